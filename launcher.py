@@ -205,6 +205,13 @@ def main():
     # 启动时间
     start_time = time.time()
     
+    # 启动耗时分析（设置环境变量 PROFILE_STARTUP=1 启用）
+    try:
+        from src.utils.startup_profiler import StartupProfiler
+        StartupProfiler().start()
+    except ImportError:
+        pass
+    
     # 创建启动画面
     splash = SplashScreen()
     
@@ -244,13 +251,8 @@ def main():
                 import src.main
                 logger.info("成功导入主模块")
         
-        # 准备启动主程序
-        splash.set_progress(90, "准备启动应用程序...")
-        time.sleep(0.3)  # 短暂停顿以显示进度
-        
         # 最终准备
         splash.set_progress(100, "准备就绪，即将启动...")
-        time.sleep(0.5)  # 短暂停顿以显示100%
         
         # 关闭启动画面（在调用main之前关闭，避免多个Tk实例）
         splash.close()
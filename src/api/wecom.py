@@ -2,6 +2,7 @@ import requests
 from typing import Dict, Any, Optional
 from ..utils.logger import get_logger
 from ..core.token_manager import TokenManager
+from ..core.api_governor import ApiBudgetGovernor
 from ..utils.error_handler import ErrorHandler
 from ..utils.performance_manager import PerformanceManager
 import time
@@ -23,6 +24,7 @@ class WeComAPI:
         self.token_manager.set_credentials(corpid, corpsecret, agent_id)
         self.error_handler = ErrorHandler()
         self.performance_manager = PerformanceManager()
+        self.governor = ApiBudgetGovernor()
         self._session = None
         
         # API 调用统计
@@ -73,6 +75,9 @@ class WeComAPI:
                 params = {}
             params["access_token"] = self.access_token
             
+            # 申请调用额度
+            self.governor.acquire(self.corpid, endpoint)
+            
             # 发送请求
             if method.upper() == "GET":
                 response = requests.get(url, params=params)
@@ -80,6 +85,7 @@ class WeComAPI:
                 response = requests.post(url, params=params, json=data)
                 
             result = response.json()
+            self.governor.report_result(self.corpid, endpoint, result.get("errcode"))
             
             # 检查响应
             if result.get("errcode") == 0:
@@ -147,7 +153,8 @@ class WeComAPI:
             "last_error": self._api_stats["last_error"],
             "last_error_time": self._api_stats["last_error_time"],
             "api_call_times": self._api_stats["api_call_times"],
-            "token_stats": self.token_manager.get_stats()
+            "token_stats": self.token_manager.get_stats(),
+            "budget": self.governor.get_metrics(self.corpid)
         }
         
     def log_api_stats(self):
@@ -167,6 +174,10 @@ class WeComAPI:
         for endpoint, count in stats["api_call_times"].items():
             logger.info(f"- {endpoint}: {count}次")
             
+        # 记录剩余额度
+        for corpid, budget in stats["budget"]["corps"].items():
+            logger.info(f"企业[{corpid}]剩余额度: {budget['remaining']}/{budget['capacity']}")
+            
         # 记录 token 统计信息
         self.token_manager.log_stats()
         
@@ -272,8 +283,10 @@ class WeComAPI:
             }
             
             logger.debug(f"发送API请求: {url} 参数: {payload}")
+            self.governor.acquire(self.corpid, "living/get_watch_stat")
             response = requests.post(url, json=payload)
             result = response.json()
+            self.governor.report_result(self.corpid, "living/get_watch_stat", result.get("errcode"))
             
             if result.get("errcode") != 0:
                 # 如果token过期，尝试刷新后重试
@@ -437,4 +450,43 @@ class WeComAPI:
         except Exception as e:
             self.error_handler.handle_error(e, "获取外部联系人信息")
             raise
-    
\ No newline at end of file
+    
+    def get_department_list(self, department_id: int = None) -> list:
+        """获取部门列表
+        
+        Args:
+            department_id: 部门ID，不传则获取全量部门
+            
+        Returns:
+            list: 部门列表，每项包含 id/name/parentid 等字段
+        """
+        try:
+            params = {}
+            if department_id is not None:
+                params["id"] = department_id
+            result = self._make_request("GET", "department/list", params=params)
+            return result.get("department", [])
+        except Exception as e:
+            self.error_handler.handle_error(e, "获取部门列表")
+            raise
+    
+    def get_department_users(self, department_id: int, fetch_child: bool = False) -> list:
+        """获取部门成员详情
+        
+        Args:
+            department_id: 部门ID
+            fetch_child: 是否递归获取子部门成员
+            
+        Returns:
+            list: 成员列表，每项包含 userid/name/department/status 等字段
+        """
+        try:
+            params = {
+                "department_id": department_id,
+                "fetch_child": 1 if fetch_child else 0
+            }
+            result = self._make_request("GET", "user/list", params=params)
+            return result.get("userlist", [])
+        except Exception as e:
+            self.error_handler.handle_error(e, "获取部门成员")
+            raise
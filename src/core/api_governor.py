@@ -0,0 +1,310 @@
+import enum
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional, Any, Callable
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ApiPriority(enum.IntEnum):
+    """企业微信接口调用优先级"""
+    INTERACTIVE = 0  # 用户界面触发的交互请求
+    BACKGROUND = 1   # 后台批量任务
+
+
+class _TokenBucket:
+    """令牌桶
+
+    企业微信按分钟统计调用频率，令牌桶容量取限额的一部分作为突发额度，
+    其余额度按速率匀速补充，保证任意一分钟内的调用数不超过限额。
+    """
+
+    def __init__(self, limit_per_minute: int, burst_ratio: float):
+        self.limit_per_minute = limit_per_minute
+        self.capacity = max(1.0, limit_per_minute * burst_ratio)
+        self.rate = max(limit_per_minute - self.capacity, 1.0) / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.acquired = 0
+        self.throttled = 0
+
+    def refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def wait_time(self, now: float, reserve: float = 0.0) -> float:
+        """获取可以消耗一个令牌（并保留 reserve 个令牌）所需等待的秒数"""
+        self.refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        needed = 1.0 + reserve - self.tokens
+        return 0.0 if needed <= 0 else needed / self.rate
+
+    def consume(self):
+        self.tokens -= 1.0
+        self.acquired += 1
+
+    def block(self, now: float, seconds: float):
+        self.tokens = 0.0
+        self.updated_at = now
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.throttled += 1
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        self.refill(now)
+        return {
+            "limit_per_minute": self.limit_per_minute,
+            "capacity": round(self.capacity, 2),
+            "remaining": round(max(self.tokens, 0.0), 2),
+            "blocked_seconds": round(max(self.blocked_until - now, 0.0), 2),
+            "acquired": self.acquired,
+            "throttled": self.throttled
+        }
+
+
+class ApiBudgetGovernor:
+    """企业微信接口调用预算控制器（进程级单例）
+
+    所有 WeComAPI 实例在发送请求前都需要从这里申请额度：
+    1. 每个企业一个总额度桶，每个企业的每个接口一个接口额度桶
+    2. 交互请求优先：有交互请求排队时后台请求让行，且后台请求不能动用保留额度
+    3. 企业微信返回频率超限错误码时，对应接口冷却到下一个统计周期
+    """
+
+    # 企业微信频率限制：每企业调用单个接口不超过1万次/分
+    DEFAULT_CORP_LIMIT = 15000       # 每企业每分钟调用总数
+    DEFAULT_ENDPOINT_LIMIT = 10000   # 每企业每接口每分钟调用数
+    ENDPOINT_LIMITS = {
+        "gettoken": 300,
+    }
+    BURST_RATIO = 0.1                # 突发额度占限额的比例
+    BACKGROUND_RESERVE = 0.2         # 为交互请求保留的额度比例
+    THROTTLE_ERRCODES = (45009, 45033)
+    THROTTLE_COOLDOWN = 60           # 触发频率限制后的冷却时间(秒)
+    MAX_WAIT_SLICE = 0.5             # 单次等待的最长时间(秒)
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(ApiBudgetGovernor, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        # 防止重复初始化
+        if hasattr(self, '_initialized') and self._initialized:
+            return
+
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._corp_buckets: Dict[str, _TokenBucket] = {}
+        self._endpoint_buckets: Dict[tuple, _TokenBucket] = {}
+        self._corp_limits: Dict[str, int] = {}
+        self._endpoint_limits: Dict[str, int] = dict(self.ENDPOINT_LIMITS)
+        self._interactive_waiting: Dict[str, int] = {}
+        self._wait_stats = {
+            ApiPriority.INTERACTIVE: {"requests": 0, "waited": 0, "wait_time": 0.0},
+            ApiPriority.BACKGROUND: {"requests": 0, "waited": 0, "wait_time": 0.0}
+        }
+
+        self._initialized = True
+
+    def set_limits(
+        self,
+        corpid: Optional[str] = None,
+        corp_limit: Optional[int] = None,
+        endpoint_limits: Optional[Dict[str, int]] = None
+    ):
+        """调整额度配置
+
+        Args:
+            corpid: 企业ID，设置该企业的总额度
+            corp_limit: 每分钟调用总数
+            endpoint_limits: {接口: 每分钟调用数}
+        """
+        with self._condition:
+            if corpid and corp_limit:
+                self._corp_limits[corpid] = corp_limit
+                self._corp_buckets.pop(corpid, None)
+            if endpoint_limits:
+                self._endpoint_limits.update(endpoint_limits)
+                for key in [key for key in self._endpoint_buckets if key[1] in endpoint_limits]:
+                    del self._endpoint_buckets[key]
+            self._condition.notify_all()
+
+    # ---------- 优先级 ----------
+
+    def current_priority(self) -> ApiPriority:
+        """获取当前线程的调用优先级
+
+        未显式设置时，主线程（界面线程）视为交互请求，其他线程视为后台请求
+        """
+        priority = getattr(self._local, "priority", None)
+        if priority is not None:
+            return priority
+        if threading.current_thread() is threading.main_thread():
+            return ApiPriority.INTERACTIVE
+        return ApiPriority.BACKGROUND
+
+    @contextmanager
+    def priority(self, priority: ApiPriority):
+        """在上下文中指定当前线程的调用优先级"""
+        previous = getattr(self._local, "priority", None)
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def bind_priority(self, func: Callable) -> Callable:
+        """绑定调用方当前的优先级，用于提交到线程池的函数"""
+        priority = self.current_priority()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.priority(priority):
+                return func(*args, **kwargs)
+        return wrapper
+
+    # ---------- 额度 ----------
+
+    def _get_buckets(self, corpid: str, endpoint: str):
+        corp_bucket = self._corp_buckets.get(corpid)
+        if corp_bucket is None:
+            corp_bucket = _TokenBucket(self._corp_limits.get(corpid, self.DEFAULT_CORP_LIMIT), self.BURST_RATIO)
+            self._corp_buckets[corpid] = corp_bucket
+
+        key = (corpid, endpoint)
+        endpoint_bucket = self._endpoint_buckets.get(key)
+        if endpoint_bucket is None:
+            endpoint_bucket = _TokenBucket(
+                self._endpoint_limits.get(endpoint, self.DEFAULT_ENDPOINT_LIMIT), self.BURST_RATIO
+            )
+            self._endpoint_buckets[key] = endpoint_bucket
+        return corp_bucket, endpoint_bucket
+
+    @staticmethod
+    def _normalize_endpoint(endpoint: str) -> str:
+        return endpoint.split("?", 1)[0].strip("/")
+
+    def acquire(
+        self,
+        corpid: str,
+        endpoint: str,
+        priority: Optional[ApiPriority] = None,
+        timeout: Optional[float] = None
+    ) -> float:
+        """申请一次接口调用额度，额度不足时阻塞等待
+
+        Args:
+            corpid: 企业ID
+            endpoint: 接口地址，例如 "living/get_watch_stat"
+            priority: 调用优先级，默认取当前线程的优先级
+            timeout: 最长等待时间(秒)，None表示一直等待
+
+        Returns:
+            float: 实际等待的秒数
+
+        Raises:
+            TimeoutError: 超过最长等待时间仍未获得额度
+        """
+        corpid = corpid or ""
+        endpoint = self._normalize_endpoint(endpoint)
+        priority = self.current_priority() if priority is None else priority
+        interactive = priority == ApiPriority.INTERACTIVE
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+
+        with self._condition:
+            if interactive:
+                self._interactive_waiting[corpid] = self._interactive_waiting.get(corpid, 0) + 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    corp_bucket, endpoint_bucket = self._get_buckets(corpid, endpoint)
+                    if interactive:
+                        wait = max(corp_bucket.wait_time(now), endpoint_bucket.wait_time(now))
+                    elif self._interactive_waiting.get(corpid, 0) > 0:
+                        wait = self.MAX_WAIT_SLICE
+                    else:
+                        wait = max(
+                            corp_bucket.wait_time(now, corp_bucket.capacity * self.BACKGROUND_RESERVE),
+                            endpoint_bucket.wait_time(now, endpoint_bucket.capacity * self.BACKGROUND_RESERVE)
+                        )
+
+                    if wait <= 0:
+                        corp_bucket.consume()
+                        endpoint_bucket.consume()
+                        break
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise TimeoutError(f"等待企业微信接口额度超时: {endpoint}")
+                        wait = min(wait, remaining)
+                    self._condition.wait(min(wait, self.MAX_WAIT_SLICE))
+            finally:
+                if interactive:
+                    self._interactive_waiting[corpid] -= 1
+                    self._condition.notify_all()
+
+            waited = time.monotonic() - start
+            stats = self._wait_stats[priority]
+            stats["requests"] += 1
+            if waited > 0.001:
+                stats["waited"] += 1
+                stats["wait_time"] += waited
+
+        if waited > 1:
+            logger.debug(f"接口[{endpoint}]等待额度 {waited:.2f} 秒 (优先级: {priority.name})")
+        return waited
+
+    def report_result(self, corpid: str, endpoint: str, errcode: Optional[int]):
+        """上报接口返回的错误码，频率超限时让对应接口冷却"""
+        if errcode not in self.THROTTLE_ERRCODES:
+            return
+        corpid = corpid or ""
+        endpoint = self._normalize_endpoint(endpoint)
+        with self._condition:
+            _, endpoint_bucket = self._get_buckets(corpid, endpoint)
+            endpoint_bucket.block(time.monotonic(), self.THROTTLE_COOLDOWN)
+        logger.warning(f"企业微信接口[{endpoint}]触发频率限制(errcode={errcode})，冷却 {self.THROTTLE_COOLDOWN} 秒")
+
+    def get_metrics(self, corpid: Optional[str] = None) -> Dict[str, Any]:
+        """获取剩余额度等统计信息
+
+        Args:
+            corpid: 企业ID，为None时返回所有企业
+
+        Returns:
+            Dict[str, Any]: {"corps": {...}, "endpoints": {...}, "priorities": {...}}
+        """
+        now = time.monotonic()
+        with self._condition:
+            corps = {
+                cid: bucket.snapshot(now) for cid, bucket in self._corp_buckets.items()
+                if corpid is None or cid == corpid
+            }
+            endpoints = {
+                f"{cid}:{endpoint}": bucket.snapshot(now)
+                for (cid, endpoint), bucket in self._endpoint_buckets.items()
+                if corpid is None or cid == corpid
+            }
+            priorities = {
+                priority.name.lower(): {
+                    "requests": stats["requests"],
+                    "waited": stats["waited"],
+                    "avg_wait_time": round(stats["wait_time"] / stats["waited"], 3) if stats["waited"] else 0.0
+                }
+                for priority, stats in self._wait_stats.items()
+            }
+        return {"corps": corps, "endpoints": endpoints, "priorities": priorities}
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Tuple, Any, Union
+from typing import Dict, FrozenSet, List, Optional, Tuple, Any, Union
 from datetime import datetime
 import hashlib
 import json
@@ -22,6 +22,12 @@ class AuthManager:
     # 添加线程本地存储用于保存当前用户
     _thread_local = threading.local()
     
+    # 用户权限集缓存: {userid 或 login_name: (userid, 权限集合)}
+    # 登录时计算，角色权限或用户角色变更时通过 invalidate_permissions() 失效；
+    # 在类上共享，页面调用失效后，其他模块各自创建的 AuthManager 也不会读到旧的权限
+    _permission_cache: Dict[Union[int, str], Tuple[int, FrozenSet[str]]] = {}
+    _permission_lock = threading.Lock()
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
         self.users = {}
@@ -233,53 +239,97 @@ class AuthManager:
         Args:
             user_or_login: 用户对象、用户ID或登录名
             permission: 权限名称
-            session: 可选的数据库会话
+            session: 可选的数据库会话，只在权限集未缓存时使用
             
         Returns:
             bool: 是否有权限
         """
         try:
-            # 确定是否需要关闭会话
-            should_close_session = False
-            
-            # 如果没有提供会话，创建一个新的
-            if not session:
-                session = self.db.Session()
-                should_close_session = True
-            
-            try:
-                # 获取用户对象
-                user = None
-                if isinstance(user_or_login, str):
-                    # 如果是字符串，假定为登录名
-                    user = session.query(User).filter_by(login_name=user_or_login).first()
-                elif isinstance(user_or_login, int):
-                    # 如果是整数，假定为用户ID
-                    user = session.query(User).get(user_or_login)
-                elif hasattr(user_or_login, 'userid'):
-                    # 如果是用户对象，确保与会话绑定
-                    user = session.merge(user_or_login)
-                
-                if not user:
-                    return False
-                    
-                # 超级管理员拥有所有权限
-                if user.role == UserRole.ROOT_ADMIN.value:
-                    return True
-                    
-                # 检查普通权限
-                permissions = self.roles.get(user.role, {}).get("permissions", [])
-                return "*" in permissions or permission in permissions
-                
-            finally:
-                # 如果我们创建了会话，确保关闭它
-                if should_close_session:
-                    session.close()
-                    
+            permissions = self.get_user_permissions(user_or_login, session)
+            return "*" in permissions or permission in permissions
         except Exception as e:
             logger.error(f"检查用户权限失败: {str(e)}")
             return False
             
+    def get_user_permissions(self, user_or_login: Union[str, int, User], session=None) -> FrozenSet[str]:
+        """获取用户的权限集合
+        
+        第一次调用（或登录时 set_current_user）按用户角色计算并缓存，之后的权限检查只是集合查找，
+        不再查询数据库。超级管理员的权限集合为 {"*"}。
+        
+        Args:
+            user_or_login: 用户对象、用户ID或登录名
+            session: 可选的数据库会话
+            
+        Returns:
+            FrozenSet[str]: 权限集合，用户不存在时为空集合
+        """
+        if hasattr(user_or_login, 'userid'):
+            key = user_or_login.userid
+        else:
+            key = user_or_login
+        if key is None:
+            return frozenset()
+            
+        cached = self._permission_cache.get(key)
+        if cached is not None:
+            return cached[1]
+            
+        # 缓存未命中，从数据库读取用户角色
+        should_close_session = False
+        if not session:
+            session = self.db.Session()
+            should_close_session = True
+        try:
+            query = session.query(User.userid, User.login_name, User.role)
+            if isinstance(key, str):
+                row = query.filter(User.login_name == key).first()
+            else:
+                row = query.filter(User.userid == key).first()
+        finally:
+            if should_close_session:
+                session.close()
+                
+        if not row:
+            return frozenset()
+        return self._cache_user_permissions(row.userid, row.login_name, row.role)
+        
+    def _cache_user_permissions(self, userid: int, login_name: Optional[str], role: str) -> FrozenSet[str]:
+        """按角色计算用户的权限集合并缓存（用户ID和登录名都可以命中）"""
+        if role == UserRole.ROOT_ADMIN.value:
+            permissions = frozenset(["*"])
+        else:
+            permissions = frozenset(self.roles.get(role, {}).get("permissions", []))
+        with self._permission_lock:
+            self._permission_cache[userid] = (userid, permissions)
+            if login_name:
+                self._permission_cache[login_name] = (userid, permissions)
+        return permissions
+        
+    def invalidate_permissions(self, user_or_login: Union[str, int, User, None] = None):
+        """使缓存的用户权限集合失效
+        
+        修改角色权限后不传参数，清除全部用户的缓存；修改或删除某个用户（如变更角色）后传入该用户。
+        
+        Args:
+            user_or_login: 用户对象、用户ID或登录名，None 表示全部用户
+        """
+        with self._permission_lock:
+            if user_or_login is None:
+                self._permission_cache.clear()
+                return
+            if hasattr(user_or_login, 'userid'):
+                userid = user_or_login.userid
+            elif isinstance(user_or_login, str):
+                cached = self._permission_cache.get(user_or_login)
+                if cached is None:
+                    return
+                userid = cached[0]
+            else:
+                userid = user_or_login
+            for key in [key for key, (cached_id, _) in self._permission_cache.items() if cached_id == userid]:
+                del self._permission_cache[key]
+            
     def load_config(self):
         """加载配置"""
         try:
@@ -323,6 +373,8 @@ class AuthManager:
                     }
                 }
                 
+            self.invalidate_permissions()
+                
             # 保存配置
             self.save_config()
                 
@@ -924,6 +976,7 @@ class AuthManager:
                 self.roles[role]["permissions"] = permissions
                 
                 # 更新配置文件中的角色权限
+                self.invalidate_permissions()
                 self.save_config()
                 
                 logger.info(f"更新角色 {role} 权限成功")
@@ -973,6 +1026,7 @@ class AuthManager:
                 self.roles[role]["permissions"] = default_permissions[role]
                 
                 # 更新配置文件中的角色权限
+                self.invalidate_permissions()
                 self.save_config()
                 
                 logger.info(f"重置角色 {role} 权限成功")
@@ -1021,6 +1075,7 @@ class AuthManager:
             self.roles[role_id]["permissions"] = current_permissions
             
             # 保存配置
+            self.invalidate_permissions()
             self.save_config()
             
             logger.info(f"设置角色 {role_id} 的权限 {permission_id} 为 {allowed} 成功")
@@ -1066,6 +1121,7 @@ class AuthManager:
             if user is None:
                 self._thread_local.user = None
                 self._thread_local.user_id = None
+                self.invalidate_permissions()
                 return True
                 
             # 如果是用户对象
@@ -1073,6 +1129,8 @@ class AuthManager:
                 # 存储完整的用户对象和ID
                 self._thread_local.user = user
                 self._thread_local.user_id = user.userid
+                # 登录时计算权限集合，之后的权限检查不再查询数据库
+                self._cache_user_permissions(user.userid, user.login_name, user.role)
                 return True
             # 如果是用户ID，尝试从数据库获取用户对象
             else:
@@ -1081,6 +1139,7 @@ class AuthManager:
                     if user_obj:
                         self._thread_local.user = user_obj
                         self._thread_local.user_id = user
+                        self._cache_user_permissions(user_obj.userid, user_obj.login_name, user_obj.role)
                         return True
                     else:
                         logger.warning(f"设置当前用户失败: 未找到ID为 {user} 的用户")
@@ -1,10 +1,14 @@
 import os
 import shutil
+import asyncio
 import zipfile
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from src.utils.logger import get_logger
 from src.core.config_manager import ConfigManager
+from src.core.online_backup import OnlineBackup
+from src.core.incremental_backup import IncrementalBackupStore
+from src.core.database import DatabaseManager
 
 logger = get_logger(__name__)
 
@@ -21,31 +25,44 @@ class BackupManager:
         
         # 创建备份目录
         os.makedirs(self.backup_dir, exist_ok=True)
+        
+        self._incremental_store = None
+    
+    @property
+    def incremental_store(self) -> IncrementalBackupStore:
+        """增量备份仓库（备份目录下的 incremental 目录）"""
+        if self._incremental_store is None:
+            self._incremental_store = IncrementalBackupStore(os.path.join(self.backup_dir, "incremental"))
+        return self._incremental_store
     
-    async def create_backup(self, source_path: str = "data.db") -> Optional[str]:
+    def _backup_target(self) -> str:
+        """生成备份文件路径"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_file = os.path.join(self.backup_dir, f"backup_{timestamp}.db")
+        return f"{backup_file}.zip" if self.compress_backups else backup_file
+    
+    async def create_backup(
+        self,
+        source_path: str = "data.db",
+        progress_callback: Optional[Callable[[str, int, int], None]] = None
+    ) -> Optional[str]:
         """创建备份
         
+        在线备份和压缩在线程池中执行，不阻塞事件循环。
+        
         Args:
             source_path: 源文件路径
+            progress_callback: 进度回调 callback(stage, done, total)，见 OnlineBackup
             
         Returns:
             Optional[str]: 备份文件路径
         """
         try:
-            # 生成备份文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = os.path.join(self.backup_dir, f"backup_{timestamp}.db")
-            
-            # 复制文件
-            shutil.copy2(source_path, backup_file)
-            
-            # 压缩备份
-            if self.compress_backups:
-                zip_file = f"{backup_file}.zip"
-                with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    zipf.write(backup_file, os.path.basename(backup_file))
-                os.remove(backup_file)
-                backup_file = zip_file
+            backup = OnlineBackup(source_path, progress_callback=progress_callback)
+            loop = asyncio.get_running_loop()
+            backup_file = await loop.run_in_executor(
+                None, backup.run, self._backup_target(), self.compress_backups
+            )
             
             # 清理旧备份
             await self.cleanup_old_backups()
@@ -57,6 +74,34 @@ class BackupManager:
             logger.error(f"创建备份失败: {str(e)}")
             return None
     
+    def start_backup(
+        self,
+        source_path: str = "data.db",
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        done_callback: Optional[Callable[[Optional[str], Optional[Exception]], None]] = None
+    ) -> OnlineBackup:
+        """在后台线程中创建备份，立即返回
+        
+        Args:
+            source_path: 源文件路径
+            progress_callback: 进度回调 callback(stage, done, total)，在备份线程中调用
+            done_callback: 完成回调 callback(备份路径, 异常)，在备份线程中调用
+            
+        Returns:
+            OnlineBackup: 备份任务，可调用 cancel() 取消
+        """
+        backup = OnlineBackup(source_path, progress_callback=progress_callback)
+        
+        def on_done(path, error):
+            if path:
+                asyncio.run(self.cleanup_old_backups())
+                logger.info(f"创建备份成功: {path}")
+            if done_callback:
+                done_callback(path, error)
+        
+        backup.start(self._backup_target(), self.compress_backups, on_done)
+        return backup
+    
     async def restore_backup(self, backup_file: str, target_path: str = "data.db") -> bool:
         """恢复备份
         
@@ -106,7 +151,8 @@ class BackupManager:
             
             # 遍历备份目录
             for filename in os.listdir(self.backup_dir):
-                if not filename.startswith("backup_"):
+                # 跳过正在写入的临时文件
+                if not filename.startswith("backup_") or filename.endswith((".part", ".snapshot")):
                     continue
                     
                 file_path = os.path.join(self.backup_dir, filename)
@@ -129,6 +175,101 @@ class BackupManager:
             logger.error(f"获取备份列表失败: {str(e)}")
             return []
     
+    async def create_incremental_backup(
+        self,
+        source_path: str = "data.db",
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        prune: bool = True
+    ) -> Optional[str]:
+        """创建增量去重备份，只保存与已有备份不同的块
+        
+        Args:
+            source_path: 源文件路径
+            progress_callback: 进度回调 callback(stage, done, total)
+            prune: 备份后是否按保留策略清理旧备份
+            
+        Returns:
+            Optional[str]: 备份名
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            manifest = await loop.run_in_executor(
+                None, lambda: self.incremental_store.create(source_path, progress_callback=progress_callback)
+            )
+            if prune:
+                await loop.run_in_executor(
+                    None, lambda: self.incremental_store.prune(keep=self.max_backups, max_days=self.backup_days)
+                )
+            return manifest["name"]
+            
+        except Exception as e:
+            logger.error(f"创建增量备份失败: {str(e)}")
+            return None
+    
+    async def restore_incremental_backup(self, name: str, target_path: str = "data.db") -> bool:
+        """从增量备份恢复，恢复前先对当前文件做一次增量备份
+        
+        恢复前的备份不执行清理，否则要恢复的备份（最旧的或已超过保留天数的）会在恢复前被删除。
+        target_path 是应用正在使用的数据库时，替换文件前释放连接池，替换后重新创建引擎，
+        避免继续读写已被替换的旧文件。
+        
+        Args:
+            name: 备份名
+            target_path: 目标文件路径
+            
+        Returns:
+            bool: 是否恢复成功
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            # 先确认要恢复的备份存在
+            await loop.run_in_executor(None, self.incremental_store.load_manifest, name)
+            
+            if os.path.exists(target_path):
+                current_backup = await self.create_incremental_backup(target_path, prune=False)
+                if not current_backup:
+                    logger.error("创建当前文件备份失败")
+                    return False
+            
+            db_manager = self._database_using(target_path)
+            if db_manager is None:
+                return await loop.run_in_executor(None, self.incremental_store.restore, name, target_path)
+            
+            active_sessions = db_manager.get_active_sessions_count()
+            if active_sessions:
+                logger.warning(f"恢复数据库时仍有 {active_sessions} 个活跃会话，这些会话的后续操作不会写入恢复后的数据库")
+            db_manager.engine.dispose()
+            try:
+                return await loop.run_in_executor(None, self.incremental_store.restore, name, target_path)
+            finally:
+                db_manager.reconnect()
+            
+        except Exception as e:
+            logger.error(f"从增量备份恢复失败: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _database_using(path: str) -> Optional[DatabaseManager]:
+        """应用的数据库管理器正在使用 path 时返回它，否则返回 None"""
+        db_manager = DatabaseManager()
+        if not db_manager.initialized or not db_manager.engine:
+            return None
+        if os.path.abspath(db_manager.db_config["path"]) != os.path.abspath(path):
+            return None
+        return db_manager
+    
+    def list_incremental_backups(self) -> List[Dict[str, Any]]:
+        """获取增量备份列表
+        
+        Returns:
+            List[Dict[str, Any]]: 备份列表
+        """
+        try:
+            return self.incremental_store.list_backups()
+        except Exception as e:
+            logger.error(f"获取增量备份列表失败: {str(e)}")
+            return []
+    
     async def cleanup_old_backups(self):
         """清理旧备份"""
         try:
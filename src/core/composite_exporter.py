@@ -0,0 +1,205 @@
+from datetime import datetime
+from itertools import groupby
+from typing import Dict, List, Any, Optional, Callable
+import time
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, PatternFill, Font
+from openpyxl.utils import get_column_letter
+from sqlalchemy import text
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CompositeExporter:
+    """综合导出（流式）
+
+    以用户为行、每场直播三列（观看时长/签到次数/邀请人）导出多场直播的综合数据：
+    - 观众数据按 userid 排序后用服务端游标逐批读取，同一用户的多场记录在内存中只停留一行
+    - 使用 write-only 工作簿逐行写出，单元格样式使用共享的命名样式
+    内存占用与导出人数无关，主要开销在磁盘写入。
+    """
+
+    SHEET_TITLE = "综合直播数据"
+    LIVE_COLORS = ['FFCCCC', 'CCFFCC', 'CCCCFF', 'FFFFCC', 'FFCCFF', 'CCFFFF']
+    FETCH_SIZE = 2000          # 游标每批读取的记录数
+    PROGRESS_INTERVAL = 1000   # 每写出多少行回调一次进度
+    EXPORTED_MARK = "已导出"
+
+    def __init__(self, db_manager):
+        """初始化综合导出器
+
+        Args:
+            db_manager: 数据库管理器
+        """
+        self.db_manager = db_manager
+
+    @staticmethod
+    def format_seconds(seconds: Optional[int]) -> str:
+        """将秒转换为时分秒格式"""
+        if not seconds:
+            return "未观看"
+        hours, remainder = divmod(int(seconds), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+    def _register_styles(self, wb: Workbook, live_count: int) -> List[str]:
+        """注册每场直播的共享命名样式，返回按直播顺序排列的样式名"""
+        style_names = []
+        registered = set(wb.named_styles)
+        for i in range(1, live_count + 1):
+            color = self.LIVE_COLORS[i % len(self.LIVE_COLORS)]
+            name = f"composite_live_{color}"
+            if name not in registered:
+                style = NamedStyle(name=name)
+                style.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+                wb.add_named_style(style)
+                registered.add(name)
+            style_names.append(name)
+
+        if "composite_header" not in registered:
+            header = NamedStyle(name="composite_header")
+            header.font = Font(bold=True)
+            wb.add_named_style(header)
+        return style_names
+
+    @staticmethod
+    def _styled(ws, value: Any, style_name: str) -> WriteOnlyCell:
+        """创建带命名样式的单元格（样式已由 _register_styles 注册到工作簿）"""
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style_name
+        return cell
+
+    def export(
+        self,
+        file_path: str,
+        live_ids: List[int],
+        live_titles: Dict[int, str],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        cancel_check: Optional[Callable[[], bool]] = None,
+        mark_exported: bool = True
+    ) -> Dict[str, Any]:
+        """导出综合数据
+
+        Args:
+            file_path: 导出文件路径
+            live_ids: 直播记录ID列表，决定列顺序
+            live_titles: {直播记录ID: 直播主题}
+            progress_callback: 进度回调 (已写出行数, 总行数)
+            cancel_check: 返回True时中止导出
+            mark_exported: 导出成功后是否为观众记录追加"已导出"状态
+
+        Returns:
+            Dict[str, Any]: {"rows", "updated", "cancelled", "duration"}
+        """
+        start_time = time.time()
+        result = {"rows": 0, "updated": 0, "cancelled": False, "duration": 0}
+        if not live_ids:
+            return result
+
+        params = {f"live_{i}": live_id for i, live_id in enumerate(live_ids)}
+        placeholders = ", ".join(f":{key}" for key in params)
+        column_index = {live_id: i for i, live_id in enumerate(live_ids)}
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(self.SHEET_TITLE)
+        style_names = self._register_styles(wb, len(live_ids))
+
+        # 表头及列宽（write-only 模式需在写入数据前设置列宽）
+        headers = ["用户ID", "用户名称"]
+        for i, live_id in enumerate(live_ids, 1):
+            title = live_titles.get(live_id, str(live_id))
+            headers.extend([f"观看时长{i} ({title})", f"签到次数{i} ({title})", f"邀请人{i} ({title})"])
+        headers.extend(["红包合计($)", "是否合格"])
+
+        for col, header in enumerate(headers, 1):
+            width = 36 if col == 1 else len(header) * 2 + 2
+            ws.column_dimensions[get_column_letter(col)].width = min(width, 50)
+
+        header_row = [self._styled(ws, header, "composite_header") for header in headers[:2]]
+        for i in range(len(live_ids)):
+            header_row.extend(self._styled(ws, header, style_names[i]) for header in headers[2 + i * 3:5 + i * 3])
+        header_row.extend(self._styled(ws, header, "composite_header") for header in headers[-2:])
+        ws.append(header_row)
+
+        with self.db_manager.get_session() as session:
+            total = session.execute(
+                text(f"SELECT COUNT(DISTINCT userid) FROM live_viewers WHERE living_id IN ({placeholders})"),
+                params
+            ).scalar() or 0
+
+            rows = session.execute(
+                text(f"""
+                    SELECT userid, name, living_id, watch_time, sign_count, invitor_name,
+                           reward_amount, is_reward_eligible
+                    FROM live_viewers
+                    WHERE living_id IN ({placeholders})
+                    ORDER BY userid
+                """).execution_options(stream_results=True, yield_per=self.FETCH_SIZE),
+                params
+            )
+
+            for userid, records in groupby(rows, key=lambda row: row.userid):
+                if cancel_check and result["rows"] % self.PROGRESS_INTERVAL == 0 and cancel_check():
+                    result["cancelled"] = True
+                    break
+
+                per_live = [None] * len(live_ids)
+                name = None
+                total_reward = 0.0
+                is_eligible = False
+                for record in records:
+                    name = name or record.name
+                    total_reward += record.reward_amount or 0
+                    is_eligible = is_eligible or bool(record.is_reward_eligible)
+                    per_live[column_index[record.living_id]] = record
+
+                row = [userid, name]
+                for i, record in enumerate(per_live):
+                    style_name = style_names[i]
+                    row.append(self._styled(ws, self.format_seconds(record.watch_time if record else None), style_name))
+                    row.append(self._styled(ws, (record.sign_count or 0) if record else 0, style_name))
+                    row.append(self._styled(ws, (record.invitor_name or "无") if record else "无", style_name))
+                row.extend([total_reward, "是" if is_eligible else "否"])
+                ws.append(row)
+
+                result["rows"] += 1
+                if progress_callback and result["rows"] % self.PROGRESS_INTERVAL == 0:
+                    progress_callback(result["rows"], total)
+
+        if result["cancelled"]:
+            logger.info(f"综合导出已取消，已处理 {result['rows']} 行")
+            return result
+
+        wb.save(file_path)
+        if progress_callback:
+            progress_callback(result["rows"], total)
+
+        if mark_exported:
+            result["updated"] = self.mark_exported(live_ids)
+
+        result["duration"] = round(time.time() - start_time, 2)
+        logger.info(f"综合导出完成: {result['rows']} 行, 更新 {result['updated']} 条观众状态, 耗时 {result['duration']} 秒")
+        return result
+
+    def mark_exported(self, live_ids: List[int]) -> int:
+        """为选中直播的观众记录追加"已导出"状态
+
+        Returns:
+            int: 更新的记录数
+        """
+        params = {f"live_{i}": live_id for i, live_id in enumerate(live_ids)}
+        params.update({"mark": self.EXPORTED_MARK, "now": datetime.now()})
+        placeholders = ", ".join(f":live_{i}" for i in range(len(live_ids)))
+        with self.db_manager.get_session() as session:
+            return session.execute(text(f"""
+                UPDATE live_viewers
+                SET reward_status = CASE
+                        WHEN reward_status IS NULL OR reward_status = '' THEN :mark
+                        WHEN instr(reward_status, :mark) = 0 THEN reward_status || '，' || :mark
+                        ELSE reward_status
+                    END,
+                    updated_at = :now
+                WHERE living_id IN ({placeholders})
+            """), params).rowcount
@@ -31,6 +31,7 @@ def get_db_connection_config() -> Dict[str, Any]:
         "pool_size": 5,
         "timeout": 30,
         "echo": False,
+        "profile_sql": False,  # 是否启用SQL语句分析(按界面操作汇总、检测N+1)
         "pool_recycle": 3600,
         "pool_pre_ping": True
     }
@@ -106,26 +107,9 @@ class DatabaseManager:
                 logger.info(f"创建备份目录: {backup_path}")
                 os.makedirs(backup_path, exist_ok=True)
             
-            # 创建数据库引擎
+            # 创建数据库引擎和会话工厂
             logger.info("创建数据库引擎...")
-            self.engine = create_engine(
-                f"sqlite:///{db_path}",
-                poolclass=QueuePool,
-                pool_size=self.db_config.get("pool_size", 5),
-                pool_recycle=self.db_config.get("pool_recycle", 3600),
-                pool_timeout=self.db_config.get("timeout", 30),
-                echo=self.db_config.get("echo", False)
-            )
-            
-            # 创建会话工厂 - 兼容SQLAlchemy 2.0的方式
-            logger.info("创建会话工厂...")
-            self.Session = sessionmaker(
-                autocommit=False,
-                autoflush=True,
-                expire_on_commit=True,
-                class_=Session,
-                bind=self.engine
-            )
+            self._create_engine(db_path)
             
             # 标记为已初始化
             self.initialized = True
@@ -136,6 +120,41 @@ class DatabaseManager:
             logger.error(f"初始化数据库失败: {str(e)}")
             return False
             
+    def _create_engine(self, db_path: str):
+        """按当前配置创建数据库引擎和会话工厂"""
+        self.engine = create_engine(
+            f"sqlite:///{db_path}",
+            poolclass=QueuePool,
+            pool_size=self.db_config.get("pool_size", 5),
+            pool_recycle=self.db_config.get("pool_recycle", 3600),
+            pool_timeout=self.db_config.get("timeout", 30),
+            echo=self.db_config.get("echo", False)
+        )
+        
+        # SQL语句分析
+        if self.db_config.get("profile_sql"):
+            from src.utils.db_monitor import setup_db_monitoring
+            setup_db_monitoring(self)
+        
+        # 创建会话工厂 - 兼容SQLAlchemy 2.0的方式
+        self.Session = sessionmaker(
+            autocommit=False,
+            autoflush=True,
+            expire_on_commit=True,
+            class_=Session,
+            bind=self.engine
+        )
+    
+    def reconnect(self):
+        """释放连接池并重新创建引擎
+        
+        数据库文件被整体替换（如从备份恢复）后调用，之后的会话连接到新文件。
+        """
+        if self.engine:
+            self.engine.dispose()
+        self._create_engine(self.db_config["path"])
+        logger.info(f"数据库已重新连接: {self.db_config['path']}")
+    
     def create_tables(self) -> bool:
         """创建数据库表
         
@@ -160,6 +179,9 @@ class DatabaseManager:
             from src.models.operation_log import OperationLog
             from src.models.live_sign_record import LiveSignRecord
             from src.models.live_reward_record import LiveRewardRecord
+            from src.models.sync_watermark import SyncWatermark
+            from src.models.external_contact import ExternalContact
+            from src.models.viewer_facet import ViewerFacet
             
             # 动态获取所有模型表
             # 使用Base.metadata.tables获取所有注册的表
@@ -245,6 +267,11 @@ class DatabaseManager:
                 # 仅创建不存在的表
                 logger.info("正在检查并创建缺失的数据库表...")
                 Base.metadata.create_all(bind=self.engine)
+                
+                # 已存在的表补建新增的索引
+                for table in Base.metadata.sorted_tables:
+                    for index in table.indexes:
+                        index.create(bind=self.engine, checkfirst=True)
             
             # 创建默认的root-admin用户
             session = self.Session()
@@ -354,13 +381,20 @@ class DatabaseManager:
             logger.error(f"合并用户对象失败: {str(e)}")
             return None
     
-    def backup(self) -> str:
+    def backup(self, progress_callback=None) -> str:
         """数据库备份
         
+        使用SQLite在线备份分步复制，不需要关闭连接，备份期间可以继续读写。
+        
+        Args:
+            progress_callback: 进度回调 callback(stage, done, total)，见 OnlineBackup
+            
         Returns:
             str: 备份文件路径
         """
         try:
+            from src.core.online_backup import OnlineBackup
+            
             # 生成备份文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_file = os.path.join(
@@ -368,11 +402,7 @@ class DatabaseManager:
                 f"backup_{timestamp}.db"
             )
             
-            # 关闭所有连接
-            self.engine.dispose()
-            
-            # 复制数据库文件
-            shutil.copy2(self.db_config['path'], backup_file)
+            OnlineBackup(self.db_config['path'], progress_callback=progress_callback).backup_to(backup_file)
             
             logger.info(f"数据库备份成功: {backup_file}")
             return backup_file
@@ -485,6 +515,9 @@ class DatabaseManager:
                 echo=self.db_config['echo']
             )
             self.Session = sessionmaker(bind=self.engine)
+            if self.db_config.get("profile_sql"):
+                from src.utils.db_monitor import setup_db_monitoring
+                setup_db_monitoring(self)
             
             logger.info(f"数据库路径更新成功: {new_path}")
             return True
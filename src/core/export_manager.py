@@ -1,4 +1,5 @@
-import pandas as pd
+from __future__ import annotations
+
 import asyncio
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
@@ -7,10 +8,15 @@ from src.utils.logger import get_logger
 from src.models.live_booking import LiveBooking
 from src.models.live_viewer import LiveViewer
 from src.core.viewer_stats_manager import ViewerStatsManager
+from src.core.sign_pivot import SignPivotQuery
 from src.utils.cache import Cache
-import matplotlib.pyplot as plt
+from src.utils.lazy_import import lazy_import
 import os
-from PIL import Image
+
+# pandas/matplotlib/PIL 只在导出时使用，延迟导入以缩短启动时间
+pd = lazy_import("pandas")
+plt = lazy_import("matplotlib.pyplot")
+Image = lazy_import("PIL.Image")
 
 logger = get_logger(__name__)
 cache = Cache()
@@ -375,36 +381,68 @@ class ExportManager:
     def export_sign_data(self, living_id: int, selected_fields: List[str]) -> pd.DataFrame:
         """导出签到数据
         
+        每个已签到观众一行，签到轮次由数据库透视为"第N次签到时间/类型/是否有效"列。
+        
         Args:
             living_id: 直播ID
-            selected_fields: 选中的字段列表
+            selected_fields: 选中的字段列表，"*"表示全部字段；包含"签到明细"时输出签到轮次列
             
         Returns:
             pd.DataFrame: 导出的数据
         """
         try:
+            export_all = "*" in selected_fields
+            sign_fields = ("time", "type", "valid")
             with self.db_manager.get_session() as session:
-                # 获取签到记录
-                sign_records = session.query(LiveViewer).filter_by(
-                    living_id=living_id, is_signed=True
-                ).all()
+                max_sequence = SignPivotQuery.max_sequence(session, living_id)
+                pivot = SignPivotQuery.subquery(living_id, max_sequence, sign_fields)
+                
+                # 获取签到观众及其签到轮次
+                rows = session.query(
+                    LiveViewer.living_id,
+                    LiveViewer.userid,
+                    LiveViewer.name,
+                    LiveViewer.department,
+                    LiveViewer.sign_time,
+                    LiveViewer.sign_count,
+                    LiveViewer.reward_amount,
+                    LiveViewer.reward_status,
+                    LiveViewer.created_at,
+                    LiveViewer.updated_at,
+                    pivot.c.original_member_name,
+                    *SignPivotQuery.pivot_columns(pivot, max_sequence, sign_fields)
+                ).outerjoin(
+                    pivot, pivot.c.viewer_id == LiveViewer.id
+                ).filter(
+                    LiveViewer.living_id == living_id,
+                    LiveViewer.is_signed == True
+                ).order_by(LiveViewer.sign_time).all()
                 
                 # 构建数据
                 data = []
-                for record in sign_records:
+                for record in rows:
                     record_data = {
                         "直播ID": record.living_id,
                         "用户ID": record.userid,
                         "用户名": record.name,
+                        "原始名称": record.original_member_name,
                         "部门": record.department,
                         "签到时间": record.sign_time,
-                        "签到类型": record.sign_type,
+                        "签到次数": record.sign_count,
                         "奖励金额": record.reward_amount,
                         "奖励状态": record.reward_status,
                         "创建时间": record.created_at,
                         "更新时间": record.updated_at
                     }
-                    data.append({k: v for k, v in record_data.items() if k in selected_fields})
+                    row_data = {k: v for k, v in record_data.items() if export_all or k in selected_fields}
+                    
+                    if export_all or "签到明细" in selected_fields:
+                        for seq in range(1, max_sequence + 1):
+                            is_valid = getattr(record, f"valid_{seq}")
+                            row_data[f"第{seq}次签到时间"] = getattr(record, f"time_{seq}")
+                            row_data[f"第{seq}次签到类型"] = getattr(record, f"type_{seq}")
+                            row_data[f"第{seq}次签到是否有效"] = None if is_valid is None else ("是" if is_valid else "否")
+                    data.append(row_data)
                     
                 return pd.DataFrame(data)
                 
@@ -0,0 +1,255 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.utils.logger import get_logger
+from src.core.api_governor import ApiBudgetGovernor
+from src.utils.db_monitor import SQLProfiler
+from src.models.external_contact import ExternalContact
+
+logger = get_logger(__name__)
+
+
+class ExternalContactResolver:
+    """外部联系人批量解析器
+
+    在观看数据收集完成后统一解析外部观众和外部邀请人的名称：
+    1. 优先使用本地 external_contacts 缓存（有效期内不再请求企业微信）
+    2. 缓存缺失的ID按并发上限批量请求企业微信并写回缓存
+    3. 用一条集合更新语句回填 live_viewers.invitor_name
+    """
+
+    DEFAULT_TTL = 7 * 24 * 3600   # 缓存有效期（秒）
+    DEFAULT_WORKERS = 5           # 并发请求数
+    QUERY_CHUNK_SIZE = 500        # IN 查询分块大小，避免超过 SQLite 参数上限
+
+    # 企业微信外部联系人ID前缀
+    EXTERNAL_ID_PREFIXES = ("wm", "wo")
+
+    def __init__(self, db_manager, wecom_api=None, ttl: int = None, max_workers: int = None):
+        """初始化外部联系人解析器
+
+        Args:
+            db_manager: 数据库管理器
+            wecom_api: 企业微信API实例，为None时只使用本地缓存
+            ttl: 缓存有效期（秒）
+            max_workers: 最大并发请求数
+        """
+        self.db_manager = db_manager
+        self.wecom_api = wecom_api
+        self.ttl = ttl or self.DEFAULT_TTL
+        self.max_workers = max_workers or self.DEFAULT_WORKERS
+        self._stats = {
+            "cache_hits": 0,
+            "api_calls": 0,
+            "api_errors": 0
+        }
+
+    @classmethod
+    def is_external_userid(cls, userid: Optional[str]) -> bool:
+        """判断是否为外部联系人ID"""
+        return bool(userid) and userid.startswith(cls.EXTERNAL_ID_PREFIXES)
+
+    def resolve(self, external_userids: Iterable[str]) -> Dict[str, str]:
+        """批量解析外部联系人名称
+
+        Args:
+            external_userids: 外部联系人ID集合
+
+        Returns:
+            Dict[str, str]: {external_userid: name}，无法解析的ID不包含在结果中
+        """
+        ids = {userid for userid in external_userids if userid}
+        if not ids:
+            return {}
+
+        cached = self._load_cached(ids)
+        self._stats["cache_hits"] += len(cached)
+        names = {userid: name for userid, name in cached.items() if name}
+
+        missing = ids - set(cached)
+        if missing and self.wecom_api:
+            fetched = self._fetch_contacts(missing)
+            self._save_contacts(fetched)
+            names.update({userid: info["name"] for userid, info in fetched.items() if info.get("name")})
+
+        return names
+
+    def _load_cached(self, ids: set) -> Dict[str, Optional[str]]:
+        """加载有效期内的缓存
+
+        Returns:
+            Dict[str, Optional[str]]: {external_userid: name}，name为None表示企业微信未返回该联系人
+        """
+        expire_before = datetime.now() - timedelta(seconds=self.ttl)
+        cached = {}
+        id_list = list(ids)
+        with self.db_manager.get_session() as session:
+            for i in range(0, len(id_list), self.QUERY_CHUNK_SIZE):
+                chunk = id_list[i:i + self.QUERY_CHUNK_SIZE]
+                rows = session.query(ExternalContact.external_userid, ExternalContact.name).filter(
+                    ExternalContact.external_userid.in_(chunk),
+                    ExternalContact.fetched_at >= expire_before
+                ).all()
+                for row in rows:
+                    cached[row.external_userid] = row.name
+        return cached
+
+    def _fetch_one(self, external_userid: str) -> Dict[str, Any]:
+        """从企业微信获取单个外部联系人"""
+        response = self.wecom_api.get_external_contact(external_userid)
+        contact = response.get("external_contact", {}) if response else {}
+        return {
+            "name": contact.get("name"),
+            "corp_name": contact.get("corp_name"),
+            "type": contact.get("type")
+        }
+
+    def _fetch_contacts(self, ids: set) -> Dict[str, Dict[str, Any]]:
+        """并发请求企业微信获取外部联系人
+
+        请求失败的ID不包含在结果中（不写入缓存），下次解析时重新请求；
+        企业微信正常返回但没有名称的联系人照常缓存，有效期内不再重复请求
+        """
+        start_time = time.time()
+        results = {}
+        # 工作线程沿用调用方的接口优先级和SQL分析的操作范围
+        fetch_one = SQLProfiler().bind_action(ApiBudgetGovernor().bind_priority(self._fetch_one))
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="external-contact") as executor:
+            futures = {executor.submit(fetch_one, userid): userid for userid in ids}
+            for future in as_completed(futures):
+                userid = futures[future]
+                self._stats["api_calls"] += 1
+                try:
+                    results[userid] = future.result()
+                except Exception as e:
+                    self._stats["api_errors"] += 1
+                    logger.warning(f"获取外部联系人[{userid}]失败，下次解析时重试: {str(e)}")
+
+        logger.info(f"从企业微信获取 {len(ids)} 个外部联系人，耗时 {time.time() - start_time:.2f} 秒")
+        return results
+
+    def _save_contacts(self, contacts: Dict[str, Dict[str, Any]]):
+        """批量写入外部联系人缓存"""
+        if not contacts:
+            return
+
+        now = datetime.now()
+        rows = [{
+            "external_userid": userid,
+            "name": info.get("name"),
+            "corp_name": info.get("corp_name"),
+            "type": info.get("type"),
+            "fetched_at": now,
+            "created_at": now,
+            "updated_at": now
+        } for userid, info in contacts.items()]
+
+        stmt = sqlite_insert(ExternalContact.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["external_userid"],
+            set_={
+                "name": stmt.excluded.name,
+                "corp_name": stmt.excluded.corp_name,
+                "type": stmt.excluded.type,
+                "fetched_at": stmt.excluded.fetched_at,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        with self.db_manager.get_session() as session:
+            session.execute(stmt, rows)
+
+    def backfill_invitor_names(self, living_id: int) -> Dict[str, int]:
+        """回填直播观众的邀请人名称
+
+        Args:
+            living_id: 直播记录ID(livings.id)
+
+        Returns:
+            Dict[str, int]: 各步骤更新的记录数
+        """
+        result = {"from_viewers": 0, "from_contacts": 0, "external_names": 0, "unresolved": 0}
+        unresolved_clause = (
+            "invitor_userid IS NOT NULL AND invitor_userid != '' "
+            "AND (invitor_name IS NULL OR invitor_name = '' OR invitor_name = invitor_userid)"
+        )
+
+        with self.db_manager.get_session() as session:
+            # 1. 邀请人本身也是本场观众时，直接用观众名称回填
+            result["from_viewers"] = session.execute(text(f"""
+                UPDATE live_viewers
+                SET invitor_name = (
+                    SELECT v2.name FROM live_viewers v2
+                    WHERE v2.living_id = live_viewers.living_id
+                      AND v2.userid = live_viewers.invitor_userid
+                      AND v2.name IS NOT NULL AND v2.name != ''
+                    LIMIT 1
+                )
+                WHERE living_id = :living_id AND {unresolved_clause}
+                  AND EXISTS (
+                    SELECT 1 FROM live_viewers v2
+                    WHERE v2.living_id = live_viewers.living_id
+                      AND v2.userid = live_viewers.invitor_userid
+                      AND v2.name IS NOT NULL AND v2.name != ''
+                  )
+            """), {"living_id": living_id}).rowcount
+
+            # 2. 收集仍未解析的外部邀请人和缺少名称的外部观众
+            pending = session.execute(text(f"""
+                SELECT DISTINCT invitor_userid FROM live_viewers
+                WHERE living_id = :living_id AND {unresolved_clause}
+                UNION
+                SELECT DISTINCT userid FROM live_viewers
+                WHERE living_id = :living_id AND user_source = 'EXTERNAL'
+                  AND (name IS NULL OR name = '')
+            """), {"living_id": living_id}).scalars().all()
+
+        pending = [userid for userid in pending if self.is_external_userid(userid)]
+        if not pending:
+            return result
+
+        # 3. 批量解析（缓存优先，缺失部分并发请求企业微信）
+        names = self.resolve(pending)
+        result["unresolved"] = len(set(pending) - set(names))
+
+        # 4. 集合更新回填名称
+        with self.db_manager.get_session() as session:
+            result["from_contacts"] = session.execute(text(f"""
+                UPDATE live_viewers
+                SET invitor_name = (
+                    SELECT ec.name FROM external_contacts ec
+                    WHERE ec.external_userid = live_viewers.invitor_userid
+                )
+                WHERE living_id = :living_id AND {unresolved_clause}
+                  AND invitor_userid IN (
+                    SELECT external_userid FROM external_contacts
+                    WHERE name IS NOT NULL AND name != ''
+                  )
+            """), {"living_id": living_id}).rowcount
+
+            result["external_names"] = session.execute(text("""
+                UPDATE live_viewers
+                SET name = (
+                    SELECT ec.name FROM external_contacts ec
+                    WHERE ec.external_userid = live_viewers.userid
+                )
+                WHERE living_id = :living_id AND user_source = 'EXTERNAL'
+                  AND (name IS NULL OR name = '')
+                  AND userid IN (
+                    SELECT external_userid FROM external_contacts
+                    WHERE name IS NOT NULL AND name != ''
+                  )
+            """), {"living_id": living_id}).rowcount
+
+        logger.info(
+            f"直播[{living_id}]邀请人名称回填完成: 观众匹配 {result['from_viewers']} 条, "
+            f"外部联系人 {result['from_contacts']} 条, 外部观众名称 {result['external_names']} 条, "
+            f"未解析 {result['unresolved']} 个"
+        )
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取统计信息"""
+        return dict(self._stats)
@@ -0,0 +1,268 @@
+import os
+import json
+import zlib
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Callable
+from src.utils.logger import get_logger
+from src.core.online_backup import OnlineBackup
+
+logger = get_logger(__name__)
+
+
+class IncrementalBackupStore:
+    """增量去重备份仓库
+
+    每次备份先用 OnlineBackup 取得一致快照，再按固定大小切块（块大小是SQLite页大小的
+    整数倍），以块内容的SHA-256为键保存压缩后的块；内容未变化的块只保存一份。
+    每次备份生成一个清单，按顺序记录块哈希，恢复时依清单重新拼装数据库。
+
+    目录结构:
+        <store_dir>/chunks/<哈希前两位>/<哈希>   zlib压缩的块
+        <store_dir>/manifests/<备份名>.json     备份清单
+    """
+
+    CHUNK_SIZE = 256 * 1024   # 块大小(字节)，默认页大小4KB时为64页
+    COMPRESS_LEVEL = 6
+
+    # 同一进程内备份与清理互斥，避免清理删除正在写入的清单引用的块
+    _lock = threading.Lock()
+
+    def __init__(self, store_dir: str, chunk_size: Optional[int] = None):
+        self.store_dir = store_dir
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.chunk_dir = os.path.join(store_dir, "chunks")
+        self.manifest_dir = os.path.join(store_dir, "manifests")
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+    # ---------- 块 ----------
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def _write_chunk(self, digest: str, data: bytes) -> bool:
+        """保存块，已存在时跳过
+
+        Returns:
+            bool: 是否写入了新块
+        """
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        part_path = f"{path}.part"
+        with open(part_path, "wb") as f:
+            f.write(zlib.compress(data, self.COMPRESS_LEVEL))
+        os.replace(part_path, path)
+        return True
+
+    def _read_chunk(self, digest: str) -> bytes:
+        with open(self._chunk_path(digest), "rb") as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"备份块校验失败: {digest}")
+        return data
+
+    # ---------- 清单 ----------
+
+    def _manifest_path(self, name: str) -> str:
+        return os.path.join(self.manifest_dir, f"{name}.json")
+
+    def load_manifest(self, name: str) -> Dict[str, Any]:
+        """读取备份清单"""
+        with open(self._manifest_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """获取备份列表（不含块列表），按创建时间倒序"""
+        backups = []
+        for filename in os.listdir(self.manifest_dir):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                manifest = self.load_manifest(filename[:-5])
+            except Exception as e:
+                logger.error(f"读取备份清单失败 {filename}: {str(e)}")
+                continue
+            backups.append({
+                "name": manifest["name"],
+                "created_at": datetime.fromisoformat(manifest["created_at"]),
+                "size": manifest["size"],
+                "chunk_count": len(manifest["chunks"]),
+                "new_chunks": manifest.get("new_chunks", 0),
+                "new_bytes": manifest.get("new_bytes", 0)
+            })
+        backups.sort(key=lambda x: x["created_at"], reverse=True)
+        return backups
+
+    # ---------- 备份 ----------
+
+    def create(
+        self,
+        source_path: str,
+        name: Optional[str] = None,
+        progress_callback: Optional[Callable[[str, int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """创建增量备份
+
+        Args:
+            source_path: 数据库文件路径
+            name: 备份名，默认 backup_<时间戳(微秒)>，同名备份已存在时追加序号
+            progress_callback: 进度回调 callback(stage, done, total)，
+                stage 为 "backup"（快照，页数）或 "chunk"（切块，字节数）
+
+        Returns:
+            Dict[str, Any]: 备份清单（含 new_chunks/new_bytes 统计）
+        """
+        created_at = datetime.now()
+        name = name or f"backup_{created_at.strftime('%Y%m%d_%H%M%S_%f')}"
+
+        with self._lock:
+            # 同一时刻创建的备份不能覆盖已有清单
+            base_name, suffix = name, 1
+            while os.path.exists(self._manifest_path(name)):
+                name = f"{base_name}_{suffix}"
+                suffix += 1
+            snapshot_path = os.path.join(self.store_dir, f"{name}.snapshot")
+            try:
+                OnlineBackup(source_path, progress_callback=progress_callback).backup_to(snapshot_path)
+
+                size = os.path.getsize(snapshot_path)
+                chunks = []
+                new_chunks = new_bytes = 0
+                db_hash = hashlib.sha256()
+                with open(snapshot_path, "rb") as f:
+                    while True:
+                        data = f.read(self.chunk_size)
+                        if not data:
+                            break
+                        db_hash.update(data)
+                        digest = hashlib.sha256(data).hexdigest()
+                        if self._write_chunk(digest, data):
+                            new_chunks += 1
+                            new_bytes += len(data)
+                        chunks.append(digest)
+                        if progress_callback:
+                            progress_callback("chunk", f.tell(), size)
+
+                manifest = {
+                    "name": name,
+                    "created_at": created_at.isoformat(timespec="microseconds"),
+                    "source": os.path.abspath(source_path),
+                    "size": size,
+                    "chunk_size": self.chunk_size,
+                    "sha256": db_hash.hexdigest(),
+                    "new_chunks": new_chunks,
+                    "new_bytes": new_bytes,
+                    "chunks": chunks
+                }
+                # 清单最后写入，中途失败时不会出现引用缺失块的备份
+                part_path = f"{self._manifest_path(name)}.part"
+                with open(part_path, "w", encoding="utf-8") as f:
+                    json.dump(manifest, f)
+                os.replace(part_path, self._manifest_path(name))
+            finally:
+                if os.path.exists(snapshot_path):
+                    os.remove(snapshot_path)
+
+        logger.info(
+            f"增量备份完成: {name}, 共 {len(chunks)} 块, 新增 {new_chunks} 块 "
+            f"({new_bytes / 1024 / 1024:.2f}MB / {size / 1024 / 1024:.2f}MB)"
+        )
+        return manifest
+
+    # ---------- 恢复 ----------
+
+    def restore(self, name: str, target_path: str) -> bool:
+        """按清单拼装数据库并校验后替换 target_path
+
+        拼装结果先写入临时文件，整体哈希和 PRAGMA integrity_check 都通过后才替换目标文件。
+
+        Args:
+            name: 备份名
+            target_path: 目标数据库路径（调用方需先释放该数据库的连接，见 BackupManager.restore_incremental_backup）
+
+        Returns:
+            bool: 是否恢复成功
+        """
+        part_path = f"{target_path}.restore"
+        try:
+            manifest = self.load_manifest(name)
+            db_hash = hashlib.sha256()
+            with open(part_path, "wb") as f:
+                for digest in manifest["chunks"]:
+                    data = self._read_chunk(digest)
+                    db_hash.update(data)
+                    f.write(data)
+            if db_hash.hexdigest() != manifest["sha256"]:
+                raise ValueError("恢复后的数据库与备份时的哈希不一致")
+
+            conn = sqlite3.connect(part_path)
+            try:
+                result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+            finally:
+                conn.close()
+            if result != "ok":
+                raise ValueError(f"数据库完整性检查失败: {result}")
+
+            # 删除旧库遗留的日志文件，避免被应用到恢复后的数据库
+            for suffix in ("-journal", "-wal", "-shm"):
+                if os.path.exists(target_path + suffix):
+                    os.remove(target_path + suffix)
+            os.replace(part_path, target_path)
+            logger.info(f"从增量备份恢复成功: {name} -> {target_path}")
+            return True
+
+        except Exception as e:
+            logger.error(f"从增量备份恢复失败 {name}: {str(e)}")
+            return False
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    # ---------- 保留策略 ----------
+
+    def prune(self, keep: Optional[int] = None, max_days: Optional[int] = None) -> Dict[str, int]:
+        """按保留策略删除旧备份，并删除不再被任何清单引用的块
+
+        Args:
+            keep: 最多保留的备份数
+            max_days: 备份保留天数
+
+        Returns:
+            Dict[str, int]: {"manifests": 删除的清单数, "chunks": 删除的块数, "bytes": 释放的字节数}
+        """
+        removed = {"manifests": 0, "chunks": 0, "bytes": 0}
+        with self._lock:
+            backups = self.list_backups()
+            expire_time = datetime.now() - timedelta(days=max_days) if max_days else None
+            for index, backup in enumerate(backups):
+                if (keep is not None and index >= keep) or (expire_time and backup["created_at"] < expire_time):
+                    os.remove(self._manifest_path(backup["name"]))
+                    removed["manifests"] += 1
+                    logger.info(f"删除过期增量备份: {backup['name']}")
+
+            referenced = set()
+            for filename in os.listdir(self.manifest_dir):
+                if filename.endswith(".json"):
+                    referenced.update(self.load_manifest(filename[:-5])["chunks"])
+
+            for prefix in os.listdir(self.chunk_dir):
+                prefix_dir = os.path.join(self.chunk_dir, prefix)
+                for digest in os.listdir(prefix_dir):
+                    if digest in referenced:
+                        continue
+                    path = os.path.join(prefix_dir, digest)
+                    removed["bytes"] += os.path.getsize(path)
+                    os.remove(path)
+                    removed["chunks"] += 1
+
+        if removed["manifests"] or removed["chunks"]:
+            logger.info(
+                f"增量备份清理完成: 删除 {removed['manifests']} 个备份, {removed['chunks']} 个块, "
+                f"释放 {removed['bytes'] / 1024 / 1024:.2f}MB"
+            )
+        return removed
@@ -0,0 +1,324 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from sqlalchemy import insert, update, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.utils.logger import get_logger
+from src.core.api_governor import ApiBudgetGovernor
+from src.utils.db_monitor import SQLProfiler
+from src.models.living import Living, LivingStatus, LivingType
+from src.models.live_booking import LiveBooking
+from src.models.sync_watermark import SyncWatermark
+
+logger = get_logger(__name__)
+
+
+class LiveSyncPlanner:
+    """直播同步计划器
+
+    根据每场直播的同步水位(sync_watermarks, scope="living:<livingid>")决定哪些直播需要
+    重新调用 get_living_info：
+    1. 本地不存在的直播、预约中/直播中的直播始终刷新
+    2. 已结束的直播在结束后的观察窗口内继续刷新，以拿到最终统计数据
+    3. 已是终态且超出观察窗口、并已同步过的直播直接跳过
+    刷新结果在一个会话内批量写入 livings、live_viewers 和同步水位。
+    """
+
+    SCOPE_PREFIX = "living:"
+    RECENT_END_WINDOW = timedelta(days=3)   # 直播结束后继续刷新的时间窗口
+    SYNC_WORKERS = 4                        # 并发请求数
+    QUERY_CHUNK_SIZE = 500                  # IN 查询分块大小
+
+    FINAL_STATUSES = (LivingStatus.ENDED, LivingStatus.EXPIRED, LivingStatus.CANCELLED)
+
+    # 企业微信 living_info 中同步到 livings 表的字段
+    SYNC_FIELDS = (
+        "theme", "living_start", "living_duration", "anchor_userid", "description",
+        "type", "status", "corpname", "agentid", "viewer_num", "comment_num",
+        "mic_num", "online_count", "subscribe_count"
+    )
+
+    def __init__(self, db_manager, wecom_api, recent_end_window: timedelta = None, max_workers: int = None):
+        """初始化同步计划器
+
+        Args:
+            db_manager: 数据库管理器
+            wecom_api: 企业微信API实例
+            recent_end_window: 直播结束后继续刷新的时间窗口
+            max_workers: 最大并发请求数
+        """
+        self.db_manager = db_manager
+        self.wecom_api = wecom_api
+        self.recent_end_window = recent_end_window or self.RECENT_END_WINDOW
+        self.max_workers = max_workers or self.SYNC_WORKERS
+
+    @classmethod
+    def scope_of(cls, livingid: str) -> str:
+        """获取直播对应的同步水位标识"""
+        return f"{cls.SCOPE_PREFIX}{livingid}"
+
+    @staticmethod
+    def _to_enum(value: Any, enum_cls, default):
+        """将企业微信/预约表中的整数值转换为枚举"""
+        if isinstance(value, enum_cls):
+            return value
+        if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+            try:
+                return enum_cls(int(value))
+            except ValueError:
+                return default
+        return default
+
+    def _chunks(self, items: List[Any]):
+        for i in range(0, len(items), self.QUERY_CHUNK_SIZE):
+            yield items[i:i + self.QUERY_CHUNK_SIZE]
+
+    def _load_watermarks(self, session, livingids: List[str]) -> Dict[str, datetime]:
+        """加载直播的最近同步时间"""
+        synced = {}
+        prefix_len = len(self.SCOPE_PREFIX)
+        for chunk in self._chunks([self.scope_of(livingid) for livingid in livingids]):
+            rows = session.query(SyncWatermark.scope, SyncWatermark.synced_at).filter(
+                SyncWatermark.scope.in_(chunk)
+            ).all()
+            for row in rows:
+                synced[row.scope[prefix_len:]] = row.synced_at
+        return synced
+
+    def plan(self, livingids: Iterable[str] = None, force: bool = False) -> Dict[str, List[str]]:
+        """生成同步计划
+
+        Args:
+            livingids: 企业微信返回的直播ID，本地已有的直播和预约会自动加入候选
+            force: 是否忽略水位强制刷新全部候选直播
+
+        Returns:
+            Dict[str, List[str]]: {"refresh": 需要刷新的直播ID, "skip": 跳过的直播ID,
+                                   "bootstrap": 跳过但尚无水位、需要补记水位的直播ID}
+        """
+        now = datetime.now()
+        candidates = set(livingid for livingid in (livingids or []) if livingid)
+
+        with self.db_manager.get_session() as session:
+            local = {
+                row.livingid: row for row in session.query(
+                    Living.livingid, Living.status, Living.living_start,
+                    Living.living_duration, Living.is_remote_synced
+                ).all()
+            }
+            booking_ids = {row.livingid for row in session.query(LiveBooking.livingid).all() if row.livingid}
+            candidates |= set(local) | booking_ids
+            watermarks = self._load_watermarks(session, list(candidates))
+
+        result = {"refresh": [], "skip": [], "bootstrap": []}
+        for livingid in candidates:
+            row = local.get(livingid)
+            if force or not row or row.status not in self.FINAL_STATUSES:
+                result["refresh"].append(livingid)
+                continue
+
+            end_time = (row.living_start or now) + timedelta(seconds=row.living_duration or 0)
+            synced_at = watermarks.get(livingid)
+            if end_time >= now - self.recent_end_window:
+                # 刚结束的直播统计数据仍可能变化
+                result["refresh"].append(livingid)
+            elif synced_at and synced_at >= end_time:
+                result["skip"].append(livingid)
+            elif not synced_at and row.is_remote_synced:
+                # 升级前已同步过的历史直播，直接补记水位
+                result["skip"].append(livingid)
+                result["bootstrap"].append(livingid)
+            else:
+                # 最近一次同步早于直播结束，需要再拉取一次最终数据
+                result["refresh"].append(livingid)
+
+        return result
+
+    def _fetch_living_info(self, livingids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """并发获取直播详情"""
+        results = {}
+        if not livingids:
+            return results
+
+        def fetch(livingid):
+            response = self.wecom_api.get_living_info(livingid)
+            if response.get("errcode") != 0:
+                raise Exception(response.get("errmsg", "未知错误"))
+            return response.get("living_info", {})
+
+        # 工作线程沿用调用方的接口优先级和SQL分析的操作范围
+        fetch = SQLProfiler().bind_action(ApiBudgetGovernor().bind_priority(fetch))
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="live-sync") as executor:
+            futures = {executor.submit(fetch, livingid): livingid for livingid in livingids}
+            for future in as_completed(futures):
+                livingid = futures[future]
+                try:
+                    results[livingid] = future.result()
+                except Exception as e:
+                    logger.error(f"同步直播数据失败 (ID: {livingid}): {str(e)}")
+        return results
+
+    def _build_record(
+        self,
+        livingid: str,
+        wecom_data: Dict[str, Any],
+        booking: Optional[LiveBooking],
+        living: Optional[Living],
+        owner: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """合并直播数据（优先级：企业微信 > livings > bookings > 直播所属用户）"""
+        final_data = {}
+        for source in (booking, living):
+            if source is not None:
+                final_data.update({
+                    field: getattr(source, field)
+                    for field in self.SYNC_FIELDS if hasattr(source, field)
+                })
+
+        for field in self.SYNC_FIELDS:
+            if field in wecom_data:
+                final_data[field] = wecom_data[field]
+
+        if isinstance(final_data.get("living_start"), (int, float)):
+            final_data["living_start"] = datetime.fromtimestamp(final_data["living_start"])
+
+        owner = owner or {}
+        record = {
+            "livingid": livingid,
+            "theme": final_data.get("theme") or "",
+            "living_start": final_data.get("living_start") or datetime.now(),
+            "living_duration": final_data.get("living_duration") or 0,
+            "anchor_userid": final_data.get("anchor_userid") or "",
+            "description": final_data.get("description") or "",
+            "type": self._to_enum(final_data.get("type"), LivingType, LivingType.GENERAL),
+            "status": self._to_enum(final_data.get("status"), LivingStatus, LivingStatus.RESERVED),
+            "corpname": final_data.get("corpname") or owner.get("corpname") or "",
+            "agentid": final_data.get("agentid") or owner.get("agentid") or "",
+            "viewer_num": final_data.get("viewer_num") or 0,
+            "comment_num": final_data.get("comment_num") or 0,
+            "mic_num": final_data.get("mic_num") or 0,
+            "online_count": final_data.get("online_count") or 0,
+            "subscribe_count": final_data.get("subscribe_count") or 0,
+            "is_remote_synced": 1,
+            "live_booking_id": booking.id if booking is not None else None
+        }
+        return record
+
+    def sync(
+        self,
+        livingids: Iterable[str] = None,
+        owner_info: Optional[Dict[str, Dict[str, Any]]] = None,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """按计划同步直播数据
+
+        Args:
+            livingids: 企业微信返回的直播ID
+            owner_info: {livingid: {"corpname": ..., "agentid": ...}}，直播详情缺少企业信息时使用
+            force: 是否强制刷新全部候选直播
+
+        Returns:
+            Dict[str, Any]: 同步统计信息
+        """
+        start_time = time.time()
+        owner_info = owner_info or {}
+        plan = self.plan(livingids, force=force)
+        refresh_ids = plan["refresh"]
+        stats = {
+            "candidates": len(plan["refresh"]) + len(plan["skip"]),
+            "refreshed": 0,
+            "skipped": len(plan["skip"]),
+            "created": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "failed": 0,
+            "duration": 0
+        }
+
+        fetched = self._fetch_living_info(refresh_ids)
+        stats["failed"] = len(refresh_ids) - len(fetched)
+        now = datetime.now()
+
+        with self.db_manager.get_session() as session:
+            new_rows, update_rows, synced = [], [], []
+            fetched_ids = list(fetched)
+            for chunk in self._chunks(fetched_ids):
+                bookings = {b.livingid: b for b in session.query(LiveBooking).filter(LiveBooking.livingid.in_(chunk))}
+                livings = {l.livingid: l for l in session.query(Living).filter(Living.livingid.in_(chunk))}
+                for livingid in chunk:
+                    living = livings.get(livingid)
+                    record = self._build_record(
+                        livingid, fetched[livingid], bookings.get(livingid), living, owner_info.get(livingid)
+                    )
+                    synced.append((livingid, record["status"]))
+                    if living is None:
+                        new_rows.append({**record, "created_at": now, "updated_at": now})
+                        continue
+
+                    changes = {
+                        field: value for field, value in record.items()
+                        if field != "livingid" and getattr(living, field) != value
+                    }
+                    if changes:
+                        update_rows.append({"id": living.id, "updated_at": now, **changes})
+                    else:
+                        stats["unchanged"] += 1
+
+            # 批量写入直播记录
+            if new_rows:
+                session.execute(insert(Living), new_rows)
+            if update_rows:
+                session.execute(update(Living), update_rows)
+
+            # 关联预约ID有变化的直播，一次性同步观众记录的 live_booking_id
+            booking_changed = [row["id"] for row in update_rows if "live_booking_id" in row]
+            for chunk in self._chunks(booking_changed):
+                params = {f"id{i}": living_id for i, living_id in enumerate(chunk)}
+                placeholders = ", ".join(f":{key}" for key in params)
+                session.execute(text(f"""
+                    UPDATE live_viewers
+                    SET live_booking_id = (
+                        SELECT l.live_booking_id FROM livings l WHERE l.id = live_viewers.living_id
+                    )
+                    WHERE living_id IN ({placeholders})
+                """), params)
+
+            # 记录同步水位
+            watermark_rows = [{
+                "scope": self.scope_of(livingid),
+                "synced_at": now,
+                "status": status.value,
+                "item_count": 1,
+                "created_at": now,
+                "updated_at": now
+            } for livingid, status in synced]
+            if plan["bootstrap"]:
+                for chunk in self._chunks(plan["bootstrap"]):
+                    for row in session.query(Living.livingid, Living.status).filter(Living.livingid.in_(chunk)):
+                        watermark_rows.append({
+                            "scope": self.scope_of(row.livingid),
+                            "synced_at": now,
+                            "status": row.status.value,
+                            "item_count": 1,
+                            "created_at": now,
+                            "updated_at": now
+                        })
+            if watermark_rows:
+                stmt = sqlite_insert(SyncWatermark.__table__)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["scope"],
+                    set_={
+                        "synced_at": stmt.excluded.synced_at,
+                        "status": stmt.excluded.status,
+                        "updated_at": stmt.excluded.updated_at
+                    }
+                )
+                session.execute(stmt, watermark_rows)
+
+        stats["refreshed"] = len(fetched)
+        stats["created"] = len(new_rows)
+        stats["updated"] = len(update_rows)
+        stats["duration"] = round(time.time() - start_time, 2)
+        logger.info(f"直播同步完成: {stats}")
+        return stats
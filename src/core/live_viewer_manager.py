@@ -6,22 +6,50 @@ from src.models.live_booking import LiveBooking
 from src.models.live_viewer import LiveViewer, UserSource
 from src.models.living import Living
 from src.models.user import User
+from src.models.sync_watermark import SyncWatermark
 from src.core.token_manager import TokenManager
 from src.api.wecom import WeComAPI
-from sqlalchemy import text, func
+from sqlalchemy import text, func, delete, update, type_coerce, String
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from typing import List, Tuple, Dict, Any, Optional
 import threading
+import json
 from src.models.corporation import Corporation
 from src.core.auth_manager import AuthManager
+from src.core.external_contact_resolver import ExternalContactResolver
+from src.core.viewer_facets import ViewerFacetIndex
+from src.core.api_governor import ApiBudgetGovernor, ApiPriority
+from src.utils.db_monitor import SQLProfiler
 import queue
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+import sys
 import time
 
 logger = get_logger(__name__)
 
+
+def _estimate_size(obj, seen=None) -> int:
+    """估算对象及其包含的容器、元素占用的内存（字节），共享的对象只计算一次"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_estimate_size(key, seen) + _estimate_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_estimate_size(item, seen) for item in obj)
+    return size
+
 class LiveViewerManager:
     """直播观看者管理器"""
     
+    CHECKPOINT_PREFIX = "viewer_fetch:"  # 拉取检查点的同步水位标识前缀
+    PIPELINE_DEPTH = 4                   # 拉取与写入之间最多缓冲的页数
+    VIEWER_NAME_CACHE_LIMIT = 20000      # 拉取中缓存的观众名称条数上限（供邀请人查找，超出时淘汰最早的）
+    
     def __init__(self, db_manager, auth_manager=None):
         """初始化直播观看者管理器
         
@@ -35,16 +63,14 @@ class LiveViewerManager:
         self.livingid = None
         self.wecom_api = None
         
-        # 缓存
-        self._cache = {
-            "existing_viewers": {},      # 现有内部用户观看记录: {userid: viewer}
-            "existing_external_viewers": {},  # 现有外部用户观看记录: {userid: viewer}
-            "user_map": {},             # 用户信息缓存: {userid: user_info}
-            "external_user_map": {},    # 外部用户信息缓存: {external_userid: user_info}
-            "anchor_info": {},          # 主播信息缓存
-            "stat_info": None,          # API返回的统计信息缓存
-            "wecom_contact_tried": False # 是否已尝试过获取企业微信通讯录
-        }
+        # 由批量拉取调度器设置
+        self.write_lock = None          # 多场直播并行拉取时串行写库的锁
+        self.progress_callback = None   # progress_callback(livingid, 阶段, 已获取观众数)
+        self.is_cancelled = None        # is_cancelled() 返回 True 时在当前页写入后停止
+        
+        # 缓存（只在一次拉取任务内有效，任务结束后释放，见 _job_scope）
+        self._cache = self._new_job_cache()
+        self._in_job = False
         
         # 统计信息
         self._stats = {
@@ -53,6 +79,9 @@ class LiveViewerManager:
             "external_viewers": 0,       # 外部观众数
             "sign_count": 0,             # 总签到次数
             "success_count": 0,          # 成功处理的记录数
+            "new_viewers": 0,            # 新增的观看记录数
+            "updated_viewers": 0,        # 内容有变化而更新的观看记录数
+            "unchanged_viewers": 0,      # 内容未变化而跳过的观看记录数
             "error_count": 0,            # 处理失败的记录数
             "last_sync_time": None,      # 最后同步时间
             "last_error": None,          # 最后一次错误信息
@@ -60,31 +89,89 @@ class LiveViewerManager:
             "processed_batches": 0,      # 已处理批次数
         }
     
+    @staticmethod
+    def _new_job_cache() -> Dict[str, Any]:
+        return {
+            "existing_viewers": {},      # 现有观看记录: {"user_type:userid": (id, 内容指纹)}
+            "user_map": {},             # 用户信息缓存: {userid: user_info}
+            "viewer_names": {},         # 已拉取观众的名称: {"user_type:userid": name}，有上限
+            "anchor_info": {},          # 主播信息缓存
+            "wecom_contact_tried": False # 是否已尝试过获取企业微信通讯录
+        }
+    
+    @contextmanager
+    def _job_scope(self, livingid: str):
+        """一次拉取任务的作用域
+        
+        进入时创建空缓存，退出时（包括出错）整体替换为空缓存，预加载的观看记录索引、
+        用户信息和观众名称随之释放；统计信息(get_stats)保留到下一次任务。
+        """
+        self.livingid = livingid
+        self._cache = self._new_job_cache()
+        self._in_job = True
+        try:
+            yield
+        finally:
+            # 只记录条数：估算字节数要遍历整个缓存（10万观众约1秒），只在显式调用 get_memory_usage() 时计算
+            entries = {name: self._cache_entries(value) for name, value in self._cache.items()}
+            self._cache = self._new_job_cache()
+            self._in_job = False
+            logger.debug(f"直播[{livingid}]拉取任务结束，释放缓存: {entries}")
+    
+    @staticmethod
+    def _cache_entries(value) -> int:
+        return len(value) if isinstance(value, (dict, list, set, tuple)) else 0
+    
+    def get_memory_usage(self) -> Dict[str, Any]:
+        """当前缓存占用的内存（估算）
+        
+        Returns:
+            Dict[str, Any]: {"in_job": 是否在拉取中, "caches": {缓存名: {"entries": 条数, "bytes": 字节数}},
+                "total_bytes": 合计字节数}
+        """
+        cache = self._cache
+        caches = {}
+        for name, value in cache.items():
+            caches[name] = {
+                "entries": self._cache_entries(value),
+                "bytes": _estimate_size(value)
+            }
+        return {
+            "in_job": self._in_job,
+            "caches": caches,
+            "total_bytes": sum(item["bytes"] for item in caches.values())
+        }
+    
     def _preload_existing_viewers(self, living_id):
-        """预加载当前直播的观看人员信息
+        """预加载当前直播已有观看记录的ID和内容指纹
+        
+        不加载 ORM 实体，每条记录只保留ID和指纹；重新拉取时指纹相同的记录不再写入，
+        有变化的记录按主键批量更新
         
         Args:
             living_id: 直播ID
             
         Returns:
-            Dict[str, LiveViewer]: 观看人员信息字典，key为"user_type:userid"格式
+            Dict[str, Tuple[int, int]]: {"user_type:userid": (id, 内容指纹)}
         """
         existing_viewers = {}
         with self.db_manager.get_session() as session:
             # 先获取直播记录的ID
-            live_info = session.query(Living).filter_by(livingid=living_id).first()
-            if not live_info:
+            live_id = session.query(Living.id).filter_by(livingid=living_id).scalar()
+            if not live_id:
                 logger.warning(f"找不到直播记录: {living_id}")
                 return existing_viewers
             
-            logger.debug(f"找到直播记录: {live_info.id}")
+            logger.debug(f"找到直播记录: {live_id}")
             
             # 使用直播记录的ID查询观看记录
-            viewers = session.query(LiveViewer).filter_by(living_id=live_info.id).all()
-            for viewer in viewers:
-                key = f"{viewer.user_type}:{viewer.userid}"
-                existing_viewers[key] = viewer
-                logger.debug(f"加载已存在的观看记录: {key}")
+            rows = session.query(
+                LiveViewer.id, LiveViewer.user_type, LiveViewer.userid,
+                LiveViewer.watch_time, LiveViewer.is_comment, LiveViewer.is_mic,
+                LiveViewer.invitor_userid, type_coerce(LiveViewer.location, String)
+            ).filter(LiveViewer.living_id == live_id)
+            for viewer_id, user_type, userid, *content in rows:
+                existing_viewers[f"{user_type}:{userid}"] = (viewer_id, self._fingerprint(*content))
             
             logger.info(f"已加载 {len(existing_viewers)} 条观看记录")
         return existing_viewers
@@ -178,50 +265,9 @@ class LiveViewerManager:
             logger.error(f"预加载上下文数据失败: {str(e)}")
             import traceback
             logger.error(f"错误详情: {traceback.format_exc()}")
-            self._cache = {}  # 重置缓存
+            self._cache = self._new_job_cache()  # 重置缓存
             return False
     
-    def _preload_user_information(self, session=None):
-        """预加载所有可能的用户信息"""
-        start_time = time.time()
-        logger.info("开始预加载用户信息...")
-        
-        # 如果没有提供session，则创建新的session
-        if not session:
-            with self.db_manager.get_session() as new_session:
-                self._do_preload_user_info(new_session)
-        else:
-            # 使用提供的session
-            self._do_preload_user_info(session)
-        
-        duration = time.time() - start_time
-        logger.info(f"用户信息预加载完成，共 {len(self._cache['user_map'])} 条，耗时 {duration:.2f} 秒")
-    
-    def _do_preload_user_info(self, session):
-        """执行实际的用户信息预加载，同时考虑wecom_code和login_name"""
-        from src.models.user import User
-        users = session.query(User).all()
-        
-        for user in users:
-            user_data = {
-                "id": user.userid,
-                "name": user.name,
-                "wecom_code": user.wecom_code,
-                "login_name": user.login_name,
-                "department": user.department if hasattr(user, 'department') else None,
-                "department_id": user.department_id if hasattr(user, 'department_id') else None
-            }
-            
-            # 使用企业微信ID作为主键
-            if user.wecom_code:
-                self._cache["user_map"][user.wecom_code] = user_data
-            
-            # 同时也可以用登录名查找
-            if user.login_name:
-                self._cache["user_map"][user.login_name] = user_data
-        
-        logger.info(f"已预加载 {len(users)} 条用户信息")
-    
     def _initialize_wecom_api(self):
         """初始化企业微信API"""
         try:
@@ -253,10 +299,24 @@ class LiveViewerManager:
             logger.error(f"初始化企业微信API失败: {str(e)}")
             return False
     
+    def _write_guard(self):
+        """写库阶段的锁，单独拉取时不加锁"""
+        return self.write_lock if self.write_lock is not None else nullcontext()
+    
+    def _report_progress(self, stage: str, count: int):
+        """报告拉取进度，回调出错不影响拉取"""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(self.livingid, stage, count)
+        except Exception as e:
+            logger.warning(f"报告拉取进度失败: {str(e)}")
+    
     def process_viewer_info(self, livingid: str, token: str = None) -> bool:
         """处理直播观看者信息(优化版)
         
-        使用多线程和批量处理，显著减少数据库操作次数
+        使用多线程和批量处理，显著减少数据库操作次数。
+        拉取观看数据属于后台批量任务，接口调用让行于界面交互请求
         
         Args:
             livingid: 直播ID
@@ -265,11 +325,15 @@ class LiveViewerManager:
         Returns:
             bool: 处理是否成功
         """
+        with ApiBudgetGovernor().priority(ApiPriority.BACKGROUND), self._job_scope(livingid):
+            return self._process_viewer_info(livingid, token)
+    
+    def _process_viewer_info(self, livingid: str, token: str = None) -> bool:
+        """处理直播观看者信息的具体实现"""
         logger.info(f"开始处理直播[{livingid}]的观看者信息")
         start_time = time.time()
         
         # 1. 预加载上下文信息
-        self.livingid = livingid
         if not self._preload_context(livingid):
             logger.error(f"预加载直播[{livingid}]的上下文信息失败")
             return False
@@ -279,16 +343,10 @@ class LiveViewerManager:
             logger.error("初始化企业微信API失败")
             return False
         
-        # 3. 使用多线程处理数据
+        # 3. 逐页拉取并写入观看数据
         try:
-            # 初始化数据队列和结果集
-            internal_queue = queue.Queue()
-            external_queue = queue.Queue()
-            
-            # 合并所有现有记录用于查找
-            existing_records = {}
-            existing_records.update({k: v for k, v in self._cache["existing_viewers"].items()})
-            existing_records.update({k: v for k, v in self._cache["existing_external_viewers"].items()})
+            # 现有记录索引（写入新记录时原地更新，不复制）
+            existing_records = self._cache["existing_viewers"]
             
             # 获取living_id
             with self.db_manager.get_session() as session:
@@ -298,86 +356,67 @@ class LiveViewerManager:
                     return False
                 live_id = live_info.id
             
-            # 启动数据收集线程
-            logger.info("启动数据收集线程...")
-            collector_future = None
-            collector_stats = None
+            result = self._collect_all_data(livingid, live_id, existing_records)
+            total_viewers = result["internal_count"] + result["external_count"]
+            logger.info(f"数据收集完成: 共 {result['pages']} 页, {total_viewers} 条记录")
+            self._report_progress("write", total_viewers)
             
-            with ThreadPoolExecutor(max_workers=3) as executor:
-                # 提交数据收集任务
-                collector_future = executor.submit(
-                    self._collect_all_data, livingid, internal_queue, external_queue
-                )
-                
-                # 等待数据收集线程完成
-                collector_stats = collector_future.result()
-                logger.info(f"数据收集完成: {collector_stats}")
-                
-                # 提交数据处理任务
-                internal_future = executor.submit(
-                    self._process_user_queue, 
-                    internal_queue, 
-                    existing_records,
-                    live_id,
-                    1,  # 内部用户类型
-                    collector_stats.get("stat_info") if collector_stats else None  # 传递 stat_info
-                )
-                
-                external_future = executor.submit(
-                    self._process_user_queue, 
-                    external_queue, 
-                    existing_records,
-                    live_id,
-                    2,  # 外部用户类型
-                    collector_stats.get("stat_info") if collector_stats else None  # 传递 stat_info
-                )
-                
-                # 等待数据处理线程完成
-                internal_result = internal_future.result()
-                external_result = external_future.result()
+            # 多场直播并行拉取时接口调用并行、写库串行（SQLite 同一时间只允许一个写事务）
+            with self._write_guard():
+                # 4. 批量处理邀请关系
+                logger.info("开始处理邀请关系...")
+                invitation_map = result["invitation_map"]
+                invitation_updates = 0
+                if invitation_map:
+                    logger.info(f"处理 {len(invitation_map)} 个邀请关系")
+                    invitation_updates = self._process_all_invitations(invitation_map)
             
-            # 4. 批量处理邀请关系
-            logger.info("开始处理邀请关系...")
-            invitation_map = {}
-            invitation_map.update(internal_result.get("invitation_map", {}))
-            invitation_map.update(external_result.get("invitation_map", {}))
+                # 5. 批量解析外部邀请人名称
+                backfilled = 0
+                try:
+                    resolver = ExternalContactResolver(self.db_manager, self.wecom_api)
+                    backfill_result = resolver.backfill_invitor_names(live_id)
+                    backfilled = sum(count for step, count in backfill_result.items() if step != "unresolved")
+                except Exception as e:
+                    logger.warning(f"批量解析外部邀请人名称失败: {str(e)}")
             
-            if invitation_map:
-                logger.info(f"处理 {len(invitation_map)} 个邀请关系")
-                self._process_all_invitations(invitation_map)
+                # 刷新该直播的表头筛选值统计。只有本次没有写入任何记录时跳过：邀请人名称不在指纹中，
+                # 未变化的记录也可能被邀请关系处理和名称回填改写；从检查点继续时之前写入的页尚未刷新
+                if (result["new_count"] or result["update_count"] or result["resumed"]
+                        or invitation_updates or backfilled):
+                    try:
+                        ViewerFacetIndex(self.db_manager).refresh(live_id)
+                    except Exception as e:
+                        logger.warning(f"刷新直播[{livingid}]的筛选值统计失败: {str(e)}")
             
-            # 5. 更新直播记录
-            with self.db_manager.get_session() as session:
-                live_info = session.query(Living).filter_by(livingid=livingid).first()
-                if live_info:
-                    live_info.is_viewer_fetched = 1
-                    live_info.viewer_num = (
-                        internal_result.get("processed_count", 0) + 
-                        external_result.get("processed_count", 0)
-                    )
+                # 6. 更新直播记录，拉取完成后清除检查点
+                with self.db_manager.get_session() as session:
+                    live_info = session.query(Living).filter_by(livingid=livingid).first()
+                    if live_info:
+                        live_info.is_viewer_fetched = 1
+                        live_info.viewer_num = total_viewers
+                        logger.info(f"已更新直播[{livingid}]的观看人数: {live_info.viewer_num}")
+                    self._clear_checkpoint(session, livingid)
                     session.commit()
-                    logger.info(f"已更新直播[{livingid}]的观看人数: {live_info.viewer_num}")
             
-            # 6. 更新统计信息
-            total_viewers = (
-                internal_result.get("processed_count", 0) + 
-                external_result.get("processed_count", 0)
-            )
+            # 7. 更新统计信息
             self._stats["total_viewers"] = total_viewers
-            self._stats["internal_viewers"] = internal_result.get("processed_count", 0)
-            self._stats["external_viewers"] = external_result.get("processed_count", 0)
-            self._stats["success_count"] = (
-                internal_result.get("new_count", 0) + 
-                external_result.get("new_count", 0) + 
-                internal_result.get("update_count", 0) + 
-                external_result.get("update_count", 0)
-            )
+            self._stats["internal_viewers"] = result["internal_count"]
+            self._stats["external_viewers"] = result["external_count"]
+            self._stats["success_count"] = result["new_count"] + result["update_count"]
+            self._stats["new_viewers"] = result["new_count"]
+            self._stats["updated_viewers"] = result["update_count"]
+            self._stats["unchanged_viewers"] = result["unchanged_count"]
+            self._stats["error_count"] += result["error_count"]
             self._stats["last_sync_time"] = datetime.now()
             
             # 记录处理时间
             duration = time.time() - start_time
             logger.info(f"成功处理直播[{livingid}]的观看数据，共 {total_viewers} 条记录，耗时 {duration:.2f} 秒")
             logger.info(f"总观众: {total_viewers}, 内部: {self._stats['internal_viewers']}, 外部: {self._stats['external_viewers']}")
+            logger.info(
+                f"新增: {result['new_count']}, 更新: {result['update_count']}, 未变化: {result['unchanged_count']}"
+            )
             
             return True
             
@@ -393,94 +432,237 @@ class LiveViewerManager:
             
             return False
     
-    def _collect_all_data(self, livingid, internal_queue, external_queue):
-        """收集所有数据并分发到内部和外部用户队列"""
-        stats = {'total_batches': 0, 'internal_count': 0, 'external_count': 0}
+    # ---------- 拉取检查点 ----------
+    
+    @classmethod
+    def checkpoint_scope(cls, livingid: str) -> str:
+        """拉取检查点在同步水位表中的标识"""
+        return f"{cls.CHECKPOINT_PREFIX}{livingid}"
+    
+    def _load_checkpoint(self, livingid: str) -> Optional[Dict[str, Any]]:
+        """读取未完成的拉取检查点，没有时返回 None"""
+        with self.db_manager.get_session() as session:
+            row = session.query(SyncWatermark).filter_by(scope=self.checkpoint_scope(livingid)).first()
+            if row is None:
+                return None
+            extra = row.extra or {}
+            return {
+                "next_key": row.watermark or "",
+                "complete": row.status == 1,
+                "pages": extra.get("pages", 0),
+                "internal_count": extra.get("internal_count", 0),
+                "external_count": extra.get("external_count", 0)
+            }
+    
+    def _save_checkpoint(self, session, livingid: str, next_key: Optional[str], pages: int,
+                         internal_count: int, external_count: int):
+        """在写入观众数据的事务中推进检查点
         
-        try:
-            next_key = None
-            has_more = True
+        Args:
+            next_key: 下一页的 next_key，None 表示全部页已写入
+        """
+        now = datetime.now()
+        stmt = sqlite_insert(SyncWatermark.__table__).values(
+            scope=self.checkpoint_scope(livingid), synced_at=now,
+            watermark=next_key or "", status=0 if next_key else 1,
+            item_count=internal_count + external_count,
+            extra={"pages": pages, "internal_count": internal_count, "external_count": external_count},
+            created_at=now, updated_at=now
+        )
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=["scope"],
+            set_={
+                "synced_at": stmt.excluded.synced_at,
+                "watermark": stmt.excluded.watermark,
+                "status": stmt.excluded.status,
+                "item_count": stmt.excluded.item_count,
+                "extra": stmt.excluded.extra,
+                "updated_at": stmt.excluded.updated_at
+            }
+        ))
+    
+    def _clear_checkpoint(self, session, livingid: str):
+        session.execute(delete(SyncWatermark).where(SyncWatermark.scope == self.checkpoint_scope(livingid)))
+    
+    # ---------- 拉取与写入 ----------
+    
+    @staticmethod
+    def _fingerprint(watch_time, is_comment, is_mic, invitor_userid, location_json) -> int:
+        """观看记录内容指纹（拉取会写入的字段），只在本次拉取的进程内比较
+        
+        数据库中的值和接口数据按相同方式归一化后计算，指纹相同说明重新拉取不会改变该记录。
+        location_json 为地理位置的 JSON 文本（与写库时的序列化方式相同），避免逐行解析。
+        """
+        if location_json == "null":
+            location_json = None
+        return hash((int(watch_time or 0), int(bool(is_comment)), int(bool(is_mic)),
+                     invitor_userid or None, location_json or None))
+    
+    @staticmethod
+    def _new_fetch_result() -> Dict[str, Any]:
+        return {
+            "pages": 0,
+            "internal_count": 0,
+            "external_count": 0,
+            "new_count": 0,
+            "update_count": 0,
+            "unchanged_count": 0,
+            "error_count": 0,
+            "resumed": False,              # 是否从检查点继续（之前的任务已写入部分页）
+            "invitation_map": {}
+        }
+    
+    def _collect_all_data(self, livingid, live_id, existing_records):
+        """流水线拉取并写入观看数据
+        
+        拉取线程按 next_key 顺序请求各页放入有界队列，当前线程逐页写入，每页与拉取检查点
+        在同一事务中提交：
+        - 写入和后续页的拉取同时进行，总耗时接近 max(拉取, 写入)
+        - 队列满时拉取线程等待（背压），内存中最多缓冲 PIPELINE_DEPTH 页
+        - 中断（网络错误、token失效、取消、程序退出）后再次拉取时从检查点的 next_key 继续，
+          已写入的页不再重复拉取；全部页已写入时直接进入后续处理
+        
+        Args:
+            livingid: 直播ID
+            live_id: 直播记录ID(livings.id)
+            existing_records: 现有记录ID映射表，写入的新记录会加入其中
+            
+        Returns:
+            dict: 拉取结果统计（页数和人数包含检查点之前已写入的部分）
             
-            while has_more:
-                # 获取一批数据
-                logger.info(f"获取第 {stats['total_batches']+1} 批数据...")
+        Raises:
+            Exception: 接口返回错误或任务取消，已写入的页保留在检查点中
+        """
+        result = self._new_fetch_result()
+        checkpoint = self._load_checkpoint(livingid)
+        next_key = ""
+        if checkpoint:
+            result.update({key: checkpoint[key] for key in ("pages", "internal_count", "external_count")})
+            result["resumed"] = True
+            if checkpoint["complete"]:
+                logger.info(f"直播[{livingid}]的观看数据已全部写入（共 {result['pages']} 页），跳过拉取")
+                return result
+            next_key = checkpoint["next_key"]
+            logger.info(
+                f"从检查点继续拉取直播[{livingid}]: 已写入 {result['pages']} 页, "
+                f"{result['internal_count'] + result['external_count']} 条记录"
+            )
+        
+        pages = queue.Queue(maxsize=self.PIPELINE_DEPTH)
+        stop = threading.Event()
+        # 拉取线程沿用当前线程的接口优先级和SQL分析的操作范围
+        fetcher = threading.Thread(
+            target=SQLProfiler().bind_action(ApiBudgetGovernor().bind_priority(self._fetch_pages)),
+            args=(livingid, next_key, checkpoint is not None, pages, stop),
+            name=f"watch-stat-{livingid}",
+            daemon=True
+        )
+        fetcher.start()
+        try:
+            while True:
+                kind, payload = pages.get()
+                if kind == "restart":
+                    # 检查点中的 next_key 可能已失效：从头拉取，已写入的观众按更新处理
+                    logger.warning(f"从检查点继续拉取失败({payload})，从第一页重新拉取")
+                    with self.db_manager.get_session() as session:
+                        self._clear_checkpoint(session, livingid)
+                    result = self._new_fetch_result()
+                    existing_records.clear()
+                    existing_records.update(self._preload_existing_viewers(livingid))
+                    continue
+                if kind == "cancelled":
+                    raise Exception(f"拉取已取消，已写入 {result['pages']} 页，下次从检查点继续")
+                if kind == "error":
+                    raise Exception(
+                        f"获取直播观看数据失败：{payload}"
+                        f"（已写入 {result['pages']} 页，重新拉取时从检查点继续）"
+                    )
+                
+                stat_info, next_key = payload
                 start_time = time.time()
+                self._cache_page_users(stat_info)
+                self._store_page(livingid, live_id, stat_info, existing_records, result, next_key)
+                self._stats['processed_batches'] = result['pages']
+                self._report_progress("collect", result['internal_count'] + result['external_count'])
                 
-                response = self.wecom_api.get_watch_stat(livingid, next_key)
-                stats['total_batches'] += 1
-                self._stats['processed_batches'] = stats['total_batches']
+                duration = time.time() - start_time
+                logger.info(f"第 {result['pages']} 批数据写入完成，耗时 {duration:.2f} 秒")
+                if next_key is None:
+                    break
+                # 拉取线程可能已提前拉取了后续页，取消时不再写入
+                if self.is_cancelled is not None and self.is_cancelled():
+                    raise Exception(f"拉取已取消，已写入 {result['pages']} 页，下次从检查点继续")
+        finally:
+            # 写入出错时通知拉取线程退出（拉取线程在等待队列空位时检查）
+            stop.set()
+        
+        logger.info(f"所有数据收集完毕，共 {result['internal_count']} 内部用户和 {result['external_count']} 外部用户")
+        return result
+    
+    def _fetch_pages(self, livingid, next_key, resuming, pages, stop):
+        """拉取线程：按 next_key 顺序拉取各页放入队列
+        
+        队列中的消息为 (类型, 内容)：("page", (stat_info, 下一页next_key或None))、
+        ("restart", 错误)、("error", 错误)、("cancelled", None)
+        """
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.2)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        fetched = 0
+        try:
+            while not stop.is_set():
+                if self.is_cancelled is not None and self.is_cancelled():
+                    put(("cancelled", None))
+                    return
                 
+                logger.info(f"获取第 {fetched + 1} 批数据...")
+                response = self.wecom_api.get_watch_stat(livingid, next_key)
                 if "error" in response:
+                    if resuming and fetched == 0:
+                        resuming = False
+                        next_key = ""
+                        if not put(("restart", response.get("error"))):
+                            return
+                        continue
                     logger.error(f"获取直播观看数据失败：{response.get('error')}")
-                    if stats['total_batches'] == 1:
-                        internal_queue.put(None)
-                        external_queue.put(None)
-                        return stats
-                    break
-                
-                # 保存API返回的统计信息到缓存
-                stat_info = response.get("stat_info", {})
-                self._cache["stat_info"] = stat_info
-                
-                # 更新用户映射缓存
-                if "users" in stat_info:
-                    for user in stat_info["users"]:
-                        if "userid" in user and "name" in user:
-                            self._cache["user_map"][user["userid"]] = {
-                                "name": user["name"],
-                                "userid": user["userid"]
-                            }
-                            logger.debug(f"缓存内部用户: {user['userid']} -> {user['name']}")
-                
-                if "external_users" in stat_info:
-                    for user in stat_info["external_users"]:
-                        if "external_userid" in user and "name" in user:
-                            self._cache["external_user_map"][user["external_userid"]] = {
-                                "name": user["name"],
-                                "external_userid": user["external_userid"]
-                            }
-                            logger.debug(f"缓存外部用户: {user['external_userid']} -> {user['name']}")
-                
-                # 处理内部用户数据
-                internal_users = stat_info.get("users", [])
-                for user in internal_users:
-                    user['user_type'] = 1
-                    internal_queue.put(user)
-                
-                # 处理外部用户数据
-                external_users = stat_info.get("external_users", [])
-                for user in external_users:
-                    user['user_type'] = 2
-                    external_queue.put(user)
-                
-                # 统计数量
-                stats['internal_count'] += len(internal_users)
-                stats['external_count'] += len(external_users)
+                    put(("error", response.get("error")))
+                    return
                 
-                # 检查是否有更多数据
+                fetched += 1
                 next_key = response.get("next_key", "")
                 has_more = bool(next_key) and not response.get("ending", False)
-                
-                duration = time.time() - start_time
-                logger.info(f"第 {stats['total_batches']} 批数据处理完成，耗时 {duration:.2f} 秒")
-                
-                if has_more and (stats['total_batches'] % 5 == 0):
-                    time.sleep(1)
-            
-            logger.info(f"所有数据收集完毕，共 {stats['internal_count']} 内部用户和 {stats['external_count']} 外部用户")
-            internal_queue.put(None)
-            external_queue.put(None)
-            
-            return stats
-            
+                if not put(("page", (response.get("stat_info", {}), next_key if has_more else None))):
+                    return
+                if not has_more:
+                    return
         except Exception as e:
-            logger.error(f"收集数据失败: {str(e)}")
-            import traceback
-            logger.error(f"错误详情: {traceback.format_exc()}")
-            
-            internal_queue.put(None)
-            external_queue.put(None)
-            return stats
+            logger.error(f"拉取直播观看数据失败: {str(e)}")
+            put(("error", str(e)))
+    
+    def _cache_page_users(self, stat_info):
+        """缓存一页观众的名称，供邀请人查找使用
+        
+        只保存名称字符串，条数超过 VIEWER_NAME_CACHE_LIMIT 时淘汰最早缓存的（大直播中邀请人
+        通常出现在较早的页；淘汰后仍可从当前页、企业微信或数据处理完成后的批量回填中获得名称）。
+        """
+        names = self._cache["viewer_names"]
+        for user in stat_info.get("users", []):
+            if "userid" in user and "name" in user:
+                names[f"1:{user['userid']}"] = user["name"]
+        for user in stat_info.get("external_users", []):
+            if "external_userid" in user and "name" in user:
+                names[f"2:{user['external_userid']}"] = user["name"]
+        
+        overflow = len(names) - self.VIEWER_NAME_CACHE_LIMIT
+        if overflow > 0:
+            for key in list(islice(names, overflow)):
+                del names[key]
     
     def _get_invitor_info(self, user_data, user_type, stat_info):
         """获取邀请人信息
@@ -530,13 +712,12 @@ class LiveViewerManager:
                 invitor_name = user_info["name"]
                 logger.debug(f"从内部用户缓存中找到邀请人: {invitor_id} -> {invitor_name}")
                 return invitor_id, invitor_name
-        else:
-            # 从外部用户缓存中查找
-            user_info = self._cache["external_user_map"].get(invitor_id)
-            if user_info and "name" in user_info:
-                invitor_name = user_info["name"]
-                logger.debug(f"从外部用户缓存中找到邀请人: {invitor_id} -> {invitor_name}")
-                return invitor_id, invitor_name
+        
+        # 从已拉取观众的名称中查找
+        invitor_name = self._cache["viewer_names"].get(f"{1 if is_internal_invitor else 2}:{invitor_id}")
+        if invitor_name:
+            logger.debug(f"从已拉取观众中找到邀请人: {invitor_id} -> {invitor_name}")
+            return invitor_id, invitor_name
         
         # 2.3 从API返回的统计信息中查找
         if stat_info:
@@ -553,31 +734,19 @@ class LiveViewerManager:
                         logger.debug(f"从API统计信息中找到外部邀请人: {invitor_id} -> {invitor_name}")
                         return invitor_id, invitor_name
         
-        # 2.4 如果还是找不到，尝试从企业微信获取
-        if not invitor_name and self.wecom_api:
+        # 2.4 内部邀请人尝试从企业微信获取；外部邀请人在数据处理完成后批量解析
+        if not invitor_name and self.wecom_api and is_internal_invitor:
             try:
-                if is_internal_invitor:
-                    # 获取内部用户信息
-                    user_info = self.wecom_api.get_user_info(invitor_id)
-                    if user_info and user_info.get("errcode") == 0:
-                        invitor_name = user_info.get("name")
-                        # 更新缓存
-                        self._cache["user_map"][invitor_id] = {
-                            "name": invitor_name,
-                            "userid": invitor_id
-                        }
-                        logger.debug(f"从企业微信API获取到内部邀请人: {invitor_id} -> {invitor_name}")
-                else:
-                    # 获取外部联系人信息
-                    contact_info = self.wecom_api.get_external_contact(invitor_id)
-                    if contact_info and contact_info.get("errcode") == 0:
-                        invitor_name = contact_info.get("name")
-                        # 更新缓存
-                        self._cache["external_user_map"][invitor_id] = {
-                            "name": invitor_name,
-                            "external_userid": invitor_id
-                        }
-                        logger.debug(f"从企业微信API获取到外部邀请人: {invitor_id} -> {invitor_name}")
+                # 获取内部用户信息
+                user_info = self.wecom_api.get_user_info(invitor_id)
+                if user_info and user_info.get("errcode") == 0:
+                    invitor_name = user_info.get("name")
+                    # 更新缓存
+                    self._cache["user_map"][invitor_id] = {
+                        "name": invitor_name,
+                        "userid": invitor_id
+                    }
+                    logger.debug(f"从企业微信API获取到内部邀请人: {invitor_id} -> {invitor_name}")
             except Exception as e:
                 logger.warning(f"获取邀请人[{invitor_id}]信息失败: {str(e)}")
         
@@ -588,204 +757,131 @@ class LiveViewerManager:
         
         return invitor_id, invitor_name
     
-    def _process_user_queue(self, user_queue, existing_records, living_id, user_type, stat_info):
-        """处理特定类型用户队列中的数据
+    def _store_page(self, livingid, live_id, stat_info, existing_records, result, next_key):
+        """在一个事务中写入一页观众数据并推进拉取检查点
+        
+        先在锁外整理本页数据（解析邀请人可能调用接口）：已有记录的内容指纹与接口数据相同时跳过，
+        再批量插入新记录、按主键批量更新有变化的记录。重新拉取内容没有变化的直播时只推进检查点。
         
         Args:
-            user_queue: 用户数据队列
-            existing_records: 现有记录映射表
-            living_id: 直播记录ID
-            user_type: 用户类型(1内部用户/2外部用户)
-            stat_info: API返回的统计信息
-            
-        Returns:
-            dict: 处理结果统计
+            livingid: 直播ID
+            live_id: 直播记录ID(livings.id)
+            stat_info: 接口返回的一页统计信息
+            existing_records: 现有记录映射表 {key: (id, 内容指纹)}，提交成功后更新
+            result: 拉取结果统计，提交成功后累加
+            next_key: 下一页的 next_key，None 表示这是最后一页
         """
-        result = {
-            'user_type': 'internal' if user_type == 1 else 'external',
-            'new_records': [],
-            'update_records': [],
-            'processed_count': 0,
-            'new_count': 0,
-            'update_count': 0,
-            'error_count': 0,
-            'invitation_map': {}
-        }
+        stat_info = stat_info or {}
+        users = [(1, user) for user in stat_info.get("users", [])]
+        users += [(2, user) for user in stat_info.get("external_users", [])]
+        anchor_info = self._cache["anchor_info"]
+        counts = {1: 0, 2: 0}
+        new_count = update_count = unchanged_count = error_count = 0
+        invitation_map = {}
+        new_records: Dict[str, LiveViewer] = {}
+        update_rows: Dict[int, Dict[str, Any]] = {}
+        fingerprints: Dict[str, int] = {}
+        now = datetime.now()
         
-        # 批量操作缓冲区
-        batch_size = 1000
-        new_batch = []
-        update_batch = []
-        
-        # 使用一个session处理整个批次
-        with self.db_manager.get_session() as session:
-            while True:
-                try:
-                    user_data = user_queue.get()
-                    if user_data is None:  # 结束标记
-                        break
-                    
-                    # 获取用户ID
-                    userid = user_data.get("userid") if user_type == 1 else user_data.get("external_userid")
-                    if not userid:
-                        logger.warning(f"跳过无效用户数据: {user_data}")
-                        continue
-                    
-                    # 获取邀请人信息
-                    invitor_id, invitor_name = self._get_invitor_info(user_data, user_type, stat_info or {})
-                    
-                    # 创建或更新记录
-                    key = f"{user_type}:{userid}"
-                    if key in existing_records:
-                        # 更新现有记录
-                        record = existing_records[key]
-                        # 确保记录与当前session关联
-                        if record not in session:
-                            record = session.merge(record)
-                        
-                        self._update_record_data(record, user_data)
-                        
-                        # 设置邀请人信息
-                        if invitor_id:
-                            record.invitor_userid = invitor_id
-                            record.invitor_name = invitor_name or invitor_id
-                            if invitor_id == self._cache["anchor_info"].get("userid") and hasattr(record, 'is_invited_by_anchor'):
-                                record.is_invited_by_anchor = True
-                                
-                        update_batch.append(record)
-                        result['update_count'] += 1
-                    else:
-                        # 创建新记录
-                        record = LiveViewer.from_api_data(user_data, living_id=living_id, user_type=user_type)
-                        
-                        # 设置 live_booking_id
-                        if self._cache["anchor_info"].get("live_booking_id"):
-                            record.live_booking_id = self._cache["anchor_info"]["live_booking_id"]
-                        
-                        # 设置邀请人信息
-                        if invitor_id:
-                            record.invitor_userid = invitor_id
-                            record.invitor_name = invitor_name or invitor_id
-                            if invitor_id == self._cache["anchor_info"].get("userid") and hasattr(record, 'is_invited_by_anchor'):
-                                record.is_invited_by_anchor = True
-                                
-                        new_batch.append(record)
-                        # 更新映射以便后续处理
-                        existing_records[key] = record
-                        result['new_count'] += 1
-                    
-                    # 如果仍有邀请关系需要处理
-                    if invitor_id and not invitor_name:
-                        result['invitation_map'][key] = (invitor_id, user_type)
-                    
-                    result['processed_count'] += 1
-                    
-                    # 批量提交
-                    if len(new_batch) >= batch_size:
-                        session.bulk_save_objects(new_batch)
-                        new_batch = []
-                        session.flush()
-                    
-                    if len(update_batch) >= batch_size:
-                        for record in update_batch:
-                            session.merge(record)
-                        update_batch = []
-                        session.flush()
-                    
-                except Exception as e:
-                    logger.error(f"处理用户数据失败: {str(e)}")
-                    import traceback
-                    logger.error(f"错误详情: {traceback.format_exc()}")
-                    result['error_count'] += 1
-                    continue
-            
-            # 提交剩余的批次
+        for user_type, user_data in users:
             try:
-                if new_batch:
-                    session.bulk_save_objects(new_batch)
-                if update_batch:
-                    for record in update_batch:
-                        session.merge(record)
-                session.commit()
+                # 获取用户ID
+                userid = user_data.get("userid") if user_type == 1 else user_data.get("external_userid")
+                if not userid:
+                    logger.warning(f"跳过无效用户数据: {user_data}")
+                    continue
+                counts[user_type] += 1
+                
+                # 获取邀请人信息
+                invitor_id, invitor_name = self._get_invitor_info(user_data, user_type, stat_info)
+                values = {
+                    "watch_time": int(user_data.get("watch_time", 0) or 0),
+                    "is_comment": int(bool(user_data.get("is_comment", 0))),
+                    "is_mic": int(bool(user_data.get("is_mic", 0))),
+                    "invitor_userid": invitor_id or None,
+                    "invitor_name": (invitor_name or invitor_id) if invitor_id else None,
+                    "is_invited_by_anchor": bool(invitor_id) and invitor_id == anchor_info.get("userid")
+                }
+                if user_data.get("location"):
+                    values["location"] = user_data["location"]
+                key = f"{user_type}:{userid}"
+                fingerprint = self._fingerprint(
+                    values["watch_time"], values["is_comment"], values["is_mic"],
+                    values["invitor_userid"], json.dumps(values["location"]) if "location" in values else None
+                )
+                
+                # 创建或更新记录（同一页中重复出现时以后出现的数据为准）
+                existing = existing_records.get(key)
+                if existing is not None:
+                    viewer_id, old_fingerprint = existing
+                    if fingerprint == old_fingerprint:
+                        update_rows.pop(viewer_id, None)
+                        fingerprints.pop(key, None)
+                        unchanged_count += 1
+                        continue
+                    update_rows[viewer_id] = dict(values, id=viewer_id, updated_at=now)
+                    update_count += 1
+                elif key in new_records:
+                    for field, value in values.items():
+                        setattr(new_records[key], field, value)
+                    update_count += 1
+                else:
+                    # 创建新记录
+                    record = LiveViewer.from_api_data(user_data, living_id=live_id, user_type=user_type)
+                    for field, value in values.items():
+                        setattr(record, field, value)
+                    if anchor_info.get("live_booking_id"):
+                        record.live_booking_id = anchor_info["live_booking_id"]
+                    new_records[key] = record
+                    new_count += 1
+                fingerprints[key] = fingerprint
+                
+                # 如果仍有邀请关系需要处理
+                if invitor_id and not invitor_name:
+                    invitation_map[key] = (invitor_id, user_type)
+                
             except Exception as e:
-                logger.error(f"提交最后批次时失败: {str(e)}")
-                session.rollback()
-                raise
-        
-        return result
-    
-    def _update_record_data(self, record: LiveViewer, user_data: Dict[str, Any]) -> None:
-        """更新记录数据
+                logger.error(f"处理用户数据失败: {str(e)}")
+                import traceback
+                logger.error(f"错误详情: {traceback.format_exc()}")
+                error_count += 1
         
-        Args:
-            record: 现有记录
-            user_data: 用户数据
-        """
-        # 更新观看信息
-        record.watch_time = user_data.get('watch_time', record.watch_time)
-        record.is_comment = user_data.get('is_comment', record.is_comment)
-        record.is_mic = user_data.get('is_mic', record.is_mic)
-        
-        # 设置邀请人信息
-        if not record.invitor_userid:  # 只在没有邀请人时设置
-            invitor_id, invitor_name, is_anchor = self._identify_inviter(user_data)
-            if invitor_id:
-                record.invitor_userid = invitor_id
-                record.invitor_name = invitor_name
-                record.is_invited_by_anchor = is_anchor
-        
-        # 更新时间戳
-        record.updated_at = datetime.now()
-    
-    def _bulk_insert_records(self, records):
-        """批量插入记录
-        
-        Args:
-            records: 记录列表
-        """
-        if not records:
-            return
-
-            # 确保不会设置id字段，让数据库自动生成
-        for record in records:
-            if hasattr(record, 'id') and record.id is not None:
-                record.id = None
-        
-        with self.db_manager.get_session() as session:
-            session.bulk_save_objects(records)
-            session.commit()
-    
-    def _bulk_update_records(self, records):
-        """批量更新记录
-        
-        Args:
-            records: 记录列表
-        """
-        if not records:
-            return
-        
-        with self.db_manager.get_session() as session:
-            for record in records:
-                session.merge(record)
+        new_ids = {}
+        with self._write_guard(), self.db_manager.get_session() as session:
+            if new_records:
+                session.bulk_save_objects(list(new_records.values()))
+            if update_rows:
+                # 字段相同的行排在一起，批量更新时合并为同一条语句
+                rows = sorted(update_rows.values(), key=lambda row: "location" in row)
+                session.execute(update(LiveViewer), rows)
+            if new_records:
+                # 读取新记录的ID，本次拉取中再次出现时按主键更新
+                userids = list({record.userid for record in new_records.values()})
+                for i in range(0, len(userids), 500):
+                    for viewer_id, user_type, userid in session.query(
+                        LiveViewer.id, LiveViewer.user_type, LiveViewer.userid
+                    ).filter(LiveViewer.living_id == live_id, LiveViewer.userid.in_(userids[i:i + 500])):
+                        key = f"{user_type}:{userid}"
+                        if key in new_records:
+                            new_ids[key] = viewer_id
+            self._save_checkpoint(
+                session, livingid, next_key, result["pages"] + 1,
+                result["internal_count"] + counts[1], result["external_count"] + counts[2]
+            )
             session.commit()
-    
-    def _commit_batch(self, new_batch, update_batch):
-        """提交批量操作
         
-        Args:
-            new_batch: 新记录列表
-            update_batch: 需要更新的记录列表
-        """
-        try:
-            if new_batch:
-                self._bulk_insert_records(new_batch)
-            if update_batch:
-                self._bulk_update_records(update_batch)
-        except Exception as e:
-            logger.error(f"批量提交失败: {str(e)}")
-            import traceback
-            logger.error(f"错误详情: {traceback.format_exc()}")
-            raise
+        for key, fingerprint in fingerprints.items():
+            viewer_id = new_ids.get(key) if key in new_records else existing_records[key][0]
+            if viewer_id is not None:
+                existing_records[key] = (viewer_id, fingerprint)
+        result["pages"] += 1
+        result["internal_count"] += counts[1]
+        result["external_count"] += counts[2]
+        result["new_count"] += new_count
+        result["update_count"] += update_count
+        result["unchanged_count"] += unchanged_count
+        result["error_count"] += error_count
+        result["invitation_map"].update(invitation_map)
     
     def _process_all_invitations(self, invitation_map):
         """批量处理所有邀请关系
@@ -794,9 +890,12 @@ class LiveViewerManager:
         
         Args:
             invitation_map: 邀请关系映射表 {key: (inviter_id, user_type)}
+            
+        Returns:
+            int: 更新的记录数
         """
         if not invitation_map:
-            return
+            return 0
         
         start_time = time.time()
         logger.info(f"开始处理 {len(invitation_map)} 个邀请关系...")
@@ -847,12 +946,14 @@ class LiveViewerManager:
                         }
                         continue
                         
-                    # 尝试从预加载的用户模型中查找
+                    # 尝试从预加载的用户模型和已拉取观众的名称中查找
                     user_info = self._cache["user_map"].get(inviter_id)
-                    if user_info:
+                    inviter_name = user_info["name"] if user_info else \
+                        self._cache["viewer_names"].get(f"{inviter_type}:{inviter_id}")
+                    if inviter_name:
                         inviter_records[f"{inviter_type}:{inviter_id}"] = {
                             "userid": inviter_id,
-                            "name": user_info["name"]
+                            "name": inviter_name
                         }
                         continue
                         
@@ -897,26 +998,29 @@ class LiveViewerManager:
                             "invitor_name": inviter_name,
                             "is_anchor_invitation": is_anchor_invitation
                         })
-                        update_count += 1
                         
                         # 达到批处理大小时执行批量更新
                         if len(batch_updates) >= MAX_BATCH_SIZE:
-                            self._execute_batch_invitation_update(session, batch_updates)
-                            logger.info(f"已批量更新 {len(batch_updates)} 条邀请关系")
+                            if self._execute_batch_invitation_update(session, batch_updates):
+                                update_count += len(batch_updates)
+                                logger.info(f"已批量更新 {len(batch_updates)} 条邀请关系")
                             batch_updates = []
                 
                 # 处理剩余的批次
                 if batch_updates:
-                    self._execute_batch_invitation_update(session, batch_updates)
-                    logger.info(f"已批量更新剩余 {len(batch_updates)} 条邀请关系")
+                    if self._execute_batch_invitation_update(session, batch_updates):
+                        update_count += len(batch_updates)
+                        logger.info(f"已批量更新剩余 {len(batch_updates)} 条邀请关系")
                 
                 duration = time.time() - start_time
                 logger.info(f"邀请关系处理完成，更新了 {update_count} 条记录，耗时 {duration:.2f} 秒")
+                return update_count
                 
         except Exception as e:
             logger.error(f"处理邀请关系失败: {str(e)}")
             import traceback
             logger.error(f"错误详情: {traceback.format_exc()}")
+            return update_count
     
     def _execute_batch_invitation_update(self, session, batch_updates):
         """执行批量邀请关系更新
@@ -926,9 +1030,12 @@ class LiveViewerManager:
         Args:
             session: 数据库会话
             batch_updates: 批量更新数据
+            
+        Returns:
+            bool: 是否更新成功
         """
         if not batch_updates:
-            return
+            return False
         
         try:
             # 构建批量更新SQL
@@ -966,10 +1073,12 @@ class LiveViewerManager:
             
             session.execute(text(sql))
             session.commit()
+            return True
             
         except Exception as e:
             logger.error(f"执行批量邀请关系更新失败: {str(e)}")
             session.rollback()
+            return False
     
     def get_stats(self) -> dict:
         """获取统计信息"""
@@ -984,6 +1093,7 @@ class LiveViewerManager:
         logger.info(f"外部观众: {stats['external_viewers']}")
         logger.info(f"总签到数: {stats['sign_count']}")
         logger.info(f"成功处理的记录数: {stats['success_count']}")
+        logger.info(f"新增/更新/未变化: {stats['new_viewers']}/{stats['updated_viewers']}/{stats['unchanged_viewers']}")
         logger.info(f"处理失败的记录数: {stats['error_count']}")
         logger.info(f"已处理批次数: {stats['processed_batches']}")
         
@@ -1173,12 +1283,6 @@ class LiveViewerManager:
         if invitor_id == anchor_info.get("userid"):
             return invitor_id, anchor_info.get("name"), True
         
-        # 2.2 检查当前直播数据库观看人员信息
-        existing_viewers = self._cache.get("existing_viewers", {})
-        if invitor_id in existing_viewers:
-            viewer = existing_viewers[invitor_id]
-            return invitor_id, viewer.name, False
-        
         # 2.3 检查用户users模型
         user_map = self._cache.get("user_map", {})
         if invitor_id in user_map:
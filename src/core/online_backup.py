@@ -0,0 +1,194 @@
+import os
+import sqlite3
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Optional, Callable
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BackupCancelled(Exception):
+    """备份被取消"""
+
+
+class _TooManyRestarts(Exception):
+    """分步复制被源库写入反复打断"""
+
+
+class OnlineBackup:
+    """SQLite在线热备份
+
+    使用 sqlite3.Connection.backup 分步复制数据库页，每步之间释放读锁，
+    备份期间应用可以继续读写；复制过程中源库被其他连接修改时，SQLite
+    会自动从头重新复制，保证得到一致的快照。写入频繁导致反复重新复制时，
+    改为一步复制剩余内容（只在复制期间持有读锁）。压缩时按块流式写入zip，
+    不需要把整个数据库读入内存。
+
+    进度回调签名为 callback(stage, done, total)：
+    stage 为 "backup"（done/total 为页数）或 "compress"（done/total 为字节数）。
+    """
+
+    PAGES_PER_STEP = 1024          # 每步复制的页数（默认页大小4KB时约4MB）
+    STEP_SLEEP = 0.005             # 每步之间让出锁的时间(秒)
+    COPY_CHUNK = 1024 * 1024       # 压缩时每次读取的字节数
+    MAX_RESTARTS = 3               # 分步复制最多重新开始的次数，超过后改为一步复制
+
+    def __init__(
+        self,
+        source_path: str,
+        pages_per_step: Optional[int] = None,
+        progress_callback: Optional[Callable[[str, int, int], None]] = None
+    ):
+        self.source_path = source_path
+        self.pages_per_step = pages_per_step or self.PAGES_PER_STEP
+        self.progress_callback = progress_callback
+        self._cancelled = threading.Event()
+        self._restarts = 0
+        self._last_remaining = None
+
+    def cancel(self):
+        """取消备份，已生成的临时文件会被删除"""
+        self._cancelled.set()
+
+    def _report(self, stage: str, done: int, total: int):
+        if self.progress_callback:
+            try:
+                self.progress_callback(stage, done, total)
+            except Exception as e:
+                logger.error(f"备份进度回调失败: {str(e)}")
+
+    def _on_step(self, status, remaining, total):
+        if self._cancelled.is_set():
+            raise BackupCancelled("备份已取消")
+        # 剩余页数变多说明源库在复制期间被修改，SQLite从头重新复制
+        if self._last_remaining is not None and remaining > self._last_remaining:
+            self._restarts += 1
+            if self._restarts > self.MAX_RESTARTS:
+                raise _TooManyRestarts()
+        self._last_remaining = remaining
+        self._report("backup", total - remaining, total)
+
+    def _on_final_step(self, status, remaining, total):
+        self._report("backup", total - remaining, total)
+
+    def backup_to(self, target_path: str) -> str:
+        """将数据库快照写入 target_path
+
+        先写入 target_path + ".part"，完成后再重命名，中途失败不会留下不完整的备份。
+
+        Returns:
+            str: 备份文件路径
+        """
+        if not os.path.exists(self.source_path):
+            raise FileNotFoundError(f"数据库文件不存在: {self.source_path}")
+
+        part_path = f"{target_path}.part"
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+        started = time.perf_counter()
+        self._restarts = 0
+        self._last_remaining = None
+        source = sqlite3.connect(f"{Path(self.source_path).resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+        target = sqlite3.connect(part_path)
+        try:
+            try:
+                source.backup(target, pages=self.pages_per_step, progress=self._on_step, sleep=self.STEP_SLEEP)
+            except _TooManyRestarts:
+                logger.warning(f"备份期间数据库写入频繁，已重新复制 {self.MAX_RESTARTS} 次，改为一步复制")
+                self._last_remaining = None
+                source.backup(target, pages=-1, progress=self._on_final_step)
+        except BaseException:
+            target.close()
+            source.close()
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        target.close()
+        source.close()
+
+        os.replace(part_path, target_path)
+        logger.info(
+            f"在线备份完成: {target_path}, 耗时 {time.perf_counter() - started:.2f}s"
+            + (f", 源库变更导致重新复制 {self._restarts} 次" if self._restarts else "")
+        )
+        return target_path
+
+    def backup_to_zip(self, zip_path: str, arcname: Optional[str] = None) -> str:
+        """将数据库快照流式压缩到 zip_path
+
+        快照先写入zip同目录下的临时文件，再分块写入压缩包，完成后删除临时文件。
+
+        Args:
+            zip_path: 压缩包路径
+            arcname: 压缩包内的文件名，默认为去掉 .zip 后缀的文件名
+
+        Returns:
+            str: 压缩包路径
+        """
+        arcname = arcname or os.path.basename(zip_path[:-4] if zip_path.endswith(".zip") else zip_path)
+        snapshot_path = f"{zip_path}.snapshot"
+        part_path = f"{zip_path}.part"
+        try:
+            self.backup_to(snapshot_path)
+
+            total = os.path.getsize(snapshot_path)
+            done = 0
+            with zipfile.ZipFile(part_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+                with open(snapshot_path, "rb") as src, zipf.open(arcname, "w", force_zip64=True) as dst:
+                    while True:
+                        if self._cancelled.is_set():
+                            raise BackupCancelled("备份已取消")
+                        chunk = src.read(self.COPY_CHUNK)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        done += len(chunk)
+                        self._report("compress", done, total)
+            os.replace(part_path, zip_path)
+            return zip_path
+        finally:
+            for path in (snapshot_path, part_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def run(self, target_path: str, compress: bool = False) -> str:
+        """执行备份，compress 为 True 时 target_path 为压缩包路径"""
+        return self.backup_to_zip(target_path) if compress else self.backup_to(target_path)
+
+    def start(
+        self,
+        target_path: str,
+        compress: bool = False,
+        done_callback: Optional[Callable[[Optional[str], Optional[Exception]], None]] = None
+    ) -> threading.Thread:
+        """在后台线程中执行备份
+
+        Args:
+            target_path: 备份文件路径
+            compress: 是否压缩
+            done_callback: 完成回调 callback(备份路径, 异常)，成功时异常为None
+
+        Returns:
+            threading.Thread: 备份线程
+        """
+        def worker():
+            try:
+                path = self.run(target_path, compress)
+            except Exception as e:
+                if isinstance(e, BackupCancelled):
+                    logger.info(f"备份已取消: {target_path}")
+                else:
+                    logger.error(f"在线备份失败: {str(e)}")
+                if done_callback:
+                    done_callback(None, e)
+                return
+            if done_callback:
+                done_callback(path, None)
+
+        thread = threading.Thread(target=worker, name="online-backup", daemon=True)
+        thread.start()
+        return thread
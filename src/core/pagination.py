@@ -0,0 +1,168 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, false, tuple_
+
+
+class KeysetPaginator:
+    """键集(seek)分页器
+
+    下一页从上一页最后一行的排序键之后开始读取（WHERE (键...) < (游标...) ... LIMIT n），
+    不使用 OFFSET，任意页深度的翻页成本相同：
+    - 每页的起始游标保存在游标栈中，上一页/回到已访问页直接取回游标
+    - 多读一行判断是否还有下一页，不依赖总数
+    - 总数只用于显示页码，按查询语句缓存，翻页时不重复 COUNT
+    """
+
+    COUNT_TTL = 60  # 总数缓存时间(秒)
+
+    def __init__(self, sort_keys: Sequence[Tuple[Any, bool]], page_size: int = 20, count_ttl: Optional[int] = None):
+        """初始化分页器
+
+        Args:
+            sort_keys: [(排序列, 是否降序)]，方向必须一致；只有首列允许为 NULL，最后一列必须唯一（通常为主键 id）
+            page_size: 每页记录数
+            count_ttl: 总数缓存时间(秒)
+        """
+        directions = {descending for _, descending in sort_keys}
+        if len(directions) != 1:
+            raise ValueError("键集分页的排序方向必须一致")
+        self.columns = [column for column, _ in sort_keys]
+        self.descending = directions.pop()
+        self.page_size = page_size
+        self.count_ttl = self.COUNT_TTL if count_ttl is None else count_ttl
+        self.has_next = False
+        self._cursors: List[Optional[Tuple]] = [None]  # 第 i+1 页的起始游标
+        self._count_cache: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    # ---------- 翻页 ----------
+
+    def clone(self, keep_cursors: bool = False) -> "KeysetPaginator":
+        """排序和页大小相同、共享总数缓存的新分页器（游标独立，可在其他线程翻页）
+
+        Args:
+            keep_cursors: 是否复制当前的游标栈（在副本上继续翻页）
+        """
+        sort_keys = [(column, self.descending) for column in self.columns]
+        paginator = KeysetPaginator(sort_keys, page_size=self.page_size, count_ttl=self.count_ttl)
+        paginator._count_cache = self._count_cache
+        paginator._lock = self._lock
+        if keep_cursors:
+            paginator._cursors = list(self._cursors)
+            paginator.has_next = self.has_next
+        return paginator
+
+    def reset(self):
+        """清空游标栈（查询条件变化时调用）"""
+        self._cursors = [None]
+        self.has_next = False
+
+    def _order_by(self) -> List[Any]:
+        return [column.desc() if self.descending else column.asc() for column in self.columns]
+
+    def _compare(self, columns: List[Any], values: Tuple):
+        """行值比较 (k1, k2, ...) < (v1, v2, ...)，SQLite 可以直接在复合索引上做范围扫描"""
+        if not columns:
+            return false()
+        left = columns[0] if len(columns) == 1 else tuple_(*columns)
+        right = values[0] if len(values) == 1 else tuple_(*values)
+        return left < right if self.descending else left > right
+
+    def _seek_conditions(self, cursor: Tuple) -> List[Any]:
+        """构建"位于游标之后"的条件，按结果顺序分段
+
+        首列为 NULL 的记录无法参与行值比较，单独作为一段（SQLite 中 NULL 升序时在最前、降序时在最后）。
+        每段条件都不含 OR，保证能走索引范围扫描。
+        """
+        lead = self.columns[0]
+        if cursor[0] is not None:
+            conditions = [self._compare(self.columns, cursor)]
+            if self.descending:
+                conditions.append(lead.is_(None))
+        else:
+            conditions = [and_(lead.is_(None), self._compare(self.columns[1:], cursor[1:]))]
+            if not self.descending:
+                conditions.append(lead.isnot(None))
+        return conditions
+
+    def _key_of(self, row) -> Tuple:
+        return tuple(getattr(row, column.key) for column in self.columns)
+
+    def fetch(self, query, page: int) -> List[Any]:
+        """读取指定页
+
+        Args:
+            query: 已应用筛选条件、未排序未分页的 ORM 查询
+            page: 页码，从1开始；第1页会清空游标栈
+
+        Returns:
+            List[Any]: 当前页的记录
+        """
+        if page <= 1:
+            self.reset()
+            page = 1
+
+        # 正常的上一页/下一页都能命中游标；跳页时从最近的已知游标开始偏移
+        known = min(page, len(self._cursors))
+        cursor = self._cursors[known - 1]
+        offset = (page - known) * self.page_size
+        limit = self.page_size + 1
+        if cursor is None:
+            rows = query.order_by(*self._order_by()).offset(offset).limit(limit).all()
+        else:
+            rows = []
+            for condition in self._seek_conditions(cursor):
+                segment = query.filter(condition).order_by(*self._order_by())
+                if offset:
+                    # 跳页的偏移可能跨段，先统计本段的记录数
+                    skipped = min(offset, segment.order_by(None).count())
+                    offset -= skipped
+                    if offset:
+                        continue
+                    segment = segment.offset(skipped)
+                rows.extend(segment.limit(limit - len(rows)).all())
+                if len(rows) >= limit:
+                    break
+
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        # 记录下一页的起始游标，丢弃之后的旧游标（跳页时中间页的游标未知，不记录）
+        del self._cursors[page:]
+        if self.has_next and len(self._cursors) == page:
+            self._cursors.append(self._key_of(rows[-1]))
+        return rows
+
+    # ---------- 总数 ----------
+
+    @staticmethod
+    def _count_key(query) -> str:
+        compiled = query.statement.compile()
+        return f"{compiled}|{sorted(compiled.params.items())!r}"
+
+    def count(self, query) -> int:
+        """获取总记录数（按查询语句缓存 count_ttl 秒，期间数据变化时为近似值）"""
+        key = self._count_key(query)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._count_cache.get(key)
+            if cached and now - cached[1] < self.count_ttl:
+                return cached[0]
+
+        total = query.order_by(None).count()
+        with self._lock:
+            self._count_cache[key] = (total, now)
+        return total
+
+    def invalidate_count(self):
+        """清除总数缓存（数据变化后调用）"""
+        with self._lock:
+            self._count_cache.clear()
+
+    def total_pages(self, total: int, page: int) -> int:
+        """根据（近似）总数计算总页数，并保证与是否有下一页一致"""
+        pages = max(1, (total + self.page_size - 1) // self.page_size)
+        if self.has_next:
+            return max(pages, page + 1)
+        return page
@@ -0,0 +1,252 @@
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+import time
+import pandas as pd
+from sqlalchemy import text
+from src.utils.logger import get_logger
+from src.models.live_reward_record import RewardRuleType
+
+logger = get_logger(__name__)
+
+
+class RewardEngine:
+    """红包奖励计算引擎
+
+    与界面无关，按列（整场直播的观众集合）评估奖励规则：
+    - 签到次数：签到记录数，没有签到记录时使用观众记录上的 sign_count
+    - 观看时长：live_viewers.watch_time
+    - 观看场次：同一用户在本次选中直播中出现的场次
+    评估与写入都在数据库中以集合语句完成，不在 Python 中逐条处理观众。
+    """
+
+    REWARD_STATUS = "批量计算"
+
+    # 规则类型 -> 参与判断的条件及组合方式
+    RULE_CONDITIONS = {
+        RewardRuleType.SIGN: (("sign",), "AND"),
+        RewardRuleType.WATCH: (("watch",), "AND"),
+        RewardRuleType.COUNT: (("count",), "AND"),
+        RewardRuleType.SIGN_WATCH: (("sign", "watch"), "AND"),
+        RewardRuleType.SIGN_COUNT: (("sign", "count"), "AND"),
+        RewardRuleType.WATCH_COUNT: (("watch", "count"), "AND"),
+        RewardRuleType.ALL_OR: (("sign", "watch", "count"), "OR"),
+        RewardRuleType.ALL_AND: (("sign", "watch", "count"), "AND"),
+    }
+
+    CONDITION_SQL = {
+        "sign": "e.sign_count >= e.rule_sign_count",
+        "watch": "e.watch_time >= e.rule_watch_time",
+        "count": "e.watch_count >= :rule_watch_count",
+    }
+
+    def __init__(self, db_manager):
+        """初始化奖励计算引擎
+
+        Args:
+            db_manager: 数据库管理器
+        """
+        self.db_manager = db_manager
+
+    def _build_query(
+        self,
+        live_rules: List[Dict[str, Any]],
+        rule_type: RewardRuleType,
+        rule_watch_count: int
+    ) -> Tuple[str, Dict[str, Any]]:
+        """构建评估查询
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: (以 evaluated 命名的 CTE 语句片段, 参数)
+        """
+        params: Dict[str, Any] = {"rule_watch_count": rule_watch_count}
+        rule_rows = []
+        for i, rule in enumerate(live_rules):
+            rule_rows.append(f"(:live_{i}, :sign_{i}, :watch_{i}, :amount_{i})")
+            params[f"live_{i}"] = int(rule["id"])
+            params[f"sign_{i}"] = rule.get("rule_sign_count") or 0
+            params[f"watch_{i}"] = rule.get("rule_watch_time") or 0
+            params[f"amount_{i}"] = rule.get("reward_amount") or 0.0
+        live_ids = ", ".join(f":live_{i}" for i in range(len(live_rules)))
+
+        conditions, joiner = self.RULE_CONDITIONS[rule_type]
+        eligible_sql = f" {joiner} ".join(f"({self.CONDITION_SQL[name]})" for name in conditions)
+
+        sql = f"""
+            WITH rules(living_id, rule_sign_count, rule_watch_time, reward_amount) AS (
+                VALUES {", ".join(rule_rows)}
+            ),
+            sign_counts AS (
+                SELECT s.viewer_id, COUNT(*) AS cnt
+                FROM live_sign_records s
+                JOIN live_viewers v ON v.id = s.viewer_id
+                WHERE v.living_id IN ({live_ids})
+                GROUP BY s.viewer_id
+            ),
+            watch_counts AS (
+                SELECT userid, COUNT(DISTINCT living_id) AS cnt
+                FROM live_viewers
+                WHERE living_id IN ({live_ids})
+                GROUP BY userid
+            ),
+            base AS (
+                SELECT
+                    v.id AS viewer_id,
+                    v.living_id,
+                    v.userid,
+                    v.user_type,
+                    COALESCE(v.watch_time, 0) AS watch_time,
+                    CASE
+                        WHEN COALESCE(sc.cnt, 0) > 0 THEN sc.cnt
+                        WHEN v.is_signed THEN COALESCE(v.sign_count, 0)
+                        ELSE 0
+                    END AS sign_count,
+                    COALESCE(wc.cnt, 0) AS watch_count,
+                    r.rule_sign_count,
+                    r.rule_watch_time,
+                    r.reward_amount AS rule_amount
+                FROM live_viewers v
+                JOIN rules r ON r.living_id = v.living_id
+                LEFT JOIN sign_counts sc ON sc.viewer_id = v.id
+                LEFT JOIN watch_counts wc ON wc.userid = v.userid
+            ),
+            evaluated AS (
+                SELECT e.*, CASE WHEN {eligible_sql} THEN 1 ELSE 0 END AS is_reward_eligible
+                FROM base e
+            )
+        """
+        return sql, params
+
+    def evaluate(
+        self,
+        live_rules: List[Dict[str, Any]],
+        rule_type: RewardRuleType = RewardRuleType.ALL_AND,
+        rule_watch_count: int = 0
+    ) -> pd.DataFrame:
+        """评估奖励资格（不写入数据库）
+
+        Args:
+            live_rules: [{"id": 直播记录ID, "rule_sign_count": ..., "rule_watch_time": 秒, "reward_amount": ...}]
+            rule_type: 奖励规则方式
+            rule_watch_count: 同一观众最少观看场次
+
+        Returns:
+            pd.DataFrame: 每个观众一行，包含评估指标、is_reward_eligible 和实际奖励金额 reward_amount
+        """
+        if not live_rules:
+            return pd.DataFrame()
+
+        rule_type = RewardRuleType.from_string(rule_type)
+        sql, params = self._build_query(live_rules, rule_type, rule_watch_count)
+        sql += """
+            SELECT *, CASE WHEN is_reward_eligible = 1 THEN rule_amount ELSE 0.0 END AS reward_amount
+            FROM evaluated
+        """
+        with self.db_manager.get_session() as session:
+            result = session.execute(text(sql), params)
+            df = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        if not df.empty:
+            df["is_reward_eligible"] = df["is_reward_eligible"].astype(bool)
+        return df
+
+    def calculate(
+        self,
+        live_rules: List[Dict[str, Any]],
+        rule_type: RewardRuleType = RewardRuleType.ALL_AND,
+        rule_watch_count: int = 0,
+        batch_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """计算奖励并写入数据库
+
+        在一个事务内：删除选中直播的旧奖励记录，按评估结果插入新的奖励记录，
+        再用一条更新语句回写 live_viewers 的 is_reward_eligible/reward_amount/reward_status。
+
+        Args:
+            live_rules: 同 evaluate
+            rule_type: 奖励规则方式
+            rule_watch_count: 同一观众最少观看场次
+            batch_id: 计算批次标识
+
+        Returns:
+            Dict[str, Any]: {"total", "eligible", "total_amount", "per_live", "batch_id", "duration"}
+        """
+        start_time = time.time()
+        result = {"total": 0, "eligible": 0, "total_amount": 0.0, "per_live": {}, "batch_id": batch_id, "duration": 0}
+        if not live_rules:
+            return result
+
+        rule_type = RewardRuleType.from_string(rule_type)
+        now = datetime.now()
+        sql, params = self._build_query(live_rules, rule_type, rule_watch_count)
+        params.update({
+            "rule_type": rule_type.value,
+            "batch_id": batch_id,
+            "reward_status": self.REWARD_STATUS,
+            "now": now
+        })
+        live_ids = ", ".join(f":live_{i}" for i in range(len(live_rules)))
+
+        with self.db_manager.get_session() as session:
+            # 1. 删除旧的奖励记录
+            deleted = session.execute(
+                text(f"DELETE FROM live_reward_records WHERE living_id IN ({live_ids})"), params
+            ).rowcount
+            logger.info(f"删除旧奖励记录 {deleted} 条")
+
+            # 2. 插入新的奖励记录（live_reward_records.reward_amount 记录规则金额）
+            session.execute(text(sql + """
+                INSERT INTO live_reward_records (
+                    living_id, live_viewer_id, rule_type, rule_sign_count, rule_watch_time,
+                    rule_watch_count, calculate_batch, reward_amount, is_reward_eligible,
+                    created_at, updated_at
+                )
+                SELECT
+                    living_id, viewer_id, :rule_type, rule_sign_count, rule_watch_time,
+                    :rule_watch_count, :batch_id, rule_amount, is_reward_eligible,
+                    :now, :now
+                FROM evaluated
+            """), params)
+
+            # 3. 回写观众记录（live_viewers.reward_amount 记录合格后的实际金额）
+            session.execute(text(f"""
+                UPDATE live_viewers
+                SET is_reward_eligible = COALESCE((
+                        SELECT rr.is_reward_eligible FROM live_reward_records rr
+                        WHERE rr.live_viewer_id = live_viewers.id AND rr.living_id = live_viewers.living_id
+                    ), 0),
+                    reward_amount = COALESCE((
+                        SELECT CASE WHEN rr.is_reward_eligible THEN rr.reward_amount ELSE 0.0 END
+                        FROM live_reward_records rr
+                        WHERE rr.live_viewer_id = live_viewers.id AND rr.living_id = live_viewers.living_id
+                    ), 0.0),
+                    reward_status = :reward_status,
+                    updated_at = :now
+                WHERE living_id IN ({live_ids})
+            """), params)
+
+            # 4. 汇总
+            rows = session.execute(text(f"""
+                SELECT living_id,
+                       COUNT(*) AS total,
+                       SUM(CASE WHEN is_reward_eligible THEN 1 ELSE 0 END) AS eligible,
+                       SUM(CASE WHEN is_reward_eligible THEN reward_amount ELSE 0 END) AS total_amount
+                FROM live_reward_records
+                WHERE living_id IN ({live_ids})
+                GROUP BY living_id
+            """), params).fetchall()
+
+        for row in rows:
+            result["per_live"][row.living_id] = {
+                "total": row.total,
+                "eligible": row.eligible or 0,
+                "total_amount": float(row.total_amount or 0)
+            }
+            result["total"] += row.total
+            result["eligible"] += row.eligible or 0
+            result["total_amount"] += float(row.total_amount or 0)
+
+        result["duration"] = round(time.time() - start_time, 3)
+        logger.info(
+            f"奖励计算完成: 批次 {batch_id}, 处理 {result['total']} 条, 符合条件 {result['eligible']} 人, "
+            f"总金额 {result['total_amount']:.2f}, 耗时 {result['duration']} 秒"
+        )
+        return result
@@ -8,6 +8,8 @@ from src.models.live_viewer import LiveViewer, UserSource
 from src.models.live_booking import LiveBooking
 from src.models.living import Living
 from src.models.live_sign_record import LiveSignRecord
+from src.core.viewer_facets import ViewerFacetIndex
+from src.core.viewer_records import iter_viewer_records
 import time
 import concurrent.futures
 import threading
@@ -91,35 +93,31 @@ class SignImportManager:
             sheet_names = excel.sheet_names
             logger.debug(f"Excel文件包含以下sheet: {sheet_names}")
             
-            # 一次性加载所有相关的LiveViewer记录，避免后续重复查询
-            existing_records = session.query(LiveViewer).filter_by(living_id=live.id).all()
-            logger.debug(f"当前直播已有 {len(existing_records)} 条签到记录")
-            
-            # 创建姓名到ID的映射，只传递基本数据类型（避免session对象）
+            # 一次性读取当前直播观众的ID和名称，创建姓名到ID的映射
+            # 只传递基本数据类型（避免session对象），不加载 LiveViewer 实体
             existing_name_map = {}
-            for record in existing_records:
-                # 只存储ID和其他必要的基本信息
+            for record in iter_viewer_records(
+                session, LiveViewer.living_id == live.id, fields=("id", "name", "living_id"),
+                batch_size=self.db_config.get('query_batch_size', 10000)
+            ):
                 existing_name_map[record.name.lower()] = {
                     'id': record.id,
                     'name': record.name,
                     'livingid': record.living_id
                 }
-            
-            # 获取当前直播的所有签到明细记录
-            existing_sign_records = session.query(LiveSignRecord).filter_by(living_id=live.livingid).all()
-            logger.debug(f"当前直播已有 {len(existing_sign_records)} 条签到明细记录")
-            
-            # 如果有已存在的签到明细记录，先删除它们 - 覆盖模式
-            if existing_sign_records:
-                logger.debug(f"删除当前直播的 {len(existing_sign_records)} 条签到明细记录")
-                session.query(LiveSignRecord).filter_by(living_id=live.livingid).delete()
-                session.commit()
-            
-            # 重置所有签到用户的签到次数计数
-            for record in existing_records:
-                record.is_signed = False
-                record.sign_time = None
-                record.sign_count = 0
+            logger.debug(f"当前直播已有 {len(existing_name_map)} 条观众记录")
+            
+            # 删除当前直播已有的签到明细记录 - 覆盖模式
+            deleted_sign_records = session.query(LiveSignRecord).filter_by(living_id=live.livingid)\
+                .delete(synchronize_session=False)
+            if deleted_sign_records:
+                logger.debug(f"删除当前直播的 {deleted_sign_records} 条签到明细记录")
+            
+            # 重置所有观众的签到状态和签到次数（一条更新语句）
+            session.query(LiveViewer).filter(LiveViewer.living_id == live.id).update(
+                {LiveViewer.is_signed: False, LiveViewer.sign_time: None, LiveViewer.sign_count: 0},
+                synchronize_session=False
+            )
             session.commit()
             
             # 重置结果字典，添加详细日志功能
@@ -286,15 +284,15 @@ class SignImportManager:
                         for i in range(0, total_names, query_batch_size):
                             name_batch = new_viewer_names[i:i + query_batch_size]
                             
-                            new_viewers_query = session.query(LiveViewer).filter(
+                            new_viewers_query = session.query(LiveViewer.id, LiveViewer.name).filter(
                                 LiveViewer.living_id == live.id,
                                 LiveViewer.name.in_(name_batch),
                                 LiveViewer.user_source == UserSource.EXTERNAL
-                            ).all()
+                            )
                             
                             # 构建名称到ID的映射
-                            for viewer in new_viewers_query:
-                                viewer_id_map[viewer.name.lower()] = viewer.id
+                            for viewer_id, viewer_name in new_viewers_query:
+                                viewer_id_map[viewer_name.lower()] = viewer_id
                             
                             logger.debug(f"已查询 {i+len(name_batch)}/{total_names} 个新用户ID")
                     
@@ -471,6 +469,12 @@ class SignImportManager:
                 results['error_count'] += 1
                 results['error_details'].append(f"数据库操作失败: {str(e)}")
             
+            # 导入会修改签到状态并可能新增观众，刷新表头筛选值统计
+            try:
+                ViewerFacetIndex(self.db_manager).refresh(living_id)
+            except Exception as e:
+                logger.warning(f"刷新直播[{living_id}]的筛选值统计失败: {str(e)}")
+            
             # 记录详细的导入结果日志
             logger.debug(f"===== 导入签到数据完成 =====")
             logger.debug(f"成功导入: {results['success_count']} 条记录")
@@ -0,0 +1,113 @@
+from typing import Dict, List, Any, Optional, Sequence
+from sqlalchemy import select, func, case
+from src.models.live_viewer import LiveViewer
+from src.models.live_sign_record import LiveSignRecord
+
+
+class SignPivotQuery:
+    """签到轮次透视查询构建器
+
+    在 SQLite 中用条件聚合把签到记录透视为 (观众 × 第N次签到) 的宽表：
+        SELECT viewer_id, MAX(CASE WHEN sign_sequence = 1 THEN sign_time END) AS time_1, ...
+        FROM live_sign_records JOIN live_viewers ... GROUP BY viewer_id
+    生成的子查询可以直接外连接到 live_viewers 查询上，一次查询得到每个观众的全部签到轮次。
+    """
+
+    # 可透视的签到字段
+    FIELDS = {
+        "time": LiveSignRecord.sign_time,
+        "type": LiveSignRecord.sign_type,
+        "remark": LiveSignRecord.sign_remark,
+        "valid": LiveSignRecord.is_valid,
+    }
+
+    @staticmethod
+    def column_name(field: str, sequence: int) -> str:
+        """获取透视列名，例如 time_1"""
+        return f"{field}_{sequence}"
+
+    @staticmethod
+    def max_sequence(session, living_id: int) -> int:
+        """获取直播的最大签到轮次
+
+        Args:
+            session: 数据库会话
+            living_id: 直播记录ID(livings.id)
+        """
+        return session.execute(
+            select(func.max(LiveSignRecord.sign_sequence))
+            .join(LiveViewer, LiveViewer.id == LiveSignRecord.viewer_id)
+            .where(LiveViewer.living_id == living_id)
+        ).scalar() or 0
+
+    @classmethod
+    def subquery(
+        cls,
+        living_id: int,
+        max_sequence: int,
+        fields: Sequence[str] = ("time",),
+        viewer_ids: Optional[List[int]] = None
+    ):
+        """构建透视子查询
+
+        Args:
+            living_id: 直播记录ID(livings.id)
+            max_sequence: 透视的最大签到轮次
+            fields: 需要透视的字段，取值见 FIELDS
+            viewer_ids: 只透视指定观众，None表示整场直播
+
+        Returns:
+            Subquery: 列为 viewer_id、original_member_name 以及 <field>_<N>
+        """
+        columns = [
+            LiveSignRecord.viewer_id.label("viewer_id"),
+            func.min(LiveSignRecord.original_member_name).label("original_member_name"),
+        ]
+        for sequence in range(1, max_sequence + 1):
+            for field in fields:
+                columns.append(
+                    func.max(
+                        case((LiveSignRecord.sign_sequence == sequence, cls.FIELDS[field]))
+                    ).label(cls.column_name(field, sequence))
+                )
+
+        stmt = (
+            select(*columns)
+            .join(LiveViewer, LiveViewer.id == LiveSignRecord.viewer_id)
+            .where(LiveViewer.living_id == living_id)
+            .group_by(LiveSignRecord.viewer_id)
+        )
+        if viewer_ids is not None:
+            stmt = stmt.where(LiveSignRecord.viewer_id.in_(viewer_ids))
+        return stmt.subquery("sign_pivot")
+
+    @classmethod
+    def pivot_columns(cls, pivot, max_sequence: int, fields: Sequence[str] = ("time",)) -> List[Any]:
+        """获取透视子查询中的签到轮次列，用于 add_columns"""
+        return [
+            pivot.c[cls.column_name(field, sequence)]
+            for sequence in range(1, max_sequence + 1)
+            for field in fields
+        ]
+
+    @classmethod
+    def fetch(
+        cls,
+        session,
+        living_id: int,
+        fields: Sequence[str] = ("time",),
+        viewer_ids: Optional[List[int]] = None,
+        max_sequence: Optional[int] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """直接查询透视结果
+
+        Returns:
+            Dict[int, Dict[str, Any]]: {viewer_id: {"original_member_name": ..., "time_1": ..., ...}}
+        """
+        if max_sequence is None:
+            max_sequence = cls.max_sequence(session, living_id)
+        pivot = cls.subquery(living_id, max_sequence, fields, viewer_ids)
+        return {
+            row["viewer_id"]: dict(row)
+            for row in session.execute(select(pivot)).mappings()
+        }
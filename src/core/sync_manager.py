@@ -1,15 +1,21 @@
 import asyncio
-from typing import Optional, Dict, List, Any
-from datetime import datetime, timedelta
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, List, Any, Tuple
+from datetime import datetime
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 from src.utils.logger import get_logger
 from src.core.database import DatabaseManager
-from src.core.wecom_api import WeComAPI
+from src.api.wecom import WeComAPI
 from src.core.config_manager import ConfigManager
-from models.live_booking import LiveBooking
-from models.live_viewer import LiveViewer
-from models.live_viewer import LiveViewer
-from utils.cache import Cache
+from src.models.live_booking import LiveBooking
+from src.models.live_viewer import LiveViewer
+from src.models.user import User, UserRole
+from src.models.corporation import Corporation
+from src.models.sync_watermark import SyncWatermark
+from src.utils.cache import Cache
 
 logger = get_logger(__name__)
 cache = Cache()
@@ -17,6 +23,8 @@ cache = Cache()
 class SyncManager:
     """同步管理器"""
     
+    DIRECTORY_SYNC_WORKERS = 8  # 并发拉取部门成员的线程数
+    
     def __init__(self, db_manager: DatabaseManager, wecom_api: WeComAPI):
         """初始化同步管理器"""
         self.db_manager = db_manager
@@ -71,10 +79,7 @@ class SyncManager:
             
             while self.is_running:
                 try:
-                    # 同步部门数据
-                    await self._sync_departments()
-                    
-                    # 同步用户数据
+                    # 同步通讯录（部门及成员）
                     await self._sync_users()
                     
                     # 重置错误计数
@@ -103,63 +108,276 @@ class SyncManager:
             logger.error(f"同步循环异常: {str(e)}")
             self.stop_sync()
     
-    async def _sync_departments(self):
-        """同步部门数据"""
+    async def _sync_users(self):
+        """同步用户数据"""
         try:
-            # 获取部门列表
-            departments = self.wecom_api.get_department_list()
-            if not departments:
-                return
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.sync_directory)
+        except Exception as e:
+            logger.error(f"同步用户数据失败: {str(e)}")
+    
+    def sync_directory(self, max_workers: int = None) -> Dict[str, Any]:
+        """同步企业微信通讯录到用户表
+        
+        1. 拉取全量部门，并发拉取各部门成员（按 userid 去重）
+        2. 与本地 users 表按内容摘要比对，只保留新增/变更/离职的成员
+        3. 在一个事务中批量写入，并记录同步水位
+        
+        Args:
+            max_workers: 并发拉取部门成员的线程数，默认 DIRECTORY_SYNC_WORKERS
             
-            # 更新部门数据
-            for dept in departments:
-                await self._update_department(dept)
+        Returns:
+            Dict[str, Any]: 同步统计信息
+        """
+        start_time = time.time()
+        stats = {
+            "departments": 0,
+            "members": 0,
+            "inserted": 0,
+            "updated": 0,
+            "deactivated": 0,
+            "unchanged": 0,
+            "skipped": 0,
+            "failed_departments": 0,
+            "duration": 0.0
+        }
+        
+        if not self.wecom_api:
+            logger.error("企业微信API未初始化，无法同步通讯录")
+            return stats
+        
+        corpid = self.wecom_api.corpid
+        with self.db_manager.get_session() as session:
+            corp = session.query(Corporation).filter_by(corp_id=corpid).first()
+            corpname = corp.name if corp else None
+        
+        # 1. 拉取部门和成员
+        departments = self.wecom_api.get_department_list()
+        stats["departments"] = len(departments)
+        members, failed = self._fetch_directory_members(
+            [dept["id"] for dept in departments],
+            max_workers or self.DIRECTORY_SYNC_WORKERS
+        )
+        stats["members"] = len(members)
+        stats["failed_departments"] = failed
+        
+        # 2. 比对并批量写入
+        inserts, updates, deactivations, unchanged, skipped = self._diff_directory_members(
+            members, corpid, corpname, allow_deactivate=(failed == 0)
+        )
+        stats["inserted"] = len(inserts)
+        stats["updated"] = len(updates)
+        stats["deactivated"] = len(deactivations)
+        stats["unchanged"] = unchanged
+        stats["skipped"] = skipped
+        
+        with self.db_manager.get_session() as session:
+            if inserts:
+                session.execute(insert(User), inserts)
+            if updates or deactivations:
+                session.execute(update(User), updates + deactivations)
             
-            logger.info(f"同步部门数据完成，共 {len(departments)} 个部门")
+            self._save_directory_watermark(session, corpid, members, stats)
+        
+        stats["duration"] = round(time.time() - start_time, 2)
+        
+        logger.info(
+            f"通讯录同步完成: 部门 {stats['departments']} 个, 成员 {stats['members']} 人, "
+            f"新增 {stats['inserted']}, 更新 {stats['updated']}, 停用 {stats['deactivated']}, "
+            f"未变化 {stats['unchanged']}, 耗时 {stats['duration']} 秒"
+        )
+        return stats
+    
+    def _fetch_directory_members(self, department_ids: List[int], max_workers: int) -> Tuple[Dict[str, Dict], int]:
+        """并发拉取部门成员
+        
+        Args:
+            department_ids: 部门ID列表
+            max_workers: 最大并发数
             
-        except Exception as e:
-            logger.error(f"同步部门数据失败: {str(e)}")
+        Returns:
+            Tuple[Dict[str, Dict], int]: ({userid: 成员信息}, 拉取失败的部门数)
+        """
+        members = {}
+        failed = 0
+        
+        # 预先获取token，避免多个线程同时刷新
+        _ = self.wecom_api.access_token
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="directory-sync") as executor:
+            futures = {
+                executor.submit(self.wecom_api.get_department_users, dept_id): dept_id
+                for dept_id in department_ids
+            }
+            for future in as_completed(futures):
+                dept_id = futures[future]
+                try:
+                    for member in future.result():
+                        userid = member.get("userid")
+                        if userid and userid not in members:
+                            members[userid] = member
+                except Exception as e:
+                    failed += 1
+                    logger.warning(f"拉取部门[{dept_id}]成员失败: {str(e)}")
+        
+        return members, failed
     
-    async def _sync_users(self):
-        """同步用户数据"""
-        try:
-            # 获取部门列表
-            departments = self.wecom_api.get_department_list()
-            if not departments:
-                return
+    @staticmethod
+    def _member_digest(name: Optional[str], wecom_code: Optional[str], corpname: Optional[str],
+                       corpid: Optional[str], is_active: Optional[bool]) -> str:
+        """计算成员内容摘要
+        
+        本地行和企业微信成员投影到相同字段后计算，摘要相同即视为无变化
+        """
+        content = "\x1f".join([
+            name or "",
+            wecom_code or "",
+            corpname or "",
+            corpid or "",
+            "" if is_active is None else str(int(bool(is_active)))
+        ])
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+    
+    def _diff_directory_members(self, members: Dict[str, Dict], corpid: str, corpname: Optional[str],
+                                allow_deactivate: bool = True) -> Tuple[List[Dict], List[Dict], List[Dict], int, int]:
+        """比对企业微信成员与本地用户表
+        
+        只有由通讯录同步维护的账号（普通用户且未设置登录密码）才会同步启用状态，
+        手工创建的管理员账号只更新姓名等基础信息。
+        
+        Args:
+            members: {userid: 成员信息}
+            corpid: 企业ID
+            corpname: 企业名称
+            allow_deactivate: 是否停用已不在通讯录中的成员（部门拉取不完整时应关闭）
             
-            # 同步每个部门的用户
-            for dept in departments:
-                users = self.wecom_api.get_department_users(dept["id"])
-                if not users:
+        Returns:
+            Tuple: (新增行, 更新行, 停用行, 未变化数, 跳过数)
+        """
+        inserts, updates, deactivations = [], [], []
+        unchanged = skipped = 0
+        
+        with self.db_manager.get_session() as session:
+            rows = session.query(
+                User.userid, User.login_name, User.name, User.wecom_code, User.corpname,
+                User.corpid, User.is_active, User.role, User.password_hash
+            ).all()
+        
+        by_wecom_code = {}
+        by_login_name = {}
+        for row in rows:
+            by_login_name[row.login_name] = row
+            if row.wecom_code and (row.corpid == corpid or row.wecom_code not in by_wecom_code):
+                by_wecom_code[row.wecom_code] = row
+        
+        def is_managed(row) -> bool:
+            return row.role == UserRole.NORMAL.value and not row.password_hash
+        
+        now = datetime.now()
+        for userid, member in members.items():
+            name = member.get("name") or userid
+            is_active = member.get("status", 1) == 1
+            row = by_wecom_code.get(userid)
+            if row is None:
+                row = by_login_name.get(userid)
+                if row is not None and row.corpid and row.corpid != corpid:
+                    # 登录名已被其他企业的账号占用
+                    skipped += 1
                     continue
-                
-                # 更新用户数据
-                for user in users:
-                    await self._update_user(user)
             
-            logger.info("同步用户数据完成")
+            if row is None:
+                inserts.append({
+                    "login_name": userid,
+                    "name": name,
+                    "role": UserRole.NORMAL.value,
+                    "corpname": corpname,
+                    "corpid": corpid,
+                    "wecom_code": userid,
+                    "is_admin": False,
+                    "is_active": is_active,
+                    "created_at": now,
+                    "updated_at": now
+                })
+                continue
             
-        except Exception as e:
-            logger.error(f"同步用户数据失败: {str(e)}")
-    
-    async def _update_department(self, dept: dict):
-        """更新部门数据"""
-        try:
-            # TODO: 实现部门数据更新
-            pass
+            managed = is_managed(row)
+            local_digest = self._member_digest(
+                row.name, row.wecom_code, row.corpname, row.corpid,
+                row.is_active if managed else None
+            )
+            remote_digest = self._member_digest(
+                name, userid, corpname or row.corpname, corpid,
+                is_active if managed else None
+            )
+            if local_digest == remote_digest:
+                unchanged += 1
+                continue
             
-        except Exception as e:
-            logger.error(f"更新部门数据失败: {str(e)}")
+            values = {
+                "userid": row.userid,
+                "name": name,
+                "wecom_code": userid,
+                "corpname": corpname or row.corpname,
+                "corpid": corpid,
+                "updated_at": now
+            }
+            if managed:
+                values["is_active"] = is_active
+            updates.append(values)
+        
+        if allow_deactivate:
+            for row in rows:
+                if (row.corpid == corpid and row.is_active and is_managed(row)
+                        and (row.wecom_code or row.login_name) not in members):
+                    deactivations.append({
+                        "userid": row.userid,
+                        "is_active": False,
+                        "updated_at": now
+                    })
+        
+        return inserts, updates, deactivations, unchanged, skipped
     
-    async def _update_user(self, user: dict):
-        """更新用户数据"""
-        try:
-            # TODO: 实现用户数据更新
-            pass
+    def _save_directory_watermark(self, session: Session, corpid: str, members: Dict[str, Dict],
+                                  stats: Dict[str, Any]):
+        """记录通讯录同步水位
+        
+        Args:
+            session: 数据库会话
+            corpid: 企业ID
+            members: 本次拉取的成员
+            stats: 同步统计
+        """
+        directory_digest = hashlib.sha1()
+        for userid in sorted(members):
+            member = members[userid]
+            directory_digest.update(
+                f"{userid}\x1f{member.get('name', '')}\x1f{member.get('status', 1)}\x1e".encode("utf-8")
+            )
+        
+        scope = f"directory:{corpid}"
+        watermark = session.query(SyncWatermark).filter_by(scope=scope).first()
+        if not watermark:
+            watermark = SyncWatermark(scope=scope)
+            session.add(watermark)
+        
+        watermark.synced_at = datetime.now()
+        watermark.watermark = directory_digest.hexdigest()
+        watermark.item_count = len(members)
+        watermark.extra = {k: v for k, v in stats.items() if k != "duration"}
+    
+    def get_directory_watermark(self, corpid: str = None) -> Optional[Dict[str, Any]]:
+        """获取通讯录同步水位
+        
+        Args:
+            corpid: 企业ID，默认为当前API对应的企业
             
-        except Exception as e:
-            logger.error(f"更新用户数据失败: {str(e)}")
+        Returns:
+            Optional[Dict[str, Any]]: 水位信息，从未同步过则返回None
+        """
+        corpid = corpid or (self.wecom_api.corpid if self.wecom_api else None)
+        with self.db_manager.get_session() as session:
+            watermark = session.query(SyncWatermark).filter_by(scope=f"directory:{corpid}").first()
+            return watermark.to_dict() if watermark else None
     
     def sync_live_data(self, living_id: str) -> bool:
         """同步直播数据
@@ -1,6 +1,8 @@
 import time
+import threading
 from typing import Optional, Dict, Any
 from src.utils.logger import get_logger
+from src.core.api_governor import ApiBudgetGovernor
 import requests
 from datetime import datetime
 
@@ -15,6 +17,8 @@ class TokenManager:
         self._corpid = None
         self._corpsecret = None
         self._agent_id = None
+        # 批量拉取时多个线程共享同一个管理器，过期后只由一个线程刷新
+        self._lock = threading.RLock()
         
         # 监控统计
         self._stats = {
@@ -66,6 +70,11 @@ class TokenManager:
             ValueError: 未设置企业凭证
             Exception: 获取 token 失败
         """
+        with self._lock:
+            return self._get_token()
+    
+    def _get_token(self) -> str:
+        """获取 access_token（调用方已持有锁）"""
         start_time = time.time()
         
         try:
@@ -90,8 +99,11 @@ class TokenManager:
                 "corpsecret": self._corpsecret
             }
             
+            governor = ApiBudgetGovernor()
+            governor.acquire(self._corpid, "gettoken")
             response = requests.get(url, params=params)
             result = response.json()
+            governor.report_result(self._corpid, "gettoken", result.get("errcode"))
             
             if result.get("errcode") == 0:
                 self._access_token = result["access_token"]
@@ -123,6 +135,12 @@ class TokenManager:
         """清除 access_token"""
         self._access_token = None
         self._expires_at = None
+    
+    def refresh_token(self) -> str:
+        """丢弃当前 access_token 并重新获取（接口返回 token 失效时调用）"""
+        with self._lock:
+            self.clear_token()
+            return self._get_token()
         
     def get_stats(self) -> dict:
         """获取统计信息
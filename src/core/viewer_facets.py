@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, insert, delete, func, cast, literal, String
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.live_viewer import LiveViewer
+from src.models.viewer_facet import ViewerFacet
+from src.models.sync_watermark import SyncWatermark
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ViewerFacetIndex:
+    """观众筛选值索引
+
+    表头筛选菜单需要某场直播某一列的全部取值及人数。大直播现场 GROUP BY 要扫描全部观众，
+    这里把结果保存在 viewer_facets 表中（按 直播, 字段, 取值 建唯一索引），菜单打开时只读取几行。
+
+    观众数据写入后（拉取观看信息、导入签到）调用 refresh() 只重算受影响直播的相关字段；
+    尚未建立索引的直播（升级前的数据）在第一次读取时建立，是否建立过记录在
+    同步水位 scope="viewer_facets:<living_id>" 中。
+    """
+
+    # 建立索引的字段：取值较少、常用于筛选的列
+    FACETS = {
+        "department": LiveViewer.department,
+        "user_type": LiveViewer.user_type,
+        "user_source": LiveViewer.user_source,
+        "invitor_userid": LiveViewer.invitor_userid,
+        "invitor_name": LiveViewer.invitor_name,
+        "is_signed": LiveViewer.is_signed,
+    }
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    @staticmethod
+    def scope_of(living_id: int) -> str:
+        return f"viewer_facets:{living_id}"
+
+    @classmethod
+    def facet_of(cls, column) -> Optional[str]:
+        """列对应的索引字段名，没有建立索引时返回 None"""
+        for name, facet_column in cls.FACETS.items():
+            if column is facet_column:
+                return name
+        return None
+
+    # ---------- 刷新 ----------
+
+    def refresh(self, living_id: int, facets: Optional[Iterable[str]] = None, session=None) -> Dict[str, int]:
+        """重算一场直播的筛选值统计
+
+        Args:
+            living_id: 直播记录ID(livings.id)
+            facets: 需要重算的字段，None 表示全部；直播尚未建立索引时总是重算全部字段
+            session: 可选的数据库会话，与观众数据的写入在同一事务中刷新时传入
+
+        Returns:
+            Dict[str, int]: {字段名: 取值个数}
+        """
+        if session is None:
+            with self.db_manager.get_session() as new_session:
+                return self._refresh(new_session, living_id, facets)
+        return self._refresh(session, living_id, facets)
+
+    def _is_built(self, session, living_id: int) -> bool:
+        return session.execute(
+            select(SyncWatermark.id).where(SyncWatermark.scope == self.scope_of(living_id))
+        ).first() is not None
+
+    def _refresh(self, session, living_id: int, facets: Optional[Iterable[str]]) -> Dict[str, int]:
+        names = list(self.FACETS) if facets is None else [name for name in facets if name in self.FACETS]
+        if facets is not None and not self._is_built(session, living_id):
+            names = list(self.FACETS)
+        if not names:
+            return {}
+
+        now = datetime.now()
+        session.execute(
+            delete(ViewerFacet).where(ViewerFacet.living_id == living_id, ViewerFacet.facet.in_(names))
+        )
+        result = {}
+        for name in names:
+            column = self.FACETS[name]
+            value = cast(column, String)
+            grouped = (
+                select(
+                    literal(living_id), literal(name), value, func.count(),
+                    literal(now), literal(now)
+                )
+                .where(LiveViewer.living_id == living_id, column.isnot(None), value != "")
+                .group_by(value)
+            )
+            result[name] = session.execute(
+                insert(ViewerFacet).from_select(
+                    ["living_id", "facet", "value", "count", "created_at", "updated_at"], grouped
+                )
+            ).rowcount
+
+        if len(names) == len(self.FACETS):
+            stmt = sqlite_insert(SyncWatermark.__table__).values(
+                scope=self.scope_of(living_id), synced_at=now, item_count=sum(result.values()),
+                created_at=now, updated_at=now
+            )
+            session.execute(stmt.on_conflict_do_update(
+                index_elements=["scope"],
+                set_={
+                    "synced_at": stmt.excluded.synced_at,
+                    "item_count": stmt.excluded.item_count,
+                    "updated_at": stmt.excluded.updated_at
+                }
+            ))
+        logger.debug(f"刷新直播[{living_id}]的筛选值统计: {result}")
+        return result
+
+    # ---------- 读取 ----------
+
+    def lookup(self, living_id: int, facet: str, limit: int = 500) -> List[Tuple[Any, int]]:
+        """读取一场直播某字段的取值及人数（按人数倒序）
+
+        Returns:
+            List[Tuple[Any, int]]: [(取值, 人数)]，取值已转换为列的 Python 类型（枚举、布尔等）
+        """
+        column = self.FACETS[facet]
+        with self.db_manager.get_session() as session:
+            if not self._is_built(session, living_id):
+                self._refresh(session, living_id, None)
+            rows = session.execute(
+                select(cast(ViewerFacet.value, column.type), ViewerFacet.count)
+                .where(ViewerFacet.living_id == living_id, ViewerFacet.facet == facet)
+                .order_by(ViewerFacet.count.desc())
+                .limit(limit)
+            ).all()
+        return [(value, count) for value, count in rows]
@@ -0,0 +1,188 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from sqlalchemy import update
+from src.core.live_viewer_manager import LiveViewerManager
+from src.models.living import Living
+from src.utils.db_monitor import SQLProfiler
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ViewerFetchOrchestrator:
+    """多场直播观看信息批量拉取调度器
+
+    每场直播使用独立的 LiveViewerManager（缓存按直播隔离），在线程池中并行执行：
+    1. 所有直播共用同一个 WeComAPI 实例，即共用 access_token 缓存和接口额度（ApiBudgetGovernor）
+    2. 拉取 get_watch_stat 分页的阶段并行，写库阶段通过 write_lock 串行（SQLite 同一时间只允许一个写事务）
+    3. 每场直播的进度、耗时和吞吐量通过 progress_callback 报告，结束后统一标记 is_viewer_fetched
+
+    拉取主要耗时在接口等待上，N 场直播的总耗时接近最慢的一场加上各场的写库时间。
+    """
+
+    FETCH_WORKERS = 8  # 同时拉取的直播数
+
+    def __init__(self, db_manager, wecom_api=None, auth_manager=None, max_workers: int = None):
+        """初始化调度器
+
+        Args:
+            db_manager: 数据库管理器
+            wecom_api: 共用的企业微信API实例，为 None 时按当前登录用户的企业创建
+            auth_manager: 认证管理器，可选
+            max_workers: 同时拉取的直播数
+        """
+        self.db_manager = db_manager
+        self.wecom_api = wecom_api
+        self.auth_manager = auth_manager
+        self.max_workers = max_workers or self.FETCH_WORKERS
+        self._write_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+    def _create_manager(self) -> LiveViewerManager:
+        manager = LiveViewerManager(self.db_manager, self.auth_manager)
+        manager.wecom_api = self.wecom_api
+        manager.write_lock = self._write_lock
+        return manager
+
+    def _ensure_api(self) -> bool:
+        """准备共用的企业微信API实例"""
+        if self.wecom_api is not None:
+            return True
+        manager = LiveViewerManager(self.db_manager, self.auth_manager)
+        if not manager._initialize_wecom_api():
+            return False
+        self.wecom_api = manager.wecom_api
+        return True
+
+    def run(
+        self,
+        livingids: Iterable[str],
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
+        """并行拉取多场直播的观看信息
+
+        Args:
+            livingids: 企业微信直播ID
+            progress_callback: progress_callback(单场进度)，在工作线程调用；单场进度包含
+                livingid、stage(waiting/collect/write/done/failed/cancelled)、viewers、duration、throughput，
+                完成后还有 inserted/updated/unchanged（新增、更新、未变化的观看记录数）
+            is_cancelled: 返回 True 时不再开始新的直播，已开始的直播在当前页写入后停止，下次拉取时从检查点继续
+
+        Returns:
+            Dict[str, Any]: 汇总统计，lives 为 {livingid: 单场进度}
+        """
+        livingids = list(dict.fromkeys(livingids))
+        start_time = time.time()
+        progress = {
+            livingid: {"livingid": livingid, "stage": "waiting", "viewers": 0, "duration": 0.0,
+                       "throughput": 0.0, "inserted": 0, "updated": 0, "unchanged": 0, "error": None}
+            for livingid in livingids
+        }
+        summary = {
+            "total": len(livingids),
+            "succeeded": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "viewers": 0,
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "duration": 0.0,
+            "throughput": 0.0,
+            "lives": progress
+        }
+        if not livingids:
+            return summary
+        if not self._ensure_api():
+            raise Exception("初始化企业微信API失败")
+
+        def notify(livingid: str, **changes):
+            with self._state_lock:
+                item = progress[livingid]
+                item.update(changes)
+                snapshot = dict(item)
+            if progress_callback is not None:
+                try:
+                    progress_callback(snapshot)
+                except Exception as e:
+                    logger.warning(f"报告直播[{livingid}]拉取进度失败: {str(e)}")
+
+        def fetch(livingid: str) -> bool:
+            if is_cancelled is not None and is_cancelled():
+                notify(livingid, stage="cancelled")
+                return False
+            live_start = time.time()
+            manager = self._create_manager()
+
+            def on_progress(_livingid, stage, count):
+                elapsed = time.time() - live_start
+                notify(livingid, stage=stage, viewers=count, duration=elapsed,
+                       throughput=count / elapsed if elapsed > 0 else 0.0)
+
+            manager.progress_callback = on_progress
+            manager.is_cancelled = is_cancelled
+            success = manager.process_viewer_info(livingid)
+            elapsed = time.time() - live_start
+            stats = manager.get_stats()
+            viewers = stats.get("total_viewers", 0) if success else progress[livingid]["viewers"]
+            if success:
+                stage = "done"
+            else:
+                stage = "cancelled" if is_cancelled is not None and is_cancelled() else "failed"
+            changes = {}
+            if success:
+                changes = {"inserted": stats.get("new_viewers", 0), "updated": stats.get("updated_viewers", 0),
+                           "unchanged": stats.get("unchanged_viewers", 0)}
+            notify(livingid, stage=stage, viewers=viewers, duration=elapsed,
+                   throughput=viewers / elapsed if elapsed > 0 else 0.0,
+                   error=None if success else (stats.get("last_error") or "拉取失败"), **changes)
+            return success
+
+        # 工作线程沿用调用方的SQL分析操作范围（接口优先级由 process_viewer_info 设置）
+        fetch = SQLProfiler().bind_action(fetch)
+        succeeded: List[str] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="viewer-fetch") as executor:
+            futures = {executor.submit(fetch, livingid): livingid for livingid in livingids}
+            for future in as_completed(futures):
+                livingid = futures[future]
+                try:
+                    if future.result():
+                        succeeded.append(livingid)
+                except Exception as e:
+                    logger.error(f"拉取直播[{livingid}]观看信息失败: {str(e)}")
+                    notify(livingid, stage="failed", error=str(e))
+
+        self._mark_fetched(succeeded)
+
+        duration = time.time() - start_time
+        for item in progress.values():
+            if item["stage"] == "done":
+                summary["viewers"] += item["viewers"]
+                for name in ("inserted", "updated", "unchanged"):
+                    summary[name] += item[name]
+            elif item["stage"] == "cancelled":
+                summary["cancelled"] += 1
+            else:
+                summary["failed"] += 1
+        summary["succeeded"] = len(succeeded)
+        summary["duration"] = duration
+        summary["throughput"] = summary["viewers"] / duration if duration > 0 else 0.0
+        logger.info(
+            f"批量拉取观看信息完成: {summary['succeeded']}/{summary['total']} 场成功，"
+            f"共 {summary['viewers']} 名观众（新增 {summary['inserted']}，更新 {summary['updated']}，"
+            f"未变化 {summary['unchanged']}），耗时 {duration:.2f} 秒，{summary['throughput']:.1f} 人/秒"
+        )
+        return summary
+
+    def _mark_fetched(self, livingids: List[str]):
+        """标记已拉取观看信息（包括没有观众的直播）"""
+        if not livingids:
+            return
+        with self._write_lock, self.db_manager.get_session() as session:
+            session.execute(
+                update(Living).where(Living.livingid.in_(livingids)).values(is_viewer_fetched=1)
+            )
+            session.commit()
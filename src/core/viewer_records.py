@@ -0,0 +1,74 @@
+from typing import Any, Iterator, List, Optional, Sequence
+from sqlalchemy import select
+from src.models.live_viewer import LiveViewer
+
+
+class ViewerRecord:
+    """观众记录的紧凑表示
+
+    批量处理整场直播的观众（签到导入、导出等）时使用，代替 LiveViewer 实体：
+    - 使用 __slots__，没有实例字典，也不进入会话的 identity map，读取时不做变更跟踪
+    - 只读取需要的列（不读取 location/device_info 等 JSON 列时也不需要解析）
+    - 只用于读取；写回用 update(LiveViewer) 的集合更新或按主键批量更新，不转换回实体
+
+    10万观众的直播，LiveViewer 实体约占 2~3 KB/条，ViewerRecord 只有 200 字节左右（不含字段值本身）。
+    """
+
+    # 可读取的字段（与 LiveViewer 列同名）
+    __slots__ = (
+        "id", "living_id", "userid", "name", "user_source", "user_type",
+        "department", "department_id", "watch_time", "is_comment", "is_mic", "access_channel",
+        "is_signed", "sign_time", "sign_count",
+        "invitor_userid", "invitor_name", "is_invited_by_anchor",
+        "is_reward_eligible", "reward_amount", "reward_status",
+    )
+    FIELDS = __slots__
+
+    def __init__(self, **values):
+        for field in self.__slots__:
+            setattr(self, field, values.get(field))
+
+    @classmethod
+    def columns(cls, fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """字段对应的 LiveViewer 列，fields 为 None 时返回全部字段"""
+        return [getattr(LiveViewer, field) for field in (fields or cls.FIELDS)]
+
+    @classmethod
+    def from_row(cls, fields: Sequence[str], row: Sequence[Any]) -> "ViewerRecord":
+        """从按 fields 顺序选择的查询结果行创建，未选择的字段为 None"""
+        record = cls.__new__(cls)
+        for field in cls.__slots__:
+            setattr(record, field, None)
+        for field, value in zip(fields, row):
+            setattr(record, field, value)
+        return record
+
+    def __repr__(self) -> str:
+        return f"<ViewerRecord(id={self.id}, userid={self.userid}, name={self.name})>"
+
+
+def iter_viewer_records(
+    session,
+    *criteria,
+    fields: Optional[Sequence[str]] = None,
+    order_by: Sequence[Any] = (),
+    batch_size: int = 2000
+) -> Iterator[ViewerRecord]:
+    """按条件逐批读取观众记录
+
+    Args:
+        session: 数据库会话
+        *criteria: 过滤条件，如 LiveViewer.living_id == live_id
+        fields: 需要的字段，None 表示 ViewerRecord.FIELDS 全部字段
+        order_by: 排序
+        batch_size: 游标每批读取的行数
+
+    Yields:
+        ViewerRecord: 观众记录
+    """
+    fields = tuple(fields or ViewerRecord.FIELDS)
+    stmt = select(*ViewerRecord.columns(fields)).where(*criteria).order_by(*order_by)
+    rows = session.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+    for row in rows:
+        yield ViewerRecord.from_row(fields, row)
+
@@ -8,10 +8,8 @@ import json
 from PySide6.QtWidgets import QApplication, QMessageBox
 from PySide6.QtGui import QIcon
 
-# UI相关导入
+# UI相关导入（初始化向导只在首次运行时需要，延迟导入）
 from .ui.windows.login_window import LoginWindow
-from .ui.components.dialogs.init_wizard import InitWizard
-from .ui.windows.main_window import MainWindow
 
 # 核心功能导入
 from .core.database import DatabaseManager
@@ -25,6 +23,9 @@ from .utils.error_handler import ErrorHandler
 # 应用上下文导入
 from .app import init_app_context
 
+# 启动耗时分析
+from .utils.startup_profiler import StartupProfiler
+
 
 def show_error_dialog(title: str, message: str):
     """显示错误对话框"""
@@ -89,6 +90,9 @@ def get_config_path():
 
 def main():
     """主程序入口"""
+    profiler = StartupProfiler()
+    profiler.start()
+    profiler.mark("主模块导入完成")
     try:
         # 安装全局异常处理器
         ErrorHandler.install_global_exception_handler()
@@ -96,6 +100,7 @@ def main():
         # 创建应用实例
         app = QApplication(sys.argv)
         app.setApplicationName("企业微信直播签到系统")
+        profiler.mark("QApplication创建完成")
 
         # 获取配置路径
         config_dir, need_init = get_config_path()
@@ -125,6 +130,7 @@ def main():
             init_app_context(db_manager, config_manager, auth_manager)
 
             # 首次运行，显示初始化向导
+            from .ui.components.dialogs.init_wizard import InitWizard
             wizard = InitWizard(db_manager, config_manager, auth_manager)
             if wizard.exec() != InitWizard.Accepted:
                 logger.info("用户取消初始化")
@@ -167,6 +173,7 @@ def main():
 
             # 正常启动时只检查并创建缺失的表
             db_manager.init_db(force_recreate=False)
+            profiler.mark("数据库初始化完成")
             
             # 初始化认证管理器
             auth_manager = AuthManager(db_manager)
@@ -176,7 +183,9 @@ def main():
 
         # 显示登录窗口
         login_window = LoginWindow(auth_manager, config_manager, db_manager)
+        profiler.mark("登录窗口创建完成")
         login_window.show()
+        profiler.on_first_window()
 
         # 运行应用
         result = app.exec()
@@ -10,6 +10,9 @@ from .operation_log import OperationLog
 from .ip_record import IPRecord
 from .live_sign_record import LiveSignRecord
 from .live_reward_record import LiveRewardRecord, RewardRuleType
+from .sync_watermark import SyncWatermark
+from .external_contact import ExternalContact
+from .viewer_facet import ViewerFacet
 
 __all__ = [
     "BaseModel",
@@ -28,5 +31,8 @@ __all__ = [
     "IPRecord",
     "LiveSignRecord",
     "LiveRewardRecord",
-    "RewardRuleType"
+    "RewardRuleType",
+    "SyncWatermark",
+    "ExternalContact",
+    "ViewerFacet"
 ] 
\ No newline at end of file
@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, Integer, String, DateTime
+from .base import BaseModel
+
+
+class ExternalContact(BaseModel):
+    """外部联系人缓存模型
+
+    缓存从企业微信拉取的外部联系人信息，用于解析外部观众和邀请人的名称
+    """
+    __tablename__ = "external_contacts"
+
+    external_userid = Column(String(64), unique=True, nullable=False, index=True, comment="外部联系人ID")
+    name = Column(String(100), nullable=True, comment="外部联系人名称")
+    corp_name = Column(String(100), nullable=True, comment="外部联系人所在企业")
+    type = Column(Integer, nullable=True, comment="外部联系人类型：1-微信用户，2-企业微信用户")
+    fetched_at = Column(DateTime, nullable=False, default=datetime.now, comment="从企业微信拉取的时间")
+
+    def __init__(
+        self,
+        external_userid: str,
+        name: Optional[str] = None,
+        corp_name: Optional[str] = None,
+        type: Optional[int] = None,
+        fetched_at: Optional[datetime] = None
+    ):
+        self.external_userid = external_userid
+        self.name = name
+        self.corp_name = corp_name
+        self.type = type
+        self.fetched_at = fetched_at or datetime.now()
+
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        base_dict = super().to_dict()
+        base_dict.update({
+            "external_userid": self.external_userid,
+            "name": self.name,
+            "corp_name": self.corp_name,
+            "type": self.type,
+            "fetched_at": self.fetched_at.strftime("%Y-%m-%d %H:%M:%S") if self.fetched_at else None
+        })
+        return base_dict
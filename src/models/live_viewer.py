@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, Dict, Any, List
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, JSON, Float, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, JSON, Float, Enum, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 from .living import Living
@@ -20,7 +20,11 @@ class LiveViewer(BaseModel):
     整合了观看统计(WatchStat)、观众(LiveViewer)和签到记录(SignRecord)的功能
     """
     __tablename__ = "live_viewers"
-    __table_args__ = {'extend_existing': True}  # 允许表重复定义
+    __table_args__ = (
+        Index("ix_live_viewers_living_watch_time", "living_id", "watch_time", "id"),  # 观众列表键集分页
+        Index("ix_live_viewers_living_userid", "living_id", "userid"),  # 按直播+用户查找（拉取写入、邀请人回填）
+        {'extend_existing': True}  # 允许表重复定义
+    )
     
     # 关联直播
     living_id = Column(Integer, ForeignKey("livings.id"), nullable=False, index=True)
@@ -27,7 +27,7 @@ class Living(BaseModel):
     
     livingid = Column(String(50), unique=True, nullable=False, comment="直播ID")
     theme = Column(String(100), nullable=False, comment="直播主题")
-    living_start = Column(DateTime, nullable=False, comment="直播开始时间")
+    living_start = Column(DateTime, nullable=False, index=True, comment="直播开始时间")
     living_duration = Column(Integer, nullable=False, comment="直播时长(秒)")
     anchor_userid = Column(String(50), nullable=False, comment="主播用户ID")
     description = Column(Text, nullable=True, comment="直播描述")
@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from .base import BaseModel
+
+
+class SyncWatermark(BaseModel):
+    """同步水位模型
+
+    记录各类同步任务最近一次成功同步的时间和内容摘要，
+    通过 scope 区分同步范围，例如 "directory:<corpid>"
+    """
+    __tablename__ = "sync_watermarks"
+
+    scope = Column(String(200), unique=True, nullable=False, index=True, comment="同步范围标识")
+    synced_at = Column(DateTime, nullable=True, comment="最近一次成功同步时间")
+    watermark = Column(String(200), nullable=True, comment="水位值(内容摘要/游标等)")
+    status = Column(Integer, nullable=True, comment="同步对象的最终状态")
+    item_count = Column(Integer, default=0, comment="同步对象数量")
+    extra = Column(JSON, nullable=True, comment="附加统计信息")
+
+    def __init__(
+        self,
+        scope: str,
+        synced_at: Optional[datetime] = None,
+        watermark: Optional[str] = None,
+        status: Optional[int] = None,
+        item_count: int = 0,
+        extra: Optional[Dict[str, Any]] = None
+    ):
+        self.scope = scope
+        self.synced_at = synced_at
+        self.watermark = watermark
+        self.status = status
+        self.item_count = item_count
+        self.extra = extra
+
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        base_dict = super().to_dict()
+        base_dict.update({
+            "scope": self.scope,
+            "synced_at": self.synced_at.strftime("%Y-%m-%d %H:%M:%S") if self.synced_at else None,
+            "watermark": self.watermark,
+            "status": self.status,
+            "item_count": self.item_count,
+            "extra": self.extra
+        })
+        return base_dict
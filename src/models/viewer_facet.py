@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from .base import BaseModel
+
+
+class ViewerFacet(BaseModel):
+    """观众筛选值统计模型
+
+    按直播和字段记录观众各取值的人数，供表头筛选菜单直接读取，
+    由 ViewerFacetIndex 在观众数据写入后刷新
+    """
+    __tablename__ = "viewer_facets"
+    __table_args__ = (
+        Index("ix_viewer_facets_living_facet_value", "living_id", "facet", "value", unique=True),
+    )
+
+    living_id = Column(Integer, ForeignKey("livings.id"), nullable=False, comment="直播记录ID")
+    facet = Column(String(50), nullable=False, comment="字段名")
+    value = Column(String(200), nullable=False, comment="取值(数据库中的文本形式)")
+    count = Column(Integer, nullable=False, default=0, comment="观众人数")
+
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        base_dict = super().to_dict()
+        base_dict.update({
+            "living_id": self.living_id,
+            "facet": self.facet,
+            "value": self.value,
+            "count": self.count
+        })
+        return base_dict
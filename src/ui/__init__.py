@@ -5,9 +5,24 @@ from PySide6.QtWidgets import QApplication
 from .managers.style import StyleManager
 from .managers.animation import AnimationManager
 from .utils.widget_utils import WidgetUtils
-from .components.widgets.chart_widget import ChartWidget
-from .components.widgets.performance_monitor import PerformanceMonitor
-from .components.dialogs.progress_dialog import ProgressDialog
+
+# 依赖较重的组件（pyqtgraph、psutil）在首次访问时导入
+_LAZY_EXPORTS = {
+    'ChartWidget': '.components.widgets.chart_widget',
+    'PerformanceMonitor': '.components.widgets.performance_monitor',
+    'ProgressDialog': '.components.dialogs.progress_dialog',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 # 导出
 __all__ = [
@@ -17,4 +32,4 @@ __all__ = [
     'ChartWidget',
     'PerformanceMonitor',
     'ProgressDialog'
-] 
\ No newline at end of file
+]
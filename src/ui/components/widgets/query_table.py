@@ -0,0 +1,532 @@
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from PySide6.QtWidgets import (QTableView, QStyledItemDelegate, QStyleOptionButton, QStyle,
+                               QApplication, QAbstractItemView, QHeaderView)
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect, QEvent, Signal
+from sqlalchemy import func
+from src.core.pagination import KeysetPaginator
+from src.ui.utils.background_loader import BackgroundLoader
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def contains_filter(column, text: str):
+    """列包含 text 的 LIKE 条件，text 中的 %、_ 按普通字符匹配"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.like(f"%{escaped}%", escape="\\")
+
+
+class QueryColumn:
+    """查询表格的列定义"""
+
+    def __init__(
+        self,
+        title: str,
+        key: Optional[str] = None,
+        sort: Any = None,
+        filter: Any = None,
+        value_map: Optional[Dict[str, Any]] = None,
+        formatter: Optional[Callable[[Any, Any], str]] = None,
+        foreground: Optional[Callable[[Any], Any]] = None,
+        tooltip: Optional[Callable[[Any, Dict[str, Any]], Optional[str]]] = None,
+        width: Optional[int] = None
+    ):
+        """初始化列定义
+
+        Args:
+            title: 表头文本
+            key: 行字段名；行中没有该字段时从批量附加数据中读取，None 表示操作列
+            sort: 排序使用的列（必须在查询结果中，字段名与列名一致），None 表示不可排序
+            filter: 表头筛选使用的列，None 表示不可筛选
+            value_map: 表头筛选的显示文本到数据库值的映射，None 表示显示文本即数据库值
+            formatter: 显示格式化 formatter(值, 行) -> 文本，默认 str(值)，None 值显示为空
+            foreground: 前景色 foreground(行) -> 颜色
+            tooltip: 提示文本 tooltip(行, 附加数据) -> 文本
+            width: 初始列宽
+        """
+        self.title = title
+        self.key = key
+        self.sort = sort
+        self.filter = filter
+        self.value_map = value_map
+        self.formatter = formatter
+        self.foreground = foreground
+        self.tooltip = tooltip
+        self.width = width
+
+    def value(self, row, extra: Dict[str, Any]) -> Any:
+        if self.key is None:
+            return None
+        if hasattr(row, self.key):
+            return getattr(row, self.key)
+        return extra.get(self.key)
+
+    def text(self, row, extra: Dict[str, Any]) -> str:
+        value = self.value(row, extra)
+        if self.formatter:
+            return self.formatter(value, row)
+        return "" if value is None else str(value)
+
+
+class QueryTableModel(QAbstractTableModel):
+    """按需从数据库读取的表格模型
+
+    - 只保存已读取的行，滚动到底部时通过 canFetchMore/fetchMore 按键集分页读取下一批
+    - 查询在后台线程执行，新的读取会取消进行中的读取；query_factory、batch_loader 和 distinct_source
+      会在后台线程调用
+    - 排序和筛选都转换为查询条件，不在客户端处理
+    - 行数据为查询返回的列元组（不是 ORM 实体），会话关闭后仍可访问
+    - batch_loader(session, rows) 可为每批行读取附加数据（如签到透视），按 key_column 对应
+    """
+
+    BATCH_SIZE = 200
+
+    _DATA_ROLES = frozenset((Qt.DisplayRole, Qt.UserRole, Qt.ForegroundRole, Qt.ToolTipRole))
+    _ITEM_FLAGS = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    countChanged = Signal(int, int)  # (已加载行数, 总行数)
+    loadingChanged = Signal(bool)
+    loadFailed = Signal(object)  # 读取出错时发出异常
+
+    def __init__(
+        self,
+        db_manager,
+        columns: Sequence[QueryColumn],
+        query_factory: Callable[[Any], Any],
+        key_column: Any,
+        default_sort: Optional[Tuple[Any, bool]] = None,
+        batch_loader: Optional[Callable[[Any, List[Any]], Dict[Any, Dict[str, Any]]]] = None,
+        batch_size: Optional[int] = None,
+        distinct_source: Optional[Callable[[QueryColumn, int], Optional[List[Tuple[Any, int]]]]] = None,
+        parent=None
+    ):
+        """初始化模型
+
+        Args:
+            db_manager: 数据库管理器
+            columns: 列定义
+            query_factory: query_factory(session) -> 已应用页面筛选条件、未排序的列查询
+            key_column: 唯一键列（通常为主键），作为排序的最后一列
+            default_sort: 默认排序 (列, 是否降序)，None 表示按唯一键降序
+            batch_loader: 每批行的附加数据读取函数
+            batch_size: 每批读取的行数
+            distinct_source: distinct_source(列定义, 数量上限) -> [(数据库值, 数量)]，没有其他筛选条件时
+                代替 GROUP BY 提供表头筛选值（如预先统计的索引），返回 None 时仍在查询中统计
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.columns = list(columns)
+        self.query_factory = query_factory
+        self.key_column = key_column
+        self.default_sort = default_sort
+        self.batch_loader = batch_loader
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.distinct_source = distinct_source
+
+        self.value_filters: Dict[int, List[str]] = {}
+        self.text_filters: Dict[int, str] = {}
+        self._sort = default_sort
+        self._rows: List[Any] = []
+        self._extras: Dict[Any, Dict[str, Any]] = {}
+        self._page = 0
+        self._has_more = False
+        self._total = 0
+        self._loading = False
+        self._paginator = self._create_paginator()
+
+    # ---------- 查询 ----------
+
+    def _create_paginator(self) -> KeysetPaginator:
+        sort_keys = [(self.key_column, True)]
+        if self._sort is not None:
+            column, descending = self._sort
+            sort_keys = [(column, descending), (self.key_column, descending)]
+        return KeysetPaginator(sort_keys, page_size=self.batch_size)
+
+    def filter_state(self) -> Tuple[List[QueryColumn], Dict[int, List[str]], Dict[int, str]]:
+        """当前列定义和筛选条件的快照，供后台线程构建查询"""
+        return list(self.columns), dict(self.value_filters), dict(self.text_filters)
+
+    @staticmethod
+    def _apply_filters(query, state, skip_column: Optional[int] = None):
+        columns, value_filters, text_filters = state
+        for index, values in value_filters.items():
+            column = columns[index]
+            if index == skip_column or not values or column.filter is None:
+                continue
+            if column.value_map:
+                values = [column.value_map[value] for value in values if value in column.value_map]
+            query = query.filter(column.filter.in_(values))
+        for index, text in text_filters.items():
+            column = columns[index]
+            if index == skip_column or not text or column.filter is None:
+                continue
+            query = query.filter(contains_filter(column.filter, text))
+        return query
+
+    def build_query(self, session, skip_column: Optional[int] = None, state=None):
+        """当前筛选条件下的查询（未排序）
+
+        Args:
+            state: filter_state() 的快照，在后台线程构建查询时传入
+        """
+        return self._apply_filters(self.query_factory(session), state or self.filter_state(), skip_column)
+
+    def is_loading(self) -> bool:
+        return self._loading
+
+    def _set_loading(self, loading: bool):
+        if loading != self._loading:
+            self._loading = loading
+            self.loadingChanged.emit(loading)
+
+    def _read_batch(self, session, query, paginator: KeysetPaginator, page: int):
+        rows = paginator.fetch(query, page)
+        extras = self.batch_loader(session, rows) if rows and self.batch_loader else {}
+        return rows, extras, paginator
+
+    def _load_first_batch(self, request, paginator: KeysetPaginator, state):
+        """后台线程：总数和第一批数据
+
+        paginator 是模型分页器的副本，读取后的游标随结果交回GUI线程替换模型的分页器。
+        """
+        with self.db_manager.get_session() as session:
+            query = self.build_query(session, state=state)
+            total = paginator.count(query)
+            request.raise_if_cancelled()
+            return (total,) + self._read_batch(session, query, paginator, 1)
+
+    def _load_next_batch(self, request, paginator: KeysetPaginator, state, page: int):
+        """后台线程：下一批数据（paginator 同 _load_first_batch）"""
+        with self.db_manager.get_session() as session:
+            return self._read_batch(session, self.build_query(session, state=state), paginator, page)
+
+    def reload(self, invalidate_count: bool = True):
+        """在后台重新读取总数和第一批数据（查询条件、列或排序变化后调用）
+
+        读取完成前保留当前显示的行；进行中的读取会被取消。
+        """
+        paginator = self._paginator.clone()
+        if invalidate_count:
+            paginator.invalidate_count()
+        self._set_loading(True)
+        BackgroundLoader().submit(
+            self._load_first_batch, paginator, self.filter_state(),
+            key="query", owner=self,
+            on_result=self._on_reloaded,
+            on_error=self._on_load_error,
+            on_finished=partial(self._set_loading, False)
+        )
+
+    def _on_reloaded(self, result):
+        total, rows, extras, paginator = result
+        self._paginator = paginator
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._extras = dict(extras)
+        self._page = 1
+        self._has_more = paginator.has_next
+        self._total = total
+        self.endResetModel()
+        self.countChanged.emit(len(self._rows), self._total)
+
+    def _on_load_error(self, error: Exception):
+        self._has_more = False
+        logger.error(f"读取表格数据失败: {str(error)}")
+        self.loadFailed.emit(error)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more or self._loading:
+            return
+        self._set_loading(True)
+        BackgroundLoader().submit(
+            self._load_next_batch, self._paginator.clone(keep_cursors=True), self.filter_state(), self._page + 1,
+            key="query", owner=self,
+            on_result=self._on_batch_loaded,
+            on_error=self._on_load_error,
+            on_finished=partial(self._set_loading, False)
+        )
+
+    def _on_batch_loaded(self, result):
+        rows, extras, paginator = result
+        self._paginator = paginator
+        self._page += 1
+        self._has_more = paginator.has_next
+        if rows:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+            self._extras.update(extras)
+            self._rows.extend(rows)
+            self.endInsertRows()
+        self.countChanged.emit(len(self._rows), self._total)
+
+    def load_distinct_values(self, column: int, on_result: Callable[[List[Tuple[str, int]]], None],
+                             on_error: Optional[Callable[[Exception], None]] = None, limit: int = 500):
+        """在后台读取表头筛选的可选值及数量（基于除本列外的其他筛选条件）
+
+        没有其他筛选条件时使用 distinct_source，否则在查询中分组统计。
+
+        Args:
+            on_result: on_result([(显示文本, 数量)])，在GUI线程调用
+            on_error: 读取出错时在GUI线程调用
+        """
+        spec = self.columns[column]
+        if spec.filter is None:
+            on_result([])
+            return
+        use_source = self.distinct_source is not None and not (self.filtered_columns() - {column})
+        BackgroundLoader().submit(
+            self._query_distinct_values, column, self.filter_state(), use_source, limit,
+            key="distinct_values", owner=self,
+            on_result=on_result,
+            on_error=on_error
+        )
+
+    def _query_distinct_values(self, request, column: int, state, use_source: bool, limit: int) -> List[Tuple[str, int]]:
+        """后台线程：表头筛选的可选值及数量"""
+        spec = state[0][column]
+        reverse_map = {value: text for text, value in (spec.value_map or {}).items()}
+        rows = self.distinct_source(spec, limit) if use_source else None
+        if rows is None:
+            request.raise_if_cancelled()
+            with self.db_manager.get_session() as session:
+                query = self.build_query(session, skip_column=column, state=state)
+                rows = (
+                    query.with_entities(spec.filter, func.count())
+                    .group_by(spec.filter)
+                    .order_by(func.count().desc())
+                    .limit(limit)
+                    .all()
+                )
+        values = []
+        for value, count in rows:
+            if value is None or value == "":
+                continue
+            text = reverse_map.get(value, str(value)) if spec.value_map else str(value)
+            values.append((text, count))
+        return values
+
+    # ---------- 筛选 ----------
+
+    def set_value_filter(self, column: int, values: List[str]):
+        self.text_filters.pop(column, None)
+        if values:
+            self.value_filters[column] = list(values)
+        else:
+            self.value_filters.pop(column, None)
+        self.reload()
+
+    def set_text_filter(self, column: int, text: str):
+        self.value_filters.pop(column, None)
+        if text:
+            self.text_filters[column] = text
+        else:
+            self.text_filters.pop(column, None)
+        self.reload()
+
+    def clear_filters(self, reload: bool = True):
+        self.value_filters.clear()
+        self.text_filters.clear()
+        if reload:
+            self.reload()
+
+    def filtered_columns(self) -> set:
+        return {index for index, values in self.value_filters.items() if values} | \
+               {index for index, text in self.text_filters.items() if text}
+
+    # ---------- 列 ----------
+
+    def set_columns(self, columns: Sequence[QueryColumn]):
+        """替换列定义（列数变化时清空与新列不匹配的筛选）"""
+        self.beginResetModel()
+        self.columns = list(columns)
+        for filters in (self.value_filters, self.text_filters):
+            for index in [index for index in filters if index >= len(self.columns)]:
+                del filters[index]
+        self.endResetModel()
+
+    # ---------- 访问 ----------
+
+    def row_at(self, row: int):
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def extra_at(self, row: int) -> Dict[str, Any]:
+        record = self.row_at(row)
+        if record is None:
+            return {}
+        return self._extras.get(getattr(record, self.key_column.key), {})
+
+    def total_count(self) -> int:
+        return self._total
+
+    # ---------- QAbstractTableModel ----------
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        # 视图绘制每个单元格时会按多种角色调用，先按角色过滤再取数据
+        if role not in self._DATA_ROLES or not index.isValid():
+            return None
+        row_index = index.row()
+        row = self._rows[row_index]
+        if role == Qt.UserRole:
+            return row
+        column = self.columns[index.column()]
+        if role == Qt.DisplayRole:
+            if column.key is None:
+                return None
+            return column.text(row, self.extra_at(row_index))
+        if role == Qt.ForegroundRole:
+            return column.foreground(row) if column.foreground else None
+        return column.tooltip(row, self.extra_at(row_index)) if column.tooltip else None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section].title if section < len(self.columns) else None
+        return section + 1
+
+    def flags(self, index):
+        return self._ITEM_FLAGS if index.isValid() else Qt.NoItemFlags
+
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        """在查询中排序，不可排序的列恢复默认排序"""
+        if column < 0 or column >= len(self.columns) or self.columns[column].sort is None:
+            sort = self.default_sort
+        else:
+            sort = (self.columns[column].sort, order == Qt.DescendingOrder)
+        if sort == self._sort and (self._page or self._loading):
+            return
+        self._sort = sort
+        self._paginator = self._create_paginator()
+        self.reload()
+
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """操作列代理：直接绘制按钮，不为每行创建控件
+
+    actions 为 [(动作, 按钮文本)]；row_actions(行) 可按行返回不同的按钮，返回空列表时显示 empty_text。
+    点击按钮时发出 clicked(行号, 动作)。
+    """
+
+    clicked = Signal(int, str)
+
+    BUTTON_SPACING = 6
+    BUTTON_PADDING = 16
+    BUTTON_MAX_HEIGHT = 26
+
+    def __init__(
+        self,
+        actions: Sequence[Tuple[str, str]],
+        row_actions: Optional[Callable[[Any], Sequence[Tuple[str, str]]]] = None,
+        empty_text: str = "",
+        parent=None
+    ):
+        super().__init__(parent)
+        self.actions = list(actions)
+        self.row_actions = row_actions
+        self.empty_text = empty_text
+
+    def _actions(self, index) -> List[Tuple[str, str]]:
+        if self.row_actions is None:
+            return self.actions
+        return list(self.row_actions(index.data(Qt.UserRole)))
+
+    def _button_rects(self, option, actions) -> List[QRect]:
+        metrics = option.fontMetrics
+        height = min(option.rect.height() - 6, self.BUTTON_MAX_HEIGHT)
+        top = option.rect.top() + (option.rect.height() - height) // 2
+        left = option.rect.left() + 5
+        rects = []
+        for _, text in actions:
+            width = metrics.horizontalAdvance(text) + self.BUTTON_PADDING
+            rects.append(QRect(left, top, width, height))
+            left += width + self.BUTTON_SPACING
+        return rects
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        actions = self._actions(index)
+        if not actions:
+            if self.empty_text:
+                painter.save()
+                painter.setPen(Qt.gray)
+                painter.drawText(option.rect.adjusted(5, 0, 0, 0), Qt.AlignVCenter | Qt.AlignLeft, self.empty_text)
+                painter.restore()
+            return
+        style = option.widget.style() if option.widget else QApplication.style()
+        for (_, text), rect in zip(actions, self._button_rects(option, actions)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = text
+            button.state = QStyle.State_Enabled | QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            actions = self._actions(index)
+            pos = event.position().toPoint()
+            for (action, _), rect in zip(actions, self._button_rects(option, actions)):
+                if rect.contains(pos):
+                    self.clicked.emit(index.row(), action)
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+
+class QueryTableView(QTableView):
+    """配合 QueryTableModel 使用的表格视图：表头点击在查询中排序，按列定义设置列宽"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setAlternatingRowColors(True)
+        self.setWordWrap(False)
+        self.verticalHeader().setDefaultSectionSize(32)
+
+    def setModel(self, model):
+        super().setModel(model)
+        if isinstance(model, QueryTableModel):
+            model.modelReset.connect(self.apply_column_widths)
+            self.apply_column_widths()
+
+    def enable_sorting(self):
+        """启用表头排序（不触发默认排序以外的重新查询）"""
+        header = self.horizontalHeader()
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        header.setSectionsClickable(True)
+        header.sortIndicatorChanged.connect(self._on_sort_indicator_changed)
+
+    def _on_sort_indicator_changed(self, section: int, order):
+        model = self.model()
+        if not isinstance(model, QueryTableModel):
+            return
+        if section >= 0 and model.columns[section].sort is None:
+            # 不可排序的列：清除排序标记，恢复默认排序
+            header = self.horizontalHeader()
+            header.blockSignals(True)
+            header.setSortIndicator(-1, Qt.AscendingOrder)
+            header.blockSignals(False)
+            section = -1
+        model.sort(section, order)
+
+    def apply_column_widths(self):
+        model = self.model()
+        if not isinstance(model, QueryTableModel):
+            return
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        for index, column in enumerate(model.columns):
+            if column.width:
+                self.setColumnWidth(index, column.width)
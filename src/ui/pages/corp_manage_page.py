@@ -13,6 +13,8 @@ from src.utils.error_handler import ErrorHandler
 from src.core.database import DatabaseManager
 from src.models.corporation import Corporation as Corp
 from src.core.auth_manager import AuthManager
+from src.ui.components.widgets.query_table import QueryColumn, QueryTableModel, QueryTableView, ActionButtonDelegate
+from typing import List
 import pandas as pd
 import os
 from datetime import datetime
@@ -150,19 +152,28 @@ class CorpManagePage(QWidget):
         search_group = self._create_search_group()
         layout.addWidget(search_group)
         
-        # 创建表格
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "企业ID", "企业名称", "应用ID", "企业应用Secret",
-            "状态", "创建时间", "操作"
-        ])
-        # 修改表格的滚动模式，支持水平滚动
-        self.table.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        # 创建表格：按需读取，滚动到底部时再读取下一批
+        self.table = QueryTableView()
+        self.model = QueryTableModel(
+            self.db_manager,
+            self._build_columns(),
+            self._build_query,
+            Corp.id,
+            parent=self
+        )
+        self.model.countChanged.connect(self._update_count_label)
+        self.model.loadingChanged.connect(self._update_count_label)
+        self.model.loadFailed.connect(lambda e: ErrorHandler.handle_error(e, self, "加载企业列表失败"))
+        self.table.setModel(self.model)
+        self.table.enable_sorting()
+        
+        # 操作列按钮由代理绘制
+        self.action_delegate = ActionButtonDelegate([("edit", "编辑"), ("delete", "删除")], parent=self.table)
+        self.action_delegate.clicked.connect(self._on_action_clicked)
+        self.table.setItemDelegateForColumn(6, self.action_delegate)
+        
         # 设置最后一列（操作列）的宽度固定
         self.table.horizontalHeader().setSectionResizeMode(6, QHeaderView.Fixed)
-        self.table.setColumnWidth(6, 180)  # 增加操作列的宽度为180像素
         
         # 增加行高设置
         self.table.verticalHeader().setDefaultSectionSize(50)  # 增加默认行高为50像素
@@ -170,26 +181,9 @@ class CorpManagePage(QWidget):
         WidgetUtils.set_table_style(self.table)
         layout.addWidget(self.table)
         
-        # 创建分页区域
-        pagination_layout = QHBoxLayout()
-        
-        # 上一页按钮
-        self.prev_btn = QPushButton("上一页")
-        self.prev_btn.setObjectName("secondaryButton")
-        self.prev_btn.clicked.connect(self.prev_page)
-        pagination_layout.addWidget(self.prev_btn)
-        
-        # 页码显示
-        self.page_label = QLabel("第 1 页")
-        pagination_layout.addWidget(self.page_label)
-        
-        # 下一页按钮
-        self.next_btn = QPushButton("下一页")
-        self.next_btn.setObjectName("secondaryButton")
-        self.next_btn.clicked.connect(self.next_page)
-        pagination_layout.addWidget(self.next_btn)
-        
-        layout.addLayout(pagination_layout)
+        # 加载状态
+        self.count_label = QLabel("已加载 0 / 共 0 条")
+        layout.addWidget(self.count_label, alignment=Qt.AlignCenter)
         
         # 设置样式
         self.setStyleSheet(StyleManager.get_main_style())
@@ -198,8 +192,7 @@ class CorpManagePage(QWidget):
         AnimationManager.fade_in(self)
         
         # 加载数据
-        self.current_page = 1
-        self.page_size = 10
+        self.search_name = ""
         self.load_data()
         
     def _create_toolbar(self) -> QWidget:
@@ -258,107 +251,69 @@ class CorpManagePage(QWidget):
         
         return group
         
+    def _build_columns(self) -> List[QueryColumn]:
+        """表格列定义"""
+        def mask_secret(value, row):
+            # 脱敏处理企业密钥
+            if value and len(value) > 8:
+                return value[:4] + '*' * (len(value) - 8) + value[-4:]
+            return '****' if value else ''
+        
+        def format_time(value, row):
+            if not value:
+                return ""
+            return value.strftime("%Y-%m-%d %H:%M:%S") if isinstance(value, datetime) else str(value)
+        
+        return [
+            QueryColumn("企业ID", "corp_id", sort=Corp.corp_id, width=160),
+            QueryColumn("企业名称", "name", sort=Corp.name, width=160),
+            QueryColumn("应用ID", "agent_id", width=120),
+            QueryColumn("企业应用Secret", "corp_secret", formatter=mask_secret, width=200),
+            QueryColumn("状态", "status", formatter=lambda value, row: "启用" if value else "禁用"),
+            QueryColumn("创建时间", "created_at", sort=Corp.created_at, formatter=format_time, width=160),
+            QueryColumn("操作", width=180)
+        ]
+    
+    def _build_query(self, session):
+        """企业列查询，应用搜索条件（排序由模型处理）"""
+        query = session.query(
+            Corp.id,
+            Corp.corp_id,
+            Corp.name,
+            Corp.agent_id,
+            Corp.corp_secret,
+            Corp.status,
+            Corp.created_at
+        )
+        
+        # 应用搜索条件
+        if self.search_name:
+            query = query.filter(Corp.name.like(f"%{self.search_name}%"))
+        return query
+    
     @PerformanceManager.measure_operation("load_data")
     def load_data(self):
-        """加载数据"""
+        """加载数据（第一批），之后的数据在滚动时按需读取"""
         try:
-            # 获取企业列表
-            with self.db_manager.get_session() as session:
-                query = session.query(Corp)
-                
-                # 应用搜索条件
-                if hasattr(self, 'corp_name') and self.corp_name.text():
-                    query = query.filter(Corp.name.like(f"%{self.corp_name.text()}%"))
-                    
-                # 计算总页数
-                total = query.count()
-                self.total_pages = (total + self.page_size - 1) // self.page_size
-                
-                # 获取当前页数据
-                records = query.offset((self.current_page - 1) * self.page_size).limit(self.page_size).all()
-                
-                # 在会话范围内准备表格数据
-                table_data = []
-                for record in records:
-                    # 在会话内获取数据
-                    corp_id = record.corp_id
-                    name = record.name
-                    agent_id = record.agent_id
-                    corp_secret = record.corp_secret
-                    status = record.status
-                    created_at = record.created_at
-                    updated_at = record.updated_at
-                    
-                    # 脱敏处理企业密钥
-                    if corp_secret and len(corp_secret) > 8:
-                        masked_secret = corp_secret[:4] + '*' * (len(corp_secret) - 8) + corp_secret[-4:]
-                    else:
-                        masked_secret = '****' if corp_secret else ''
-                    
-                    # 保存企业数据
-                    table_data.append({
-                        'id': getattr(record, 'id', None),
-                        'corp_id': corp_id,
-                        'name': name,
-                        'agent_id': agent_id,
-                        'corp_secret': corp_secret,  # 保存原始值用于编辑
-                        'masked_secret': masked_secret,  # 保存脱敏值用于显示
-                        'status': status,
-                        'created_at': created_at,
-                        'updated_at': updated_at
-                    })
-            
-            # 会话已关闭，使用从会话中提取的数据更新表格
-            self.table.setRowCount(len(table_data))
-            for row, data in enumerate(table_data):
-                self.table.setItem(row, 0, QTableWidgetItem(data['corp_id']))
-                self.table.setItem(row, 1, QTableWidgetItem(data['name']))
-                self.table.setItem(row, 2, QTableWidgetItem(data['agent_id']))
-                self.table.setItem(row, 3, QTableWidgetItem(data['masked_secret']))  # 显示脱敏值
-                
-                # 状态列
-                status_text = "启用" if data['status'] else "禁用"
-                self.table.setItem(row, 4, QTableWidgetItem(status_text))
-                
-                # 创建时间
-                created_at = ""
-                if data['created_at']:
-                    if isinstance(data['created_at'], datetime):
-                        created_at = data['created_at'].strftime("%Y-%m-%d %H:%M:%S")
-                    else:
-                        created_at = str(data['created_at'])
-                self.table.setItem(row, 5, QTableWidgetItem(created_at))
-                
-                # 操作按钮
-                btn_widget = QWidget()
-                btn_layout = QHBoxLayout(btn_widget)  # 使用水平布局，与用户管理页面一致
-                btn_layout.setContentsMargins(0, 0, 0, 0)  # 减少边距
-                
-                edit_btn = QPushButton("编辑")
-                edit_btn.setObjectName("linkButton")
-                # 直接设置样式确保按钮可见，与用户管理页面样式一致
-                edit_btn.setStyleSheet("background-color: #f0f0f0; color: #000000; border: 1px solid #cccccc; border-radius: 4px; padding: 4px 12px; min-width: 60px;")
-                corp_id = data['corp_id']
-                edit_btn.clicked.connect(lambda checked, cid=corp_id: self._edit_corp_by_id(cid))
-                btn_layout.addWidget(edit_btn)
-                
-                delete_btn = QPushButton("删除")
-                delete_btn.setObjectName("linkButton")
-                # 直接设置样式确保按钮可见，与用户管理页面样式一致
-                delete_btn.setStyleSheet("background-color: #f0f0f0; color: #000000; border: 1px solid #cccccc; border-radius: 4px; padding: 4px 12px; min-width: 60px;")
-                delete_btn.clicked.connect(lambda checked, cid=corp_id: self._delete_corp_by_id(cid))
-                btn_layout.addWidget(delete_btn)
-                
-                self.table.setCellWidget(row, 6, btn_widget)
-                
-            # 更新分页信息
-            self.page_label.setText(f"第 {self.current_page} 页 / 共 {self.total_pages} 页")
-            self.prev_btn.setEnabled(self.current_page > 1)
-            self.next_btn.setEnabled(self.current_page < self.total_pages)
-            
+            self.model.reload()
         except Exception as e:
             ErrorHandler.handle_error(e, self, "加载企业列表失败")
     
+    def _update_count_label(self, *args):
+        text = f"已加载 {self.model.rowCount()} / 共 {self.model.total_count()} 条"
+        if self.model.is_loading():
+            text += "（正在加载...）"
+        self.count_label.setText(text)
+    
+    def _on_action_clicked(self, row: int, action: str):
+        corp = self.model.row_at(row)
+        if corp is None:
+            return
+        if action == "edit":
+            self._edit_corp_by_id(corp.corp_id)
+        elif action == "delete":
+            self._delete_corp_by_id(corp.corp_id)
+    
     def _edit_corp_by_id(self, corp_id):
         """通过企业ID编辑企业
         
@@ -394,20 +349,8 @@ class CorpManagePage(QWidget):
         
     def search(self):
         """搜索"""
-        self.current_page = 1
+        self.search_name = self.corp_name.text().strip()
         self.load_data()
-        
-    def prev_page(self):
-        """上一页"""
-        if self.current_page > 1:
-            self.current_page -= 1
-            self.load_data()
-            
-    def next_page(self):
-        """下一页"""
-        if self.current_page < self.total_pages:
-            self.current_page += 1
-            self.load_data()
             
     @PerformanceManager.measure_operation("add_corp")
     def add_corp(self):
@@ -415,10 +358,9 @@ class CorpManagePage(QWidget):
         try:
             # 检查权限
             if self.auth_manager and self.user_id:
-                with self.db_manager.get_session() as session:
-                    if not self.auth_manager.has_permission(self.user_id, "manage_corps", session):
-                        self.error_handler.handle_warning("您没有权限执行此操作", self)
-                        return
+                if not self.auth_manager.has_permission(self.user_id, "manage_corps"):
+                    self.error_handler.handle_warning("您没有权限执行此操作", self)
+                    return
             
             # 创建企业对话框
             dialog = CorpDialog()
@@ -458,10 +400,9 @@ class CorpManagePage(QWidget):
         try:
             # 检查权限
             if self.auth_manager and self.user_id:
-                with self.db_manager.get_session() as session:
-                    if not self.auth_manager.has_permission(self.user_id, "manage_corps", session):
-                        self.error_handler.handle_warning("您没有权限执行此操作", self)
-                        return
+                if not self.auth_manager.has_permission(self.user_id, "manage_corps"):
+                    self.error_handler.handle_warning("您没有权限执行此操作", self)
+                    return
             
             # 创建企业对话框，使用企业数据的副本而不是SQLAlchemy对象
             corp_data = {
@@ -508,10 +449,9 @@ class CorpManagePage(QWidget):
         try:
             # 检查权限
             if self.auth_manager and self.user_id:
-                with self.db_manager.get_session() as session:
-                    if not self.auth_manager.has_permission(self.user_id, "manage_corps", session):
-                        self.error_handler.handle_warning("您没有权限执行此操作", self)
-                        return
+                if not self.auth_manager.has_permission(self.user_id, "manage_corps"):
+                    self.error_handler.handle_warning("您没有权限执行此操作", self)
+                    return
             
             # 确认删除
             from PySide6.QtWidgets import QMessageBox
@@ -548,10 +488,9 @@ class CorpManagePage(QWidget):
         try:
             # 检查权限
             if self.auth_manager and self.user_id:
-                with self.db_manager.get_session() as session:
-                    if not self.auth_manager.has_permission(self.user_id, "export_data", session):
-                        self.error_handler.handle_warning("您没有权限执行此操作", self)
-                        return
+                if not self.auth_manager.has_permission(self.user_id, "export_data"):
+                    self.error_handler.handle_warning("您没有权限执行此操作", self)
+                    return
             
             # 选择保存路径
             file_path, _ = QFileDialog.getSaveFileName(
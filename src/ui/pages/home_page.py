@@ -18,17 +18,11 @@ from src.ui.components.dialogs.io_dialog import IODialog
 from src.core.auth_manager import AuthManager
 from src.models.user import User
 from src.models.live_viewer import LiveViewer
-import pandas as pd
 import os
 import datetime
 from src import __version__  # 添加导入 __version__
 
-# 导入页面
-from src.ui.pages.stats_page import StatsPage
-from src.ui.pages.settings_page import SettingsPage
-from src.ui.pages.live_booking_page import LiveBookingPage
-from src.ui.pages.live_list_page import LiveListPage
-from src.ui.pages.corp_manage_page import CorpManagePage  # 添加企业管理页面的导入
+# 各功能页面在首次打开时导入，缩短启动时间
 
 logger = get_logger(__name__)
 
@@ -132,17 +126,15 @@ class HomePage(QWidget):
     
     def update_menu_ui(self):
         """根据用户权限更新菜单UI"""
-        # 创建临时会话检查权限
-        with self.db_manager.get_session() as session:
-            # 启用/禁用对应的按钮
-            has_user_mgmt_perm = self.auth_manager.has_permission(self.user_id, "manage_users", session) if self.user_id else False
-            has_live_mgmt_perm = self.auth_manager.has_permission(self.user_id, "manage_live", session) if self.user_id else False
-            has_stats_perm = self.auth_manager.has_permission(self.user_id, "view_stats", session) if self.user_id else False
-            
-            # 用户管理
-            self.live_booking_btn.setEnabled(has_live_mgmt_perm)
-            self.live_list_btn.setEnabled(has_live_mgmt_perm)
-            self.stats_btn.setEnabled(has_stats_perm)
+        # 启用/禁用对应的按钮
+        has_user_mgmt_perm = self.auth_manager.has_permission(self.user_id, "manage_users") if self.user_id else False
+        has_live_mgmt_perm = self.auth_manager.has_permission(self.user_id, "manage_live") if self.user_id else False
+        has_stats_perm = self.auth_manager.has_permission(self.user_id, "view_stats") if self.user_id else False
+        
+        # 用户管理
+        self.live_booking_btn.setEnabled(has_live_mgmt_perm)
+        self.live_list_btn.setEnabled(has_live_mgmt_perm)
+        self.stats_btn.setEnabled(has_stats_perm)
     
     def create_dashboard(self) -> QWidget:
         """创建仪表盘页面"""
@@ -245,37 +237,35 @@ class HomePage(QWidget):
         buttons_layout.setContentsMargins(0, 10, 0, 10)
         buttons_layout.setSpacing(15)
         
-        # 使用临时会话检查权限
-        with self.db_manager.get_session() as session:
-            # 根据用户权限创建快捷操作按钮
-            has_live_mgmt_perm = self.auth_manager.has_permission(self.user_id, "manage_live", session) if self.user_id else False
-            has_user_mgmt_perm = self.auth_manager.has_permission(self.user_id, "manage_users", session) if self.user_id else False
-            
-            # 添加快速创建直播按钮
-            if has_live_mgmt_perm:
-                create_live_btn = self.create_action_button(
-                    "创建直播",
-                    "fas.calendar-plus",
-                    lambda: self.content_stack.setCurrentWidget(self.live_booking_page)
-                )
-                buttons_layout.addWidget(create_live_btn)
-            
-            # 添加查看统计按钮
-            stats_btn = self.create_action_button(
-                "查看统计",
-                "fas.chart-line",
-                lambda: self.show_stats_page()
+        # 根据用户权限创建快捷操作按钮
+        has_live_mgmt_perm = self.auth_manager.has_permission(self.user_id, "manage_live") if self.user_id else False
+        has_user_mgmt_perm = self.auth_manager.has_permission(self.user_id, "manage_users") if self.user_id else False
+        
+        # 添加快速创建直播按钮
+        if has_live_mgmt_perm:
+            create_live_btn = self.create_action_button(
+                "创建直播",
+                "fas.calendar-plus",
+                lambda: self.content_stack.setCurrentWidget(self.live_booking_page)
             )
-            buttons_layout.addWidget(stats_btn)
-            
-            # 添加用户管理按钮
-            if has_user_mgmt_perm:
-                user_mgmt_btn = self.create_action_button(
-                    "用户管理",
-                    "fas.users-cog",
-                    lambda: self.content_stack.setCurrentWidget(self.user_management_page)
-                )
-                buttons_layout.addWidget(user_mgmt_btn)
+            buttons_layout.addWidget(create_live_btn)
+        
+        # 添加查看统计按钮
+        stats_btn = self.create_action_button(
+            "查看统计",
+            "fas.chart-line",
+            lambda: self.show_stats_page()
+        )
+        buttons_layout.addWidget(stats_btn)
+        
+        # 添加用户管理按钮
+        if has_user_mgmt_perm:
+            user_mgmt_btn = self.create_action_button(
+                "用户管理",
+                "fas.users-cog",
+                lambda: self.content_stack.setCurrentWidget(self.user_management_page)
+            )
+            buttons_layout.addWidget(user_mgmt_btn)
         
         quick_actions_widget.setLayout(quick_actions_layout)
         quick_actions_layout.addWidget(buttons_widget)
@@ -370,8 +360,7 @@ class HomePage(QWidget):
         Returns:
             bool: 是否有权限
         """
-        with self.db_manager.get_session() as session:
-            return self.auth_manager.has_permission(self.user_id, permission, session) if self.user_id else False
+        return self.auth_manager.has_permission(self.user_id, permission) if self.user_id else False
     
     def close_tab(self, index):
         """关闭标签页
@@ -410,6 +399,7 @@ class HomePage(QWidget):
                 return
             
         # 创建页面
+        from src.ui.pages.live_booking_page import LiveBookingPage
         page = LiveBookingPage(
             self.db_manager,
             self.wecom_api,
@@ -433,6 +423,7 @@ class HomePage(QWidget):
                 return
             
         # 创建页面
+        from src.ui.pages.live_list_page import LiveListPage
         page = LiveListPage(
             self.db_manager,    # 数据库管理器
             self.wecom_api,     # 企业微信API
@@ -456,6 +447,7 @@ class HomePage(QWidget):
                 return
             
         # 创建页面
+        from src.ui.pages.settings_page import SettingsPage
         page = SettingsPage(
             self.auth_manager,
             self.db_manager,
@@ -478,6 +470,7 @@ class HomePage(QWidget):
                 return
         
         # 创建统计页面并添加到标签页
+        from src.ui.pages.stats_page import StatsPage
         stats_page = StatsPage(self.db_manager, self.auth_manager)
         self.content_stack.addTab(stats_page, "数据统计")
         self.content_stack.setCurrentWidget(stats_page)
@@ -500,6 +493,7 @@ class HomePage(QWidget):
                 return
         
         # 创建企业管理页面
+        from src.ui.pages.corp_manage_page import CorpManagePage
         corp_manage_page = CorpManagePage(
             self.db_manager,
             auth_manager=self.auth_manager,
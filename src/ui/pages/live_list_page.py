@@ -22,15 +22,25 @@ from src.models.living import Living, LivingStatus, LivingType
 from datetime import datetime, timedelta
 from src.ui.components.dialogs.io_dialog import IODialog
 from src.ui.components.widgets.custom_datetime_widget import CustomDateTimeWidget
-from src.models.live_viewer import LiveViewer
+from src.ui.components.widgets.query_table import (QueryColumn, QueryTableModel, QueryTableView, ActionButtonDelegate,
+                                                  contains_filter)
+from src.models.live_viewer import LiveViewer, UserSource
 from src.models.live_sign_record import LiveSignRecord
 from src.models.user import User, UserRole
 import pandas as pd
 import os
 from typing import List, Optional, Dict, Any
-from sqlalchemy import select, func, and_, or_, cast, String, text
+from sqlalchemy import select, update, func, and_, or_, cast, String, text
 from src.core.live_viewer_manager import LiveViewerManager
+from src.core.viewer_fetch_orchestrator import ViewerFetchOrchestrator
+from src.core.live_sync_planner import LiveSyncPlanner
+from src.core.reward_engine import RewardEngine
+from src.core.sign_pivot import SignPivotQuery
+from src.core.viewer_facets import ViewerFacetIndex
+from src.core.pagination import KeysetPaginator
+from src.ui.utils.background_loader import BackgroundLoader, run_with_progress
 import concurrent.futures
+from functools import partial
 from threading import Lock
 from copy import deepcopy
 from collections import defaultdict, namedtuple
@@ -82,6 +92,9 @@ class AutoCloseMessageBox(QMessageBox):
 class LiveListPage(QWidget):
     """直播列表页面"""
     
+    QUERY_CHUNK_SIZE = 500  # IN 查询分块大小，避免超过 SQLite 参数上限
+    _EMPTY_SIGN_STATS = {"unique_signers": 0, "sign_count": 0, "sign_time": None}  # 没有签到的直播
+    
     def __init__(self, db_manager: DatabaseManager, wecom_api: WeComAPI, auth_manager=None, user_id=None):
         super().__init__()
         self.db_manager = db_manager
@@ -181,6 +194,11 @@ class LiveListPage(QWidget):
         # 加载数据
         self.current_page = 1
         self.page_size = 10
+        self.total_pages = 1
+        self.paginator = KeysetPaginator(
+            [(Living.living_start, True), (Living.id, True)], page_size=self.page_size
+        )
+        self._paginator_lock = Lock()
         self.load_data()
         
     def _create_search_group(self) -> QGroupBox:
@@ -354,6 +372,13 @@ class LiveListPage(QWidget):
         sync_btn.clicked.connect(self.sync_live_data)
         button_row.addWidget(sync_btn)
         
+        # 批量拉取观看信息按钮
+        batch_fetch_btn = QPushButton("批量拉取观看信息")
+        batch_fetch_btn.setObjectName("primaryButton")
+        batch_fetch_btn.setMinimumWidth(140)
+        batch_fetch_btn.clicked.connect(self.batch_fetch_watch_stat)
+        button_row.addWidget(batch_fetch_btn)
+        
         # 导出按钮
         export_btn = QPushButton("导出数据")
         export_btn.setObjectName("primaryButton")
@@ -379,333 +404,397 @@ class LiveListPage(QWidget):
         
         return group
         
+    def _current_search_filters(self) -> Dict[str, Any]:
+        """当前搜索条件的快照（后台查询不能读取界面控件）"""
+        return {
+            "title": self.live_title.text(),
+            "status": self.live_status.currentText(),
+            "viewer_fetched": self.viewer_fetched_status.currentText(),
+            "sign_imported": self.sign_imported_status.currentText(),
+            "doc_uploaded": self.doc_uploaded_status.currentText(),
+            "remote_synced": self.remote_synced_status.currentText(),
+            "start": self.start_date_time.dateTime().toPython(),
+            "end": self.end_date_time.dateTime().toPython()
+        }
+    
     @PerformanceManager.measure_operation("load_data")
     def load_data(self):
-        """加载数据"""
+        """在后台加载当前页数据，新的加载会取代尚未完成的加载"""
         try:
-            # 获取直播列表
-            records_data = []  # 存储转换后的记录数据
-            
-            with self.db_manager.get_session() as session:
-                # 获取当前用户信息和权限
-                current_user = None
-                user_role = None
-                user_corpname = None
-                user_id = None
-                
-                if self.auth_manager and self.user_id:
-                    # 在当前会话中获取用户信息
-                    from src.models.user import User, UserRole
-                    current_user = session.query(User).filter_by(userid=self.user_id).first()
-                    if current_user:
-                        user_role = current_user.role
-                        user_corpname = current_user.corpname
-                        user_id = current_user.wecom_code or current_user.login_name
-                
-                # 使用旧版API风格
-                query = session.query(Living)
-                
-                # 根据用户权限过滤数据
-                if current_user:
-                    if user_role == UserRole.ROOT_ADMIN.value:
-                        # 超级管理员可以查看所有直播
-                        pass
-                    elif user_role == UserRole.WECOM_ADMIN.value and user_corpname:
-                        # 企业管理员只能查看自己企业的直播
-                        query = query.filter(Living.corpname == user_corpname)
-                    else:
-                        # 普通用户只能查看自己为主播的直播
-                        if user_id:
-                            query = query.filter(Living.anchor_userid == user_id)
-                        else:
-                            # 如果没有企业微信ID，则显示空列表
-                            logger.warning(f"用户 {current_user.login_name} 没有企业微信ID，无法显示直播列表")
-                            self.table.setRowCount(0)
-                            self.prev_btn.setEnabled(False)
-                            self.next_btn.setEnabled(False)
-                            self.page_label.setText("第 0 页 / 共 0 页")
-                            return
-                
-                # 应用搜索条件
-                if self.live_title.text():
-                    query = query.filter(Living.theme.like(f"%{self.live_title.text()}%"))
-                    
-                if self.live_status.currentText() != "全部":
-                    status_map = {
-                        "未开始": LivingStatus.RESERVED,
-                        "进行中": LivingStatus.LIVING,
-                        "已结束": LivingStatus.ENDED
-                    }
-                    query = query.filter(Living.status == status_map[self.live_status.currentText()])
-                
-                # 应用新增的状态字段过滤条件
-                # 是否拉取观看信息
-                if self.viewer_fetched_status.currentText() != "全部":
-                    is_fetched = 1 if self.viewer_fetched_status.currentText() == "已拉取" else 0
-                    query = query.filter(Living.is_viewer_fetched == is_fetched)
-                
-                # 是否导入签到
-                if self.sign_imported_status.currentText() != "全部":
-                    is_imported = 1 if self.sign_imported_status.currentText() == "已导入" else 0
-                    query = query.filter(Living.is_sign_imported == is_imported)
-                
-                # 是否上传企微文档
-                if self.doc_uploaded_status.currentText() != "全部":
-                    is_uploaded = 1 if self.doc_uploaded_status.currentText() == "已上传" else 0
-                    query = query.filter(Living.is_doc_uploaded == is_uploaded)
-                
-                # 是否远程同步
-                if self.remote_synced_status.currentText() != "全部":
-                    is_synced = 1 if self.remote_synced_status.currentText() == "已同步" else 0
-                    query = query.filter(Living.is_remote_synced == is_synced)
-                
-                # 应用日期范围查询
-                start_datetime = self.start_date_time.dateTime().toPython()
-                end_datetime = self.end_date_time.dateTime().toPython()
-                
-                # 过滤直播开始时间在指定范围内的记录
-                query = query.filter(Living.living_start >= start_datetime)
-                query = query.filter(Living.living_start <= end_datetime)
-                
-                # 计算总记录数
-                total = query.count()
-                self.total_pages = (total + self.page_size - 1) // self.page_size
-                
-                # 获取当前页数据
-                records = query.offset((self.current_page - 1) * self.page_size).limit(self.page_size).all()
-                
-                # 在会话内将数据转换为字典，避免会话关闭后的访问问题
-                for record in records:
-                    # 获取所有需要的数据
-                    record_data = {
-                        "id": record.id,  # 用于标识记录
-                        "livingid": record.livingid,
-                        "theme": record.theme,
-                        "living_start": record.living_start,
-                        "living_duration": record.living_duration,
-                        "anchor_userid": record.anchor_userid,
-                        "description": record.description,
-                        "type": record.type,
-                        "status": record.status,
-                        "corpname": record.corpname,
-                        "agentid": record.agentid,
-                        "viewer_num": record.viewer_num,
-                        "comment_num": record.comment_num,
-                        "mic_num": record.mic_num,
-                        "online_count": record.online_count,
-                        "subscribe_count": record.subscribe_count
-                    }
-                    
-                    # 获取主播的名称
-                    from src.models.user import User
-                    user = session.query(User).filter(
-                        (User.wecom_code == record.anchor_userid) | 
-                        (User.login_name == record.anchor_userid)
-                    ).first()
-                    
-                    if user:
-                        record_data["anchor_name"] = f"{user.name}({record.anchor_userid})"
-                    else:
-                        record_data["anchor_name"] = f"{record.anchor_userid}"
-                    
-                    # 计算结束时间
-                    if record.living_start and record.living_duration:
-                        record_data["end_time"] = record.living_start + timedelta(seconds=record.living_duration)
-                    else:
-                        record_data["end_time"] = None
-                        
-                    # 获取签到统计信息
-                    from src.models.live_viewer import LiveViewer
-                    # 使用 LiveViewer 查询签到统计
-                    sign_stats = {}
-                    with self.db_manager.get_session() as stats_session:
-                        # 获取不同的签到人数
-                        unique_signers = stats_session.query(func.count(LiveViewer.id)).filter(
-                            LiveViewer.living_id == record.id,
-                            LiveViewer.is_signed == True
-                        ).scalar() or 0
-                        
-                        # 获取总签到次数
-                        sign_count = stats_session.query(func.sum(LiveViewer.sign_count)).filter(
-                            LiveViewer.living_id == record.id,
-                            LiveViewer.is_signed == True
-                        ).scalar() or 0
-                        
-                        # 获取首次签到时间
-                        first_sign = stats_session.query(func.min(LiveViewer.sign_time)).filter(
-                            LiveViewer.living_id == record.id,
-                            LiveViewer.is_signed == True
-                        ).scalar()
-                        
-                        sign_stats = {
-                            "unique_signers": unique_signers,
-                            "sign_count": sign_count,
-                            "sign_time": first_sign
-                        }
-                    
-                    record_data["sign_count"] = sign_stats["unique_signers"]  # 使用unique_signers作为签到人数
-                    record_data["total_sign_count"] = sign_stats["sign_count"]  # 总签到次数
-                    record_data["sign_time"] = sign_stats["sign_time"]
-                    
-                    # 添加状态字段
-                    record_data["is_viewer_fetched"] = record.is_viewer_fetched
-                    record_data["is_sign_imported"] = record.is_sign_imported
-                    record_data["is_doc_uploaded"] = record.is_doc_uploaded
-                    record_data["is_remote_synced"] = record.is_remote_synced
-                    
-                    records_data.append(record_data)
-                
-            # 更新表格
-            self.table.setRowCount(len(records_data))
-            for row, record_data in enumerate(records_data):
-                # 设置足够的行高以容纳按钮
-                self.table.setRowHeight(row, 27)  # 设置每行高度为原来的2/3（约27像素）
-                
-                # 设置序号
-                self.table.setItem(row, 0, QTableWidgetItem(str(row + 1 + (self.current_page - 1) * self.page_size)))
-                
-                # 设置直播ID
-                self.table.setItem(row, 1, QTableWidgetItem(record_data["livingid"]))
-                self.table.setItem(row, 2, QTableWidgetItem(record_data["theme"]))
-                self.table.setItem(row, 3, QTableWidgetItem(record_data["living_start"].strftime("%Y-%m-%d %H:%M:%S")))
-                
-                # 结束时间
-                end_time_str = record_data["end_time"].strftime("%Y-%m-%d %H:%M:%S") if record_data["end_time"] else "-"
-                self.table.setItem(row, 4, QTableWidgetItem(end_time_str))
-                
-                # 主播名称
-                self.table.setItem(row, 5, QTableWidgetItem(record_data["anchor_name"]))
-                
-                # 状态
-                status_text = {
-                    LivingStatus.RESERVED: "预约中",
-                    LivingStatus.LIVING: "直播中",
-                    LivingStatus.ENDED: "已结束",
-                    LivingStatus.EXPIRED: "已过期",
-                    LivingStatus.CANCELLED: "已取消"
-                }.get(record_data["status"], "未知")
-                self.table.setItem(row, 6, QTableWidgetItem(status_text))
-                
-                # 直播类型
-                type_text = {
-                    LivingType.GENERAL: "通用直播",
-                    LivingType.SMALL: "小班课",
-                    LivingType.LARGE: "大班课",
-                    LivingType.TRAINING: "企业培训",
-                    LivingType.EVENT: "活动直播"
-                }.get(record_data["type"], "未知")
-                self.table.setItem(row, 7, QTableWidgetItem(type_text))
-                
-                self.table.setItem(row, 8, QTableWidgetItem(str(record_data["viewer_num"])))
-                self.table.setItem(row, 9, QTableWidgetItem(str(record_data["comment_num"])))
-                
-                # 签到人数
-                self.table.setItem(row, 10, QTableWidgetItem(str(record_data["sign_count"])))
-                
-                # 签到次数
-                self.table.setItem(row, 11, QTableWidgetItem(str(record_data["total_sign_count"])))
-                
-                # 观看信息状态
-                viewer_fetched_text = "已拉取" if record_data["is_viewer_fetched"] == 1 else "未拉取"
-                viewer_item = QTableWidgetItem(viewer_fetched_text)
-                viewer_item.setForeground(Qt.green if record_data["is_viewer_fetched"] == 1 else Qt.red)
-                self.table.setItem(row, 12, viewer_item)
-                
-                # 签到导入状态
-                sign_imported_text = "已导入" if record_data["is_sign_imported"] == 1 else "未导入"
-                sign_item = QTableWidgetItem(sign_imported_text)
-                sign_item.setForeground(Qt.green if record_data["is_sign_imported"] == 1 else Qt.red)
-                self.table.setItem(row, 13, sign_item)
-                
-                # 企微文档状态
-                doc_uploaded_text = "已上传" if record_data["is_doc_uploaded"] == 1 else "未上传"
-                doc_item = QTableWidgetItem(doc_uploaded_text)
-                doc_item.setForeground(Qt.green if record_data["is_doc_uploaded"] == 1 else Qt.red)
-                self.table.setItem(row, 14, doc_item)
-                
-                # 远程同步状态
-                remote_synced_text = "已同步" if record_data["is_remote_synced"] == 1 else "未同步"
-                remote_item = QTableWidgetItem(remote_synced_text)
-                remote_item.setForeground(Qt.green if record_data["is_remote_synced"] == 1 else Qt.red)
-                self.table.setItem(row, 15, remote_item)
-                
-                # 操作按钮
-                btn_widget = QWidget()
-                btn_layout = QHBoxLayout(btn_widget)
-                btn_layout.setContentsMargins(2, 2, 2, 2)  # 减小边距使按钮更紧凑
-                btn_layout.setSpacing(5)  # 减少按钮之间的间距
-                
-                # 创建Living对象用于按钮回调，避免会话问题
-                living = Living(
-                    livingid=record_data["livingid"],
-                    theme=record_data["theme"],
-                    living_start=record_data["living_start"],
-                    living_duration=record_data["living_duration"],
-                    anchor_userid=record_data["anchor_userid"],
-                    description=record_data["description"],
-                    status=record_data["status"],
-                    type=record_data["type"],
-                    corpname=record_data["corpname"],
-                    agentid=record_data["agentid"],
-                    viewer_num=record_data["viewer_num"],
-                    comment_num=record_data["comment_num"],
-                    mic_num=record_data["mic_num"],
-                    online_count=record_data["online_count"],
-                    subscribe_count=record_data["subscribe_count"]
-                )
-                # 保存签到信息到living对象中，以便在详情对话框中使用
-                living.sign_count = record_data["sign_count"]
-                living.total_sign_count = record_data["total_sign_count"]
-                living.sign_time = record_data["sign_time"]
-                
-                # 创建样式化的按钮，减小高度以适应行高
-                view_btn = QPushButton("查看详情")
-                view_btn.setObjectName("linkButton")
-                view_btn.setMinimumHeight(22)  # 减小按钮高度
-                view_btn.setFixedWidth(80)  # 固定宽度
-                view_btn.clicked.connect(lambda checked, r=living: self.view_details(r))
-                btn_layout.addWidget(view_btn)
-                
-                # 添加"拉取观看信息"按钮，并根据状态调整显示
-                fetch_viewer_btn = QPushButton("拉取观看信息" if not record_data["is_viewer_fetched"] else "重取观看信息")
-                fetch_viewer_btn.setObjectName("linkButton")
-                fetch_viewer_btn.setMinimumHeight(22)  # 减小按钮高度
-                fetch_viewer_btn.setFixedWidth(120)  # 固定宽度
-                # 如果已经拉取过，使用不同的样式
-                if record_data["is_viewer_fetched"]:
-                    fetch_viewer_btn.setStyleSheet("color: #0056b3;")  # 使用较暗的蓝色
-                fetch_viewer_btn.clicked.connect(lambda checked, r=living: self.fetch_watch_stat(r))
-                btn_layout.addWidget(fetch_viewer_btn)
-                
-                import_btn = QPushButton("导入签到")
-                import_btn.setObjectName("linkButton")
-                import_btn.setMinimumHeight(22)  # 减小按钮高度
-                import_btn.setFixedWidth(80)  # 固定宽度
-                import_btn.clicked.connect(lambda checked, r=living: self.import_sign(r))
-                btn_layout.addWidget(import_btn)
-                
-                # 只有在直播状态为"预约中"时才显示取消按钮
-                if record_data["status"] == LivingStatus.RESERVED:
-                    cancel_btn = QPushButton("取消")
-                    cancel_btn.setObjectName("linkButton")
-                    cancel_btn.setMinimumHeight(22)  # 减小按钮高度
-                    cancel_btn.setFixedWidth(80)  # 固定宽度
-                    cancel_btn.clicked.connect(lambda checked, r=living: self.cancel_live(r))
-                    btn_layout.addWidget(cancel_btn)
-                
-                self.table.setCellWidget(row, 16, btn_widget)
-                
-            # 更新分页信息
-            self.page_label.setText(f"第 {self.current_page} 页 / 共 {self.total_pages} 页")
-            self.prev_btn.setEnabled(self.current_page > 1)
-            self.next_btn.setEnabled(self.current_page < self.total_pages)
-            
+            BackgroundLoader().submit(
+                self._query_live_page, self._current_search_filters(), self.current_page,
+                key="load_data", owner=self,
+                on_result=self._render_live_page,
+                on_error=lambda e: ErrorHandler.handle_error(e, self, "加载直播列表失败")
+            )
+        except Exception as e:
+            ErrorHandler.handle_error(e, self, "加载直播列表失败")
+    
+    def _build_live_query(self, session, filters: Dict[str, Any]):
+        """按当前用户权限和搜索条件构建直播查询，用户没有可查看的直播时返回 None"""
+        # 获取当前用户信息和权限
+        current_user = None
+        user_role = None
+        user_corpname = None
+        user_id = None
+        
+        if self.auth_manager and self.user_id:
+            # 在当前会话中获取用户信息
+            current_user = session.query(User).filter_by(userid=self.user_id).first()
+            if current_user:
+                user_role = current_user.role
+                user_corpname = current_user.corpname
+                user_id = current_user.wecom_code or current_user.login_name
+        
+        # 使用旧版API风格
+        query = session.query(Living)
+
+        # 根据用户权限过滤数据
+        if current_user:
+            if user_role == UserRole.ROOT_ADMIN.value:
+                # 超级管理员可以查看所有直播
+                pass
+            elif user_role == UserRole.WECOM_ADMIN.value and user_corpname:
+                # 企业管理员只能查看自己企业的直播
+                query = query.filter(Living.corpname == user_corpname)
+            else:
+                # 普通用户只能查看自己为主播的直播
+                if user_id:
+                    query = query.filter(Living.anchor_userid == user_id)
+                else:
+                    # 如果没有企业微信ID，则显示空列表
+                    logger.warning(f"用户 {current_user.login_name} 没有企业微信ID，无法显示直播列表")
+                    return None
+
+        # 应用搜索条件
+        if filters["title"]:
+            query = query.filter(contains_filter(Living.theme, filters["title"]))
+
+        if filters["status"] != "全部":
+            status_map = {
+                "未开始": LivingStatus.RESERVED,
+                "进行中": LivingStatus.LIVING,
+                "已结束": LivingStatus.ENDED
+            }
+            query = query.filter(Living.status == status_map[filters["status"]])
+
+        # 应用新增的状态字段过滤条件
+        # 是否拉取观看信息
+        if filters["viewer_fetched"] != "全部":
+            is_fetched = 1 if filters["viewer_fetched"] == "已拉取" else 0
+            query = query.filter(Living.is_viewer_fetched == is_fetched)
+
+        # 是否导入签到
+        if filters["sign_imported"] != "全部":
+            is_imported = 1 if filters["sign_imported"] == "已导入" else 0
+            query = query.filter(Living.is_sign_imported == is_imported)
+
+        # 是否上传企微文档
+        if filters["doc_uploaded"] != "全部":
+            is_uploaded = 1 if filters["doc_uploaded"] == "已上传" else 0
+            query = query.filter(Living.is_doc_uploaded == is_uploaded)
+
+        # 是否远程同步
+        if filters["remote_synced"] != "全部":
+            is_synced = 1 if filters["remote_synced"] == "已同步" else 0
+            query = query.filter(Living.is_remote_synced == is_synced)
+
+        # 应用日期范围查询
+        start_datetime = filters["start"]
+        end_datetime = filters["end"]
+
+        # 过滤直播开始时间在指定范围内的记录
+        query = query.filter(Living.living_start >= start_datetime)
+        query = query.filter(Living.living_start <= end_datetime)
+        
+        return query
+    
+    def _query_live_page(self, request, filters: Dict[str, Any], page: int) -> Dict[str, Any]:
+        """后台线程：查询一页直播及其签到统计"""
+        records_data = []  # 存储转换后的记录数据
+        
+        with self.db_manager.get_session() as session:
+            query = self._build_live_query(session, filters)
+            if query is None:
+                return {"records": None, "page": page, "total_pages": 0}
+
+            # 按开始时间倒序键集分页，总数使用缓存的近似值
+            # 游标栈不是线程安全的：串行翻页，被取代的加载在拿到锁后直接退出
+            with self._paginator_lock:
+                request.raise_if_cancelled()
+                records = self.paginator.fetch(query, page)
+                total = self.paginator.count(query)
+                total_pages = self.paginator.total_pages(total, page)
+            
+            # 主播名称和签到统计按本页直播批量查询
+            request.raise_if_cancelled()
+            anchor_names = self._load_anchor_names(session, {record.anchor_userid for record in records})
+            sign_stats = self._load_sign_stats(session, [record.id for record in records])
+            
+            # 在会话内将数据转换为字典，避免会话关闭后的访问问题
+            for record in records:
+                # 获取所有需要的数据
+                record_data = {
+                    "id": record.id,  # 用于标识记录
+                    "livingid": record.livingid,
+                    "theme": record.theme,
+                    "living_start": record.living_start,
+                    "living_duration": record.living_duration,
+                    "anchor_userid": record.anchor_userid,
+                    "description": record.description,
+                    "type": record.type,
+                    "status": record.status,
+                    "corpname": record.corpname,
+                    "agentid": record.agentid,
+                    "viewer_num": record.viewer_num,
+                    "comment_num": record.comment_num,
+                    "mic_num": record.mic_num,
+                    "online_count": record.online_count,
+                    "subscribe_count": record.subscribe_count
+                }
+
+                # 主播的名称
+                anchor_name = anchor_names.get(record.anchor_userid)
+                if anchor_name:
+                    record_data["anchor_name"] = f"{anchor_name}({record.anchor_userid})"
+                else:
+                    record_data["anchor_name"] = f"{record.anchor_userid}"
+
+                # 计算结束时间
+                if record.living_start and record.living_duration:
+                    record_data["end_time"] = record.living_start + timedelta(seconds=record.living_duration)
+                else:
+                    record_data["end_time"] = None
+
+                # 签到统计信息
+                stats = sign_stats.get(record.id, self._EMPTY_SIGN_STATS)
+                record_data["sign_count"] = stats["unique_signers"]  # 使用unique_signers作为签到人数
+                record_data["total_sign_count"] = stats["sign_count"]  # 总签到次数
+                record_data["sign_time"] = stats["sign_time"]
+
+                # 添加状态字段
+                record_data["is_viewer_fetched"] = record.is_viewer_fetched
+                record_data["is_sign_imported"] = record.is_sign_imported
+                record_data["is_doc_uploaded"] = record.is_doc_uploaded
+                record_data["is_remote_synced"] = record.is_remote_synced
+
+                records_data.append(record_data)
+        
+        return {"records": records_data, "page": page, "total_pages": total_pages}
+    
+    def _load_anchor_names(self, session, anchor_userids) -> Dict[str, str]:
+        """批量查询主播名称
+        
+        Returns:
+            Dict[str, str]: {anchor_userid: 用户名}，优先按企业微信账号匹配，其次按登录名匹配
+        """
+        ids = [userid for userid in anchor_userids if userid]
+        by_code, by_login = {}, {}
+        for i in range(0, len(ids), self.QUERY_CHUNK_SIZE):
+            chunk = ids[i:i + self.QUERY_CHUNK_SIZE]
+            rows = session.query(User.name, User.wecom_code, User.login_name).filter(
+                or_(User.wecom_code.in_(chunk), User.login_name.in_(chunk))
+            ).all()
+            for row in rows:
+                if row.wecom_code:
+                    by_code.setdefault(row.wecom_code, row.name)
+                by_login.setdefault(row.login_name, row.name)
+        return {userid: by_code.get(userid) or by_login.get(userid) for userid in ids
+                if userid in by_code or userid in by_login}
+    
+    def _load_sign_stats(self, session, living_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """按直播分组统计签到人数、总签到次数和首次签到时间（每批直播一条 GROUP BY 查询）
+        
+        Returns:
+            Dict[int, Dict[str, Any]]: {living_id: {"unique_signers", "sign_count", "sign_time"}}，
+                没有签到的直播不包含在结果中
+        """
+        stats = {}
+        for i in range(0, len(living_ids), self.QUERY_CHUNK_SIZE):
+            chunk = living_ids[i:i + self.QUERY_CHUNK_SIZE]
+            rows = session.query(
+                LiveViewer.living_id,
+                func.count(LiveViewer.id),
+                func.sum(LiveViewer.sign_count),
+                func.min(LiveViewer.sign_time)
+            ).filter(
+                LiveViewer.living_id.in_(chunk),
+                LiveViewer.is_signed == True
+            ).group_by(LiveViewer.living_id).all()
+            for living_id, unique_signers, sign_count, first_sign in rows:
+                stats[living_id] = {
+                    "unique_signers": unique_signers or 0,
+                    "sign_count": sign_count or 0,
+                    "sign_time": first_sign
+                }
+        return stats
+    
+    def _render_live_page(self, result: Dict[str, Any]):
+        """GUI线程：用查询结果填充表格"""
+        records_data = result["records"]
+        if records_data is None:
+            self.table.setRowCount(0)
+            self.prev_btn.setEnabled(False)
+            self.next_btn.setEnabled(False)
+            self.page_label.setText("第 0 页 / 共 0 页")
+            return
+        self.current_page = result["page"]
+        self.total_pages = result["total_pages"]
+        try:
+            self._fill_live_table(records_data)
         except Exception as e:
             ErrorHandler.handle_error(e, self, "加载直播列表失败")
+    
+    def _fill_live_table(self, records_data: List[Dict[str, Any]]):
+        # 更新表格
+        self.table.setRowCount(len(records_data))
+        for row, record_data in enumerate(records_data):
+            # 设置足够的行高以容纳按钮
+            self.table.setRowHeight(row, 27)  # 设置每行高度为原来的2/3（约27像素）
+
+            # 设置序号
+            self.table.setItem(row, 0, QTableWidgetItem(str(row + 1 + (self.current_page - 1) * self.page_size)))
+
+            # 设置直播ID
+            self.table.setItem(row, 1, QTableWidgetItem(record_data["livingid"]))
+            self.table.setItem(row, 2, QTableWidgetItem(record_data["theme"]))
+            self.table.setItem(row, 3, QTableWidgetItem(record_data["living_start"].strftime("%Y-%m-%d %H:%M:%S")))
+
+            # 结束时间
+            end_time_str = record_data["end_time"].strftime("%Y-%m-%d %H:%M:%S") if record_data["end_time"] else "-"
+            self.table.setItem(row, 4, QTableWidgetItem(end_time_str))
+
+            # 主播名称
+            self.table.setItem(row, 5, QTableWidgetItem(record_data["anchor_name"]))
+
+            # 状态
+            status_text = {
+                LivingStatus.RESERVED: "预约中",
+                LivingStatus.LIVING: "直播中",
+                LivingStatus.ENDED: "已结束",
+                LivingStatus.EXPIRED: "已过期",
+                LivingStatus.CANCELLED: "已取消"
+            }.get(record_data["status"], "未知")
+            self.table.setItem(row, 6, QTableWidgetItem(status_text))
+
+            # 直播类型
+            type_text = {
+                LivingType.GENERAL: "通用直播",
+                LivingType.SMALL: "小班课",
+                LivingType.LARGE: "大班课",
+                LivingType.TRAINING: "企业培训",
+                LivingType.EVENT: "活动直播"
+            }.get(record_data["type"], "未知")
+            self.table.setItem(row, 7, QTableWidgetItem(type_text))
+
+            self.table.setItem(row, 8, QTableWidgetItem(str(record_data["viewer_num"])))
+            self.table.setItem(row, 9, QTableWidgetItem(str(record_data["comment_num"])))
+
+            # 签到人数
+            self.table.setItem(row, 10, QTableWidgetItem(str(record_data["sign_count"])))
+
+            # 签到次数
+            self.table.setItem(row, 11, QTableWidgetItem(str(record_data["total_sign_count"])))
+
+            # 观看信息状态
+            viewer_fetched_text = "已拉取" if record_data["is_viewer_fetched"] == 1 else "未拉取"
+            viewer_item = QTableWidgetItem(viewer_fetched_text)
+            viewer_item.setForeground(Qt.green if record_data["is_viewer_fetched"] == 1 else Qt.red)
+            self.table.setItem(row, 12, viewer_item)
+
+            # 签到导入状态
+            sign_imported_text = "已导入" if record_data["is_sign_imported"] == 1 else "未导入"
+            sign_item = QTableWidgetItem(sign_imported_text)
+            sign_item.setForeground(Qt.green if record_data["is_sign_imported"] == 1 else Qt.red)
+            self.table.setItem(row, 13, sign_item)
+
+            # 企微文档状态
+            doc_uploaded_text = "已上传" if record_data["is_doc_uploaded"] == 1 else "未上传"
+            doc_item = QTableWidgetItem(doc_uploaded_text)
+            doc_item.setForeground(Qt.green if record_data["is_doc_uploaded"] == 1 else Qt.red)
+            self.table.setItem(row, 14, doc_item)
+
+            # 远程同步状态
+            remote_synced_text = "已同步" if record_data["is_remote_synced"] == 1 else "未同步"
+            remote_item = QTableWidgetItem(remote_synced_text)
+            remote_item.setForeground(Qt.green if record_data["is_remote_synced"] == 1 else Qt.red)
+            self.table.setItem(row, 15, remote_item)
+
+            # 操作按钮
+            btn_widget = QWidget()
+            btn_layout = QHBoxLayout(btn_widget)
+            btn_layout.setContentsMargins(2, 2, 2, 2)  # 减小边距使按钮更紧凑
+            btn_layout.setSpacing(5)  # 减少按钮之间的间距
+
+            # 创建Living对象用于按钮回调，避免会话问题
+            living = Living(
+                livingid=record_data["livingid"],
+                theme=record_data["theme"],
+                living_start=record_data["living_start"],
+                living_duration=record_data["living_duration"],
+                anchor_userid=record_data["anchor_userid"],
+                description=record_data["description"],
+                status=record_data["status"],
+                type=record_data["type"],
+                corpname=record_data["corpname"],
+                agentid=record_data["agentid"],
+                viewer_num=record_data["viewer_num"],
+                comment_num=record_data["comment_num"],
+                mic_num=record_data["mic_num"],
+                online_count=record_data["online_count"],
+                subscribe_count=record_data["subscribe_count"]
+            )
+            # 保存签到信息到living对象中，以便在详情对话框中使用
+            living.sign_count = record_data["sign_count"]
+            living.total_sign_count = record_data["total_sign_count"]
+            living.sign_time = record_data["sign_time"]
+
+            # 创建样式化的按钮，减小高度以适应行高
+            view_btn = QPushButton("查看详情")
+            view_btn.setObjectName("linkButton")
+            view_btn.setMinimumHeight(22)  # 减小按钮高度
+            view_btn.setFixedWidth(80)  # 固定宽度
+            view_btn.clicked.connect(lambda checked, r=living: self.view_details(r))
+            btn_layout.addWidget(view_btn)
+
+            # 添加"拉取观看信息"按钮，并根据状态调整显示
+            fetch_viewer_btn = QPushButton("拉取观看信息" if not record_data["is_viewer_fetched"] else "重取观看信息")
+            fetch_viewer_btn.setObjectName("linkButton")
+            fetch_viewer_btn.setMinimumHeight(22)  # 减小按钮高度
+            fetch_viewer_btn.setFixedWidth(120)  # 固定宽度
+            # 如果已经拉取过，使用不同的样式
+            if record_data["is_viewer_fetched"]:
+                fetch_viewer_btn.setStyleSheet("color: #0056b3;")  # 使用较暗的蓝色
+            fetch_viewer_btn.clicked.connect(lambda checked, r=living: self.fetch_watch_stat(r))
+            btn_layout.addWidget(fetch_viewer_btn)
+
+            import_btn = QPushButton("导入签到")
+            import_btn.setObjectName("linkButton")
+            import_btn.setMinimumHeight(22)  # 减小按钮高度
+            import_btn.setFixedWidth(80)  # 固定宽度
+            import_btn.clicked.connect(lambda checked, r=living: self.import_sign(r))
+            btn_layout.addWidget(import_btn)
+
+            # 只有在直播状态为"预约中"时才显示取消按钮
+            if record_data["status"] == LivingStatus.RESERVED:
+                cancel_btn = QPushButton("取消")
+                cancel_btn.setObjectName("linkButton")
+                cancel_btn.setMinimumHeight(22)  # 减小按钮高度
+                cancel_btn.setFixedWidth(80)  # 固定宽度
+                cancel_btn.clicked.connect(lambda checked, r=living: self.cancel_live(r))
+                btn_layout.addWidget(cancel_btn)
+
+            self.table.setCellWidget(row, 16, btn_widget)
+
+        # 更新分页信息
+        self.page_label.setText(f"第 {self.current_page} 页 / 共 {self.total_pages} 页")
+        self.prev_btn.setEnabled(self.current_page > 1)
+        self.next_btn.setEnabled(self.current_page < self.total_pages)
             
     def search(self):
         """搜索"""
         self.current_page = 1
+        self.paginator.invalidate_count()
         self.load_data()
         
     def prev_page(self):
@@ -795,12 +884,9 @@ class LiveListPage(QWidget):
             if not confirm:
                 return
                 
-            # 显示倒计时提示（自动3秒关闭）
-            msg_box = AutoCloseMessageBox("同步进行中", "正在同步直播数据，请稍候...", 3000, self)
-            msg_box.exec()
-            
-            # 获取用于API调用的用户ID列表
+            # 获取用于API调用的用户ID列表，以及这些用户的企业信息（直播详情缺少企业信息时使用）
             user_ids_for_api = []
+            user_corp_info = {}
             
             with self.db_manager.get_session() as session:
                 from src.models.user import UserRole, User
@@ -832,6 +918,7 @@ class LiveListPage(QWidget):
                         userid = user.wecom_code or user.login_name
                         if userid:
                             user_ids_for_api.append(userid)
+                            user_corp_info[userid] = {"corpname": user.corpname, "agentid": user.agentid}
                 
                 elif current_user and user_role == UserRole.WECOM_ADMIN.value and user_corpid:
                     # 如果是企业管理员，获取该企业下所有用户的直播列表
@@ -840,6 +927,7 @@ class LiveListPage(QWidget):
                         userid = user.wecom_code or user.login_name
                         if userid:
                             user_ids_for_api.append(userid)
+                            user_corp_info[userid] = {"corpname": user.corpname, "agentid": user.agentid}
                 
                 else:
                     # 如果是普通用户或无法确定角色，只获取自己的直播列表
@@ -847,294 +935,77 @@ class LiveListPage(QWidget):
                         userid = current_user.wecom_code or current_user.login_name
                         if userid:
                             user_ids_for_api.append(userid)
-            
-            # 从企业微信API获取直播ID列表
-            livingid_list = []
-            # 创建一个映射，记录每个直播ID是从哪个用户获取的
-            livingid_user_map = {}
-            
-            for userid in user_ids_for_api:
-                try:
-                    response = self.wecom_api.get_user_all_livingid(userid)
-                    if response.get("errcode") == 0:
-                        live_ids = response.get("livingid_list", [])
-                        for live_id in live_ids:
-                            # 记录这个直播ID是从哪个用户获取的
-                            livingid_user_map[live_id] = userid
-                        livingid_list.extend(live_ids)
-                except Exception as e:
-                    logger.error(f"获取用户 {userid} 的直播列表失败: {str(e)}")
-            
-            # 去重
-            livingid_list = list(set(livingid_list))
-            
-            # 3. 从预约直播表中获取数据
-            bookings = {}
-            with self.db_manager.get_session() as session:
-                booking_records = session.query(LiveBooking).all()
-                for booking in booking_records:
-                    bookings[booking.livingid] = {
-                        "id": booking.id,  # 添加booking的ID
-                        "livingid": booking.livingid,
-                        "theme": booking.theme,
-                        "living_start": booking.living_start,
-                        "living_duration": booking.living_duration,
-                        "anchor_userid": booking.anchor_userid,
-                        "description": booking.description,
-                        "type": booking.type,
-                        "status": booking.status,
-                        "corpname": booking.corpname,
-                        "agentid": booking.agentid,
-                        "viewer_num": booking.viewer_num,
-                        "comment_num": booking.comment_num,
-                        "mic_num": booking.mic_num,
-                        "online_count": booking.online_count,
-                        "subscribe_count": booking.subscribe_count,
-                    }
-            
-            # 4. 从直播信息表中获取数据
-            livings = {}
-            with self.db_manager.get_session() as session:
-                living_records = session.query(Living).all()
-                for living in living_records:
-                    livings[living.livingid] = {
-                        "id": living.id,  # 添加living的ID
-                        "livingid": living.livingid,
-                        "theme": living.theme,
-                        "living_start": living.living_start,
-                        "living_duration": living.living_duration,
-                        "anchor_userid": living.anchor_userid,
-                        "description": living.description,
-                        "type": living.type,
-                        "status": living.status,
-                        "corpname": living.corpname,
-                        "agentid": living.agentid,
-                        "viewer_num": living.viewer_num,
-                        "comment_num": living.comment_num,
-                        "mic_num": living.mic_num,
-                        "online_count": living.online_count,
-                        "subscribe_count": living.subscribe_count,
-                    }
-            
-            # 5. 创建所有直播ID的集合（API获取的 + 本地数据库的）
-            all_live_ids = set(livingid_list) | set(bookings.keys()) | set(livings.keys())
-            
-            # 6. 从企业微信获取直播数据
-            updated_count = 0
-            created_count = 0
-            
-            with self.db_manager.get_session() as session:
-                # 创建用户ID到用户对象的映射，用于获取企业信息
-                user_objects = {}
-                from sqlalchemy import or_
-                for userid in user_ids_for_api:
-                    user = session.query(User).filter(
-                        or_(User.wecom_code == userid, User.login_name == userid)
-                    ).first()
-                    if user:
-                        user_objects[userid] = user
-                
-                for livingid in all_live_ids:
-                    # 从企业微信获取数据
-                    try:
-                        response = self.wecom_api.get_living_info(livingid)
-                        
-                        if response.get("errcode") == 0:
-                            # 获取企业微信返回的数据
-                            wecom_data = response.get("living_info", {})
-                            
-                            # 创建最终数据（优先级：企业微信 > livings > bookings）
-                            final_data = {}
-                            
-                            # 添加bookings数据
-                            booking_id = None
-                            if livingid in bookings:
-                                final_data.update(bookings[livingid])
-                                booking_id = bookings[livingid]["id"]
-                                
-                            # 添加livings数据
-                            if livingid in livings:
-                                final_data.update(livings[livingid])
-                                
-                            # 添加企业微信数据（转换格式）
-                            if wecom_data:
-                                # 转换时间和状态
-                                if "living_start" in wecom_data and isinstance(wecom_data["living_start"], (int, float)):
-                                    wecom_data["living_start"] = datetime.fromtimestamp(wecom_data["living_start"])
-                                    
-                                # 转换状态（BookingStatus -> LivingStatus）
-                                if "status" in wecom_data:
-                                    status_map = {
-                                        BookingStatus.RESERVING: LivingStatus.RESERVED,
-                                        BookingStatus.LIVING: LivingStatus.LIVING,
-                                        BookingStatus.ENDED: LivingStatus.ENDED,
-                                        BookingStatus.EXPIRED: LivingStatus.EXPIRED,
-                                        BookingStatus.CANCELLED: LivingStatus.CANCELLED
-                                    }
-                                    wecom_data["status"] = status_map.get(wecom_data["status"], LivingStatus.RESERVED)
-                                
-                                final_data.update(wecom_data)
-                            
-                            # 检查是否存在
-                            exists = session.query(Living).filter_by(livingid=livingid).first()
-                            
-                            if exists:
-                                # 处理类型字段，确保它是 LivingType 枚举类型
-                                type_value = final_data.get("type")
-                                if type_value is not None:
-                                    if isinstance(type_value, int) or (isinstance(type_value, str) and type_value.isdigit()):
-                                        type_value = int(type_value)
-                                        # 将数字映射到 LivingType 枚举
-                                        type_map = {
-                                            0: LivingType.GENERAL,
-                                            1: LivingType.SMALL,
-                                            2: LivingType.LARGE,
-                                            3: LivingType.TRAINING,
-                                            4: LivingType.EVENT
-                                        }
-                                        exists.type = type_map.get(type_value, LivingType.GENERAL)
-                                
-                                # 处理状态字段，确保它是 LivingStatus 枚举类型
-                                status_value = final_data.get("status")
-                                if status_value is not None:
-                                    if isinstance(status_value, int) or (isinstance(status_value, str) and status_value.isdigit()):
-                                        status_value = int(status_value)
-                                        # 将数字映射到 LivingStatus 枚举
-                                        status_map = {
-                                            0: LivingStatus.RESERVED,
-                                            1: LivingStatus.LIVING,
-                                            2: LivingStatus.ENDED,
-                                            3: LivingStatus.EXPIRED,
-                                            4: LivingStatus.CANCELLED
-                                        }
-                                        exists.status = status_map.get(status_value, LivingStatus.RESERVED)
-                                
-                                # 更新现有记录的其他字段
-                                exists.theme = final_data.get("theme", exists.theme)
-                                exists.living_start = final_data.get("living_start", exists.living_start)
-                                exists.living_duration = final_data.get("living_duration", exists.living_duration)
-                                exists.anchor_userid = final_data.get("anchor_userid", exists.anchor_userid)
-                                exists.description = final_data.get("description", exists.description)
-                                # type 和 status 已在上面处理，这里不再赋值
-                                
-                                # 更新企业信息字段
-                                if final_data.get("corpname"):
-                                    exists.corpname = final_data.get("corpname")
-                                elif not exists.corpname and livingid in livingid_user_map:
-                                    # 如果corpname为空且知道该直播从哪个用户获取
-                                    user_id = livingid_user_map[livingid]
-                                    if user_id in user_objects and user_objects[user_id].corpname:
-                                        exists.corpname = user_objects[user_id].corpname
-                                
-                                if final_data.get("agentid"):
-                                    exists.agentid = final_data.get("agentid")
-                                elif not exists.agentid and livingid in livingid_user_map:
-                                    # 如果agentid为空且知道该直播从哪个用户获取
-                                    user_id = livingid_user_map[livingid]
-                                    if user_id in user_objects and user_objects[user_id].agentid:
-                                        exists.agentid = user_objects[user_id].agentid
-                                
-                                exists.viewer_num = final_data.get("viewer_num", exists.viewer_num)
-                                exists.comment_num = final_data.get("comment_num", exists.comment_num)
-                                exists.mic_num = final_data.get("mic_num", exists.mic_num)
-                                exists.online_count = final_data.get("online_count", exists.online_count)
-                                exists.subscribe_count = final_data.get("subscribe_count", exists.subscribe_count)
-                                # 设置远程同步状态为已同步
-                                exists.is_remote_synced = 1
-                                # 设置关联的预约ID
-                                exists.live_booking_id = booking_id
-                                updated_count += 1
-                                
-                                # 更新相关的LiveViewer记录的live_booking_id
-                                if booking_id:
-                                    session.query(LiveViewer).filter_by(living_id=exists.id).update(
-                                        {"live_booking_id": booking_id}
-                                    )
-                            else:
-                                # 创建新记录
-                                # 处理类型字段，确保它是 LivingType 枚举类型
-                                type_value = final_data.get("type")
-                                if type_value is not None:
-                                    if isinstance(type_value, int) or (isinstance(type_value, str) and type_value.isdigit()):
-                                        type_value = int(type_value)
-                                        # 将数字映射到 LivingType 枚举
-                                        type_map = {
-                                            0: LivingType.GENERAL,
-                                            1: LivingType.SMALL,
-                                            2: LivingType.LARGE,
-                                            3: LivingType.TRAINING,
-                                            4: LivingType.EVENT
-                                        }
-                                        type_value = type_map.get(type_value, LivingType.GENERAL)
-                                else:
-                                    type_value = LivingType.GENERAL
-                                    
-                                # 处理状态字段，确保它是 LivingStatus 枚举类型
-                                status_value = final_data.get("status", LivingStatus.RESERVED)
-                                if isinstance(status_value, int) or (isinstance(status_value, str) and status_value.isdigit()):
-                                    status_value = int(status_value)
-                                    # 将数字映射到 LivingStatus 枚举
-                                    status_map = {
-                                        0: LivingStatus.RESERVED,
-                                        1: LivingStatus.LIVING,
-                                        2: LivingStatus.ENDED,
-                                        3: LivingStatus.EXPIRED,
-                                        4: LivingStatus.CANCELLED
-                                    }
-                                    status_value = status_map.get(status_value, LivingStatus.RESERVED)
-                                
-                                # 获取企业信息，优先使用API数据，其次使用关联用户的企业信息
-                                corpname = final_data.get("corpname", "")
-                                agentid = final_data.get("agentid", "")
-                                
-                                # 如果企业信息为空，尝试从用户获取
-                                if (not corpname or not agentid) and livingid in livingid_user_map:
-                                    user_id = livingid_user_map[livingid]
-                                    if user_id in user_objects:
-                                        if not corpname and user_objects[user_id].corpname:
-                                            corpname = user_objects[user_id].corpname
-                                        if not agentid and user_objects[user_id].agentid:
-                                            agentid = user_objects[user_id].agentid
-                                
-                                new_living = Living(
-                                    livingid=livingid,
-                                    theme=final_data.get("theme", ""),
-                                    living_start=final_data.get("living_start", datetime.now()),
-                                    living_duration=final_data.get("living_duration", 0),
-                                    anchor_userid=final_data.get("anchor_userid", ""),
-                                    description=final_data.get("description", ""),
-                                    type=type_value,
-                                    status=status_value,
-                                    corpname=corpname,
-                                    agentid=agentid,
-                                    viewer_num=final_data.get("viewer_num", 0),
-                                    comment_num=final_data.get("comment_num", 0),
-                                    mic_num=final_data.get("mic_num", 0),
-                                    online_count=final_data.get("online_count", 0),
-                                    subscribe_count=final_data.get("subscribe_count", 0),
-                                    is_remote_synced=1,  # 设置远程同步状态为已同步
-                                    live_booking_id=booking_id  # 设置关联的预约ID
-                                )
-                                session.add(new_living)
-                                created_count += 1
-                    except Exception as e:
-                        logger.error(f"同步直播数据失败 (ID: {livingid}): {str(e)}")
-                
-                # 提交所有更改
-                session.commit()
-            
-            # 显示结果
-            ErrorHandler.handle_info(
-                f"同步直播数据完成\n更新记录：{updated_count}条\n新增记录：{created_count}条",
-                self,
-                "同步完成"
+                            user_corp_info[userid] = {"corpname": current_user.corpname, "agentid": current_user.agentid}
+            
+            # 拉取直播列表和详情在后台执行，可取消
+            run_with_progress(
+                self, "正在同步直播数据，请稍候...", self._sync_lives, user_ids_for_api, user_corp_info,
+                key="sync", title="同步直播数据",
+                on_result=self._on_lives_synced,
+                on_error=lambda e: ErrorHandler.handle_error(e, self, "同步直播数据失败")
             )
             
-            # 刷新数据
-            self.load_data()
-            
         except Exception as e:
             ErrorHandler.handle_error(e, self, "同步直播数据失败")
+    
+    def _sync_lives(self, request, user_ids_for_api: List[str],
+                    user_corp_info: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """后台线程：从企业微信拉取直播ID并按同步计划写入数据库
+        
+        Args:
+            user_ids_for_api: 要拉取直播列表的用户ID
+            user_corp_info: {用户ID: {"corpname", "agentid"}}，界面线程读取用户时一并读取
+        """
+        # 从企业微信API获取直播ID列表
+        livingid_list = []
+        # 创建一个映射，记录每个直播ID是从哪个用户获取的
+        livingid_user_map = {}
+        
+        total = len(user_ids_for_api)
+        for index, userid in enumerate(user_ids_for_api):
+            request.raise_if_cancelled()
+            request.report_progress(index, total + 1, f"正在获取直播列表 ({index + 1}/{total})...")
+            try:
+                response = self.wecom_api.get_user_all_livingid(userid)
+                if response.get("errcode") == 0:
+                    live_ids = response.get("livingid_list", [])
+                    for live_id in live_ids:
+                        # 记录这个直播ID是从哪个用户获取的
+                        livingid_user_map[live_id] = userid
+                    livingid_list.extend(live_ids)
+            except Exception as e:
+                logger.error(f"获取用户 {userid} 的直播列表失败: {str(e)}")
+        
+        # 去重
+        livingid_list = list(set(livingid_list))
+        
+        # 3. 记录每场直播所属用户的企业信息，直播详情缺少企业信息时使用
+        owner_info = {
+            live_id: user_corp_info[userid]
+            for live_id, userid in livingid_user_map.items() if userid in user_corp_info
+        }
+        
+        # 4. 按同步计划只刷新可能变化的直播，并批量写入（写入在一个事务中完成，开始后不再响应取消）
+        request.raise_if_cancelled()
+        request.report_progress(total, total + 1, f"正在同步 {len(livingid_list)} 场直播的详情...")
+        planner = LiveSyncPlanner(self.db_manager, self.wecom_api)
+        return planner.sync(livingid_list, owner_info)
+    
+    def _on_lives_synced(self, stats: Dict[str, Any]):
+        updated_count = stats["updated"] + stats["unchanged"]
+        created_count = stats["created"]
+        
+        # 显示结果
+        ErrorHandler.handle_info(
+            f"同步直播数据完成\n更新记录：{updated_count}条\n新增记录：{created_count}条\n"
+            f"跳过记录：{stats['skipped']}条\n失败记录：{stats['failed']}条",
+            self,
+            "同步完成"
+        )
+        
+        # 刷新数据
+        self.paginator.invalidate_count()
+        self.load_data()
             
     @PerformanceManager.measure_operation("cancel_live")
     def cancel_live(self, live: Living):
@@ -1206,145 +1077,123 @@ class LiveListPage(QWidget):
                 self,
                 "选择签到文件",
                 "",
-                "Excel Files (*.xlsx *.xls);;CSV Files (*.csv);;All Files (*)"
+                "Excel Files (*.xlsx *.xls)"
             )
             
             if not file_path:
                 return  # 用户取消了选择，直接返回
             
-            # 使用进度对话框模式创建IO对话框
-            io_dialog = IODialog(parent=self, title="导入签到记录", is_progress_dialog=True)
-            io_dialog.add_info(f"正在导入签到数据，请稍候...")
-            io_dialog.add_info(f"选择的文件: {file_path}")
-            io_dialog.show()
-            
-            # 读取文件
-            if file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-                try:
-                    df = pd.read_excel(file_path)
-                except Exception as e:
-                    io_dialog.add_error(f"读取Excel文件失败: {str(e)}")
-                    io_dialog.finish()  # 设置完成状态，但不关闭对话框
-                    io_dialog.exec()  # 使用exec()而不是show()，等待用户关闭
-                    return
-            elif file_path.endswith('.csv'):
-                try:
-                    df = pd.read_csv(file_path)
-                except Exception as e:
-                    io_dialog.add_error(f"读取CSV文件失败: {str(e)}")
-                    io_dialog.finish()
-                    io_dialog.exec()
-                    return
-            else:
-                io_dialog.add_error("不支持的文件格式")
-                io_dialog.finish()
-                io_dialog.exec()
+            if not file_path.lower().endswith(('.xlsx', '.xls')):
+                ErrorHandler.handle_warning("不支持的文件格式，请选择Excel文件", self, "错误")
                 return
             
-            # 创建SignImportManager实例
-            from src.core.sign_import_manager import SignImportManager
-            
-            # 简化创建过程，移除不必要的企业信息获取
-            import_manager = SignImportManager(self.db_manager)
-            
-            try:
-                # 在一个会话中执行整个导入过程，以避免会话分离问题
-                with self.db_manager.get_session() as session:
-                    # 重新获取直播记录
-                    live_record = session.query(Living).filter_by(livingid=live.livingid).first()
-                    if not live_record:
-                        io_dialog.add_error("找不到直播记录")
-                        io_dialog.finish()
-                        io_dialog.exec()
-                        return
-                    
-                    # 添加进度信息
-                    io_dialog.add_info(f"开始导入直播 \"{live_record.theme}\" 的签到数据...")
-                    io_dialog.add_info(f"直播ID: {live_record.livingid}")
-                    io_dialog.add_info(f"直播时间: {live_record.living_start}")
-                    
-                    # 导入签到数据，传递 live_record.id，确保它仍然与会话关联
-                    import_results = import_manager.import_sign_data(file_path, live_record.id)
-                    
-                    # 解析导入结果
-                    success_count = import_results.get('success_count', 0)
-                    error_count = import_results.get('error_count', 0)
-                    skipped_count = import_results.get('skipped_count', 0)
-                    success_details = import_results.get('success_details', [])
-                    error_details = import_results.get('error_details', [])
-                    skipped_details = import_results.get('skipped_details', [])
-                    
-                    # 设置签到导入标志
-                    live_record.is_sign_imported = 1
-                    session.commit()
-            except Exception as e:
-                io_dialog.add_error(f"导入过程中发生错误: {str(e)}")
-                import traceback
-                io_dialog.add_error(f"错误详情: {traceback.format_exc()}")
-                io_dialog.finish()
-                io_dialog.exec()
-                return
-            
-            # 显示导入结果
-            io_dialog.add_info("\n===== 导入过程完成 =====")
-            
-            # 显示成功记录
-            if success_count > 0:
-                io_dialog.add_success(f"✓ 成功导入 {success_count} 条签到记录")
-                # 显示成功详情（限制显示数量以避免过多）
-                max_success_details = 10
-                if success_details:
-                    io_dialog.add_info(f"成功详情（显示前{min(len(success_details), max_success_details)}条，共{len(success_details)}条）:")
-                    for detail in success_details[:max_success_details]:
-                        io_dialog.add_success(f"  ✓ {detail}")
-                    if len(success_details) > max_success_details:
-                        io_dialog.add_info(f"  ... 还有 {len(success_details) - max_success_details} 条成功记录未显示")
-            else:
-                io_dialog.add_warning("没有成功导入的记录")
-            
-            # 显示跳过记录
-            if skipped_count > 0:
-                io_dialog.add_warning(f"⚠ 跳过 {skipped_count} 条重复记录")
-                # 显示跳过详情
-                if skipped_details:
-                    max_skipped_details = 10
-                    io_dialog.add_warning(f"跳过详情（显示前{min(len(skipped_details), max_skipped_details)}条，共{len(skipped_details)}条）:")
-                    for detail in skipped_details[:max_skipped_details]:
-                        io_dialog.add_warning(f"  ⚠ {detail}")
-                    if len(skipped_details) > max_skipped_details:
-                        io_dialog.add_warning(f"  ... 还有 {len(skipped_details) - max_skipped_details} 条跳过记录未显示")
-            
-            # 显示错误记录
-            if error_count > 0:
-                io_dialog.add_error(f"✗ 导入失败 {error_count} 条记录")
-                # 显示错误详情
-                if error_details:
-                    max_error_details = 10
-                    io_dialog.add_error(f"错误详情（显示前{min(len(error_details), max_error_details)}条，共{len(error_details)}条）:")
-                    for detail in error_details[:max_error_details]:
-                        io_dialog.add_error(f"  ✗ {detail}")
-                    if len(error_details) > max_error_details:
-                        io_dialog.add_error(f"  ... 还有 {len(error_details) - max_error_details} 条错误记录未显示")
-            
-            # 添加总结信息
-            io_dialog.add_info("\n===== 导入结果总结 =====")
-            io_dialog.add_info(f"总处理记录: {success_count + error_count + skipped_count}")
-            io_dialog.add_success(f"成功导入: {success_count}")
-            io_dialog.add_warning(f"跳过记录: {skipped_count}")
-            io_dialog.add_error(f"导入失败: {error_count}")
-            
-            # 完成导入过程，但不自动关闭对话框
-            io_dialog.finish()
-            
-            # 使用exec()方法显示对话框，并等待用户手动关闭
-            io_dialog.exec()
-            
-            # 刷新数据
-            self.load_data()
+            # 导入在后台线程执行，完成后显示结果
+            run_with_progress(
+                self, f"正在导入直播[{live.theme}]的签到数据...", self._import_sign_file, live.livingid, file_path,
+                key=f"import_sign:{live.livingid}", title="导入签到记录", cancellable=False,
+                on_result=partial(self._on_sign_imported, file_path),
+                on_error=lambda e: ErrorHandler.handle_error(e, self, "导入签到失败")
+            )
             
         except Exception as e:
             ErrorHandler.handle_error(e, self, "导入签到失败")
-            
+    
+    def _import_sign_file(self, request, livingid: str, file_path: str) -> Dict[str, Any]:
+        """后台线程：导入签到文件并设置导入标志"""
+        from src.core.sign_import_manager import SignImportManager
+        
+        with self.db_manager.get_session() as session:
+            live_record = session.query(Living).filter_by(livingid=livingid).first()
+            if not live_record:
+                raise ValueError("找不到直播记录")
+            live_id = live_record.id
+            live_info = {"theme": live_record.theme, "livingid": live_record.livingid,
+                         "living_start": live_record.living_start}
+        
+        import_results = SignImportManager(self.db_manager).import_sign_data(file_path, live_id)
+        
+        # 设置签到导入标志
+        with self.db_manager.get_session() as session:
+            session.execute(update(Living).where(Living.id == live_id).values(is_sign_imported=1))
+            session.commit()
+        return {"live": live_info, "results": import_results}
+    
+    def _on_sign_imported(self, file_path: str, outcome: Dict[str, Any]):
+        """显示签到导入结果"""
+        live_info = outcome["live"]
+        import_results = outcome["results"]
+        
+        io_dialog = IODialog(parent=self, title="导入签到记录", is_progress_dialog=True)
+        io_dialog.add_info(f"选择的文件: {file_path}")
+        io_dialog.add_info(f"直播 \"{live_info['theme']}\" 的签到数据")
+        io_dialog.add_info(f"直播ID: {live_info['livingid']}")
+        io_dialog.add_info(f"直播时间: {live_info['living_start']}")
+        
+        # 解析导入结果
+        success_count = import_results.get('success_count', 0)
+        error_count = import_results.get('error_count', 0)
+        skipped_count = import_results.get('skipped_count', 0)
+        success_details = import_results.get('success_details', [])
+        error_details = import_results.get('error_details', [])
+        skipped_details = import_results.get('skipped_details', [])
+        
+        # 显示导入结果
+        io_dialog.add_info("\n===== 导入过程完成 =====")
+        
+        # 显示成功记录
+        if success_count > 0:
+            io_dialog.add_success(f"✓ 成功导入 {success_count} 条签到记录")
+            # 显示成功详情（限制显示数量以避免过多）
+            max_success_details = 10
+            if success_details:
+                io_dialog.add_info(f"成功详情（显示前{min(len(success_details), max_success_details)}条，共{len(success_details)}条）:")
+                for detail in success_details[:max_success_details]:
+                    io_dialog.add_success(f"  ✓ {detail}")
+                if len(success_details) > max_success_details:
+                    io_dialog.add_info(f"  ... 还有 {len(success_details) - max_success_details} 条成功记录未显示")
+        else:
+            io_dialog.add_warning("没有成功导入的记录")
+        
+        # 显示跳过记录
+        if skipped_count > 0:
+            io_dialog.add_warning(f"⚠ 跳过 {skipped_count} 条重复记录")
+            # 显示跳过详情
+            if skipped_details:
+                max_skipped_details = 10
+                io_dialog.add_warning(f"跳过详情（显示前{min(len(skipped_details), max_skipped_details)}条，共{len(skipped_details)}条）:")
+                for detail in skipped_details[:max_skipped_details]:
+                    io_dialog.add_warning(f"  ⚠ {detail}")
+                if len(skipped_details) > max_skipped_details:
+                    io_dialog.add_warning(f"  ... 还有 {len(skipped_details) - max_skipped_details} 条跳过记录未显示")
+        
+        # 显示错误记录
+        if error_count > 0:
+            io_dialog.add_error(f"✗ 导入失败 {error_count} 条记录")
+            # 显示错误详情
+            if error_details:
+                max_error_details = 10
+                io_dialog.add_error(f"错误详情（显示前{min(len(error_details), max_error_details)}条，共{len(error_details)}条）:")
+                for detail in error_details[:max_error_details]:
+                    io_dialog.add_error(f"  ✗ {detail}")
+                if len(error_details) > max_error_details:
+                    io_dialog.add_error(f"  ... 还有 {len(error_details) - max_error_details} 条错误记录未显示")
+        
+        # 添加总结信息
+        io_dialog.add_info("\n===== 导入结果总结 =====")
+        io_dialog.add_info(f"总处理记录: {success_count + error_count + skipped_count}")
+        io_dialog.add_success(f"成功导入: {success_count}")
+        io_dialog.add_warning(f"跳过记录: {skipped_count}")
+        io_dialog.add_error(f"导入失败: {error_count}")
+        
+        # 完成导入过程，但不自动关闭对话框
+        io_dialog.finish()
+        
+        # 使用exec()方法显示对话框，并等待用户手动关闭
+        io_dialog.exec()
+        
+        # 刷新数据
+        self.load_data()
+        
     @PerformanceManager.measure_operation("fetch_watch_stat")
     def fetch_watch_stat(self, live: Living):
         """拉取直播观看信息"""
@@ -1362,85 +1211,177 @@ class LiveListPage(QWidget):
             if confirm_box.exec() != QMessageBox.StandardButton.Yes:
                 return
             
-            # 显示进度对话框
-            dialog = IODialog(parent=self, title="拉取观看信息", is_import=False, is_progress_dialog=True)
-            dialog.show()
-            dialog.add_info(f"正在拉取直播[{live.theme}]的观看信息...")
-            
-            # 创建LiveViewerManager实例
-            from src.core.live_viewer_manager import LiveViewerManager
-            viewer_manager = LiveViewerManager(
-                self.db_manager,
-                self.auth_manager
+            # 拉取在后台线程执行，取消后已写入的页下次拉取时从检查点继续
+            holder = {}
+            holder["request"] = run_with_progress(
+                self, f"正在拉取直播[{live.theme}]的观看信息...", self._fetch_viewers, live.livingid,
+                key=f"fetch_watch_stat:{live.livingid}", title="拉取观看信息",
+                on_result=partial(self._on_viewers_fetched, live.theme),
+                on_error=lambda e: ErrorHandler.handle_error(e, self, "拉取观看信息失败"),
+                on_finished=lambda: self._on_fetch_finished(holder["request"], live.theme)
             )
-            
-            # 拉取观看信息 - 移除外部token参数，使用系统自动处理token
-            success = viewer_manager.process_viewer_info(live.livingid)
-            
-            # 获取统计数据
-            stats = viewer_manager.get_stats()
-            
-            # 检查是否成功拉取数据
-            if not success:
-                # 显示错误信息
-                error_message = stats.get('last_error', '未知错误')
-                dialog.add_error(f"观看数据拉取失败：{error_message}")
-                dialog.finish()
-                return
-            
-            # 检查是否有观众数据
-            if stats.get('total_viewers', 0) == 0:
-                dialog.add_warning("未获取到任何观看数据，请确认该直播有人观看")
-                dialog.finish()
-                
-                # 尽管没有观众数据，仍然更新直播的拉取状态
-                with self.db_manager.get_session() as session:
-                    living_record = session.query(Living).filter_by(livingid=live.livingid).first()
-                    if living_record:
-                        living_record.is_viewer_fetched = 1
-                        session.commit()
-                        
-                # 重新加载直播列表
-                self.load_data()
-                return
-            
-            # 显示成功信息
-            dialog.add_success(f"观看数据拉取成功！")
-            dialog.add_info(f"总观看人数: {stats.get('total_viewers', 0)}")
-            dialog.add_info(f"内部成员: {stats.get('internal_viewers', 0)}")
-            dialog.add_info(f"外部用户: {stats.get('external_viewers', 0)}")
                 
-            # 更新直播的拉取状态
+        except Exception as e:
+            ErrorHandler.handle_error(e, self, "拉取观看信息失败")
+    
+    def _fetch_viewers(self, request, livingid: str) -> Dict[str, Any]:
+        """后台线程：拉取一场直播的观看信息"""
+        from src.core.live_viewer_manager import LiveViewerManager
+        stage_names = {"collect": "拉取中", "write": "写入中"}
+        
+        viewer_manager = LiveViewerManager(self.db_manager, self.auth_manager)
+        viewer_manager.progress_callback = lambda _livingid, stage, count: request.report_progress(
+            count, 0, f"{stage_names.get(stage, '处理中')}：已处理 {count} 人"
+        )
+        viewer_manager.is_cancelled = request.is_cancelled
+        success = viewer_manager.process_viewer_info(livingid)
+        stats = viewer_manager.get_stats()
+        
+        if success:
+            # 更新直播的拉取状态（没有观众数据时同样标记）
             with self.db_manager.get_session() as session:
-                living_record = session.query(Living).filter_by(livingid=live.livingid).first()
-                if living_record:
-                    living_record.is_viewer_fetched = 1
-                    session.commit()
-                    dialog.add_success("已更新拉取状态标记")
-            
-            # 重新加载直播列表
+                session.execute(update(Living).where(Living.livingid == livingid).values(is_viewer_fetched=1))
+                session.commit()
+        return {"success": success, "stats": stats}
+    
+    def _on_fetch_finished(self, request, theme: str):
+        if request.is_cancelled():
+            ErrorHandler.handle_info(f"已取消拉取直播[{theme}]的观看信息，已写入的部分下次拉取时继续", self, "已取消")
             self.load_data()
-            
-            # 完成操作
+    
+    def _on_viewers_fetched(self, theme: str, outcome: Dict[str, Any]):
+        """显示拉取结果"""
+        stats = outcome["stats"]
+        dialog = IODialog(parent=self, title="拉取观看信息", is_import=False, is_progress_dialog=True)
+        dialog.show()
+        dialog.add_info(f"直播[{theme}]的观看信息")
+        
+        # 检查是否成功拉取数据
+        if not outcome["success"]:
+            # 显示错误信息
+            error_message = stats.get('last_error', '未知错误')
+            dialog.add_error(f"观看数据拉取失败：{error_message}")
             dialog.finish()
+            return
+        
+        # 重新加载直播列表
+        self.load_data()
+        
+        # 检查是否有观众数据
+        if stats.get('total_viewers', 0) == 0:
+            dialog.add_warning("未获取到任何观看数据，请确认该直播有人观看")
+            dialog.finish()
+            return
+        
+        # 显示成功信息
+        dialog.add_success(f"观看数据拉取成功！")
+        dialog.add_info(f"总观看人数: {stats.get('total_viewers', 0)}")
+        dialog.add_info(f"内部成员: {stats.get('internal_viewers', 0)}")
+        dialog.add_info(f"外部用户: {stats.get('external_viewers', 0)}")
+        dialog.add_info(
+            f"新增: {stats.get('new_viewers', 0)}, 更新: {stats.get('updated_viewers', 0)}, "
+            f"未变化: {stats.get('unchanged_viewers', 0)}"
+        )
+        dialog.add_success("已更新拉取状态标记")
+        
+        # 完成操作
+        dialog.finish()
+        
+        # 显示成功消息
+        msg_box = AutoCloseMessageBox(
+            "拉取成功", 
+            f"已成功拉取直播[{theme}]的观看信息", 
+            timeout=3000
+        )
+        msg_box.exec()
             
-            # 显示成功消息
-            msg_box = AutoCloseMessageBox(
-                "拉取成功", 
-                f"已成功拉取直播[{live.theme}]的观看信息", 
-                timeout=3000
+    def batch_fetch_watch_stat(self):
+        """拉取当前搜索条件下所有已结束、尚未拉取观看信息的直播"""
+        try:
+            BackgroundLoader().submit(
+                self._query_batch_fetch_targets, self._current_search_filters(),
+                key="batch_fetch_targets", owner=self,
+                on_result=self._confirm_batch_fetch,
+                on_error=lambda e: ErrorHandler.handle_error(e, self, "查询待拉取的直播失败")
             )
-            msg_box.exec()
-                
         except Exception as e:
-            ErrorHandler.handle_error(e, self, "拉取观看信息失败")
-            
+            ErrorHandler.handle_error(e, self, "批量拉取观看信息失败")
+    
+    def _query_batch_fetch_targets(self, request, filters: Dict[str, Any]) -> Dict[str, str]:
+        """后台线程：查询待拉取的直播 {livingid: 主题}"""
+        with self.db_manager.get_session() as session:
+            query = self._build_live_query(session, filters)
+            if query is None:
+                return {}
+            rows = (
+                query.filter(Living.status == LivingStatus.ENDED, Living.is_viewer_fetched == 0)
+                .with_entities(Living.livingid, Living.theme)
+                .order_by(Living.living_start)
+                .all()
+            )
+        return {livingid: theme for livingid, theme in rows}
+    
+    def _confirm_batch_fetch(self, targets: Dict[str, str]):
+        if not targets:
+            ErrorHandler.handle_info("当前搜索条件下没有需要拉取观看信息的已结束直播", self, "提示")
+            return
+        
+        confirm_box = QMessageBox(self)
+        confirm_box.setIcon(QMessageBox.Icon.Question)
+        confirm_box.setWindowTitle("确认批量拉取")
+        confirm_box.setText(f"确定要拉取当前搜索条件下 {len(targets)} 场已结束直播的观看信息吗？")
+        confirm_box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        confirm_box.setDefaultButton(QMessageBox.StandardButton.No)
+        if confirm_box.exec() != QMessageBox.StandardButton.Yes:
+            return
+        
+        run_with_progress(
+            self, f"正在拉取 {len(targets)} 场直播的观看信息...", self._batch_fetch_viewers, targets,
+            key="batch_fetch", title="批量拉取观看信息",
+            on_result=partial(self._on_batch_fetched, targets),
+            on_error=lambda e: ErrorHandler.handle_error(e, self, "批量拉取观看信息失败")
+        )
+    
+    def _batch_fetch_viewers(self, request, targets: Dict[str, str]) -> Dict[str, Any]:
+        """后台线程：并行拉取多场直播的观看信息"""
+        stage_names = {"collect": "拉取中", "write": "写入中", "done": "完成", "failed": "失败", "cancelled": "已取消"}
+        total = len(targets)
+        finished = set()
+        
+        def on_progress(item: Dict[str, Any]):
+            if item["stage"] in ("done", "failed", "cancelled"):
+                finished.add(item["livingid"])
+            request.report_progress(
+                len(finished), total,
+                f"已完成 {len(finished)}/{total} 场\n"
+                f"[{targets.get(item['livingid'], item['livingid'])}] {stage_names.get(item['stage'], '')}："
+                f"{item['viewers']} 人，{item['throughput']:.0f} 人/秒"
+            )
+        
+        orchestrator = ViewerFetchOrchestrator(self.db_manager, auth_manager=self.auth_manager)
+        return orchestrator.run(list(targets), progress_callback=on_progress, is_cancelled=request.is_cancelled)
+    
+    def _on_batch_fetched(self, targets: Dict[str, str], summary: Dict[str, Any]):
+        lines = [
+            f"成功：{summary['succeeded']} 场，失败：{summary['failed']} 场，已取消：{summary['cancelled']} 场（已写入的部分下次拉取时继续）",
+            f"观众：{summary['viewers']} 人，耗时 {summary['duration']:.1f} 秒（{summary['throughput']:.0f} 人/秒）",
+            f"新增：{summary['inserted']} 人，更新：{summary['updated']} 人，未变化：{summary['unchanged']} 人"
+        ]
+        failed = [item for item in summary["lives"].values() if item["stage"] not in ("done", "cancelled")]
+        for item in failed[:10]:
+            lines.append(f"[{targets.get(item['livingid'], item['livingid'])}] 失败：{item['error']}")
+        if len(failed) > 10:
+            lines.append(f"... 另有 {len(failed) - 10} 场失败")
+        ErrorHandler.handle_info("\n".join(lines), self, "批量拉取完成")
+        
+        self.paginator.invalidate_count()
+        self.load_data()
+    
     @PerformanceManager.measure_operation("export_data")
     def export_data(self):
-        """导出数据"""
+        """导出全部直播数据（在后台执行，可取消）"""
         try:
             # 创建默认文件名（包含当前日期时间）
-            from datetime import datetime
             current_datetime = datetime.now().strftime("%Y%m%d_%H%M%S")
             default_filename = f"直播数据导出_{current_datetime}.xlsx"
             
@@ -1453,128 +1394,110 @@ class LiveListPage(QWidget):
             )
             if not file_path:
                 return
-                
-            # 获取所有直播记录
-            with self.db_manager.get_session() as session:
-                records = session.query(Living).all()
-                
-                if not records:
-                    ErrorHandler.handle_warning("没有找到直播记录", self, "导出失败")
-                    return
-                    
-                # 转换数据
-                data = []
-                
-                for record in records:
-                    # 创建记录数据字典
-                    record_data = {}
-                    
-                    # 计算结束时间
-                    end_time = ""
-                    if record.living_start and record.living_duration:
-                        try:
-                            from datetime import timedelta
-                            end_time_obj = record.living_start + timedelta(seconds=record.living_duration)
-                            end_time = end_time_obj.strftime("%Y-%m-%d %H:%M:%S")
-                        except Exception:
-                            pass
-                    
-                    # 获取主播名称
-                    anchor_name = record.anchor_userid
-                    try:
-                        user = session.query(User).filter(
-                                (User.userid == record.anchor_userid) | (User.wecom_code == record.anchor_userid)
-                        ).first()
-                        if user:
-                            anchor_name = f"{user.name}({record.anchor_userid})"
-                    except Exception:
-                        pass
-                    
-                    # 获取直播类型文本
-                    from src.models.living import LivingType
-                    type_text = {
-                        LivingType.GENERAL: "通用直播",
-                        LivingType.SMALL: "小班课",
-                        LivingType.LARGE: "大班课",
-                        LivingType.TRAINING: "企业培训",
-                        LivingType.EVENT: "活动直播",
-                    }.get(record.type, "未知")
-                    
-                    # 获取签到统计信息
-                    from sqlalchemy import func
-                    from src.models.live_viewer import LiveViewer
-                    
-                    with self.db_manager.get_session() as stats_session:
-                        # 获取不同的签到人数
-                        unique_signers = stats_session.query(func.count(LiveViewer.id)).filter(
-                            LiveViewer.living_id == record.id,
-                            LiveViewer.is_signed == True
-                        ).scalar() or 0
-                        
-                        # 获取总签到次数
-                        sign_count = stats_session.query(func.sum(LiveViewer.sign_count)).filter(
-                            LiveViewer.living_id == record.id,
-                            LiveViewer.is_signed == True
-                        ).scalar() or 0
-                        
-                        # 获取首次签到时间
-                        first_sign = stats_session.query(func.min(LiveViewer.sign_time)).filter(
-                            LiveViewer.living_id == record.id,
-                            LiveViewer.is_signed == True
-                        ).scalar()
-                        
-                        sign_stats = {
-                            "unique_signers": unique_signers,
-                            "sign_count": sign_count,
-                            "sign_time": first_sign
-                        }
-                    
-                    # 使用中文字段名创建记录
-                    data.append({
-                        "直播ID": record.livingid,
-                        "直播主题": record.theme,
-                        "开始时间": record.living_start.strftime("%Y-%m-%d %H:%M:%S") if record.living_start else "",
-                        "结束时间": end_time,
-                        "直播时长(秒)": record.living_duration,
-                        "主播": anchor_name,
-                        "直播类型": type_text,
-                        "状态": {
-                            LivingStatus.RESERVED: "预约中",
-                            LivingStatus.LIVING: "直播中",
-                            LivingStatus.ENDED: "已结束",
-                            LivingStatus.EXPIRED: "已过期",
-                            LivingStatus.CANCELLED: "已取消"
-                        }.get(record.status, "未知"),
-                        "企业名称": record.corpname,
-                        "描述": record.description or "",
-                        "观看人数": record.viewer_num,
-                        "评论数": record.comment_num,
-                        "连麦人数": record.mic_num,
-                        "在线人数": record.online_count,
-                        "预约人数": record.subscribe_count,
-                        "签到人数": sign_stats["unique_signers"],
-                        "签到次数": sign_stats["sign_count"],
-                        "首次签到时间": sign_stats["sign_time"].strftime("%Y-%m-%d %H:%M:%S") if sign_stats["sign_time"] else "",
-                        "观看信息状态": "已拉取" if record.is_viewer_fetched == 1 else "未拉取",
-                        "签到导入状态": "已导入" if record.is_sign_imported == 1 else "未导入",
-                        "企微文档状态": "已上传" if record.is_doc_uploaded == 1 else "未上传",
-                        "远程同步状态": "已同步" if record.is_remote_synced == 1 else "未同步",
-                        "创建时间": record.created_at.strftime("%Y-%m-%d %H:%M:%S") if record.created_at else "",
-                        "更新时间": record.updated_at.strftime("%Y-%m-%d %H:%M:%S") if record.updated_at else ""
-                    })
-                    
-            # 创建DataFrame并导出到Excel
-            df = pd.DataFrame(data)
             
-            # 导出到Excel
-            df.to_excel(file_path, index=False, sheet_name="直播数据")
-            
-            # 显示成功消息
-            msg_box = AutoCloseMessageBox("导出成功", f"已成功导出 {len(data)} 条直播记录到文件:\n{file_path}", 3000, self)
-            msg_box.exec()
+            run_with_progress(
+                self, "正在导出直播数据...", self._export_lives, file_path,
+                key="export", title="导出直播数据",
+                on_result=partial(self._on_lives_exported, file_path),
+                on_error=lambda e: ErrorHandler.handle_error(e, self, "导出数据失败")
+            )
             
         except Exception as e:
             ErrorHandler.handle_error(e, self, "导出数据失败")
+    
+    def _export_lives(self, request, file_path: str) -> int:
+        """后台线程：读取全部直播及其签到统计并写入Excel，返回导出的记录数（没有直播时返回0，不写文件）"""
+        type_texts = {
+            LivingType.GENERAL: "通用直播",
+            LivingType.SMALL: "小班课",
+            LivingType.LARGE: "大班课",
+            LivingType.TRAINING: "企业培训",
+            LivingType.EVENT: "活动直播",
+        }
+        status_texts = {
+            LivingStatus.RESERVED: "预约中",
+            LivingStatus.LIVING: "直播中",
+            LivingStatus.ENDED: "已结束",
+            LivingStatus.EXPIRED: "已过期",
+            LivingStatus.CANCELLED: "已取消"
+        }
+        
+        # 获取所有直播记录
+        with self.db_manager.get_session() as session:
+            records = session.query(Living).all()
+            if not records:
+                return 0
+            
+            request.raise_if_cancelled()
+            request.report_progress(0, len(records) + 1, "正在统计签到数据...")
+            anchor_names = self._load_anchor_names(session, {record.anchor_userid for record in records})
+            sign_stats = self._load_sign_stats(session, [record.id for record in records])
+            
+            # 转换数据
+            data = []
+            total = len(records)
+            for i, record in enumerate(records):
+                if i % 500 == 0:
+                    request.raise_if_cancelled()
+                    request.report_progress(i, total + 1, f"正在导出数据... {i}/{total}")
+                
+                # 计算结束时间
+                end_time = ""
+                if record.living_start and record.living_duration:
+                    end_time_obj = record.living_start + timedelta(seconds=record.living_duration)
+                    end_time = end_time_obj.strftime("%Y-%m-%d %H:%M:%S")
+                
+                # 主播名称
+                anchor_name = record.anchor_userid
+                if anchor_names.get(record.anchor_userid):
+                    anchor_name = f"{anchor_names[record.anchor_userid]}({record.anchor_userid})"
+                
+                stats = sign_stats.get(record.id, self._EMPTY_SIGN_STATS)
+                
+                # 使用中文字段名创建记录
+                data.append({
+                    "直播ID": record.livingid,
+                    "直播主题": record.theme,
+                    "开始时间": record.living_start.strftime("%Y-%m-%d %H:%M:%S") if record.living_start else "",
+                    "结束时间": end_time,
+                    "直播时长(秒)": record.living_duration,
+                    "主播": anchor_name,
+                    "直播类型": type_texts.get(record.type, "未知"),
+                    "状态": status_texts.get(record.status, "未知"),
+                    "企业名称": record.corpname,
+                    "描述": record.description or "",
+                    "观看人数": record.viewer_num,
+                    "评论数": record.comment_num,
+                    "连麦人数": record.mic_num,
+                    "在线人数": record.online_count,
+                    "预约人数": record.subscribe_count,
+                    "签到人数": stats["unique_signers"],
+                    "签到次数": stats["sign_count"],
+                    "首次签到时间": stats["sign_time"].strftime("%Y-%m-%d %H:%M:%S") if stats["sign_time"] else "",
+                    "观看信息状态": "已拉取" if record.is_viewer_fetched == 1 else "未拉取",
+                    "签到导入状态": "已导入" if record.is_sign_imported == 1 else "未导入",
+                    "企微文档状态": "已上传" if record.is_doc_uploaded == 1 else "未上传",
+                    "远程同步状态": "已同步" if record.is_remote_synced == 1 else "未同步",
+                    "创建时间": record.created_at.strftime("%Y-%m-%d %H:%M:%S") if record.created_at else "",
+                    "更新时间": record.updated_at.strftime("%Y-%m-%d %H:%M:%S") if record.updated_at else ""
+                })
+        
+        request.raise_if_cancelled()
+        request.report_progress(total, total + 1, "正在写入文件...")
+        
+        # 创建DataFrame并导出到Excel
+        df = pd.DataFrame(data)
+        df.to_excel(file_path, index=False, sheet_name="直播数据")
+        return total
+    
+    def _on_lives_exported(self, file_path: str, count: int):
+        if not count:
+            ErrorHandler.handle_warning("没有找到直播记录", self, "导出失败")
+            return
+        
+        # 显示成功消息
+        msg_box = AutoCloseMessageBox("导出成功", f"已成功导出 {count} 条直播记录到文件:\n{file_path}", 3000, self)
+        msg_box.exec()
             
     def refresh_data(self):
         """刷新数据"""
@@ -1820,8 +1743,8 @@ class LiveViewerDetailPage(QDialog):
         self.live_info = live_info
         self.db_manager = DatabaseManager()
         
-        # 添加表头筛选条件
-        self.header_filters = {}
+        # 最大签到轮次（动态签到时间列数）
+        self.max_sign_count = 0
         
         self.init_ui()
         self.load_data()
@@ -1966,65 +1889,38 @@ class LiveViewerDetailPage(QDialog):
         filter_layout.addLayout(filter_row2)
         main_layout.addWidget(filter_group)
         
-        # 3. 表格区域
-        self.table = QTableWidget()
-        # 初始化基础列，稍后再动态添加签到记录列
-        self.table.setColumnCount(20)  # 更新列数以适应合并操作列
-        self.table.setHorizontalHeaderLabels([
-            "操作", "用户ID", "姓名", "用户来源", "用户类型", 
-            "观看时长(分钟)", "是否评论", "是否连麦", "有无签到", "最后签到时间", "签到次数", 
-            "邀请人ID", "邀请人姓名", "主播邀请", "位置信息", "符合奖励", "奖励金额", 
-            "原始名称", "部门ID", "部门"
-        ])
-        
-        # 设置表格样式
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.setAlternatingRowColors(True)
+        # 3. 表格区域：按需读取，滚动到底部时再读取下一批
+        self.table = QueryTableView()
+        self.model = QueryTableModel(
+            self.db_manager,
+            self._build_columns(0),
+            self._build_query,
+            LiveViewer.id,
+            default_sort=(LiveViewer.watch_time, True),
+            batch_loader=self._load_sign_pivots,
+            distinct_source=self._facet_values,
+            parent=self
+        )
+        self.model.countChanged.connect(self._update_count_label)
+        self.model.loadingChanged.connect(self._update_count_label)
+        self.model.loadFailed.connect(lambda e: ErrorHandler.handle_error(e, self, "加载观众数据失败"))
         
-        # 使用自定义可筛选表头 - 必须先设置表头再启用排序
+        # 使用自定义可筛选表头 - 必须先设置表头再设置模型
         custom_header = FilterHeader(self.table)
         self.table.setHorizontalHeader(custom_header)
+        self.table.setModel(self.model)
+        self.table.enable_sorting()
         
-        # 启用排序
-        self.table.setSortingEnabled(True)
-        
-        # 设置列宽
-        custom_header.setSectionResizeMode(QHeaderView.Interactive)
-        
-        # 基础列宽设置 - 增加列宽以适应筛选图标
-        column_widths = [140, 100, 120, 100, 100, 120, 100, 100, 100, 170, 100, 
-                        100, 120, 100, 160, 100, 100, 120, 140, 120, 140]
-        for i, width in enumerate(column_widths):
-            if i < len(column_widths):
-                self.table.setColumnWidth(i, width)
-        
-        # 让一些列更宽一些
-        self.table.setColumnWidth(0, 160)  # 操作列
-        self.table.setColumnWidth(9, 190)  # 最后签到时间
-        self.table.setColumnWidth(14, 160)  # 位置信息
-        self.table.setColumnWidth(17, 120)  # 奖励状态
+        # 操作列按钮由代理绘制
+        self.action_delegate = ActionButtonDelegate([("detail", "详情"), ("signs", "签到记录")], parent=self.table)
+        self.action_delegate.clicked.connect(self._on_action_clicked)
+        self.table.setItemDelegateForColumn(0, self.action_delegate)
         
         main_layout.addWidget(self.table)
         
-        # 4. 分页控件
-        pagination_layout = QHBoxLayout()
-        
-        self.prev_btn = QPushButton("上一页")
-        self.prev_btn.setObjectName("secondaryButton")
-        self.prev_btn.clicked.connect(self.prev_page)
-        pagination_layout.addWidget(self.prev_btn)
-        
-        self.page_label = QLabel("第 1 页 / 共 1 页")
-        pagination_layout.addWidget(self.page_label, alignment=Qt.AlignCenter)
-        
-        self.next_btn = QPushButton("下一页")
-        self.next_btn.setObjectName("secondaryButton")
-        self.next_btn.clicked.connect(self.next_page)
-        pagination_layout.addWidget(self.next_btn)
-        
-        main_layout.addLayout(pagination_layout)
+        # 4. 加载状态
+        self.count_label = QLabel("已加载 0 / 共 0 条")
+        main_layout.addWidget(self.count_label, alignment=Qt.AlignCenter)
         
         # 5. 按钮区域
         button_layout = QHBoxLayout()
@@ -2036,292 +1932,181 @@ class LiveViewerDetailPage(QDialog):
         
         main_layout.addLayout(button_layout)
         
-        # 初始化分页变量
-        self.current_page = 1
-        self.page_size = 20  # 每页显示记录数
-        self.total_pages = 1
+        # 搜索条件在点击搜索时保存，滚动加载时使用同一组条件
+        self.search_filters = self._current_search_filters()
+        
+    def _build_columns(self, max_sign_count: int) -> List[QueryColumn]:
+        """表格列定义（基础列 + 动态签到时间列）"""
+        def yes_no(value, row):
+            return "是" if value else "否"
+        
+        def format_time(value, row):
+            return value.strftime("%Y-%m-%d %H:%M:%S") if value else "-"
+        
+        user_source_map = {"内部企业成员": UserSource.INTERNAL, "外部联系人": UserSource.EXTERNAL}
+        user_source_text = {value: text for text, value in user_source_map.items()}
+        yes_no_map = {"是": True, "否": False}
+        
+        columns = [
+            QueryColumn("操作", width=160),
+            QueryColumn("用户ID", "userid", sort=LiveViewer.userid, filter=LiveViewer.userid, width=100),
+            QueryColumn("姓名", "name", sort=LiveViewer.name, filter=LiveViewer.name, width=120),
+            QueryColumn("用户来源", "user_source", filter=LiveViewer.user_source, value_map=user_source_map,
+                        formatter=lambda value, row: user_source_text.get(value, "未知"), width=100),
+            QueryColumn("用户类型", "user_type", filter=LiveViewer.user_type,
+                        value_map={"企业微信用户": 2, "微信用户": 1},
+                        formatter=lambda value, row: "企业微信用户" if value == 2 else "微信用户", width=100),
+            QueryColumn("观看时长(分钟)", "watch_time", sort=LiveViewer.watch_time,
+                        formatter=lambda value, row: f"{int((value or 0) / 60)}分钟", width=120),
+            QueryColumn("是否评论", "is_comment", filter=LiveViewer.is_comment, value_map=yes_no_map,
+                        formatter=yes_no, width=100),
+            QueryColumn("是否连麦", "is_mic", filter=LiveViewer.is_mic, value_map=yes_no_map,
+                        formatter=yes_no, width=100),
+            QueryColumn("有无签到", "is_signed", filter=LiveViewer.is_signed,
+                        value_map={"已签到": True, "未签到": False},
+                        formatter=lambda value, row: "已签到" if value else "未签到",
+                        foreground=lambda row: QColor(Qt.green) if row.is_signed else QColor(Qt.red), width=100),
+            QueryColumn("最后签到时间", "sign_time", sort=LiveViewer.sign_time, formatter=format_time, width=190),
+            QueryColumn("签到次数", "sign_count", sort=LiveViewer.sign_count,
+                        formatter=lambda value, row: str(value or 0), width=100),
+            QueryColumn("邀请人ID", "invitor_userid", sort=LiveViewer.invitor_userid,
+                        filter=LiveViewer.invitor_userid, width=100),
+            QueryColumn("邀请人姓名", "invitor_name", sort=LiveViewer.invitor_name,
+                        filter=LiveViewer.invitor_name, width=120),
+            QueryColumn("主播邀请", "is_invited_by_anchor", filter=LiveViewer.is_invited_by_anchor,
+                        value_map=yes_no_map, formatter=yes_no, width=100),
+            QueryColumn("位置信息", "location_info", width=160),
+            QueryColumn("符合奖励", "is_reward_eligible", filter=LiveViewer.is_reward_eligible,
+                        value_map=yes_no_map, formatter=yes_no, width=100),
+            QueryColumn("奖励金额", "reward_amount", sort=LiveViewer.reward_amount,
+                        formatter=lambda value, row: str(value or 0), width=100),
+            QueryColumn("奖励状态", "reward_status", filter=LiveViewer.reward_status,
+                        formatter=lambda value, row: value or "未设置", width=120),
+            QueryColumn("原始名称", "original_member_name", width=120),
+            QueryColumn("部门ID", "department_id", filter=LiveViewer.department_id, width=140),
+            QueryColumn("部门", "department", sort=LiveViewer.department, filter=LiveViewer.department, width=140)
+        ]
         
+        # 动态签到时间列，类型和备注显示在提示中
+        for seq in range(1, max_sign_count + 1):
+            columns.append(QueryColumn(
+                f"第{seq}次签到时间", f"time_{seq}",
+                formatter=lambda value, row: value.strftime("%Y-%m-%d %H:%M:%S") if value else "",
+                tooltip=lambda row, extra, seq=seq: (
+                    f"类型: {extra.get(f'type_{seq}') or '未知'}\n备注: {extra.get(f'remark_{seq}') or '无'}"
+                    if extra.get(f"time_{seq}") else None
+                ),
+                width=180
+            ))
+        return columns
+    
+    def _current_search_filters(self) -> Dict[str, str]:
+        return {
+            "name": self.name_filter.text().strip(),
+            "sign_status": self.sign_status_filter.currentText(),
+            "watch_time": self.watch_time_filter.currentText()
+        }
+    
+    def _facet_values(self, column: QueryColumn, limit: int):
+        """没有搜索条件时从筛选值索引读取表头筛选值，避免扫描整场直播的观众"""
+        facet = ViewerFacetIndex.facet_of(column.filter)
+        filters = self.search_filters
+        if facet is None or filters["name"] or filters["sign_status"] != "全部" or filters["watch_time"] != "全部":
+            return None
+        return ViewerFacetIndex(self.db_manager).lookup(self.live_info.id, facet, limit)
+    
+    def _build_query(self, session):
+        """观众列查询，应用搜索区域的筛选条件（表头筛选和排序由模型处理）"""
+        filters = self.search_filters
+        query = session.query(
+            LiveViewer.id,
+            LiveViewer.userid,
+            LiveViewer.name,
+            LiveViewer.user_source,
+            LiveViewer.user_type,
+            LiveViewer.department,
+            LiveViewer.department_id,
+            LiveViewer.watch_time,
+            LiveViewer.is_comment,
+            LiveViewer.is_mic,
+            LiveViewer.is_signed,
+            LiveViewer.sign_time,
+            LiveViewer.sign_count,
+            LiveViewer.invitor_userid,
+            LiveViewer.invitor_name,
+            LiveViewer.is_invited_by_anchor,
+            func.coalesce(cast(LiveViewer.location, String), '').label('location_info'),
+            LiveViewer.is_reward_eligible,
+            LiveViewer.reward_amount,
+            LiveViewer.reward_status
+        ).filter(LiveViewer.living_id == self.live_info.id)
+        
+        # 应用姓名过滤
+        if filters["name"]:
+            query = query.filter(contains_filter(LiveViewer.name, filters["name"]))
+        
+        # 应用签到状态过滤
+        if filters["sign_status"] == "已签到":
+            query = query.filter(LiveViewer.is_signed == True)
+        elif filters["sign_status"] == "未签到":
+            query = query.filter(LiveViewer.is_signed == False)
+        
+        # 应用观看时长过滤
+        watch_time = filters["watch_time"]
+        if watch_time == "10分钟以下":
+            query = query.filter(LiveViewer.watch_time < 10 * 60)  # 转换为秒
+        elif watch_time == "10-30分钟":
+            query = query.filter(LiveViewer.watch_time >= 10 * 60, LiveViewer.watch_time < 30 * 60)
+        elif watch_time == "30-60分钟":
+            query = query.filter(LiveViewer.watch_time >= 30 * 60, LiveViewer.watch_time < 60 * 60)
+        elif watch_time == "60分钟以上":
+            query = query.filter(LiveViewer.watch_time >= 60 * 60)
+        
+        return query
+    
+    def _load_sign_pivots(self, session, viewers) -> Dict[int, Dict[str, Any]]:
+        """每批观众的签到轮次在数据库中透视"""
+        return SignPivotQuery.fetch(
+            session, self.live_info.id, ("time", "type", "remark"),
+            viewer_ids=[viewer.id for viewer in viewers], max_sequence=self.max_sign_count
+        )
+    
     def load_data(self):
-        """加载数据"""
-        try:
-            with self.db_manager.get_session() as session:
-                # 获取筛选条件
-                name_filter = self.name_filter.text().strip() if hasattr(self, 'name_filter') else ""
-                # 移除部门筛选
-                sign_status = self.sign_status_filter.currentText() if hasattr(self, 'sign_status_filter') else "全部"
-                watch_time = self.watch_time_filter.currentText() if hasattr(self, 'watch_time_filter') else "全部"
-                
-                watch_start_time = None
-                watch_end_time = None
-                
-                if hasattr(self, 'watch_start_time_filter') and hasattr(self, 'watch_end_time_filter'):
-                    watch_start_time = self.watch_start_time_filter.dateTime().toPython() \
-                        if not self.watch_start_time_filter.dateTime().isNull() else None
-                    watch_end_time = self.watch_end_time_filter.dateTime().toPython() \
-                        if not self.watch_end_time_filter.dateTime().isNull() else None
-                
-                # 基于 SQLAlchemy ORM 查询
-                from src.models.live_viewer import LiveViewer
-                from src.models.live_sign_record import LiveSignRecord
-                from sqlalchemy import func, and_, or_, text, cast, String
-                
-                # 构建基础查询
-                query = session.query(
-                    LiveViewer.id,
-                    LiveViewer.userid,
-                    LiveViewer.name,
-                    LiveViewer.user_source,
-                    LiveViewer.user_type,
-                    LiveViewer.department,
-                    LiveViewer.department_id,
-                    LiveViewer.watch_time,
-                    LiveViewer.is_comment,
-                    LiveViewer.is_mic,
-                    LiveViewer.is_signed,
-                    LiveViewer.sign_time,
-                    LiveViewer.sign_count,
-                    LiveViewer.invitor_userid,
-                    LiveViewer.invitor_name,
-                    LiveViewer.is_invited_by_anchor,
-                    func.coalesce(cast(LiveViewer.location, String), '').label('location_info'),
-                    LiveViewer.is_reward_eligible,
-                    LiveViewer.reward_amount,
-                    LiveViewer.reward_status  # 添加奖励状态字段
-                ).filter(LiveViewer.living_id == self.live_info.id)
-                
-                # 应用姓名过滤
-                if name_filter:
-                    query = query.filter(LiveViewer.name.like(f"%{name_filter}%"))
-                
-                # 应用表头筛选条件 - 添加到后端查询中
-                if hasattr(self, 'table') and hasattr(self.table, 'horizontalHeader') and isinstance(self.table.horizontalHeader(), FilterHeader):
-                    header = self.table.horizontalHeader()
-                    
-                    # 用户ID筛选
-                    if 1 in header.filters and header.filters[1]:
-                        query = query.filter(LiveViewer.userid.in_(header.filters[1]))
-                    elif 1 in header.custom_filters and header.custom_filters[1]:
-                        query = query.filter(LiveViewer.userid.like(f"%{header.custom_filters[1]}%"))
-                    
-                    # 姓名筛选
-                    if 2 in header.filters and header.filters[2]:
-                        query = query.filter(LiveViewer.name.in_(header.filters[2]))
-                    elif 2 in header.custom_filters and header.custom_filters[2]:
-                        query = query.filter(LiveViewer.name.like(f"%{header.custom_filters[2]}%"))
-                    
-                    # 用户类型筛选
-                    if 4 in header.filters and header.filters[4]:
-                        user_types = []
-                        for type_text in header.filters[4]:
-                            if type_text == "企业微信用户":
-                                user_types.append(2)
-                            elif type_text == "微信用户":
-                                user_types.append(1)
-                        if user_types:
-                            query = query.filter(LiveViewer.user_type.in_(user_types))
-                    
-                    # 签到状态筛选
-                    if 8 in header.filters and header.filters[8]:
-                        is_signed_values = []
-                        for status_text in header.filters[8]:
-                            if status_text == "已签到":
-                                is_signed_values.append(True)
-                            elif status_text == "未签到":
-                                is_signed_values.append(False)
-                        if is_signed_values:
-                            query = query.filter(LiveViewer.is_signed.in_(is_signed_values))
-                
-                # 应用签到状态过滤
-                if sign_status == "已签到":
-                    query = query.filter(LiveViewer.is_signed == True)
-                elif sign_status == "未签到":
-                    query = query.filter(LiveViewer.is_signed == False)
-                
-                # 应用观看时长过滤
-                if watch_time == "10分钟以下":
-                    query = query.filter(LiveViewer.watch_time < 10 * 60)  # 转换为秒
-                elif watch_time == "10-30分钟":
-                    query = query.filter(LiveViewer.watch_time >= 10 * 60, LiveViewer.watch_time < 30 * 60)
-                elif watch_time == "30-60分钟":
-                    query = query.filter(LiveViewer.watch_time >= 30 * 60, LiveViewer.watch_time < 60 * 60)
-                elif watch_time == "60分钟以上":
-                    query = query.filter(LiveViewer.watch_time >= 60 * 60)
-                
-                # 移除对不存在属性的过滤
-                # if watch_start_time:
-                #     query = query.filter(LiveViewer.watch_start_time >= watch_start_time)
-                # if watch_end_time:
-                #     query = query.filter(LiveViewer.watch_start_time <= watch_end_time)
-                
-                # 计算总记录数
-                total_count = query.count()
-                self.total_pages = max(1, (total_count + self.page_size - 1) // self.page_size)
-                
-                # 获取当前页的数据
-                viewers = query.order_by(LiveViewer.watch_time.desc())\
-                    .offset((self.current_page - 1) * self.page_size)\
-                    .limit(self.page_size).all()
-                
-                # 查找最大签到次数，用于动态调整列数
-                max_sign_count = session.query(func.max(LiveViewer.sign_count))\
-                    .filter(LiveViewer.living_id == self.live_info.id).scalar() or 0
-                
-                # 准备查询观众的签到记录
-                viewer_ids = [viewer.id for viewer in viewers]
-                
-                # 查询所有相关的签到记录
-                sign_records = {}
-                original_member_names = {}
-                if viewer_ids:
-                    records = session.query(
-                        LiveSignRecord
-                    ).filter(
-                        LiveSignRecord.viewer_id.in_(viewer_ids),
-                        LiveSignRecord.living_id == self.live_info.livingid
-                    ).order_by(
-                        LiveSignRecord.viewer_id,
-                        LiveSignRecord.sign_sequence
-                    ).all()
-                    
-                    # 按观众ID分组签到记录
-                    for record in records:
-                        if record.viewer_id not in sign_records:
-                            sign_records[record.viewer_id] = []
-                        sign_records[record.viewer_id].append(record)
-                        
-                        # 记录原始成员名称
-                        if record.original_member_name and record.viewer_id not in original_member_names:
-                            original_member_names[record.viewer_id] = record.original_member_name
-                
-                # 动态设置表格列数和表头
-                base_columns = 21  # 基础列数改为21（增加奖励状态列）
-                total_columns = base_columns + max_sign_count
-                self.table.setColumnCount(total_columns)
-                
-                # 设置表头
-                headers = [
-                    "操作", "用户ID", "姓名", "用户来源", "用户类型", 
-                    "观看时长(分钟)", "是否评论", "是否连麦", "有无签到", "最后签到时间", "签到次数", 
-                    "邀请人ID", "邀请人姓名", "主播邀请", "位置信息", "符合奖励", "奖励金额", "奖励状态",
-                    "原始名称", "部门ID", "部门"
-                ]
-                
-                # 添加动态签到时间列
-                for i in range(1, max_sign_count + 1):
-                    headers.append(f"第{i}次签到时间")
-                    self.table.setColumnWidth(base_columns + i - 1, 180)  # 设置签到时间列的宽度
-                
-                self.table.setHorizontalHeaderLabels(headers)
-                
-                # 更新表格
-                self.table.setRowCount(len(viewers))
-                
-                for row, viewer in enumerate(viewers):
-                    # 合并操作列 - 创建操作按钮布局
-                    widget = QWidget()
-                    layout = QHBoxLayout(widget)
-                    layout.setContentsMargins(5, 2, 5, 2)
-                    layout.setSpacing(5)
-                    
-                    # 添加"查看详情"按钮
-                    detail_btn = QPushButton("详情")
-                    detail_btn.setFixedWidth(50)
-                    detail_btn.setProperty("row", row)
-                    detail_btn.setProperty("viewer_id", viewer.id)
-                    detail_btn.clicked.connect(lambda checked, r=row, v_id=viewer.id: self.show_viewer_detail(r, v_id))
-                    
-                    # 添加"查看所有签到"按钮
-                    all_signs_btn = QPushButton("签到记录")
-                    all_signs_btn.setFixedWidth(65)
-                    all_signs_btn.setProperty("row", row)
-                    all_signs_btn.setProperty("viewer_id", viewer.id)
-                    all_signs_btn.clicked.connect(lambda checked, r=row, v_id=viewer.id: self.show_all_sign_records(r, v_id))
-                    
-                    layout.addWidget(detail_btn)
-                    layout.addWidget(all_signs_btn)
-                    self.table.setCellWidget(row, 0, widget)
-                    
-                    # 添加其他数据
-                    self.table.setItem(row, 1, QTableWidgetItem(viewer.userid))
-                    self.table.setItem(row, 2, QTableWidgetItem(viewer.name))
-                    
-                    # 用户来源 - 翻译为中文
-                    user_source_map = {
-                        "INTERNAL": "内部企业成员",
-                        "EXTERNAL": "外部联系人",
-                        "UNKNOWN": "未知"
-                    }
-                    user_source = user_source_map.get(str(viewer.user_source.name) if viewer.user_source else "UNKNOWN", "未知")
-                    self.table.setItem(row, 3, QTableWidgetItem(user_source))
-                    
-                    # 用户类型
-                    user_type = "企业微信用户" if viewer.user_type == 2 else "微信用户"
-                    self.table.setItem(row, 4, QTableWidgetItem(user_type))
-                    
-                    # 计算观看时长（分钟）
-                    watch_minutes = int((viewer.watch_time or 0) / 60)
-                    self.table.setItem(row, 5, QTableWidgetItem(f"{watch_minutes}分钟"))
-                    
-                    # 评论和连麦状态
-                    self.table.setItem(row, 6, QTableWidgetItem("是" if viewer.is_comment else "否"))
-                    self.table.setItem(row, 7, QTableWidgetItem("是" if viewer.is_mic else "否"))
-                    
-                    # 签到状态
-                    sign_status_item = QTableWidgetItem("已签到" if viewer.is_signed else "未签到")
-                    sign_status_item.setForeground(Qt.green if viewer.is_signed else Qt.red)
-                    self.table.setItem(row, 8, sign_status_item)
-                    
-                    # 最后签到时间
-                    last_sign_time = viewer.sign_time.strftime("%Y-%m-%d %H:%M:%S") if viewer.sign_time else "-"
-                    self.table.setItem(row, 9, QTableWidgetItem(last_sign_time))
-                    
-                    # 签到次数
-                    self.table.setItem(row, 10, QTableWidgetItem(str(viewer.sign_count or 0)))
-                    
-                    # 邀请人ID和姓名
-                    self.table.setItem(row, 11, QTableWidgetItem(viewer.invitor_userid or ""))
-                    self.table.setItem(row, 12, QTableWidgetItem(viewer.invitor_name or ""))
-                    
-                    # 主播邀请
-                    self.table.setItem(row, 13, QTableWidgetItem("是" if viewer.is_invited_by_anchor else "否"))
-                    
-                    # 位置信息
-                    self.table.setItem(row, 14, QTableWidgetItem(viewer.location_info or ""))
-                    
-                    # 奖励信息
-                    self.table.setItem(row, 15, QTableWidgetItem("是" if viewer.is_reward_eligible else "否"))
-                    self.table.setItem(row, 16, QTableWidgetItem(str(viewer.reward_amount or 0)))
-                    
-                    # 奖励状态
-                    self.table.setItem(row, 17, QTableWidgetItem(viewer.reward_status or "未设置"))
-                    
-                    # 原始成员名称
-                    original_name = original_member_names.get(viewer.id, "")
-                    self.table.setItem(row, 18, QTableWidgetItem(original_name))
-                    
-                    # 部门ID和部门移到最后
-                    self.table.setItem(row, 19, QTableWidgetItem(viewer.department_id or ""))
-                    self.table.setItem(row, 20, QTableWidgetItem(viewer.department or ""))
-                    
-                    # 填充签到记录
-                    viewer_records = sign_records.get(viewer.id, [])
-                    for record in viewer_records:
-                        if 1 <= record.sign_sequence <= max_sign_count:
-                            col_index = base_columns + record.sign_sequence - 1
-                            sign_time_str = record.sign_time.strftime("%Y-%m-%d %H:%M:%S") if record.sign_time else ""
-                            sign_item = QTableWidgetItem(sign_time_str)
-                            sign_type = record.sign_type if record.sign_type else "未知"
-                            sign_item.setToolTip(f"类型: {sign_type}\n备注: {record.sign_remark or '无'}")
-                            self.table.setItem(row, col_index, sign_item)
-                
-                # 更新分页信息
-                self.page_label.setText(f"第 {self.current_page} 页 / 共 {self.total_pages} 页")
-                self.prev_btn.setEnabled(self.current_page > 1)
-                self.next_btn.setEnabled(self.current_page < self.total_pages)
-                
-        except Exception as e:
-            ErrorHandler.handle_error(e, self, "加载观众数据失败")
+        """加载数据（第一批），之后的数据在滚动时按需读取"""
+        # 最大签到轮次用于动态调整列数，在后台读取后再重新加载表格
+        BackgroundLoader().submit(
+            self._read_max_sign_count, self.live_info.id,
+            key="max_sign_count", owner=self,
+            on_result=self._on_max_sign_count,
+            on_error=lambda e: ErrorHandler.handle_error(e, self, "加载观众数据失败")
+        )
+    
+    def _read_max_sign_count(self, request, live_id: int) -> int:
+        with self.db_manager.get_session() as session:
+            return SignPivotQuery.max_sequence(session, live_id)
+    
+    def _on_max_sign_count(self, max_sign_count: int):
+        self.max_sign_count = max_sign_count
+        # 列数 = 基础列 + 每次签到一列
+        if len(self.model.columns) != len(self._build_columns(0)) + max_sign_count:
+            self.model.set_columns(self._build_columns(max_sign_count))
+        self.model.reload()
     
+    def _update_count_label(self, *args):
+        text = f"已加载 {self.model.rowCount()} / 共 {self.model.total_count()} 条"
+        if self.model.is_loading():
+            text += "（正在加载...）"
+        self.count_label.setText(text)
+    
+    def _on_action_clicked(self, row: int, action: str):
+        viewer = self.model.row_at(row)
+        if viewer is None:
+            return
+        if action == "detail":
+            self.show_viewer_detail(row, viewer.id)
+        elif action == "signs":
+            self.show_all_sign_records(row, viewer.id)
+
     def show_viewer_detail(self, row, viewer_id):
         """显示观众详细信息"""
         try:
@@ -2388,7 +2173,7 @@ class LiveViewerDetailPage(QDialog):
     
     def apply_filter(self):
         """应用筛选条件"""
-        self.current_page = 1  # 重置为第一页
+        self.search_filters = self._current_search_filters()
         self.load_data()
     
     def reset_filter(self):
@@ -2404,34 +2189,12 @@ class LiveViewerDetailPage(QDialog):
         self.watch_end_time_filter.setDateTime(current_time)
         
         # 清除表头筛选条件
-        header = self.table.horizontalHeader()
-        if isinstance(header, FilterHeader):
-            # 先保存所有列索引
-            columns_to_clear = list(header.filters.keys()) + list(header.custom_filters.keys())
-            # 清除每一列的筛选条件
-            for col in columns_to_clear:
-                header.clearFilters(col)
-            # 清空筛选列记录
-            header.filtered_columns.clear()
-            # 显示所有行
-            for row in range(self.table.rowCount()):
-                self.table.setRowHidden(row, False)
-        
-        self.current_page = 1  # 重置为第一页
+        self.model.clear_filters(reload=False)
+        self.table.horizontalHeader().viewport().update()
+        
+        self.search_filters = self._current_search_filters()
         self.load_data()
     
-    def prev_page(self):
-        """上一页"""
-        if self.current_page > 1:
-            self.current_page -= 1
-            self.load_data()
-    
-    def next_page(self):
-        """下一页"""
-        if self.current_page < self.total_pages:
-            self.current_page += 1
-            self.load_data()
-    
     def show_all_sign_records(self, row, viewer_id):
         """显示观众所有签到记录"""
         try:
@@ -2514,7 +2277,7 @@ class LiveViewerDetailPage(QDialog):
             ErrorHandler.handle_error(e, self, "查看签到记录失败")
     
     def export_data(self):
-        """导出数据到Excel"""
+        """导出数据到Excel（在后台执行，可取消）"""
         try:
             # 选择保存路径
             file_path, _ = QFileDialog.getSaveFileName(
@@ -2526,199 +2289,104 @@ class LiveViewerDetailPage(QDialog):
             
             if not file_path:
                 return  # 用户取消
-                
-            # 显示进度对话框
-            progress = QProgressDialog("正在导出数据...", "取消", 0, 100, self)
-            progress.setWindowTitle("导出进度")
-            progress.setWindowModality(Qt.WindowModal)
-            progress.show()
             
-            # 获取所有观众数据（不分页）
-            with self.db_manager.get_session() as session:
-                # 获取筛选条件
-                name_filter = self.name_filter.text().strip()
-                sign_status = self.sign_status_filter.currentText()
-                watch_time = self.watch_time_filter.currentText()
-                
-                watch_start_time = self.watch_start_time_filter.dateTime().toPython() \
-                    if not self.watch_start_time_filter.dateTime().isNull() else None
-                watch_end_time = self.watch_end_time_filter.dateTime().toPython() \
-                    if not self.watch_end_time_filter.dateTime().isNull() else None
-                
-                # 基于 SQLAlchemy ORM 查询
-                from src.models.live_viewer import LiveViewer
-                from src.models.live_sign_record import LiveSignRecord
-                from sqlalchemy import func, and_, or_, text, cast, String
-                
-                # 构建基础查询
-                query = session.query(
-                    LiveViewer.id,
-                    LiveViewer.userid,
-                    LiveViewer.name,
-                    LiveViewer.user_source,
-                    LiveViewer.user_type,
-                    LiveViewer.department,
-                    LiveViewer.department_id,
-                    LiveViewer.watch_time,
-                    LiveViewer.is_comment,
-                    LiveViewer.is_mic,
-                    LiveViewer.is_signed,
-                    LiveViewer.sign_time,
-                    LiveViewer.sign_count,
-                    LiveViewer.invitor_userid,
-                    LiveViewer.invitor_name,
-                    LiveViewer.is_invited_by_anchor,
-                    func.coalesce(cast(LiveViewer.location, String), '').label('location_info'),
-                    LiveViewer.is_reward_eligible,
-                    LiveViewer.reward_amount,
-                    LiveViewer.reward_status  # 添加奖励状态字段
-                ).filter(LiveViewer.living_id == self.live_info.id)
-                
-                progress.setValue(10)
-                
-                # 应用姓名过滤
-                if name_filter:
-                    query = query.filter(LiveViewer.name.like(f"%{name_filter}%"))
-                
-                # 应用签到状态过滤
-                if sign_status == "已签到":
-                    query = query.filter(LiveViewer.is_signed == True)
-                elif sign_status == "未签到":
-                    query = query.filter(LiveViewer.is_signed == False)
-                
-                # 应用观看时长过滤
-                if watch_time == "10分钟以下":
-                    query = query.filter(LiveViewer.watch_time < 10 * 60)  # 转换为秒
-                elif watch_time == "10-30分钟":
-                    query = query.filter(LiveViewer.watch_time >= 10 * 60, LiveViewer.watch_time < 30 * 60)
-                elif watch_time == "30-60分钟":
-                    query = query.filter(LiveViewer.watch_time >= 30 * 60, LiveViewer.watch_time < 60 * 60)
-                elif watch_time == "60分钟以上":
-                    query = query.filter(LiveViewer.watch_time >= 60 * 60)
-                
-                # 移除对不存在属性的过滤
-                # if watch_start_time:
-                #     query = query.filter(LiveViewer.watch_start_time >= watch_start_time)
-                # if watch_end_time:
-                #     query = query.filter(LiveViewer.watch_start_time <= watch_end_time)
-                
-                # 计算总记录数
-                total_count = query.count()
-                self.total_pages = max(1, (total_count + self.page_size - 1) // self.page_size)
-                
-                # 获取当前页的数据
-                viewers = query.order_by(LiveViewer.watch_time.desc())\
-                    .offset((self.current_page - 1) * self.page_size)\
-                    .limit(self.page_size).all()
-                
-                progress.setValue(30)
-                
-                # 查找最大签到次数
-                max_sign_count = session.query(func.max(LiveViewer.sign_count))\
-                    .filter(LiveViewer.living_id == self.live_info.id).scalar() or 0
-                
-                # 获取所有观众的ID
-                viewer_ids = [viewer.id for viewer in viewers]
-                
-                # 查询所有相关的签到记录
-                sign_records = {}
-                original_member_names = {}
-                if viewer_ids:
-                    records = session.query(
-                        LiveSignRecord
-                    ).filter(
-                        LiveSignRecord.viewer_id.in_(viewer_ids),
-                        LiveSignRecord.living_id == self.live_info.livingid
-                    ).order_by(
-                        LiveSignRecord.viewer_id,
-                        LiveSignRecord.sign_sequence
-                    ).all()
-                    
-                    # 按观众ID分组签到记录
-                    for record in records:
-                        if record.viewer_id not in sign_records:
-                            sign_records[record.viewer_id] = {}
-                        sign_records[record.viewer_id][record.sign_sequence] = record
-                        
-                        # 记录原始成员名称
-                        if record.original_member_name and record.viewer_id not in original_member_names:
-                            original_member_names[record.viewer_id] = record.original_member_name
-                
-                # 转换为 pandas DataFrame
-                import pandas as pd
-                data = []
-                
-                for i, viewer in enumerate(viewers):
-                    if progress.wasCanceled():
-                        return
-                    
-                    # 计算进度
-                    if i % 10 == 0:
-                        progress_value = 50 + int((i / len(viewers)) * 40)
-                        progress.setValue(progress_value)
-                    
-                    # 计算观看时长（分钟）
-                    watch_minutes = int((viewer.watch_time or 0) / 60)
-                    
-                    # 创建基本记录
-                    record = {
-                        "用户ID": viewer.userid,
-                        "姓名": viewer.name,
-                        "用户来源": str(viewer.user_source.name) if viewer.user_source else "未知",
-                        "用户类型": "企业微信用户" if viewer.user_type == 2 else "微信用户",
-                        "部门": viewer.department or "",
-                        "部门ID": viewer.department_id or "",
-                        "观看时长(分钟)": watch_minutes,
-                        "是否评论": "是" if viewer.is_comment else "否",
-                        "是否连麦": "是" if viewer.is_mic else "否",
-                        "是否签到": "是" if viewer.is_signed else "否",
-                        "最后签到时间": viewer.sign_time.strftime("%Y-%m-%d %H:%M:%S") if viewer.sign_time else "",
-                        "签到次数": viewer.sign_count or 0,
-                        "邀请人ID": viewer.invitor_userid or "",
-                        "邀请人姓名": viewer.invitor_name or "",
-                        "主播邀请": "是" if viewer.is_invited_by_anchor else "否",
-                        "位置信息": viewer.location_info or "",
-                        "符合奖励": "是" if viewer.is_reward_eligible else "否",
-                        "奖励金额": viewer.reward_amount or 0,
-                        "奖励状态": viewer.reward_status or "未设置",
-                        "原始名称": original_member_names.get(viewer.id, "")
-                    }
-                    
-                    # 添加动态签到记录
-                    viewer_sign_records = sign_records.get(viewer.id, {})
-                    for seq in range(1, max_sign_count + 1):
-                        if seq in viewer_sign_records:
-                            sign_record = viewer_sign_records[seq]
-                            sign_time = sign_record.sign_time.strftime("%Y-%m-%d %H:%M:%S") if sign_record.sign_time else ""
-                            record[f"第{seq}次签到时间"] = sign_time
-                            record[f"第{seq}次签到类型"] = sign_record.sign_type or ""
-                            record[f"第{seq}次签到备注"] = sign_record.sign_remark or ""
-                            record[f"第{seq}次签到是否有效"] = "是" if sign_record.is_valid else "否"
-                        else:
-                            record[f"第{seq}次签到时间"] = ""
-                            record[f"第{seq}次签到类型"] = ""
-                            record[f"第{seq}次签到备注"] = ""
-                            record[f"第{seq}次签到是否有效"] = ""
-                    
-                    data.append(record)
-                
-                progress.setValue(50)
-                
-                progress.setValue(90)
-                
-                # 创建DataFrame并保存到Excel
-                df = pd.DataFrame(data)
-                df.to_excel(file_path, index=False)
-                
-                progress.setValue(100)
-                
-                ErrorHandler.handle_info(f"已成功导出 {len(viewers)} 条记录到文件：\n{file_path}", self, "导出成功")
-                
+            # 使用与表格相同的筛选条件
+            run_with_progress(
+                self, "正在导出数据...", self._export_viewers,
+                file_path, self.live_info.id, self.model.filter_state(),
+                key="export", title="导出进度",
+                on_result=lambda count: ErrorHandler.handle_info(
+                    f"已成功导出 {count} 条记录到文件：\n{file_path}", self, "导出成功"),
+                on_error=lambda e: ErrorHandler.handle_error(e, self, "导出数据失败")
+            )
         except Exception as e:
-            ErrorHandler.handle_error(e, self, "导出数据失败") 
+            ErrorHandler.handle_error(e, self, "导出数据失败")
+    
+    def _export_viewers(self, request, file_path: str, live_id: int, state) -> int:
+        """后台线程：读取全部观众数据（不分页）并写入Excel，返回导出的记录数"""
+        with self.db_manager.get_session() as session:
+            query = self.model.build_query(session, state=state)
+            
+            # 最大签到轮次
+            max_sign_count = SignPivotQuery.max_sequence(session, live_id)
+            
+            # 签到轮次在数据库中透视后外连接
+            sign_fields = ("time", "type", "remark", "valid")
+            pivot = SignPivotQuery.subquery(live_id, max_sign_count, sign_fields)
+            viewers = query.outerjoin(pivot, pivot.c.viewer_id == LiveViewer.id)\
+                .add_columns(
+                    pivot.c.original_member_name,
+                    *SignPivotQuery.pivot_columns(pivot, max_sign_count, sign_fields)
+                )\
+                .order_by(LiveViewer.watch_time.desc(), LiveViewer.id.desc()).all()
+        
+        # 转换为 pandas DataFrame
+        import pandas as pd
+        data = []
+        total = len(viewers)
+        
+        for i, viewer in enumerate(viewers):
+            if i % 500 == 0:
+                request.raise_if_cancelled()
+                request.report_progress(i, total + 1, f"正在导出数据... {i}/{total}")
+            
+            # 计算观看时长（分钟）
+            watch_minutes = int((viewer.watch_time or 0) / 60)
+            
+            # 创建基本记录
+            record = {
+                "用户ID": viewer.userid,
+                "姓名": viewer.name,
+                "用户来源": str(viewer.user_source.name) if viewer.user_source else "未知",
+                "用户类型": "企业微信用户" if viewer.user_type == 2 else "微信用户",
+                "部门": viewer.department or "",
+                "部门ID": viewer.department_id or "",
+                "观看时长(分钟)": watch_minutes,
+                "是否评论": "是" if viewer.is_comment else "否",
+                "是否连麦": "是" if viewer.is_mic else "否",
+                "是否签到": "是" if viewer.is_signed else "否",
+                "最后签到时间": viewer.sign_time.strftime("%Y-%m-%d %H:%M:%S") if viewer.sign_time else "",
+                "签到次数": viewer.sign_count or 0,
+                "邀请人ID": viewer.invitor_userid or "",
+                "邀请人姓名": viewer.invitor_name or "",
+                "主播邀请": "是" if viewer.is_invited_by_anchor else "否",
+                "位置信息": viewer.location_info or "",
+                "符合奖励": "是" if viewer.is_reward_eligible else "否",
+                "奖励金额": viewer.reward_amount or 0,
+                "奖励状态": viewer.reward_status or "未设置",
+                "原始名称": viewer.original_member_name or ""
+            }
+
+            # 添加动态签到记录
+            for seq in range(1, max_sign_count + 1):
+                sign_time = getattr(viewer, f"time_{seq}")
+                if sign_time is not None:
+                    record[f"第{seq}次签到时间"] = sign_time.strftime("%Y-%m-%d %H:%M:%S")
+                    record[f"第{seq}次签到类型"] = getattr(viewer, f"type_{seq}") or ""
+                    record[f"第{seq}次签到备注"] = getattr(viewer, f"remark_{seq}") or ""
+                    record[f"第{seq}次签到是否有效"] = "是" if getattr(viewer, f"valid_{seq}") else "否"
+                else:
+                    record[f"第{seq}次签到时间"] = ""
+                    record[f"第{seq}次签到类型"] = ""
+                    record[f"第{seq}次签到备注"] = ""
+                    record[f"第{seq}次签到是否有效"] = ""
+
+            data.append(record)
+        
+        request.raise_if_cancelled()
+        request.report_progress(total, total + 1, "正在写入文件...")
+        
+        # 创建DataFrame并保存到Excel
+        df = pd.DataFrame(data)
+        df.to_excel(file_path, index=False)
+        return total
 
 class FilterHeader(QHeaderView):
-    """可筛选的表头"""
+    """可筛选的表头
+
+    筛选条件保存在 QueryTableModel 中并转换为查询条件；可选值和数量由模型在数据库中分组统计，
+    不依赖已加载的行。只有定义了筛选列的列显示筛选图标。
+    """
     
     def __init__(self, parent=None):
         super(FilterHeader, self).__init__(Qt.Horizontal, parent)
@@ -2730,18 +2398,33 @@ class FilterHeader(QHeaderView):
         self.filter_icon_size = 18  # 由14增加到18
         self.filter_icon_margin = 6  # 由4增加到6
         
-        # 存储过滤器
-        self.filters = {}
-        # 存储自定义筛选文本
-        self.custom_filters = {}
-        
-        # 存储有筛选条件的列
-        self.filtered_columns = set()
-        
         # 添加双击事件处理 - 当双击表头时也显示筛选菜单
         self.setMouseTracking(True)
         self.doubleClicked = False
     
+    @property
+    def filters(self) -> Dict[int, List[str]]:
+        model = self.model()
+        return model.value_filters if isinstance(model, QueryTableModel) else {}
+    
+    @property
+    def custom_filters(self) -> Dict[int, str]:
+        model = self.model()
+        return model.text_filters if isinstance(model, QueryTableModel) else {}
+    
+    @property
+    def filtered_columns(self) -> set:
+        model = self.model()
+        return model.filtered_columns() if isinstance(model, QueryTableModel) else set()
+    
+    def isFilterable(self, logical_index) -> bool:
+        model = self.model()
+        return (
+            isinstance(model, QueryTableModel)
+            and 0 <= logical_index < len(model.columns)
+            and model.columns[logical_index].filter is not None
+        )
+    
     def mousePressEvent(self, event):
         """处理鼠标点击事件"""
         pos = event.position().toPoint()
@@ -2762,13 +2445,14 @@ class FilterHeader(QHeaderView):
         pos = event.position().toPoint()
         logical_index = self.logicalIndexAt(pos)
         # 双击时直接显示筛选菜单
-        self.showFilterMenu(logical_index)
+        if self.isFilterable(logical_index):
+            self.showFilterMenu(logical_index)
         # 防止事件传递
         event.accept()
     
     def isFilterIconClicked(self, pos, logical_index):
         """判断是否点击了筛选图标 - 扩大点击区域"""
-        if logical_index < 0:
+        if not self.isFilterable(logical_index):
             return False
             
         section_rect = self.rect()
@@ -2787,9 +2471,6 @@ class FilterHeader(QHeaderView):
             section_rect.height()  # 整个表头高度
         )
         
-        # 添加调试信息
-        print(f"点击位置: {pos.x()}, {pos.y()}, 图标区域: {icon_rect}, 点击结果: {icon_rect.contains(pos)}")
-        
         return icon_rect.contains(pos)
     
     def paintSection(self, painter, rect, logical_index):
@@ -2797,6 +2478,9 @@ class FilterHeader(QHeaderView):
         # 调用父类的绘制方法
         super(FilterHeader, self).paintSection(painter, rect, logical_index)
         
+        if not self.isFilterable(logical_index):
+            return
+        
         # 绘制筛选图标 - 调整位置使其更明显
         icon_width = self.filter_icon_size + 4
         icon_left = rect.right() - icon_width - 22  # 增加与排序图标的距离
@@ -2852,24 +2536,28 @@ class FilterHeader(QHeaderView):
         return size
     
     def showFilterMenu(self, logicalIndex):
-        """显示筛选菜单"""
-        table = self.parent()
+        """显示筛选菜单（可选值为数据库中满足其他列筛选条件的分组统计，在后台读取后显示）"""
+        if not self.isFilterable(logicalIndex):
+            return
         
+        try:
+            self.model().load_distinct_values(
+                logicalIndex, partial(self._show_filter_menu, logicalIndex),
+                on_error=lambda e: ErrorHandler.handle_error(e, self, "读取筛选选项失败")
+            )
+        except Exception as e:
+            ErrorHandler.handle_error(e, self, "读取筛选选项失败")
+    
+    def _show_filter_menu(self, logicalIndex, values):
         # 创建菜单
         menu = QMenu(self)
-        
-        # 获取当前列所有唯一值
-        values = set()
-        for i in range(table.rowCount()):
-            item = table.item(i, logicalIndex)
-            if item and item.text():
-                values.add(item.text())
+        selected = self.filters.get(logicalIndex, [])
         
         # 添加选项到菜单
-        for value in sorted(values):
-            action = menu.addAction(value)
+        for value, count in sorted(values):
+            action = menu.addAction(f"{value} ({count})")
             action.setCheckable(True)
-            action.setChecked(value in self.filters.get(logicalIndex, []))
+            action.setChecked(value in selected)
             action.triggered.connect(lambda checked, v=value, idx=logicalIndex: self.toggleFilter(idx, v))
         
         # 添加操作选项
@@ -2880,14 +2568,14 @@ class FilterHeader(QHeaderView):
             
             clear_action = menu.addAction("取消筛选")
             clear_action.triggered.connect(lambda: self.applyFilter(logicalIndex, []))
-            
-            # 添加自定义筛选选项
-            menu.addSeparator()
-            custom_action = menu.addAction("自定义筛选...")
-            custom_action.triggered.connect(lambda: self.showCustomFilterDialog(logicalIndex))
+        
+        # 添加自定义筛选选项
+        menu.addSeparator()
+        custom_action = menu.addAction("自定义筛选...")
+        custom_action.triggered.connect(lambda: self.showCustomFilterDialog(logicalIndex))
         
         # 获取当前列的屏幕位置
-        column_pos = self.sectionPosition(logicalIndex)
+        column_pos = self.sectionViewportPosition(logicalIndex)
         header_height = self.height()
         viewport_pos = self.viewport().mapToGlobal(QPoint(column_pos + self.sectionSize(logicalIndex) // 2, header_height))
         
@@ -2905,186 +2593,43 @@ class FilterHeader(QHeaderView):
             current_text
         )
         
-        if ok and text:
-            self.custom_filters[columnIndex] = text
-            self.filtered_columns.add(columnIndex)  # 标记为已筛选
-            self.applyCustomFilter(columnIndex, text)
-        elif ok and not text and columnIndex in self.custom_filters:
-            # 如果用户清空了输入，则删除该列的自定义筛选
-            del self.custom_filters[columnIndex]
-            # 检查是否还有其他筛选条件
-            if columnIndex not in self.filters or not self.filters[columnIndex]:
-                self.filtered_columns.discard(columnIndex)  # 移除筛选标记
-            self.applyCustomFilter(columnIndex, "")
+        if ok:
+            self.applyCustomFilter(columnIndex, text.strip())
     
     def applyCustomFilter(self, columnIndex, text):
-        """应用自定义筛选"""
-        table = self.parent()
-        
-        # 清除该列的常规筛选
-        if columnIndex in self.filters:
-            del self.filters[columnIndex]
-        
-        # 显示所有行
-        for row in range(table.rowCount()):
-            table.setRowHidden(row, False)
-        
-        # 如果没有筛选文本，则仅应用其他列的筛选
-        if not text:
-            self.applyFilters()
-            return
-        
-        # 应用筛选文本
-        for row in range(table.rowCount()):
-            should_hide = True
-            item = table.item(row, columnIndex)
-            if item and text.lower() in item.text().lower():
-                should_hide = False
-            
-            if should_hide:
-                table.setRowHidden(row, True)
-        
-        # 应用其他列的筛选
-        self.applyFilters(skip_column=columnIndex)
-        
-        # 重新加载数据
-        self.reloadData()
-        
-        # 重绘表头，显示筛选状态
-        self.viewport().update()
+        """应用自定义筛选（部分匹配），空文本表示取消"""
+        self._run(self.model().set_text_filter, columnIndex, text)
     
     def toggleFilter(self, columnIndex, value):
         """切换特定值的筛选状态"""
-        # 清除该列的自定义筛选
-        if columnIndex in self.custom_filters:
-            del self.custom_filters[columnIndex]
-        
-        if columnIndex not in self.filters:
-            self.filters[columnIndex] = []
-        
-        if value in self.filters[columnIndex]:
-            self.filters[columnIndex].remove(value)
-        else:
-            self.filters[columnIndex].append(value)
-        
-        # 更新筛选状态标记
-        if self.filters[columnIndex]:
-            self.filtered_columns.add(columnIndex)
+        values = list(self.filters.get(columnIndex, []))
+        if value in values:
+            values.remove(value)
         else:
-            self.filtered_columns.discard(columnIndex)
-        
-        # 应用筛选
-        self.applyFilters()
-        
-        # 重新加载数据
-        self.reloadData()
-        
-        # 重绘表头，显示筛选状态
-        self.viewport().update()
+            values.append(value)
+        self.applyFilter(columnIndex, values)
     
     def applyFilter(self, columnIndex, values):
-        """应用特定列的筛选"""
-        table = self.parent()
-        
-        # 如果是空列表，表示取消筛选，先显示所有行
-        if not values:
-            for row in range(table.rowCount()):
-                table.setRowHidden(row, False)
-        
-        # 清除该列的自定义筛选
-        if columnIndex in self.custom_filters:
-            del self.custom_filters[columnIndex]
-            
-        self.filters[columnIndex] = values.copy()
-        
-        # 更新筛选状态标记
-        if self.filters[columnIndex]:
-            self.filtered_columns.add(columnIndex)
-        else:
-            self.filtered_columns.discard(columnIndex)
-            
-        self.applyFilters()
-        
-        # 如果取消筛选，重新加载所有数据确保UI刷新
-        if not values:
-            parent = self.parent()
-            while parent:
-                if isinstance(parent, LiveViewerDetailPage):
-                    QTimer.singleShot(100, parent.load_data)
-                    break
-                parent = parent.parent()
+        """应用特定列的筛选，空列表表示取消"""
+        self._run(self.model().set_value_filter, columnIndex, values)
+    
+    def clearFilters(self, columnIndex=None):
+        """清除特定列（None 表示所有列）的筛选"""
+        model = self.model()
+        if columnIndex is None:
+            self._run(model.clear_filters)
+        elif columnIndex in self.filters:
+            self._run(model.set_value_filter, columnIndex, [])
         else:
-            # 有筛选条件则只更新现有显示
-            self.reloadData()
-        
-        # 重绘表头，显示筛选状态
-        self.viewport().update()
+            self._run(model.set_text_filter, columnIndex, "")
     
-    def clearFilters(self, columnIndex):
-        """清除特定列的所有筛选"""
-        table = self.parent()
-        
-        # 先显示所有行，以确保过滤条件解除后显示所有数据
-        for row in range(table.rowCount()):
-            table.setRowHidden(row, False)
-            
-        if columnIndex in self.filters:
-            del self.filters[columnIndex]
-        if columnIndex in self.custom_filters:
-            del self.custom_filters[columnIndex]
-        
-        # 移除筛选状态标记
-        self.filtered_columns.discard(columnIndex)
-        
-        # 重新应用其他列的筛选条件
-        self.applyFilters()
-        
-        # 重新加载数据 - 取消注释，让其重新加载所有数据
-        parent = self.parent()
-        while parent:
-            if isinstance(parent, LiveViewerDetailPage):
-                QTimer.singleShot(100, parent.load_data)
-                break
-            parent = parent.parent()
-        
-        # 重绘表头，显示筛选状态
+    def _run(self, func, *args):
+        """执行筛选并重绘表头，显示筛选状态"""
+        try:
+            func(*args)
+        except Exception as e:
+            ErrorHandler.handle_error(e, self, "应用筛选失败")
         self.viewport().update()
-    
-    def applyFilters(self, skip_column=None):
-        """应用所有筛选"""
-        table = self.parent()
-        
-        # 对每个筛选列进行处理
-        for column, allowed_values in self.filters.items():
-            if skip_column is not None and column == skip_column:
-                continue
-                
-            if not allowed_values:  # 空列表表示不筛选
-                continue
-                
-            for row in range(table.rowCount()):
-                if table.isRowHidden(row):
-                    continue  # 跳过已经隐藏的行
-                    
-                item = table.item(row, column)
-                if not item or item.text() not in allowed_values:
-                    table.setRowHidden(row, True)
-    
-    def reloadData(self):
-        """重新加载数据"""
-        # 检查筛选状态
-        has_filters = bool(self.filters) or bool(self.custom_filters)
-        
-        # 查找包含此表头的窗口
-        parent = self.parent()
-        while parent:
-            # 如果父窗口是LiveViewerDetailPage，则重新加载数据
-            if isinstance(parent, LiveViewerDetailPage):
-                # 如果没有筛选条件，重新加载所有数据
-                if not has_filters:
-                    QTimer.singleShot(100, parent.load_data)
-                break
-            parent = parent.parent()
 
 class CombinedExportDialog(QDialog):
     """综合导出数据对话框"""
@@ -3485,11 +3030,6 @@ class CombinedExportDialog(QDialog):
 
     def calculate_reward(self):
         """计算奖励结果"""
-        from datetime import datetime
-        from src.models.live_viewer import LiveViewer
-        from src.models.live_sign_record import LiveSignRecord
-        from src.models.living import Living
-        
         logger.info("==================== 开始计算奖励 ====================")
         
         # 获取界面上的规则设置
@@ -3508,7 +3048,6 @@ class CombinedExportDialog(QDialog):
         
         # 收集所有选中的直播数据
         selected_lives = []
-        batch_living_ids = []  # 存储所有直播ID，用于计算观看场次
         
         logger.info("开始收集选中的直播数据...")
         
@@ -3550,8 +3089,6 @@ class CombinedExportDialog(QDialog):
                 'reward_amount': reward_amount,
             })
             
-            batch_living_ids.append(live_id)
-            
         # 检查是否有选择的直播
         if not selected_lives:
             logger.warning("没有选择直播进行计算，退出计算过程")
@@ -3564,447 +3101,43 @@ class CombinedExportDialog(QDialog):
         rule_watch_count = self.min_watch_count_spin.value()
         logger.info(f"最少观看场次规则: {rule_watch_count}")
         
-        # 创建处理进度对话框
-        progress_dialog = QProgressDialog("准备处理数据...", "取消", 0, 100, self)
-        progress_dialog.setWindowModality(Qt.WindowModal)
-        progress_dialog.setMinimumDuration(0)
-        progress_dialog.setValue(0)
-        progress_dialog.show()
-        QApplication.processEvents()
-        
-        # 创建共享数据
-        data_lock = Lock()
-        total_viewers = 0
-        processed_viewers = 0
-        is_cancelled = False
-        
-        # 统一的时间戳，避免不同记录间的时间戳差异
-        current_timestamp = datetime.now()
-        logger.info(f"设置统一时间戳: {current_timestamp}")
-        
-        # 进度更新函数
-        def update_progress(phase="处理中", value=None):
-            nonlocal processed_viewers, total_viewers
-            if value is not None:
-                progress_dialog.setValue(value)
-            elif total_viewers > 0 and not is_cancelled:
-                progress = int((processed_viewers / total_viewers) * 100)
-                progress_dialog.setValue(min(progress, 100))
-            
-            progress_dialog.setLabelText(f"{phase}...")
-            QApplication.processEvents()
-            return progress_dialog.wasCanceled()
+        # 在后台计算，期间显示进度对话框（计算在一个事务中完成，不可取消）
+        run_with_progress(
+            self, "正在计算奖励...", self._calculate_reward,
+            selected_lives, rule_type, rule_watch_count, batch_id,
+            key="calculate_reward", title="计算奖励", cancellable=False,
+            on_result=lambda result: self._on_reward_calculated(result, batch_id),
+            on_error=self._on_reward_failed
+        )
         
-        try:
-            update_progress("正在获取直播数据", 5)
-            
-            # 查询并收集所有需要的数据 - 移出线程中避免数据库连接问题
-            all_live_configs = {}
-            all_viewers = {}
-            all_sign_records = {}
-            all_watch_counts = {}
-            
-            # 记录所有用户ID到直播ID的映射，用于计算场次
-            user_id_to_live_id = defaultdict(list)
-            
-            # 使用主线程获取所有数据，避免子线程中出现数据库连接问题
-            with self.db_manager.get_session() as session:
-                # 1. 获取所有选中直播的观众和签到数据
-                logger.info("开始查询所有选中直播的观众数据...")
-                
-                for live_config in selected_lives:
-                    live_id = live_config['id']
-                    all_live_configs[live_id] = live_config
-                    
-                    # 获取观众数据
-                    viewers = session.query(LiveViewer).filter(LiveViewer.living_id == live_id).all()
-                    all_viewers[live_id] = []
-                    
-                    for viewer in viewers:
-                        # 记录用户ID到直播ID的映射
-                        user_id_to_live_id[viewer.userid].append(live_id)
-                        
-                        # 转换为字典保存
-                        viewer_dict = {
-                            'id': viewer.id,
-                            'userid': viewer.userid,
-                            'name': viewer.name,
-                            'watch_time': viewer.watch_time,
-                            'is_signed': viewer.is_signed,
-                            'sign_time': viewer.sign_time,
-                            'sign_count': viewer.sign_count or 0
-                        }
-                        all_viewers[live_id].append(viewer_dict)
-                    
-                    logger.info(f"直播ID: {live_id} 的观众数量: {len(all_viewers[live_id])}")
-                    total_viewers += len(all_viewers[live_id])
-                
-                logger.info(f"总观众数量: {total_viewers}")
-                
-                # 2. 获取所有观众的签到记录
-                logger.info("开始查询所有观众的签到记录...")
-                
-                for live_id, viewers in all_viewers.items():
-                    viewer_ids = [v['id'] for v in viewers]
-                    
-                    if not viewer_ids:
-                        continue
-                    
-                    # 使用分批查询减少内存使用
-                    batch_size = 500
-                    all_sign_records[live_id] = {}
-                    
-                    for i in range(0, len(viewer_ids), batch_size):
-                        batch_ids = viewer_ids[i:i+batch_size]
-                        
-                        # 使用分组查询获取签到次数
-                        sign_counts = session.query(
-                            LiveSignRecord.viewer_id, 
-                            LiveSignRecord.living_id, 
-                            func.count(LiveSignRecord.id).label('count')
-                        ).filter(
-                            LiveSignRecord.viewer_id.in_(batch_ids),
-                            LiveSignRecord.living_id == live_id
-                        ).group_by(
-                            LiveSignRecord.viewer_id, 
-                            LiveSignRecord.living_id
-                        ).all()
-                        
-                        for viewer_id, living_id, count in sign_counts:
-                            if viewer_id not in all_sign_records[live_id]:
-                                all_sign_records[live_id][viewer_id] = {}
-                            all_sign_records[live_id][viewer_id][str(living_id)] = count
-                
-                # 3. 计算每个观众的观看场次
-                logger.info("开始计算每个观众的观看场次...")
-                
-                for userid, live_ids in user_id_to_live_id.items():
-                    # 计算当前用户观看的不同直播数
-                    unique_live_ids = set(live_ids)
-                    watch_count = len(unique_live_ids)
-                    all_watch_counts[userid] = watch_count
-                    logger.debug(f"用户 {userid} 观看了 {watch_count} 场直播")
-            
-            update_progress("预处理数据完成", 10)
-            
-            # 准备线程处理函数
-            def process_chunk(live_id, viewers_chunk, sign_records, watch_counts, live_config, rule_watch_count_value):
-                nonlocal processed_viewers, is_cancelled, data_lock
-                
-                logger.debug(f"开始处理直播 {live_id} 的观众数据块，数量: {len(viewers_chunk)}")
-                
-                if is_cancelled:
-                    return None
-                
-                # 从配置中获取规则设置
-                rule_sign_count = live_config['rule_sign_count']
-                # 修复这里的错误 - 移除将分钟转换为秒的代码
-                rule_watch_time = live_config['rule_watch_time']  # UI传入的已经是秒，不需要再转换
-                rule_amount = live_config['reward_amount']  # 页面设置的金额
-                
-                logger.debug(f"直播 {live_id} 的规则设置: 签到次数={rule_sign_count}, 观看时长={rule_watch_time}秒, 奖励金额={rule_amount}")
-                
-                # 准备结果数据结构 - 深拷贝避免共享数据问题
-                reward_records = []
-                viewer_updates = []
-                
-                # 处理每个观众
-                for viewer in viewers_chunk:
-                    if is_cancelled:
-                        return None
-                    
-                    viewer_id = viewer['id']
-                    userid = viewer['userid']
-                    # 添加观众名称，方便日志识别
-                    viewer_name = viewer['name']
-                    
-                    # 增加详细日志，清晰记录每个观众的原始数据
-                    logger.info(f"处理观众: {viewer_name}(ID:{viewer_id}, UserID:{userid})")
-                    logger.info(f"观众原始数据: 是否签到={viewer['is_signed']}, 观看时长={viewer['watch_time']}秒, 签到次数={viewer['sign_count']}")
-                    
-                    # 获取签到记录数 - 从预加载数据中获取
-                    sign_count = 0
-                    if viewer_id in sign_records and str(live_id) in sign_records[viewer_id]:
-                        sign_count = sign_records[viewer_id][str(live_id)]
-                    
-                    # 修复：如果从签到记录中无法获取签到次数，则使用viewer本身的sign_count
-                    if sign_count == 0 and viewer['is_signed'] and viewer['sign_count'] > 0:
-                        sign_count = viewer['sign_count']
-                        logger.info(f"从viewer记录获取的签到次数: {sign_count}")
-                    
-                    logger.info(f"观众 {viewer_name} 的签到次数: {sign_count}")
-                    
-                    # 获取观看次数 - 从预加载数据中获取
-                    watch_count = 0
-                    if userid in watch_counts:
-                        watch_count = watch_counts[userid]
-                    
-                    logger.info(f"观众 {viewer_name} 的观看场次: {watch_count}")
-                    
-                    # 获取观看时长
-                    watch_time = viewer['watch_time'] or 0
-                    logger.info(f"观众 {viewer_name} 的观看时长: {watch_time}秒")
-                    
-                    # 添加更详细的规则比较日志
-                    logger.info(f"规则要求: 签到次数≥{rule_sign_count}, 观看时长≥{rule_watch_time}秒, 观看场次≥{rule_watch_count_value}")
-                    
-                    # 判断是否符合奖励条件
-                    is_eligible = False
-                    
-                    # 增加规则判断的详细日志
-                    if rule_type == RewardRuleType.SIGN:
-                        is_eligible = sign_count >= rule_sign_count
-                        logger.info(f"观众 {viewer_name} 签到规则检查: {sign_count} >= {rule_sign_count} = {is_eligible}")
-                    elif rule_type == RewardRuleType.WATCH:
-                        is_eligible = watch_time >= rule_watch_time
-                        logger.info(f"观众 {viewer_name} 观看时长规则检查: {watch_time} >= {rule_watch_time} = {is_eligible}")
-                    elif rule_type == RewardRuleType.COUNT:
-                        is_eligible = watch_count >= rule_watch_count_value
-                        logger.info(f"观众 {viewer_name} 观看场次规则检查: {watch_count} >= {rule_watch_count_value} = {is_eligible}")
-                    elif rule_type == RewardRuleType.SIGN_WATCH:
-                        sign_check = sign_count >= rule_sign_count
-                        watch_check = watch_time >= rule_watch_time
-                        is_eligible = sign_check and watch_check
-                        logger.info(f"观众 {viewer_name} 签到+观看时长规则检查: 签到({sign_count} >= {rule_sign_count} = {sign_check}) 且 观看时长({watch_time} >= {rule_watch_time} = {watch_check}) = {is_eligible}")
-                    elif rule_type == RewardRuleType.SIGN_COUNT:
-                        sign_check = sign_count >= rule_sign_count
-                        count_check = watch_count >= rule_watch_count_value
-                        is_eligible = sign_check and count_check
-                        logger.info(f"观众 {viewer_name} 签到+观看场次规则检查: 签到({sign_count} >= {rule_sign_count} = {sign_check}) 且 观看场次({watch_count} >= {rule_watch_count_value} = {count_check}) = {is_eligible}")
-                    elif rule_type == RewardRuleType.WATCH_COUNT:
-                        watch_check = watch_time >= rule_watch_time
-                        count_check = watch_count >= rule_watch_count_value
-                        is_eligible = watch_check and count_check
-                        logger.info(f"观众 {viewer_name} 观看时长+观看场次规则检查: 观看时长({watch_time} >= {rule_watch_time} = {watch_check}) 且 观看场次({watch_count} >= {rule_watch_count_value} = {count_check}) = {is_eligible}")
-                    elif rule_type == RewardRuleType.ALL_OR:
-                        sign_check = sign_count >= rule_sign_count
-                        watch_check = watch_time >= rule_watch_time
-                        count_check = watch_count >= rule_watch_count_value
-                        is_eligible = sign_check or watch_check or count_check
-                        logger.info(f"观众 {viewer_name} 全部条件(OR)规则检查: 签到({sign_count} >= {rule_sign_count} = {sign_check}) 或 观看时长({watch_time} >= {rule_watch_time} = {watch_check}) 或 观看场次({watch_count} >= {rule_watch_count_value} = {count_check}) = {is_eligible}")
-                    elif rule_type == RewardRuleType.ALL_AND:
-                        sign_check = sign_count >= rule_sign_count
-                        watch_check = watch_time >= rule_watch_time
-                        count_check = watch_count >= rule_watch_count_value
-                        is_eligible = sign_check and watch_check and count_check
-                        logger.info(f"观众 {viewer_name} 全部条件(AND)规则检查: 签到({sign_count} >= {rule_sign_count} = {sign_check}) 且 观看时长({watch_time} >= {rule_watch_time} = {watch_check}) 且 观看场次({watch_count} >= {rule_watch_count_value} = {count_check}) = {is_eligible}")
-                    
-                    logger.info(f"观众 {viewer_name} 最终奖励资格判断: {is_eligible}")
-                    
-                    # 创建奖励记录
-                    reward_record = {
-                        'living_id': live_id,
-                        'live_viewer_id': viewer_id,
-                        'rule_type': rule_type.value,  # 存储枚举的字符串值
-                        'rule_sign_count': rule_sign_count,
-                        'rule_watch_time': rule_watch_time,
-                        'rule_watch_count': rule_watch_count_value,
-                        'calculate_batch': batch_id,
-                        'reward_amount': rule_amount,  # live_reward_records.reward_amount记录页面设置的金额
-                        'is_reward_eligible': is_eligible,
-                        'created_at': current_timestamp,
-                        'updated_at': current_timestamp
-                    }
-                    
-                    logger.debug(f"创建观众 {viewer_name} 的奖励记录: {reward_record}")
-                    
-                    # 准备viewer更新数据
-                    viewer_update = {
-                        'id': viewer_id,
-                        'is_reward_eligible': is_eligible,
-                        'reward_amount': rule_amount if is_eligible else 0.0,  # live_viewers.reward_amount记录合格后的实际金额
-                        'reward_status': '批量计算',
-                        'updated_at': current_timestamp
-                    }
-                    
-                    logger.debug(f"准备更新观众 {viewer_name} 的viewer记录: {viewer_update}")
-                    
-                    reward_records.append(reward_record)
-                    viewer_updates.append(viewer_update)
-                    
-                    # 更新进度
-                    with data_lock:
-                        processed_viewers += 1
-                
-                logger.debug(f"完成直播 {live_id} 的一个观众数据块处理，生成了 {len(reward_records)} 条奖励记录")
-                return {
-                    'reward_records': reward_records,
-                    'viewer_updates': viewer_updates
-                }
-            
-            # 创建处理任务 - 每个直播作为一个处理单元
-            all_results = []
-            processing_tasks = []
-            
-            update_progress("开始处理数据", 15)
-            
-            # 创建一个线程池
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                logger.info("创建线程池，开始提交处理任务...")
-                
-                # 为每个直播创建处理任务
-                for live_id, viewers in all_viewers.items():
-                    if is_cancelled:
-                        break
-                    
-                    live_config = all_live_configs[live_id]
-                    sign_records = all_sign_records.get(live_id, {})
-                    
-                    # 分批处理观众数据，降低内存使用
-                    chunk_size = 200
-                    for i in range(0, len(viewers), chunk_size):
-                        if is_cancelled:
-                            break
-                            
-                        viewers_chunk = viewers[i:i+chunk_size]
-                        logger.info(f"提交任务处理直播 {live_id} 的观众数据，分片大小: {len(viewers_chunk)}，观众数据范围: {i} 到 {i+len(viewers_chunk)-1}")
-                        
-                        # 提交任务到线程池
-                        task = executor.submit(
-                            process_chunk, 
-                            live_id, 
-                            viewers_chunk, 
-                            sign_records, 
-                            all_watch_counts, 
-                            live_config,
-                            rule_watch_count
-                        )
-                        processing_tasks.append(task)
-                
-                # 等待所有任务完成
-                logger.info(f"等待 {len(processing_tasks)} 个处理任务完成...")
-                for i, future in enumerate(concurrent.futures.as_completed(processing_tasks)):
-                    if update_progress(f"处理中 ({i+1}/{len(processing_tasks)})"):
-                        is_cancelled = True
-                        logger.warning("用户取消了处理")
-                        break
-                    
-                    # 获取任务结果
-                    try:
-                        result = future.result()
-                        if result:
-                            all_results.append(result)
-                    except Exception as e:
-                        logger.error(f"处理任务发生错误: {str(e)}")
-                
-            # 如果用户取消了操作
-            if is_cancelled:
-                logger.warning("处理被用户取消，取消所有后续操作")
-                progress_dialog.close()
-                QMessageBox.information(self, "提示", "操作已取消。")
-                return
-            
-            # 合并所有结果
-            update_progress("正在合并处理结果", 80)
-            all_reward_records = []
-            all_viewer_updates = []
-            
-            for result in all_results:
-                all_reward_records.extend(result['reward_records'])
-                all_viewer_updates.extend(result['viewer_updates'])
-            
-            logger.info(f"合并所有结果完成，共有 {len(all_reward_records)} 条奖励记录和 {len(all_viewer_updates)} 条viewer更新")
-            
-            # 批量保存数据到数据库
-            update_progress("正在保存数据到数据库", 85)
-            success = False
-            
-            try:
-                with self.db_manager.get_session() as session:
-                    # 1. 删除旧的奖励记录 - 使用直播ID列表
-                    logger.info(f"删除选中的直播ID对应的旧奖励记录: {batch_living_ids}")
-                    delete_result = session.query(LiveRewardRecord).filter(
-                        LiveRewardRecord.living_id.in_(batch_living_ids)
-                    ).delete(synchronize_session=False)
-                    logger.info(f"删除旧奖励记录结果: 已删除 {delete_result} 条记录")
-                    
-                    # 2. 插入新的奖励记录
-                    if all_reward_records:
-                        logger.info(f"开始批量插入 {len(all_reward_records)} 条新奖励记录...")
-                        
-                        # 分批插入减轻数据库压力
-                        batch_size = 1000
-                        for i in range(0, len(all_reward_records), batch_size):
-                            batch = all_reward_records[i:i+batch_size]
-                            
-                            session.execute(
-                                LiveRewardRecord.__table__.insert(),
-                                [record for record in batch]
-                            )
-                            
-                            logger.info(f"已插入 {i+len(batch)} / {len(all_reward_records)} 条奖励记录")
-                    
-                    # 3. 更新观众记录
-                    if all_viewer_updates:
-                        logger.info(f"开始批量更新 {len(all_viewer_updates)} 条观众记录...")
-                        
-                        # 准备批量更新数据
-                        viewer_ids = [update['id'] for update in all_viewer_updates]
-                        
-                        # 基本信息
-                        update_data = {
-                            'is_reward_eligible': False,
-                            'reward_amount': 0.0,
-                            'reward_status': '批量计算',
-                            'updated_at': current_timestamp
-                        }
-                        
-                        # 批量更新所有记录
-                        session.query(LiveViewer).filter(
-                            LiveViewer.id.in_(viewer_ids)
-                        ).update(update_data, synchronize_session=False)
-                        
-                        # 逐个更新符合条件的记录
-                        eligible_updates = [u for u in all_viewer_updates if u['is_reward_eligible']]
-                        logger.info(f"其中有 {len(eligible_updates)} 条观众记录符合奖励条件，需要单独更新")
-                        
-                        for update in eligible_updates:
-                            session.query(LiveViewer).filter(
-                                LiveViewer.id == update['id']
-                            ).update({
-                                'is_reward_eligible': True,
-                                'reward_amount': update['reward_amount']
-                            }, synchronize_session=False)
-                    
-                    # 提交事务
-                    logger.info("提交所有数据库操作...")
-                    session.commit()
-                    success = True
-                    logger.info("数据保存成功！")
-                    
-            except Exception as e:
-                logger.error(f"保存数据到数据库时出错: {str(e)}")
-                QMessageBox.critical(self, "错误", f"保存数据到数据库时出错: {str(e)}")
-            
-            # 关闭进度对话框
-            progress_dialog.close()
-            
-            # 显示处理结果
-            if success:
-                eligible_count = sum(1 for r in all_reward_records if r['is_reward_eligible'])
-                total_reward = sum(r['reward_amount'] for r in all_viewer_updates if r['is_reward_eligible'])
-                
-                logger.info(f"奖励计算完成！处理了 {len(all_reward_records)} 条记录，符合奖励条件: {eligible_count} 人，奖励总金额: ¥{total_reward:.2f}")
-                
-                QMessageBox.information(
-                    self, 
-                    "处理完成", 
-                    f"奖励计算完成！\n\n"
-                    f"处理了 {len(all_reward_records)} 条记录\n"
-                    f"符合奖励条件: {eligible_count} 人\n"
-                    f"不符合条件: {len(all_reward_records) - eligible_count} 人\n"
-                    f"奖励总金额: ¥{total_reward:.2f}\n\n"
-                    f"计算批次: {batch_id}"
-                )
-                
-        except Exception as e:
-            logger.error(f"处理过程出错: {str(e)}")
-            logger.exception("详细错误信息：")
-            QMessageBox.critical(self, "错误", f"处理过程出错: {str(e)}")
-            progress_dialog.close()
+    def _calculate_reward(self, request, selected_lives, rule_type, rule_watch_count, batch_id):
+        """后台线程：计算奖励"""
+        return RewardEngine(self.db_manager).calculate(
+            selected_lives,
+            rule_type=rule_type,
+            rule_watch_count=rule_watch_count,
+            batch_id=batch_id
+        )
         
+    def _on_reward_calculated(self, result, batch_id: str):
+        eligible_count = result["eligible"]
+        total_count = result["total"]
+        QMessageBox.information(
+            self, 
+            "处理完成", 
+            f"奖励计算完成！\n\n"
+            f"处理了 {total_count} 条记录\n"
+            f"符合奖励条件: {eligible_count} 人\n"
+            f"不符合条件: {total_count - eligible_count} 人\n"
+            f"奖励总金额: ¥{result['total_amount']:.2f}\n\n"
+            f"计算批次: {batch_id}"
+        )
         logger.info("==================== 结束计算奖励 ====================")
         
+    def _on_reward_failed(self, e: Exception):
+        logger.error(f"处理过程出错: {str(e)}")
+        QMessageBox.critical(self, "错误", f"处理过程出错: {str(e)}")
+        
     def composite_export_data(self):
         """导出数据"""
         # 获取或创建logger，避免多次导入
@@ -4379,359 +3512,15 @@ class CombinedExportDialog(QDialog):
                     logger.info("用户取消了文件选择")
                     return  # 用户取消了选择
                 
-                # 显示数据处理进度对话框
-                progress = QProgressDialog("正在导出数据...", "取消", 0, 100, self)
-                progress.setWindowTitle("导出数据")
-                progress.setMinimumDuration(0)
-                progress.setWindowModality(Qt.WindowModal)
-                progress.setAutoClose(True)
-                progress.setValue(0)
-                
-                # 预先准备数据导出
-                import pandas as pd
-                from openpyxl import Workbook
-                from openpyxl.styles import PatternFill
-                from openpyxl.utils.dataframe import dataframe_to_rows
-                from openpyxl.utils import get_column_letter
-                
-                # 获取用户记录总数以便显示进度
-                total_viewers_count = session.query(func.count(func.distinct(LiveViewer.userid))).filter(
-                    LiveViewer.living_id.in_(selected_lives)
-                ).scalar() or 0
-                
-                logger.info(f"预计需要处理 {total_viewers_count} 条用户记录")
-                
-                if progress.wasCanceled():
-                    return handle_cancel(session, "用户在数据准备阶段取消了操作")
-                
-                # 创建Excel工作簿
-                wb = Workbook()
-                ws = wb.active
-                ws.title = "综合直播数据"
-                
-                # 设置标题行
-                headers = ["用户ID", "用户名称"]
-                
-                # 为每个直播添加三列数据
-                for i, live_id in enumerate(selected_lives, 1):
-                    title = living_id_to_info[live_id]['theme']
-                    headers.extend([
-                        f"观看时长{i} ({title})",
-                        f"签到次数{i} ({title})",
-                        f"邀请人{i} ({title})"
-                    ])
-                
-                # 添加合计和资格列
-                headers.extend(["红包合计($)", "是否合格"])
-                
-                # 写入标题行
-                for col, header in enumerate(headers, 1):
-                    ws.cell(row=1, column=col, value=header)
-                
-                # 为不同直播的列添加不同颜色
-                colors = ['FFCCCC', 'CCFFCC', 'CCCCFF', 'FFFFCC', 'FFCCFF', 'CCFFFF']
-                
-                # 设置标题行颜色
-                for i, live_id in enumerate(selected_lives, 1):
-                    color = colors[i % len(colors)]  # 循环使用颜色
-                    fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
-                    
-                    # 为每个直播的3列数据设置颜色
-                    col_start = 3 + (i-1)*3  # 从第3列开始是第一个直播的数据
-                    for col in range(col_start, col_start+3):
-                        ws.cell(row=1, column=col).fill = fill
-                
-                progress.setValue(10)
-                
-                if progress.wasCanceled():
-                    return handle_cancel(session, "用户在表格准备阶段取消了操作")
-                
-                # 批量处理用户数据
-                # 获取所有用户ID - 使用yield_per优化内存使用
-                all_viewer_ids_query = session.query(LiveViewer.userid).distinct().filter(
-                    LiveViewer.living_id.in_(selected_lives)
+                # 写出数据在后台执行，进度对话框可取消
+                living_titles = {live_id: info['theme'] for live_id, info in living_id_to_info.items()}
+                run_with_progress(
+                    self, "正在导出数据...", self._export_composite,
+                    file_path, selected_lives, living_titles,
+                    key="composite_export", title="导出数据",
+                    on_result=lambda export_result: self._on_composite_exported(export_result, file_path),
+                    on_error=lambda e: QMessageBox.critical(self, "错误", f"导出数据失败: {str(e)}")
                 )
-                
-                # 当前行索引，从第2行开始（第1行是标题）
-                current_row = 2
-                
-                # 批处理大小
-                batch_size = 1000
-                
-                # 记录所有已处理的用户ID（用于更新reward_status）
-                processed_user_ids = set()
-                
-                # 获取总批次数
-                total_batches = (total_viewers_count + batch_size - 1) // batch_size
-                
-                logger.info(f"总共需要处理 {total_batches} 批数据，每批 {batch_size} 条")
-                
-                # 是否已有数据写入Excel
-                has_data_written = False
-                
-                try:
-                    # 辅助函数：转换秒为时分秒格式
-                    def format_seconds(seconds):
-                        if not seconds:
-                            return "未观看"
-                        hours, remainder = divmod(seconds, 3600)
-                        minutes, seconds = divmod(remainder, 60)
-                        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                    
-                    # 分批处理用户数据
-                    for batch_index in range(total_batches):
-                        if progress.wasCanceled():
-                            logger.info("用户在数据处理阶段取消了操作")
-                            raise CancelOperationException("用户取消了操作")
-                        
-                        # 计算当前批次的进度范围：10% - 80%，总共70%的进度用于处理数据
-                        progress_start = 10
-                        progress_end = 80
-                        progress_per_batch = (progress_end - progress_start) / total_batches
-                        current_progress = progress_start + batch_index * progress_per_batch
-                        progress.setValue(int(current_progress))
-                        progress.setLabelText(f"正在处理批次 {batch_index + 1}/{total_batches}...")
-                        
-                        # 获取当前批次的用户ID
-                        viewer_ids_batch = all_viewer_ids_query.limit(batch_size).offset(batch_index * batch_size).all()
-                        
-                        if not viewer_ids_batch:
-                            logger.info(f"批次 {batch_index + 1} 没有数据，跳过")
-                            continue
-                        
-                        logger.info(f"处理批次 {batch_index + 1}/{total_batches}，包含 {len(viewer_ids_batch)} 条用户ID")
-                        
-                        # 提取用户ID列表
-                        user_ids = [uid for (uid,) in viewer_ids_batch]
-                        processed_user_ids.update(user_ids)
-                        
-                        # 批量查询用户基本信息
-                        basic_info_query = session.query(
-                            LiveViewer.userid,
-                            LiveViewer.name,
-                            func.sum(LiveViewer.reward_amount).label('total_reward'),
-                            func.max(LiveViewer.is_reward_eligible).label('is_eligible')
-                        ).filter(
-                            LiveViewer.userid.in_(user_ids),
-                            LiveViewer.living_id.in_(selected_lives)
-                        ).group_by(
-                            LiveViewer.userid,
-                            LiveViewer.name
-                        ).all()
-                        
-                        # 创建用户ID到基本信息的映射
-                        user_id_to_basic_info = {
-                            info.userid: {
-                                'name': info.name,
-                                'total_reward': info.total_reward or 0,
-                                'is_eligible': info.is_eligible or False
-                            }
-                            for info in basic_info_query
-                        }
-                        
-                        # 批量查询用户观看记录 - 使用一次性查询优化
-                        viewer_info_dict = {}
-                        
-                        # 一次性查询所有选中直播的所有用户观看记录
-                        all_viewer_info = session.query(
-                            LiveViewer.userid,
-                            LiveViewer.living_id,
-                            LiveViewer.watch_time,
-                            LiveViewer.sign_count,
-                            LiveViewer.invitor_name
-                        ).filter(
-                            LiveViewer.userid.in_(user_ids),
-                            LiveViewer.living_id.in_(selected_lives)
-                        ).all()
-                        
-                        # 构建查询结果字典
-                        for info in all_viewer_info:
-                            viewer_info_dict[(info.userid, info.living_id)] = {
-                                'watch_time': info.watch_time,
-                                'sign_count': info.sign_count,
-                                'invitor_name': info.invitor_name
-                            }
-                        
-                        # 为每个用户生成一行数据
-                        for user_id in user_ids:
-                            if user_id not in user_id_to_basic_info:
-                                continue  # 跳过没有基本信息的用户
-                            
-                            has_data_written = True  # 标记已有数据写入
-                            
-                            basic_info = user_id_to_basic_info[user_id]
-                            
-                            # 在当前行写入基本信息
-                            ws.cell(row=current_row, column=1, value=user_id)
-                            ws.cell(row=current_row, column=2, value=basic_info['name'])
-                            
-                            # 为每个直播添加详细信息
-                            for i, live_id in enumerate(selected_lives, 1):
-                                viewer_info = viewer_info_dict.get((user_id, live_id), None)
-                                
-                                # 计算列索引
-                                watch_time_col = 3 + (i-1)*3
-                                sign_count_col = watch_time_col + 1
-                                invitor_col = watch_time_col + 2
-                                
-                                # 将秒转换为时分秒格式
-                                watch_time_str = format_seconds(viewer_info['watch_time'] if viewer_info else None)
-                                
-                                # 写入单元格
-                                ws.cell(row=current_row, column=watch_time_col, value=watch_time_str)
-                                ws.cell(row=current_row, column=sign_count_col, value=viewer_info['sign_count'] if viewer_info else 0)
-                                ws.cell(row=current_row, column=invitor_col, value=viewer_info['invitor_name'] if viewer_info and viewer_info['invitor_name'] else "无")
-                                
-                                # 设置颜色
-                                color = colors[i % len(colors)]
-                                fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
-                                for col in range(watch_time_col, invitor_col + 1):
-                                    ws.cell(row=current_row, column=col).fill = fill
-                            
-                            # 添加合计和资格信息
-                            last_col = 3 + len(selected_lives)*3
-                            ws.cell(row=current_row, column=last_col, value=basic_info['total_reward'])
-                            ws.cell(row=current_row, column=last_col+1, value="是" if basic_info['is_eligible'] else "否")
-                            
-                            # 移动到下一行
-                            current_row += 1
-                        
-                        # 适当控制内存清理
-                        if batch_index % 5 == 0:
-                            import gc
-                            gc.collect()
-                    
-                    progress.setValue(80)
-                    progress.setLabelText("正在保存Excel文件...")
-                    
-                    # 自动调整列宽
-                    for col in range(1, len(headers) + 1):
-                        max_length = 0
-                        column_letter = get_column_letter(col)
-                        # 仅检查前100行和标题行，避免过多计算
-                        max_rows = min(current_row - 1, 100)
-                        for row in range(1, max_rows + 1):
-                            cell_value = str(ws.cell(row=row, column=col).value or "")
-                            max_length = max(max_length, len(cell_value))
-                        # 设置列宽（字符宽度 + 2的边距）
-                        adjusted_width = max_length + 2
-                        ws.column_dimensions[column_letter].width = min(adjusted_width, 50)  # 最大宽度限制为50
-                    
-                    # 保存Excel文件
-                    wb.save(file_path)
-                    
-                    if progress.wasCanceled():
-                        return handle_cancel(session, "用户在保存Excel文件后取消了操作", True, True)
-                    
-                    progress.setValue(85)
-                    progress.setLabelText("正在更新数据库状态...")
-                    
-                    # 批量更新reward_status
-                    logger.info(f"更新 {len(processed_user_ids)} 个用户的reward_status")
-                    
-                    # 准备批量更新语句
-                    now = datetime.now()
-                    
-                    # 分批更新数据库记录，每批最多1000条
-                    updated_count = 0
-                    batch_size = 1000
-                    
-                    # 将用户ID列表分成多个批次
-                    user_id_batches = [list(processed_user_ids)[i:i+batch_size] for i in range(0, len(processed_user_ids), batch_size)]
-                    
-                    for batch_index, user_id_batch in enumerate(user_id_batches):
-                        if progress.wasCanceled():
-                            return handle_cancel(session, f"用户在更新数据库批次 {batch_index + 1}/{len(user_id_batches)} 时取消了操作", True, True)
-                        
-                        # 当前批次的进度：85% - 95%，总共10%
-                        progress_start = 85
-                        progress_end = 95
-                        progress_per_batch = (progress_end - progress_start) / len(user_id_batches)
-                        current_progress = progress_start + batch_index * progress_per_batch
-                        progress.setValue(int(current_progress))
-                        progress.setLabelText(f"正在更新数据库 {batch_index + 1}/{len(user_id_batches)}...")
-                        
-                        # 更新当前批次的用户记录
-                        viewers_to_update = session.query(LiveViewer).filter(
-                            LiveViewer.userid.in_(user_id_batch),
-                            LiveViewer.living_id.in_(selected_lives)
-                        ).all()
-                        
-                        for viewer in viewers_to_update:
-                            # 追加"已导出"标记（如果不存在）
-                            if not viewer.reward_status:
-                                viewer.reward_status = "已导出"
-                            elif "已导出" not in viewer.reward_status:
-                                viewer.reward_status += "，已导出"
-                            
-                            # 更新时间戳
-                            viewer.updated_at = now
-                            updated_count += 1
-                        
-                        # 每批次提交一次，减少内存占用
-                        session.commit()
-                    
-                    logger.info(f"成功更新了 {updated_count} 条记录的reward_status")
-                    
-                    progress.setValue(98)
-                    
-                    # 最终提交所有更改
-                    session.commit()
-                    
-                    progress.setValue(100)
-                    progress.close()
-                    
-                    # 显示成功消息
-                    # QMessageBox.information(
-                    #     self, 
-                    #     "成功", 
-                    #     f"已成功导出 {current_row - 2} 条用户记录到文件:\n{file_path}\n\n"
-                    #     f"已更新 {updated_count} 条记录的状态。"
-                    # )
-
-                    progress.setValue(100)
-                    # 进度对话框在这里关闭一次就足够了
-                    progress.close()
-                    
-                    # 创建一个自定义的消息框，包含打开文件按钮
-                    msg_box = QMessageBox(self)
-                    msg_box.setWindowTitle("导出成功")
-                    msg_box.setIcon(QMessageBox.Information)
-                    msg_box.setText(f"已成功导出 {current_row - 2} 条用户记录！")
-                    msg_box.setInformativeText(f"文件保存在：\n{file_path}\n\n已更新 {updated_count} 条记录的状态。")
-                    
-                    # 添加按钮
-                    open_button = msg_box.addButton("打开文件", QMessageBox.ActionRole)
-                    close_button = msg_box.addButton("关闭", QMessageBox.RejectRole)
-                    
-                    # 显示消息框，等待用户操作
-                    msg_box.exec()
-                    
-                    # 处理用户的按钮点击
-                    clicked_button = msg_box.clickedButton()
-                    if clicked_button == open_button:
-                        # 使用系统默认应用程序打开文件
-                        import subprocess
-                        import platform
-                        
-                        try:
-                            system = platform.system()
-                            if system == 'Darwin':  # macOS
-                                subprocess.call(('open', file_path))
-                            elif system == 'Windows':
-                                os.startfile(file_path)
-                            else:  # Linux
-                                subprocess.call(('xdg-open', file_path))
-                            logger.info(f"用户选择打开导出文件: {file_path}")
-                        except Exception as e:
-                            logger.error(f"打开文件失败: {str(e)}")
-                            QMessageBox.warning(self, "警告", f"无法打开文件，请手动查找：\n{file_path}")
-                    else:
-                        logger.info("用户关闭了导出成功提示框")
-                
-                except CancelOperationException as e:
-                    # 用户取消操作的异常处理
-                    return handle_cancel(session, "用户取消了操作", True, True)
             
         except Exception as e:
             logger.error(f"导出数据失败: {str(e)}")
@@ -4743,7 +3532,62 @@ class CombinedExportDialog(QDialog):
             if progress:
                 progress.close()
 
-# 添加自定义异常类，用于处理用户取消操作
-class CancelOperationException(Exception):
-    """用户取消操作的自定义异常"""
-    pass
\ No newline at end of file
+    def _export_composite(self, request, file_path: str, selected_lives: List[int], living_titles: Dict[int, str]):
+        """后台线程：写出综合导出文件"""
+        from src.core.composite_exporter import CompositeExporter
+        
+        def update_export_progress(done, total):
+            request.report_progress(done, total, f"正在导出 {done}/{total} 条用户记录...")
+        
+        return CompositeExporter(self.db_manager).export(
+            file_path,
+            selected_lives,
+            living_titles,
+            progress_callback=update_export_progress,
+            cancel_check=request.is_cancelled
+        )
+    
+    def _on_composite_exported(self, export_result: Dict[str, Any], file_path: str):
+        if export_result["cancelled"]:
+            logger.info("用户取消了操作")
+            return
+        
+        exported_count = export_result["rows"]
+        updated_count = export_result["updated"]
+        logger.info(f"成功更新了 {updated_count} 条记录的reward_status")
+        
+        # 创建一个自定义的消息框，包含打开文件按钮
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle("导出成功")
+        msg_box.setIcon(QMessageBox.Information)
+        msg_box.setText(f"已成功导出 {exported_count} 条用户记录！")
+        msg_box.setInformativeText(f"文件保存在：\n{file_path}\n\n已更新 {updated_count} 条记录的状态。")
+
+        # 添加按钮
+        open_button = msg_box.addButton("打开文件", QMessageBox.ActionRole)
+        close_button = msg_box.addButton("关闭", QMessageBox.RejectRole)
+
+        # 显示消息框，等待用户操作
+        msg_box.exec()
+
+        # 处理用户的按钮点击
+        clicked_button = msg_box.clickedButton()
+        if clicked_button == open_button:
+            # 使用系统默认应用程序打开文件
+            import subprocess
+            import platform
+
+            try:
+                system = platform.system()
+                if system == 'Darwin':  # macOS
+                    subprocess.call(('open', file_path))
+                elif system == 'Windows':
+                    os.startfile(file_path)
+                else:  # Linux
+                    subprocess.call(('xdg-open', file_path))
+                logger.info(f"用户选择打开导出文件: {file_path}")
+            except Exception as e:
+                logger.error(f"打开文件失败: {str(e)}")
+                QMessageBox.warning(self, "警告", f"无法打开文件，请手动查找：\n{file_path}")
+        else:
+            logger.info("用户关闭了导出成功提示框")
@@ -266,34 +266,33 @@ class SettingsPage(QWidget):
     
     def _update_ui_by_permission(self):
         """根据用户权限更新UI"""
-        with self.db_manager.get_session() as session:
-            # 检查是否有管理用户的权限
-            has_manage_users = self.auth_manager.has_permission(self.user_id, "manage_users", session)
-            
-            # 检查是否有管理企业的权限
-            has_manage_corps = self.auth_manager.has_permission(self.user_id, "manage_corps", session)
-            
-            # 检查是否有管理系统设置的权限
-            has_manage_settings = self.auth_manager.has_permission(self.user_id, "manage_settings", session)
-            
-            # 检查是否有管理权限设置的权限
-            has_manage_permissions = self.auth_manager.has_permission(self.user_id, "manage_permissions", session)
+        # 检查是否有管理用户的权限
+        has_manage_users = self.auth_manager.has_permission(self.user_id, "manage_users")
+        
+        # 检查是否有管理企业的权限
+        has_manage_corps = self.auth_manager.has_permission(self.user_id, "manage_corps")
+        
+        # 检查是否有管理系统设置的权限
+        has_manage_settings = self.auth_manager.has_permission(self.user_id, "manage_settings")
+        
+        # 检查是否有管理权限设置的权限
+        has_manage_permissions = self.auth_manager.has_permission(self.user_id, "manage_permissions")
+        
+        # 更新标签页可见性
+        for i in range(self.tabs.count()):
+            tab_text = self.tabs.tabText(i)
             
-            # 更新标签页可见性
-            for i in range(self.tabs.count()):
-                tab_text = self.tabs.tabText(i)
+            if tab_text == "用户管理" and not has_manage_users:
+                self.tabs.setTabVisible(i, False)
                 
-                if tab_text == "用户管理" and not has_manage_users:
-                    self.tabs.setTabVisible(i, False)
-                    
-                elif tab_text == "企业管理" and not has_manage_corps:
-                    self.tabs.setTabVisible(i, False)
-                    
-                elif tab_text == "系统设置" and not has_manage_settings:
-                    self.tabs.setTabVisible(i, False)
-                    
-                elif tab_text == "权限设置" and not has_manage_permissions:
-                    self.tabs.setTabVisible(i, False)
+            elif tab_text == "企业管理" and not has_manage_corps:
+                self.tabs.setTabVisible(i, False)
+                
+            elif tab_text == "系统设置" and not has_manage_settings:
+                self.tabs.setTabVisible(i, False)
+                
+            elif tab_text == "权限设置" and not has_manage_permissions:
+                self.tabs.setTabVisible(i, False)
 
     def filter_users(self):
         """过滤用户列表"""
@@ -564,14 +563,9 @@ class SettingsPage(QWidget):
         }
         
         try:
-            # 检查用户是否有权限
-            with self.db_manager.get_session() as session:
-                has_permission = self.auth_manager.has_permission(
-                    self.user_id,
-                    operation,
-                    session
-                )
-                
+            # 检查用户是否有权限（使用登录时缓存的权限集合）
+            has_permission = self.auth_manager.has_permission(self.user_id, operation)
+            
             # 如果没有权限，记录日志
             if not has_permission:
                 # 获取操作描述
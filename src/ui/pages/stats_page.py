@@ -11,6 +11,7 @@ from src.ui.utils.widget_utils import WidgetUtils
 from src.ui.components.widgets.chart_widget import ChartWidget
 from src.ui.components.dialogs.io_dialog import IODialog
 from src.ui.components.dialogs.export_dialog import ExportDialog
+from src.ui.utils.background_loader import BackgroundLoader
 
 # 核心功能导入
 from src.core.database import DatabaseManager
@@ -191,9 +192,27 @@ class StatsPage(QWidget):
             else:
                 days = 365
             
-            # 获取统计数据
-            stats = self.db_manager.get_live_stats(days)
+            # 统计查询在后台执行，切换时间范围时取代尚未完成的查询
+            BackgroundLoader().submit(
+                self._query_stats, days,
+                key="load_data", owner=self,
+                on_result=self._render_stats,
+                on_error=lambda e: logger.error(f"数据加载失败: {str(e)}")
+            )
             
+        except Exception as e:
+            logger.error(f"数据加载失败: {str(e)}")
+    
+    def _query_stats(self, request, days: int):
+        """后台线程：获取统计和排行数据"""
+        stats = self.db_manager.get_live_stats(days)
+        request.raise_if_cancelled()
+        return stats, self.db_manager.get_live_rankings(days)
+    
+    def _render_stats(self, result):
+        """GUI线程：更新统计卡片、图表和排行表格"""
+        stats, rankings = result
+        try:
             # 更新统计卡片
             self.total_lives_card.findChild(QLabel, "cardValue").setText(str(stats["total_lives"]))
             self.total_watches_card.findChild(QLabel, "cardValue").setText(str(stats["total_watches"]))
@@ -226,9 +245,6 @@ class StatsPage(QWidget):
             y_data = [d["sign_rate"] for d in stats["daily_stats"]]
             self.sign_rate_chart.plot_line(x_data, y_data, "签到率趋势", "日期", "签到率(%)")
             
-            # 获取排行数据
-            rankings = self.db_manager.get_live_rankings(days)
-            
             # 更新排行表格
             self.ranking_table.setRowCount(len(rankings))
             for i, r in enumerate(rankings):
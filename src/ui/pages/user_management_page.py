@@ -2,7 +2,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QLabel, QLineEdit, QTableWidget, QTableWidgetItem,
                              QMessageBox, QComboBox, QDialog, QFormLayout,
                              QHeaderView, QFileDialog, QGroupBox, QCheckBox,
-                             QToolBar, QAbstractItemView, QApplication, QScrollArea)
+                             QToolBar, QAbstractItemView, QScrollArea)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon
 from ..managers.style import StyleManager
@@ -15,6 +15,8 @@ from src.utils.error_handler import ErrorHandler
 from src.core.database import DatabaseManager
 from src.models.user import User, UserRole
 from src.models.corporation import Corporation as Corp
+from src.ui.components.widgets.query_table import QueryColumn, QueryTableModel, QueryTableView, ActionButtonDelegate
+from typing import Any, Dict, List
 import pandas as pd
 import os
 
@@ -254,9 +256,6 @@ class UserDialog(QDialog):
             # 给密码字段设置焦点，确保用户可以立即输入
             self.password_edit.setFocus()
         
-        # 强制刷新UI状态
-        QApplication.processEvents()
-        
     def validate_and_accept(self):
         """验证输入并接受"""
         # 验证必填项
@@ -336,11 +335,6 @@ class UserManagementPage(QWidget):
         self.main_layout.setContentsMargins(10, 10, 10, 10)
         self.main_layout.setSpacing(10)
         
-        # 设置当前页和每页数量
-        self.current_page = 1
-        self.page_size = 10
-        self.total_pages = 1
-        
         # 创建搜索区域
         self.search_layout = QHBoxLayout()
         
@@ -441,51 +435,46 @@ class UserManagementPage(QWidget):
         # 添加工具栏到主布局
         self.main_layout.addWidget(self.toolbar)
         
-        # 创建表格
-        self.table = QTableWidget()
-        self.table.setColumnCount(11)  # 用户ID, 登录名, 显示名, 企业ID, 企业名称, 角色, 状态, 创建时间, 修改时间, 最后登录时间, 操作
-        self.table.setHorizontalHeaderLabels([
-            "用户ID", "登录名", "显示名", "WeChat ID",
-            "企业ID", "企业名称", "角色", "状态", 
-            "创建时间", "修改时间", "操作"
-        ])
-        
-        # 设置水平滚动条
-        self.table.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        # 创建表格：按需读取，滚动到底部时再读取下一批
+        self.table = QueryTableView()
+        self.model = QueryTableModel(
+            self.db_manager,
+            self._build_columns(),
+            self._build_query,
+            User.userid,
+            parent=self
+        )
+        self.model.countChanged.connect(self._update_count_label)
+        self.model.loadingChanged.connect(self._update_count_label)
+        self.model.loadFailed.connect(lambda e: ErrorHandler.handle_error(e, self, "加载用户列表失败"))
+        self.table.setModel(self.model)
+        self.table.enable_sorting()
+        
+        # 操作列按钮由代理绘制，root-admin用户不显示编辑和删除按钮
+        actions = [("edit", "编辑"), ("delete", "删除")]
+        self.action_delegate = ActionButtonDelegate(
+            actions,
+            row_actions=lambda user: [] if user.role == UserRole.ROOT_ADMIN.value else actions,
+            empty_text="系统用户",
+            parent=self.table
+        )
+        self.action_delegate.clicked.connect(self._on_action_clicked)
+        self.table.setItemDelegateForColumn(10, self.action_delegate)
         
         # 固定最后一列宽度（操作列）
         self.table.horizontalHeader().setSectionResizeMode(10, QHeaderView.Fixed)
-        self.table.setColumnWidth(10, 150)
         
         self.main_layout.addWidget(self.table)
         
-        # 创建表格下方的分页控件
-        pagination_layout = QHBoxLayout()
-        
-        # 上一页按钮
-        self.prev_btn = QPushButton("上一页")
-        self.prev_btn.setObjectName("secondaryButton")
-        self.prev_btn.clicked.connect(self.prev_page)
-        pagination_layout.addWidget(self.prev_btn)
-        
-        # 页码显示
-        self.page_label = QLabel("第 1 页")
-        pagination_layout.addWidget(self.page_label)
-        
-        # 下一页按钮
-        self.next_btn = QPushButton("下一页")
-        self.next_btn.setObjectName("secondaryButton")
-        self.next_btn.clicked.connect(self.next_page)
-        pagination_layout.addWidget(self.next_btn)
-        
-        # 添加分页布局到主布局
-        self.main_layout.addLayout(pagination_layout)
+        # 加载状态
+        self.count_label = QLabel("已加载 0 / 共 0 条")
+        self.main_layout.addWidget(self.count_label, alignment=Qt.AlignCenter)
         
         # 初始化样式
         self.setStyleSheet(StyleManager.get_main_style())
         
         # 加载数据
+        self.search_filters = self._current_search_filters()
         self.load_data()
         
     def _create_toolbar(self) -> QWidget:
@@ -579,140 +568,102 @@ class UserManagementPage(QWidget):
         
         return group
         
+    def _build_columns(self) -> List[QueryColumn]:
+        """表格列定义"""
+        role_text = {
+            UserRole.ROOT_ADMIN.value: "超级管理员",
+            UserRole.WECOM_ADMIN.value: "企业管理员",
+            UserRole.NORMAL.value: "普通用户"
+        }
+        
+        def format_time(value, row):
+            return value.strftime("%Y-%m-%d %H:%M:%S") if value else ""
+        
+        return [
+            QueryColumn("用户ID", "userid", sort=User.userid),
+            QueryColumn("登录名", "login_name", sort=User.login_name, width=120),
+            QueryColumn("显示名", "name", sort=User.name, width=120),
+            QueryColumn("企业微信ID", "wecom_code", width=120),
+            QueryColumn("企业名称", "corpname", sort=User.corpname, width=150),
+            QueryColumn("角色", "role", sort=User.role,
+                        formatter=lambda value, row: role_text.get(value, "未知")),
+            QueryColumn("状态", "is_active", formatter=lambda value, row: "正常" if value else "禁用"),
+            QueryColumn("创建时间", "created_at", sort=User.created_at, formatter=format_time, width=160),
+            QueryColumn("修改时间", "updated_at", sort=User.updated_at, formatter=format_time, width=160),
+            QueryColumn("最后登录时间", "last_login", sort=User.last_login, formatter=format_time, width=160),
+            QueryColumn("操作", width=150)
+        ]
+    
+    def _current_search_filters(self) -> Dict[str, Any]:
+        return {
+            "login_name": self.login_name_input.text().strip(),
+            "name": self.name_input.text().strip(),
+            "corp_name": self.corp_name_input.text().strip(),
+            "role": self.role_combo.currentData(),
+            "status": self.status_combo.currentText()
+        }
+    
+    def _build_query(self, session):
+        """用户列查询，应用搜索条件（排序由模型处理）"""
+        filters = self.search_filters
+        query = session.query(
+            User.userid,
+            User.login_name,
+            User.name,
+            User.wecom_code,
+            User.corpname,
+            User.role,
+            User.is_active,
+            User.created_at,
+            User.updated_at,
+            User.last_login
+        )
+        
+        # 1. 登录名模糊搜索
+        if filters["login_name"]:
+            query = query.filter(User.login_name.like(f"%{filters['login_name']}%"))
+        
+        # 2. 用户名模糊搜索
+        if filters["name"]:
+            query = query.filter(User.name.like(f"%{filters['name']}%"))
+        
+        # 3. 企业名称模糊搜索
+        if filters["corp_name"]:
+            query = query.filter(User.corpname.like(f"%{filters['corp_name']}%"))
+        
+        # 4. 用户角色下拉选择
+        if filters["role"]:
+            query = query.filter(User.role == filters["role"])
+        
+        # 5. 用户活跃状态下拉选择
+        if filters["status"] != "全部":
+            query = query.filter(User.is_active == (filters["status"] == "活跃"))
+        
+        return query
+    
     @PerformanceManager.measure_operation("load_data")
     def load_data(self):
-        """加载数据"""
+        """加载数据（第一批），之后的数据在滚动时按需读取"""
         try:
-            # 获取用户列表
-            with self.db_manager.get_session() as session:
-                query = session.query(User)
-                
-                # 应用搜索条件 - 根据新的搜索字段过滤
-                # 1. 登录名模糊搜索
-                if hasattr(self, 'login_name_input') and self.login_name_input.text():
-                    query = query.filter(User.login_name.like(f"%{self.login_name_input.text()}%"))
-                
-                # 2. 用户名模糊搜索
-                if hasattr(self, 'name_input') and self.name_input.text():
-                    query = query.filter(User.name.like(f"%{self.name_input.text()}%"))
-                
-                # 3. 企业名称模糊搜索
-                if hasattr(self, 'corp_name_input') and self.corp_name_input.text():
-                    query = query.filter(User.corpname.like(f"%{self.corp_name_input.text()}%"))
-                
-                # 4. 用户角色下拉选择
-                if hasattr(self, 'role_combo') and self.role_combo.currentData():
-                    query = query.filter(User.role == self.role_combo.currentData())
-                
-                # 5. 用户活跃状态下拉选择
-                if hasattr(self, 'status_combo') and self.status_combo.currentText() != "全部":
-                    is_active = self.status_combo.currentText() == "活跃"
-                    query = query.filter(User.is_active == is_active)
-                
-                # 计算总页数
-                total = query.count()
-                self.total_pages = (total + self.page_size - 1) // self.page_size
-                
-                # 获取当前页数据
-                records = query.offset((self.current_page - 1) * self.page_size).limit(self.page_size).all()
-                
-                # 在会话范围内准备表格数据
-                table_data = []
-                for record in records:
-                    # 在会话内提取用户数据
-                    userid = record.userid
-                    login_name = record.login_name if hasattr(record, 'login_name') else record.username
-                    name = record.name
-                    wecom_code = record.wecom_code if hasattr(record, 'wecom_code') else ""
-                    corpname = record.corpname if hasattr(record, 'corpname') else ""
-                    role = record.role
-                    is_active = record.is_active
-                    created_at = record.created_at if hasattr(record, 'created_at') else None
-                    updated_at = record.updated_at if hasattr(record, 'updated_at') else None
-                    last_login = record.last_login if hasattr(record, 'last_login') else None
-                    
-                    # 角色文本
-                    role_text = {
-                        UserRole.ROOT_ADMIN.value: "超级管理员",
-                        UserRole.WECOM_ADMIN.value: "企业管理员",
-                        UserRole.NORMAL.value: "普通用户"
-                    }.get(role, "未知")
-                    
-                    # 状态文本
-                    status_text = "正常" if is_active else "禁用"
-                    
-                    # 格式化时间
-                    created_at_str = created_at.strftime("%Y-%m-%d %H:%M:%S") if created_at else ""
-                    updated_at_str = updated_at.strftime("%Y-%m-%d %H:%M:%S") if updated_at else ""
-                    last_login_str = last_login.strftime("%Y-%m-%d %H:%M:%S") if last_login else ""
-                    
-                    # 保存用户数据
-                    table_data.append({
-                        'userid': str(userid),
-                        'login_name': login_name,
-                        'name': name,
-                        'wecom_code': wecom_code,
-                        'corpname': corpname,
-                        'role_text': role_text,
-                        'role': role,
-                        'status_text': status_text,
-                        'created_at_str': created_at_str,
-                        'updated_at_str': updated_at_str,
-                        'last_login_str': last_login_str
-                    })
-            
-            # 会话已关闭，使用表格数据更新UI
-            self.table.setRowCount(len(table_data))
-            for row, data in enumerate(table_data):
-                self.table.setItem(row, 0, QTableWidgetItem(data['userid']))
-                self.table.setItem(row, 1, QTableWidgetItem(data['login_name']))
-                self.table.setItem(row, 2, QTableWidgetItem(data['name']))
-                self.table.setItem(row, 3, QTableWidgetItem(data['wecom_code']))
-                self.table.setItem(row, 4, QTableWidgetItem(data['corpname']))
-                self.table.setItem(row, 5, QTableWidgetItem(data['role_text']))
-                self.table.setItem(row, 6, QTableWidgetItem(data['status_text']))
-                self.table.setItem(row, 7, QTableWidgetItem(data['created_at_str']))
-                self.table.setItem(row, 8, QTableWidgetItem(data['updated_at_str']))
-                self.table.setItem(row, 9, QTableWidgetItem(data['last_login_str']))
-                
-                # 操作按钮
-                btn_widget = QWidget()
-                btn_layout = QHBoxLayout(btn_widget)
-                btn_layout.setContentsMargins(0, 0, 0, 0)
-                
-                # 判断是否为root-admin用户，如果是则不显示编辑和删除按钮
-                if data['role'] == UserRole.ROOT_ADMIN.value:
-                    info_label = QLabel("系统用户")
-                    info_label.setStyleSheet("color: #7f8c8d;")
-                    btn_layout.addWidget(info_label)
-                else:
-                    edit_btn = QPushButton("编辑")
-                    edit_btn.setObjectName("linkButton")
-                    # 直接设置样式确保按钮可见
-                    edit_btn.setStyleSheet("background-color: #f0f0f0; color: #000000; border: 1px solid #cccccc; border-radius: 4px; padding: 4px 12px; min-width: 60px;")
-                    
-                    # 在按钮点击时重新从数据库获取用户对象
-                    user_id = data['userid']
-                    edit_btn.clicked.connect(lambda checked, uid=user_id: self._edit_user_by_id(uid))
-                    btn_layout.addWidget(edit_btn)
-                    
-                    delete_btn = QPushButton("删除")
-                    delete_btn.setObjectName("linkButton")
-                    # 直接设置样式确保按钮可见
-                    delete_btn.setStyleSheet("background-color: #f0f0f0; color: #000000; border: 1px solid #cccccc; border-radius: 4px; padding: 4px 12px; min-width: 60px;")
-                    delete_btn.clicked.connect(lambda checked, uid=user_id: self._delete_user_by_id(uid))
-                    btn_layout.addWidget(delete_btn)
-                
-                self.table.setCellWidget(row, 10, btn_widget)  # 操作列移到第11列
-                
-            # 更新分页信息
-            self.page_label.setText(f"第 {self.current_page} 页 / 共 {self.total_pages} 页")
-            self.prev_btn.setEnabled(self.current_page > 1)
-            self.next_btn.setEnabled(self.current_page < self.total_pages)
-            
+            self.model.reload()
         except Exception as e:
             ErrorHandler.handle_error(e, self, "加载用户列表失败")
     
+    def _update_count_label(self, *args):
+        text = f"已加载 {self.model.rowCount()} / 共 {self.model.total_count()} 条"
+        if self.model.is_loading():
+            text += "（正在加载...）"
+        self.count_label.setText(text)
+    
+    def _on_action_clicked(self, row: int, action: str):
+        user = self.model.row_at(row)
+        if user is None:
+            return
+        if action == "edit":
+            self._edit_user_by_id(user.userid)
+        elif action == "delete":
+            self._delete_user_by_id(user.userid)
+    
     def _edit_user_by_id(self, user_id):
         """通过用户ID编辑用户
         
@@ -750,7 +701,7 @@ class UserManagementPage(QWidget):
             
     def search(self):
         """搜索"""
-        self.current_page = 1
+        self.search_filters = self._current_search_filters()
         self.load_data()
         
     def reset_search(self):
@@ -760,15 +711,16 @@ class UserManagementPage(QWidget):
         self.name_input.clear()
         self.corp_name_input.clear()
         
-        # 重置下拉框
-        if hasattr(self, 'role_combo') and self.role_combo.count() > 0:
-            self.role_combo.setCurrentIndex(0)  # 设置为"全部"
-        if hasattr(self, 'status_combo') and self.status_combo.count() > 0:
-            self.status_combo.setCurrentIndex(0)  # 设置为"全部"
+        # 重置下拉框（状态下拉框变化时会自动重新加载）
+        self.role_combo.blockSignals(True)
+        self.status_combo.blockSignals(True)
+        self.role_combo.setCurrentIndex(0)  # 设置为"全部"
+        self.status_combo.setCurrentIndex(0)  # 设置为"全部"
+        self.role_combo.blockSignals(False)
+        self.status_combo.blockSignals(False)
         
         # 刷新数据
-        self.current_page = 1
-        self.load_data()
+        self.search()
     
     def filter_by_status(self, index):
         """根据状态筛选用户
@@ -776,21 +728,7 @@ class UserManagementPage(QWidget):
         Args:
             index: 下拉框索引
         """
-        # 根据状态下拉框值筛选用户
-        self.current_page = 1  # 重置到第一页
-        self.load_data()  # 重新加载数据
-        
-    def prev_page(self):
-        """上一页"""
-        if self.current_page > 1:
-            self.current_page -= 1
-            self.load_data()
-            
-    def next_page(self):
-        """下一页"""
-        if self.current_page < self.total_pages:
-            self.current_page += 1
-            self.load_data()
+        self.search()
             
     @PerformanceManager.measure_operation("add_user")
     def add_user(self):
@@ -798,10 +736,9 @@ class UserManagementPage(QWidget):
         try:
             # 检查权限
             if self.auth_manager and self.user_id:
-                with self.db_manager.get_session() as session:
-                    if not self.auth_manager.has_permission(self.user_id, "manage_users", session):
-                        self.error_handler.handle_warning("您没有权限执行此操作", self)
-                        return
+                if not self.auth_manager.has_permission(self.user_id, "manage_users"):
+                    self.error_handler.handle_warning("您没有权限执行此操作", self)
+                    return
             
             # 创建用户对话框
             dialog = UserDialog(self.auth_manager, self.db_manager)
@@ -847,10 +784,9 @@ class UserManagementPage(QWidget):
         try:
             # 检查权限
             if self.auth_manager and self.user_id:
-                with self.db_manager.get_session() as session:
-                    if not self.auth_manager.has_permission(self.user_id, "manage_users", session):
-                        self.error_handler.handle_warning("您没有权限执行此操作", self)
-                        return
+                if not self.auth_manager.has_permission(self.user_id, "manage_users"):
+                    self.error_handler.handle_warning("您没有权限执行此操作", self)
+                    return
             
             # 创建用户对话框 - 使用用户数据的副本而不是SQLAlchemy对象
             user_data = {
@@ -898,6 +834,10 @@ class UserManagementPage(QWidget):
                     
                     session.commit()
                     
+                # 角色可能已变更，清除该用户缓存的权限集合
+                if self.auth_manager:
+                    self.auth_manager.invalidate_permissions(user_id)
+                    
                 ErrorHandler.handle_info("编辑用户成功", self, "成功")
                 self.load_data()
                 
@@ -914,10 +854,9 @@ class UserManagementPage(QWidget):
         try:
             # 检查权限
             if self.auth_manager and self.user_id:
-                with self.db_manager.get_session() as session:
-                    if not self.auth_manager.has_permission(self.user_id, "manage_users", session):
-                        self.error_handler.handle_warning("您没有权限执行此操作", self)
-                        return
+                if not self.auth_manager.has_permission(self.user_id, "manage_users"):
+                    self.error_handler.handle_warning("您没有权限执行此操作", self)
+                    return
             
             # 确认删除
             from PySide6.QtWidgets import QMessageBox
@@ -942,6 +881,9 @@ class UserManagementPage(QWidget):
                     session.delete(db_user)
                     session.commit()
                     
+                if self.auth_manager:
+                    self.auth_manager.invalidate_permissions(user_id)
+                    
                 ErrorHandler.handle_info("删除用户成功", self, "成功")
                 self.load_data()
                 
@@ -954,10 +896,9 @@ class UserManagementPage(QWidget):
         try:
             # 检查权限
             if self.auth_manager and self.user_id:
-                with self.db_manager.get_session() as session:
-                    if not self.auth_manager.has_permission(self.user_id, "export_data", session):
-                        self.error_handler.handle_warning("您没有权限执行此操作", self)
-                        return
+                if not self.auth_manager.has_permission(self.user_id, "export_data"):
+                    self.error_handler.handle_warning("您没有权限执行此操作", self)
+                    return
             
             # 选择保存路径
             file_path, _ = QFileDialog.getSaveFileName(
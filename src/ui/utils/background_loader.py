@@ -0,0 +1,359 @@
+import time
+import threading
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QThread, QCoreApplication, Qt, Signal, Slot
+from src.core.api_governor import ApiBudgetGovernor
+from src.utils.db_monitor import SQLProfiler
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LoadCancelled(Exception):
+    """后台任务已取消"""
+
+
+class LoadRequest:
+    """一次后台任务
+
+    任务函数的第一个参数就是它本身：在循环或耗时步骤之间调用 raise_if_cancelled()
+    响应取消，用 report_progress() 报告进度。回调都在GUI线程执行。
+    """
+
+    PROGRESS_INTERVAL = 0.05  # 进度通知的最小间隔(秒)
+
+    def __init__(self, key: Optional[str], owner, func: Callable, args: tuple, kwargs: dict,
+                 on_result=None, on_error=None, on_progress=None, on_finished=None):
+        self.key = key
+        self.owner = owner
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.superseded = False
+        self._cleanups = []
+        self._cancelled = threading.Event()
+        self._last_progress = 0.0
+        self._emit: Optional[Callable[[str, Any], None]] = None
+
+    def cancel(self):
+        """请求取消（任务在下一次检查时停止，结果不再回调）"""
+        self._cancelled.set()
+
+    def add_cleanup(self, callback: Callable[[], None]):
+        """任务结束后总会在GUI线程调用（包括被替代的任务），用于关闭进度对话框等"""
+        self._cleanups.append(callback)
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def raise_if_cancelled(self):
+        if self._cancelled.is_set():
+            raise LoadCancelled("后台任务已取消")
+
+    def report_progress(self, done: int, total: int = 0, text: str = ""):
+        """报告进度（限制频率，完成时总会通知）"""
+        if self._emit is None or self.on_progress is None:
+            return
+        now = time.monotonic()
+        if total and done < total and now - self._last_progress < self.PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        self._emit("progress", (done, total, text))
+
+
+class _LoadRunnable(QRunnable):
+    def __init__(self, request: LoadRequest, emit: Callable[[LoadRequest, str, Any], None]):
+        super().__init__()
+        self.request = request
+        self.emit = emit
+        self.setAutoDelete(True)
+
+    def run(self):
+        request = self.request
+        try:
+            request.raise_if_cancelled()
+            result = request.func(request, *request.args, **request.kwargs)
+            request.raise_if_cancelled()
+            self.emit(request, "result", result)
+        except LoadCancelled:
+            logger.debug(f"后台任务已取消: {request.key}")
+        except Exception as e:
+            if request.is_cancelled():
+                logger.debug(f"已取消的后台任务出错: {request.key}: {str(e)}")
+            else:
+                logger.error(f"后台任务出错: {request.key}: {str(e)}")
+                self.emit(request, "error", e)
+        finally:
+            self.emit(request, "finished", None)
+
+
+class _Dispatcher(QObject):
+    """在GUI线程接收工作线程的通知"""
+
+    delivered = Signal(object, str, object)
+
+    def __init__(self, handler):
+        super().__init__()
+        self._handler = handler
+        self.delivered.connect(self._on_delivered, Qt.QueuedConnection)
+
+    @Slot(object, str, object)
+    def _on_delivered(self, request, kind, payload):
+        self._handler(request, kind, payload)
+
+
+class BackgroundLoader:
+    """后台加载器（进程级单例）
+
+    在独立的线程池中执行数据库查询和接口调用，结果通过信号回到GUI线程：
+    - 同一 owner 下相同 key 的新任务会取消并替代旧任务，旧任务的结果直接丢弃
+    - owner（通常是页面或模型）销毁后任务自动取消，不再回调
+    - on_finished 在任务结束（完成、出错或取消）后调用，被替代的任务不调用
+    """
+
+    MAX_THREADS = 4
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(BackgroundLoader, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        # 防止重复初始化
+        if hasattr(self, '_initialized') and self._initialized:
+            return
+
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(max(2, min(self.MAX_THREADS, QThread.idealThreadCount())))
+        self._dispatcher = _Dispatcher(self._dispatch)
+        app = QCoreApplication.instance()
+        if app is not None and self._dispatcher.thread() is not app.thread():
+            self._dispatcher.moveToThread(app.thread())
+        self._active: Dict[Tuple[int, str], LoadRequest] = {}
+        self._running: Dict[int, LoadRequest] = {}
+        self._watched_owners = set()
+        self._state_lock = threading.Lock()
+
+        self._initialized = True
+
+    # ---------- 提交/取消 ----------
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args,
+        key: Optional[str] = None,
+        owner: Optional[QObject] = None,
+        on_result: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        on_progress: Optional[Callable[[int, int, str], None]] = None,
+        on_finished: Optional[Callable[[], None]] = None,
+        **kwargs
+    ) -> LoadRequest:
+        """提交后台任务
+
+        Args:
+            func: 任务函数 func(request, *args, **kwargs)，在工作线程执行，不能访问界面控件
+            key: 任务键，同一 owner 下相同键的未完成任务会被取消
+            owner: 回调所属的 QObject，销毁后不再回调
+            on_result: 成功时调用 on_result(返回值)
+            on_error: 出错时调用 on_error(异常)，为 None 时只记录日志
+            on_progress: 进度 on_progress(已完成, 总数, 文本)
+            on_finished: 结束时调用
+
+        Returns:
+            LoadRequest: 可用于取消任务
+        """
+        # 工作线程沿用提交方的接口优先级（界面发起的加载仍按交互请求计入额度）和SQL分析的操作范围
+        func = SQLProfiler().bind_action(ApiBudgetGovernor().bind_priority(func))
+        request = LoadRequest(key, owner, func, args, kwargs,
+                              on_result=on_result, on_error=on_error,
+                              on_progress=on_progress, on_finished=on_finished)
+        request._emit = partial(self._emit, request)
+
+        with self._state_lock:
+            if key is not None:
+                slot = (self._owner_id(owner), key)
+                previous = self._active.get(slot)
+                if previous is not None:
+                    previous.superseded = True
+                    previous.cancel()
+                self._active[slot] = request
+            self._running[id(request)] = request
+
+        if owner is not None:
+            self._watch_owner(owner)
+        self._pool.start(_LoadRunnable(request, self._emit))
+        return request
+
+    def cancel(self, key: str, owner: Optional[QObject] = None):
+        """取消 owner 下指定键的任务"""
+        with self._state_lock:
+            request = self._active.get((self._owner_id(owner), key))
+        if request is not None:
+            request.cancel()
+
+    def cancel_owner(self, owner: QObject):
+        """取消 owner 的全部任务"""
+        self._cancel_owner_id(self._owner_id(owner))
+
+    def cancel_all(self):
+        with self._state_lock:
+            requests = list(self._running.values())
+        for request in requests:
+            request.cancel()
+
+    def is_running(self, key: str, owner: Optional[QObject] = None) -> bool:
+        with self._state_lock:
+            return (self._owner_id(owner), key) in self._active
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """等待线程池中的任务执行完（退出前调用，回调仍需事件循环派发）"""
+        return self._pool.waitForDone(msecs)
+
+    # ---------- 内部 ----------
+
+    @staticmethod
+    def _owner_id(owner) -> int:
+        return 0 if owner is None else id(owner)
+
+    def _watch_owner(self, owner: QObject):
+        owner_id = id(owner)
+        if owner_id in self._watched_owners:
+            return
+        self._watched_owners.add(owner_id)
+        owner.destroyed.connect(partial(self._on_owner_destroyed, owner_id))
+
+    def _on_owner_destroyed(self, owner_id: int, *args):
+        self._watched_owners.discard(owner_id)
+        self._cancel_owner_id(owner_id)
+
+    def _cancel_owner_id(self, owner_id: int):
+        with self._state_lock:
+            requests = [request for request in self._running.values()
+                        if self._owner_id(request.owner) == owner_id]
+        for request in requests:
+            request.cancel()
+
+    def _emit(self, request: LoadRequest, kind: str, payload: Any = None):
+        self._dispatcher.delivered.emit(request, kind, payload)
+
+    @staticmethod
+    def _owner_alive(request: LoadRequest) -> bool:
+        if request.owner is None:
+            return True
+        try:
+            from shiboken6 import isValid
+            return isValid(request.owner)
+        except Exception:
+            return False
+
+    def _dispatch(self, request: LoadRequest, kind: str, payload: Any):
+        """在GUI线程派发回调"""
+        if kind == "finished":
+            with self._state_lock:
+                self._running.pop(id(request), None)
+                if request.key is not None:
+                    slot = (self._owner_id(request.owner), request.key)
+                    if self._active.get(slot) is request:
+                        del self._active[slot]
+            for cleanup in request._cleanups:
+                try:
+                    cleanup()
+                except Exception as e:
+                    logger.error(f"后台任务清理出错: {request.key}: {str(e)}")
+            if request.superseded or not self._owner_alive(request):
+                return
+            callback = request.on_finished
+            payload = None
+        elif request.is_cancelled() or not self._owner_alive(request):
+            return
+        elif kind == "result":
+            callback = request.on_result
+        elif kind == "error":
+            callback = request.on_error
+        else:
+            callback = request.on_progress
+
+        if callback is None:
+            return
+        try:
+            if kind == "finished":
+                callback()
+            elif kind == "progress":
+                callback(*payload)
+            else:
+                callback(payload)
+        except Exception as e:
+            logger.error(f"后台任务回调出错: {request.key}: {str(e)}")
+            logger.exception("详细错误信息：")
+
+
+def run_with_progress(
+    parent,
+    label: str,
+    func: Callable[..., Any],
+    *args,
+    on_result: Optional[Callable[[Any], None]] = None,
+    on_error: Optional[Callable[[Exception], None]] = None,
+    on_finished: Optional[Callable[[], None]] = None,
+    cancellable: bool = True,
+    key: Optional[str] = None,
+    title: str = "请稍候",
+    **kwargs
+) -> LoadRequest:
+    """在后台执行任务，同时显示可取消的进度对话框
+
+    对话框在收到第一次进度前显示为忙碌状态；点击取消会取消任务，任务结束后自动关闭。
+    """
+    from PySide6.QtWidgets import QProgressDialog
+
+    dialog = QProgressDialog(label, "取消", 0, 0, parent)
+    if not cancellable:
+        dialog.setCancelButton(None)
+    dialog.setWindowTitle(title)
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(300)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+
+    def on_progress(done: int, total: int, text: str):
+        if total:
+            dialog.setMaximum(total)
+            dialog.setValue(min(done, total))
+        if text:
+            dialog.setLabelText(text)
+
+    request = BackgroundLoader().submit(
+        func, *args, key=key, owner=parent,
+        on_result=on_result, on_error=on_error,
+        on_progress=on_progress, on_finished=on_finished,
+        **kwargs
+    )
+
+    state = {"closed": False}
+
+    def cancel():
+        if not state["closed"]:
+            dialog.setLabelText("正在取消...")
+            request.cancel()
+
+    def close():
+        # 关闭对话框也会发出 canceled，先标记任务已结束
+        state["closed"] = True
+        dialog.close()
+        dialog.deleteLater()
+
+    request.add_cleanup(close)
+    dialog.canceled.connect(cancel)
+    return request
@@ -1,6 +1,6 @@
 from PySide6.QtWidgets import (QWidget, QPushButton, QLabel, QLineEdit, QTextEdit,
                              QComboBox, QCheckBox, QRadioButton, QSpinBox, QDoubleSpinBox,
-                             QSlider, QProgressBar, QTableWidget, QTableWidgetItem,
+                             QSlider, QProgressBar, QTableWidget, QTableWidgetItem, QTableView,
                              QHeaderView, QScrollArea, QFrame, QDateEdit, QTimeEdit)
 from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QFont, QIcon
@@ -221,20 +221,20 @@ class WidgetUtils:
         """)
     
     @staticmethod
-    def set_table_style(widget: QTableWidget):
+    def set_table_style(widget: QTableView):
         """设置表格样式"""
         widget.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #d9d9d9;
                 border-radius: 4px;
                 background-color: white;
                 gridline-color: #f0f0f0;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #f0f0f0;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e6f7ff;
             }
             QHeaderView::section {
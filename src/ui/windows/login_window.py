@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QComboBox,
                              QToolButton, QMessageBox, QFormLayout, QCheckBox, QFrame,
                              QGraphicsDropShadowEffect, QStyledItemDelegate)
-from PySide6.QtCore import Qt, QSize, QPoint
+from PySide6.QtCore import Qt, QSize, QPoint, Signal
 from PySide6.QtGui import QIcon, QClipboard, QMouseEvent, QColor
 from PySide6.QtWidgets import QApplication
 
@@ -12,7 +12,6 @@ from ..managers.style import StyleManager
 from ..managers.theme_manager import ThemeManager
 from ..utils.widget_utils import WidgetUtils
 from ..managers.animation import AnimationManager
-from .main_window import MainWindow
 
 # 核心功能导入
 from ...core.config_manager import ConfigManager
@@ -37,6 +36,9 @@ logger = get_logger(__name__)
 class LoginWindow(QMainWindow):
     """登录窗口"""
     
+    # 后台检测到公网IP后通知GUI线程
+    ip_detected = Signal(str)
+    
     def __init__(self, auth_manager: AuthManager, config_manager: ConfigManager, db_manager: DatabaseManager):
         super().__init__()
         self.auth_manager = auth_manager
@@ -56,16 +58,39 @@ class LoginWindow(QMainWindow):
         
         self.init_ui()
         
-        # 获取并显示IP
+        # 获取并显示IP（后台检测，不阻塞窗口显示）
+        self.ip_detected.connect(self._on_ip_detected)
         self.update_ip_info()
         
         # 加载保存的登录信息
         self.load_saved_credentials()
     
     def update_ip_info(self):
-        """更新IP信息"""
+        """更新IP信息
+        
+        公网IP在后台线程中检测，结果通过 ip_detected 信号回到GUI线程
+        """
+        try:
+            cached_ip = NetworkUtils.get_cached_public_ip()
+            if cached_ip:
+                self._on_ip_detected(cached_ip)
+                return
+            
+            self.ip_label.setText("正在获取IP...")
+            self.copy_ip_btn.setEnabled(False)
+            NetworkUtils.get_public_ip_async(self.ip_detected.emit)
+        except Exception as e:
+            logger.error(f"获取IP地址失败: {str(e)}")
+            self.ip_label.setText("获取IP地址失败")
+            self.copy_ip_btn.setEnabled(False)
+    
+    def _on_ip_detected(self, ip: str):
+        """公网IP检测完成
+        
+        Args:
+            ip: 检测到的公网IP，失败时为空字符串
+        """
         try:
-            ip = NetworkUtils.get_public_ip()
             if ip:
                 self.ip_label.setText(f"当前IP: {ip}")
                 self.copy_ip_btn.setEnabled(True)
@@ -86,13 +111,15 @@ class LoginWindow(QMainWindow):
     def copy_ip(self):
         """复制IP地址"""
         try:
-            ip = NetworkUtils.get_public_ip()
+            ip = NetworkUtils.get_cached_public_ip()
             if ip:
                 clipboard = QApplication.clipboard()
                 clipboard.setText(ip)
                 QMessageBox.information(self, "提示", "IP地址已复制到剪贴板")
             else:
-                QMessageBox.warning(self, "警告", "无法获取IP地址")
+                # 后台重新检测，不阻塞界面
+                self.update_ip_info()
+                QMessageBox.warning(self, "警告", "正在获取IP地址，请稍后再试")
         except Exception as e:
             logger.error(f"复制IP地址失败: {str(e)}")
             QMessageBox.warning(self, "错误", "复制IP地址失败")
@@ -869,7 +896,8 @@ class LoginWindow(QMainWindow):
                                     return
                                 # 如果用户选择继续使用，则继续创建主窗口
                         
-                        # 创建主窗口并保持会话
+                        # 创建主窗口并保持会话（主窗口及各页面在登录后才加载）
+                        from .main_window import MainWindow
                         self.main_window = MainWindow(
                             user,  # 传递完整的用户对象
                             self.config_manager,
@@ -1001,30 +1029,11 @@ class LoginWindow(QMainWindow):
         
         content_layout.addWidget(text_label)
         
-        # 获取IP列表
-        current_ip = NetworkUtils.get_public_ip()
-        from src.core.ip_record_manager import IPRecordManager
-        from src.utils.ip_suggestion import IPSuggestion
-        from src.models.ip_record import IPRecord
-        
-        with self.db_manager.get_session() as session:
-            ip_record_manager = IPRecordManager(session)
-            ip_suggestion = IPSuggestion(ip_record_manager)
-            
-            # 使用优化后的方法获取IP列表，传入当前session
-            ip_list = ip_suggestion.generate_and_save_ips(100, session)
-            
-            # 如果当前IP存在且不在数据库中，添加为manual类型
-            if current_ip:
-                existing_ip = session.query(IPRecord).filter_by(
-                    ip=current_ip
-                ).first()
-                if not existing_ip:
-                    ip_record_manager.add_ip(current_ip, 'manual')
-                    if current_ip not in ip_list:
-                        ip_list.insert(0, current_ip)  # 确保当前IP在列表开头
-            
-            session.commit()  # 提交所有更改
+        # 获取IP列表（只读取缓存的公网IP，未缓存时在后台检测，检测完成后再生成列表）
+        current_ip = NetworkUtils.get_cached_public_ip()
+        ip_list = self._suggest_ip_list(current_ip) if current_ip else []
+        if not current_ip:
+            self.update_ip_info()
         
         # 创建IP列表标签
         ip_list_label = QLabel("建议添加的IP地址列表：")
@@ -1055,20 +1064,35 @@ class LoginWindow(QMainWindow):
             }
         """)
         
-        # 构建IP显示文本，每行显示5个IP，用分号分隔
-        ip_text = ""
-        for i in range(0, len(ip_list), 5):
-            line_ips = ip_list[i:i+5]
-            ip_text += "; ".join(line_ips)
-            if i + 5 < len(ip_list):
-                ip_text += ";\n"
+        def render_ip_list():
+            if not ip_list:
+                ip_display.setText("正在获取当前公网IP...")
+                return
+            # 构建IP显示文本，每行显示5个IP，用分号分隔
+            ip_text = ""
+            for i in range(0, len(ip_list), 5):
+                line_ips = ip_list[i:i+5]
+                ip_text += "; ".join(line_ips)
+                if i + 5 < len(ip_list):
+                    ip_text += ";\n"
+            
+            # 添加IP数量统计
+            ip_count = len(ip_list)
+            ip_text = f"共 {ip_count} 个IP地址：\n\n" + ip_text
+            
+            ip_display.setText(ip_text)
         
-        # 添加IP数量统计
-        ip_count = len(ip_list)
-        ip_text = f"共 {ip_count} 个IP地址：\n\n" + ip_text
+        def on_ip_detected(ip: str):
+            # 对话框打开期间检测到公网IP，按该IP生成列表
+            if ip:
+                ip_list[:] = self._suggest_ip_list(ip)
+                render_ip_list()
         
-        ip_display.setText(ip_text)
+        render_ip_list()
         content_layout.addWidget(ip_display)
+        if not current_ip:
+            self.ip_detected.connect(on_ip_detected)
+            dialog.finished.connect(lambda _: self.ip_detected.disconnect(on_ip_detected))
         
         # 设置滚动区域的内容
         scroll_area.setWidget(content_widget)
@@ -1137,6 +1161,31 @@ class LoginWindow(QMainWindow):
         # 显示对话框
         dialog.exec()
     
+    def _suggest_ip_list(self, current_ip: str) -> list:
+        """按当前公网IP生成建议添加到白名单的IP列表（当前IP在列表开头）"""
+        from src.core.ip_record_manager import IPRecordManager
+        from src.utils.ip_suggestion import IPSuggestion
+        from src.models.ip_record import IPRecord
+        
+        with self.db_manager.get_session() as session:
+            ip_record_manager = IPRecordManager(session)
+            ip_suggestion = IPSuggestion(ip_record_manager)
+            
+            # 使用优化后的方法获取IP列表，传入当前session
+            ip_list = ip_suggestion.generate_and_save_ips(100, session, current_ip=current_ip)
+            
+            # 如果当前IP不在数据库中，添加为manual类型
+            existing_ip = session.query(IPRecord).filter_by(
+                ip=current_ip
+            ).first()
+            if not existing_ip:
+                ip_record_manager.add_ip(current_ip, 'manual')
+            if current_ip not in ip_list:
+                ip_list.insert(0, current_ip)  # 确保当前IP在列表开头
+            
+            session.commit()  # 提交所有更改
+        return ip_list
+    
     def copy_ip_list(self, ip_list):
         """复制IP列表到剪贴板"""
         try:
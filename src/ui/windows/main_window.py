@@ -240,9 +240,7 @@ class MainWindow(QMainWindow):
     def check_permission(self, permission: str) -> bool:
         """检查当前用户是否有指定权限"""
         try:
-            # 使用新的会话和用户ID检查权限
-            with self.db_manager.get_session() as session:
-                return self.auth_manager.has_permission(self.user_login_name, permission, session)
+            return self.auth_manager.has_permission(self.user_login_name, permission)
         except Exception as e:
             logger.error(f"检查权限失败: {str(e)}")
             return False
@@ -260,7 +258,12 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         """窗口关闭时的处理"""
-        # 清理资源，但不再需要关闭会话
+        # 取消后台加载并等待工作线程退出，避免关闭后仍在写数据库
+        from ..utils.background_loader import BackgroundLoader
+        loader = BackgroundLoader()
+        loader.cancel_all()
+        if not loader.wait_for_done(5000):
+            logger.warning("后台任务未能在5秒内结束")
         super().closeEvent(event)
 
     def relogin(self):
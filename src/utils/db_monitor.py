@@ -1,33 +1,274 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from typing import Callable, Dict, Any, List, Optional
 from sqlalchemy import event
-from src.core.database import DatabaseManager
 from src.utils.logger import get_logger
-import time
 
 logger = get_logger(__name__)
 
-def setup_db_monitoring(db_manager: DatabaseManager):
+NO_ACTION = "(无操作)"
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*(?:\?\s*,\s*)*\?\s*\)", re.I)
+_VALUES_RE = re.compile(r"\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.I)
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """将SQL语句归一化为指纹
+
+    去掉注释、字面量和多余空白，IN 列表和多行 VALUES 折叠为一项，
+    只有参数不同的语句得到相同的指纹。
+    """
+    sql = _COMMENT_RE.sub(" ", statement)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _SPACE_RE.sub(" ", sql).strip()
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    sql = _VALUES_RE.sub(r"VALUES \1, ...", sql)
+    return sql
+
+
+class _ActionScope:
+    """一次界面操作内的SQL统计"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.perf_counter()
+        self.statements = 0
+        self.total_time = 0.0
+        self.fingerprints: Dict[str, int] = {}
+
+
+class SQLProfiler:
+    """SQL语句分析器（进程级单例）
+
+    通过 before_cursor_execute/after_cursor_execute 记录每条语句的耗时，
+    按 (界面操作, 指纹) 汇总执行次数和耗时；同一次操作内相同指纹重复执行
+    达到阈值时记为 N+1 嫌疑。界面操作由 PerformanceManager.measure_operation 划定。
+    """
+
+    N_PLUS_ONE_THRESHOLD = 10    # 一次操作内同一指纹执行多少次视为 N+1 嫌疑
+    SLOW_STATEMENT_MS = 200      # 慢语句阈值(毫秒)
+    MAX_SUSPECTS = 100           # 保留的 N+1 嫌疑记录数
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(SQLProfiler, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        # 防止重复初始化
+        if hasattr(self, '_initialized') and self._initialized:
+            return
+
+        self.enabled = False
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._suspects: List[Dict[str, Any]] = []
+        self._engines = set()
+
+        self._initialized = True
+
+    # ---------- 引擎挂载 ----------
+
+    def attach(self, engine):
+        """在引擎上挂载语句监听"""
+        if id(engine) in self._engines:
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engines.add(id(engine))
+        self.enabled = True
+        logger.info("SQL语句分析已启用")
+
+    def detach(self, engine):
+        """移除引擎上的语句监听"""
+        if id(engine) not in self._engines:
+            return
+        event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engines.discard(id(engine))
+        self.enabled = bool(self._engines)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiler_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("profiler_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        self.record(statement, elapsed_ms, executemany)
+
+    # ---------- 操作范围 ----------
+
+    def _scopes(self) -> List[_ActionScope]:
+        scopes = getattr(self._local, "scopes", None)
+        if scopes is None:
+            scopes = self._local.scopes = []
+        return scopes
+
+    def current_action(self) -> str:
+        scopes = self._scopes()
+        return scopes[-1].name if scopes else NO_ACTION
+
+    @contextmanager
+    def action(self, name: str):
+        """划定一次界面操作，操作结束时检查 N+1 嫌疑
+
+        嵌套调用时语句计入最外层操作，避免同一次点击被拆成多个操作。
+        """
+        scopes = self._scopes()
+        if not self.enabled or scopes:
+            yield
+            return
+
+        scope = _ActionScope(name)
+        scopes.append(scope)
+        try:
+            yield
+        finally:
+            scopes.pop()
+            self._finish(scope)
+
+    def bind_action(self, func: Callable) -> Callable:
+        """绑定调用方当前的界面操作，用于提交到线程池或后台线程的函数
+
+        操作范围保存在线程本地，工作线程执行的语句默认计入"(无操作)"；绑定后工作线程中的语句
+        计入同名操作，并单独检查 N+1 嫌疑。
+        """
+        name = self.current_action()
+        if name == NO_ACTION:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.action(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _finish(self, scope: _ActionScope):
+        duration_ms = (time.perf_counter() - scope.started_at) * 1000
+        suspects = [
+            {"action": scope.name, "fingerprint": fp, "count": count}
+            for fp, count in scope.fingerprints.items()
+            if count >= self.N_PLUS_ONE_THRESHOLD
+        ]
+        if suspects:
+            with self._stats_lock:
+                self._suspects.extend(suspects)
+                del self._suspects[:-self.MAX_SUSPECTS]
+            for suspect in suspects:
+                logger.warning(
+                    f"疑似N+1查询: 操作[{scope.name}]中同一语句执行 {suspect['count']} 次: "
+                    f"{suspect['fingerprint'][:200]}"
+                )
+        logger.debug(
+            f"操作[{scope.name}]执行SQL {scope.statements} 条, SQL耗时 {scope.total_time:.2f}ms, "
+            f"总耗时 {duration_ms:.2f}ms"
+        )
+
+    # ---------- 统计 ----------
+
+    def record(self, statement: str, elapsed_ms: float, executemany: bool = False):
+        """记录一条语句的执行"""
+        fp = fingerprint(statement)
+        scopes = self._scopes()
+        action = scopes[-1].name if scopes else NO_ACTION
+        if scopes:
+            scope = scopes[-1]
+            scope.statements += 1
+            scope.total_time += elapsed_ms
+            if not executemany:
+                scope.fingerprints[fp] = scope.fingerprints.get(fp, 0) + 1
+
+        with self._stats_lock:
+            stats = self._stats.setdefault(action, {}).get(fp)
+            if stats is None:
+                stats = self._stats[action][fp] = {"count": 0, "total_time": 0.0, "max_time": 0.0}
+            stats["count"] += 1
+            stats["total_time"] += elapsed_ms
+            stats["max_time"] = max(stats["max_time"], elapsed_ms)
+
+        if elapsed_ms >= self.SLOW_STATEMENT_MS:
+            logger.warning(f"慢SQL({elapsed_ms:.2f}ms) 操作[{action}]: {fp[:200]}")
+
+    def get_stats(self, action: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """获取按操作汇总的语句统计
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: {操作: [{"fingerprint", "count", "total_time", "avg_time", "max_time"}]}，
+            每个操作内按总耗时倒序
+        """
+        with self._stats_lock:
+            result = {}
+            for name, fingerprints in self._stats.items():
+                if action is not None and name != action:
+                    continue
+                result[name] = sorted(
+                    (
+                        {
+                            "fingerprint": fp,
+                            "count": stats["count"],
+                            "total_time": round(stats["total_time"], 3),
+                            "avg_time": round(stats["total_time"] / stats["count"], 3),
+                            "max_time": round(stats["max_time"], 3)
+                        }
+                        for fp, stats in fingerprints.items()
+                    ),
+                    key=lambda item: item["total_time"],
+                    reverse=True
+                )
+            return result
+
+    def get_suspects(self) -> List[Dict[str, Any]]:
+        """获取 N+1 嫌疑记录 [{"action", "fingerprint", "count"}]"""
+        with self._stats_lock:
+            return list(self._suspects)
+
+    def reset_stats(self):
+        """重置统计数据"""
+        with self._stats_lock:
+            self._stats.clear()
+            self._suspects.clear()
+
+    def log_report(self, top: int = 5):
+        """将统计结果写入日志"""
+        for action, items in self.get_stats().items():
+            statements = sum(item["count"] for item in items)
+            total_time = sum(item["total_time"] for item in items)
+            logger.info(f"操作[{action}]: SQL {statements} 条, 耗时 {total_time:.2f}ms")
+            for item in items[:top]:
+                logger.info(
+                    f"  {item['count']} 次, 总计 {item['total_time']:.2f}ms, 最长 {item['max_time']:.2f}ms: "
+                    f"{item['fingerprint'][:200]}"
+                )
+        for suspect in self.get_suspects():
+            logger.info(f"疑似N+1: 操作[{suspect['action']}] {suspect['count']} 次: {suspect['fingerprint'][:200]}")
+
+
+def setup_db_monitoring(db_manager) -> SQLProfiler:
     """设置数据库监控
-    
+
     Args:
         db_manager: 数据库管理器实例
+
+    Returns:
+        SQLProfiler: 语句分析器
     """
-    @event.listens_for(db_manager.engine, 'connect')
-    def receive_connect(dbapi_connection, connection_record):
-        logger.info("数据库连接建立")
-        
-    @event.listens_for(db_manager.engine, 'disconnect')
-    def receive_disconnect(dbapi_connection, connection_record):
-        logger.info("数据库连接断开")
-        
-    @event.listens_for(db_manager.engine, 'cursor')
-    def receive_cursor(cursor):
-        start_time = time.time()
-        
-        def after_cursor_execute(session, cursor, statement, parameters, context, executemany):
-            total = time.time() - start_time
-            logger.debug(f"SQL执行时间: {total:.3f}秒")
-            logger.debug(f"SQL语句: {statement}")
-            if parameters:
-                logger.debug(f"参数: {parameters}")
-                
-        event.listen(cursor, 'after_execute', after_cursor_execute) 
\ No newline at end of file
+    profiler = SQLProfiler()
+    profiler.attach(db_manager.engine)
+    return profiler
@@ -154,21 +154,24 @@ class IPSuggestion:
             (200, 254)    # 备用服务器段
         ]
 
-    def generate_and_save_ips(self, num_ips: int = 100, session = None) -> List[str]:
+    def generate_and_save_ips(self, num_ips: int = 100, session = None, current_ip: str = None) -> List[str]:
         """生成IP地址列表
         
         Args:
             num_ips: 需要生成的IP地址总数，默认100个
             session: 数据库会话，如果为None则创建新会话
+            current_ip: 当前公网IP，为None时使用已缓存的检测结果；没有缓存时在后台开始检测，
+                本次只按手动添加、出错和历史IP生成（不阻塞调用方）
         
         Returns:
             List[str]: 生成的IP地址列表
         """
         # 获取当前公网IP
-        current_ip = NetworkUtils.get_public_ip()
-        if not current_ip:
-            logger.error("无法获取当前公网IP")
-            return []
+        if current_ip is None:
+            current_ip = NetworkUtils.get_cached_public_ip()
+            if not current_ip:
+                NetworkUtils.get_public_ip_async()
+                logger.info("当前公网IP尚未检测完成，本次不包含当前IP")
         
         # 使用提供的session或创建新session
         if session:
@@ -0,0 +1,60 @@
+import importlib
+import threading
+from types import ModuleType
+
+
+class LazyModule:
+    """延迟导入的模块代理
+
+    首次访问属性时才真正导入模块，用于 pandas、matplotlib 等只在导出/绘图时
+    才需要、但导入耗时较长的依赖，避免拖慢启动:
+
+        pd = lazy_import("pandas")
+        plt = lazy_import("matplotlib.pyplot")
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        """模块是否已导入"""
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "已导入" if self.is_loaded else "未导入"
+        return f"<LazyModule {self.__dict__['_name']} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """返回延迟导入的模块代理
+
+    Args:
+        name: 模块全名，如 "matplotlib.pyplot"
+
+    Returns:
+        LazyModule: 模块代理
+    """
+    return LazyModule(name)
+
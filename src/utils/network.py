@@ -3,8 +3,11 @@ import json
 import re
 from loguru import logger
 import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed, TimeoutError as FuturesTimeoutError
 from urllib.parse import urlparse
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Callable
 from src.utils.logger import get_logger
 from src.core.database import DatabaseManager
 from src.core.ip_record_manager import IPRecordManager
@@ -15,16 +18,55 @@ logger = get_logger(__name__)
 class NetworkUtils:
     """网络工具类"""
     
+    # 公网IP检测服务列表，按可靠性排序
+    IP_SERVICES = [
+        # 国内服务
+        ('https://whois.pconline.com.cn/ipJson.jsp', 'pconline'),   # 太平洋电脑网，含地理位置
+        ('https://myip.ipip.net', 'ipip'),                           # IPIP.NET，含地理位置
+        ('https://qifu-api.baidubce.com/ip/local/geo/v1/district', 'baiduce'),  # 百度地理位置
+        ('https://ip.useragentinfo.com/json', 'useragentinfo'),      # User Agent Info，含地理位置
+        ('https://qifu.baidu.com/ip/local/geo/v1/district', 'baidu'),# 百度地理位置
+        # 国际服务作为备选
+        ('https://httpbin.org/ip', 'httpbin'),                       # httpbin
+    ]
+    
+    IP_QUORUM = 2             # 至少几个服务返回相同IP即视为可信
+    IP_REQUEST_TIMEOUT = 3    # 单个服务的请求超时（秒）
+    IP_CACHE_TTL = 300        # 公网IP缓存有效期（秒）
+    
+    # 公网IP缓存，网络环境变化时自动失效
+    _ip_cache: Dict[str, Any] = {
+        "ip": "",
+        "details": None,
+        "expires_at": 0.0,
+        "fingerprint": None
+    }
+    _ip_cache_lock = threading.Lock()
+    
+    # 后台检测任务（供UI异步调用，多次调用共享同一个任务）
+    _async_executor: Optional[ThreadPoolExecutor] = None
+    _pending_future: Optional[Future] = None
+    _async_lock = threading.Lock()
+    
     @staticmethod
-    def get_public_ip() -> str:
+    def get_public_ip(force_refresh: bool = False) -> str:
         """获取公网IP地址
         
-        通过多个服务交叉验证获取最可靠的公网IP，同时将所有检测到的IP保存到数据库
+        通过多个服务交叉验证获取最可靠的公网IP，同时将所有检测到的IP保存到数据库。
+        检测结果会被缓存，缓存有效期内且网络环境未变化时直接返回缓存结果。
+        
+        Args:
+            force_refresh: 是否忽略缓存强制重新检测
         
         Returns:
             str: 公网IP地址，或者空字符串（如果获取失败）
         """
         try:
+            if not force_refresh:
+                cached_ip = NetworkUtils.get_cached_public_ip()
+                if cached_ip:
+                    return cached_ip
+            
             # 调用可靠IP获取方法
             ip, details = NetworkUtils.get_reliable_public_ip()
             
@@ -32,44 +74,12 @@ class NetworkUtils:
             if not ip or details.get('status') != 'success':
                 logger.error("获取公网IP失败")
                 return ''
+            
+            # 更新缓存
+            NetworkUtils._update_ip_cache(ip, details)
                 
             # 保存IP到数据库
-            try:
-                # 获取应用上下文中的数据库管理器实例
-                app_context = get_app_context()
-                if app_context:
-                    try:
-                        db_manager = app_context.db_manager
-                        
-                        # 确认数据库已初始化
-                        if db_manager.initialized:
-                            with db_manager.get_session() as session:
-                                ip_manager = IPRecordManager(session)
-                                
-                                # 保存最可靠的IP为manual类型
-                                if ip and isinstance(ip, str):
-                                    ip_manager.add_ip(ip, 'manual')
-                                    logger.info(f"将最可靠IP [{ip}] 添加到数据库 (类型: manual)")
-                                
-                                # 获取并保存其他检测到的IP
-                                all_ips = details.get('all_ips', {})
-                                if all_ips and isinstance(all_ips, dict):
-                                    for detected_ip, count in all_ips.items():
-                                        if detected_ip != ip:  # 跳过已添加为manual的IP
-                                            try:
-                                                if detected_ip and isinstance(detected_ip, str):
-                                                    ip_manager.add_ip(detected_ip, 'history')
-                                                    logger.info(f"将探测到的其他IP [{detected_ip}] 添加到数据库 (类型: history)")
-                                            except Exception as inner_e:
-                                                logger.warning(f"添加IP [{detected_ip}] 到数据库失败: {str(inner_e)}")
-                        else:
-                            logger.error("数据库管理器未初始化")
-                    except ResourceNotInitializedError:
-                        logger.error("数据库管理器尚未初始化")
-                else:
-                    logger.error("无法获取应用上下文")
-            except Exception as e:
-                logger.error(f"保存IP到数据库失败: {str(e)}")
+            NetworkUtils._save_detected_ips(ip, details)
             
             return ip
         except Exception as e:
@@ -77,126 +87,320 @@ class NetworkUtils:
             return ''
     
     @staticmethod
-    def get_reliable_public_ip() -> Tuple[str, Dict[str, Any]]:
+    def get_public_ip_async(callback: Optional[Callable[[str], None]] = None,
+                            force_refresh: bool = False) -> Future:
+        """在后台线程中获取公网IP地址，不阻塞调用方
+        
+        缓存命中时直接返回已完成的Future；检测进行中时复用同一个检测任务。
+        回调在后台线程中执行，UI调用方需要通过信号切回GUI线程。
+        
+        Args:
+            callback: 检测完成后的回调，参数为IP地址（失败时为空字符串）
+            force_refresh: 是否忽略缓存强制重新检测
+            
+        Returns:
+            Future: 结果为IP地址的Future对象
+        """
+        future = None
+        if not force_refresh:
+            cached_ip = NetworkUtils.get_cached_public_ip()
+            if cached_ip:
+                future = Future()
+                future.set_result(cached_ip)
+        
+        if future is None:
+            with NetworkUtils._async_lock:
+                pending = NetworkUtils._pending_future
+                if pending is not None and not pending.done():
+                    future = pending
+                else:
+                    if NetworkUtils._async_executor is None:
+                        NetworkUtils._async_executor = ThreadPoolExecutor(
+                            max_workers=1, thread_name_prefix="public-ip"
+                        )
+                    future = NetworkUtils._async_executor.submit(
+                        NetworkUtils.get_public_ip, force_refresh
+                    )
+                    NetworkUtils._pending_future = future
+        
+        if callback:
+            def _on_done(done_future: Future):
+                try:
+                    callback(done_future.result() or '')
+                except Exception as e:
+                    logger.error(f"公网IP回调执行失败: {str(e)}")
+            future.add_done_callback(_on_done)
+        
+        return future
+    
+    @staticmethod
+    def get_cached_public_ip() -> str:
+        """获取缓存的公网IP地址
+        
+        Returns:
+            str: 缓存有效且网络环境未变化时返回IP，否则返回空字符串
+        """
+        with NetworkUtils._ip_cache_lock:
+            cache = NetworkUtils._ip_cache
+            if not cache["ip"] or time.time() >= cache["expires_at"]:
+                return ''
+            cached_fingerprint = cache["fingerprint"]
+            cached_ip = cache["ip"]
+        
+        if NetworkUtils._get_network_fingerprint() != cached_fingerprint:
+            logger.info("检测到网络环境变化，公网IP缓存已失效")
+            NetworkUtils.invalidate_ip_cache()
+            return ''
+        
+        return cached_ip
+    
+    @staticmethod
+    def invalidate_ip_cache():
+        """清除公网IP缓存"""
+        with NetworkUtils._ip_cache_lock:
+            NetworkUtils._ip_cache.update({
+                "ip": "",
+                "details": None,
+                "expires_at": 0.0,
+                "fingerprint": None
+            })
+    
+    @staticmethod
+    def _update_ip_cache(ip: str, details: Dict[str, Any]):
+        """更新公网IP缓存
+        
+        Args:
+            ip: 公网IP地址
+            details: 检测详情
+        """
+        fingerprint = NetworkUtils._get_network_fingerprint()
+        with NetworkUtils._ip_cache_lock:
+            NetworkUtils._ip_cache.update({
+                "ip": ip,
+                "details": details,
+                "expires_at": time.time() + NetworkUtils.IP_CACHE_TTL,
+                "fingerprint": fingerprint
+            })
+    
+    @staticmethod
+    def _get_network_fingerprint() -> str:
+        """获取当前网络环境指纹
+        
+        使用默认路由对应的本机出口地址作为指纹，UDP connect 不会实际发送数据包。
+        切换网络（如有线/无线、VPN）后出口地址会变化，从而使缓存失效。
+        
+        Returns:
+            str: 网络环境指纹，无法获取时返回空字符串
+        """
+        s = None
+        try:
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.connect(("223.5.5.5", 53))
+            return s.getsockname()[0]
+        except Exception:
+            return ''
+        finally:
+            if s:
+                s.close()
+    
+    @staticmethod
+    def _save_detected_ips(ip: str, details: Dict[str, Any]):
+        """将检测到的IP保存到数据库
+        
+        Args:
+            ip: 最可靠的IP地址
+            details: 检测详情
+        """
+        try:
+            # 获取应用上下文中的数据库管理器实例
+            app_context = get_app_context()
+            if app_context:
+                try:
+                    db_manager = app_context.db_manager
+                    
+                    # 确认数据库已初始化
+                    if db_manager.initialized:
+                        with db_manager.get_session() as session:
+                            ip_manager = IPRecordManager(session)
+                            
+                            # 保存最可靠的IP为manual类型
+                            if ip and isinstance(ip, str):
+                                ip_manager.add_ip(ip, 'manual')
+                                logger.info(f"将最可靠IP [{ip}] 添加到数据库 (类型: manual)")
+                            
+                            # 获取并保存其他检测到的IP
+                            all_ips = details.get('all_ips', {})
+                            if all_ips and isinstance(all_ips, dict):
+                                for detected_ip, count in all_ips.items():
+                                    if detected_ip != ip:  # 跳过已添加为manual的IP
+                                        try:
+                                            if detected_ip and isinstance(detected_ip, str):
+                                                ip_manager.add_ip(detected_ip, 'history')
+                                                logger.info(f"将探测到的其他IP [{detected_ip}] 添加到数据库 (类型: history)")
+                                        except Exception as inner_e:
+                                            logger.warning(f"添加IP [{detected_ip}] 到数据库失败: {str(inner_e)}")
+                    else:
+                        logger.error("数据库管理器未初始化")
+                except ResourceNotInitializedError:
+                    logger.error("数据库管理器尚未初始化")
+            else:
+                logger.error("无法获取应用上下文")
+        except Exception as e:
+            logger.error(f"保存IP到数据库失败: {str(e)}")
+    
+    @staticmethod
+    def _query_ip_service(service_url: str, service_id: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """查询单个IP服务并解析结果
+        
+        Args:
+            service_url: 服务地址
+            service_id: 服务标识
+            
+        Returns:
+            Tuple[Optional[str], Dict[str, Any]]: (IP地址, 地理位置信息)
+        """
+        headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko)'}
+        response = requests.get(service_url, headers=headers, timeout=NetworkUtils.IP_REQUEST_TIMEOUT)
+        
+        if response.status_code != 200:
+            return None, {}
+            
+        content = response.text
+        ip = None
+        geo = {}
+        
+        # 根据不同服务解析IP和地理位置
+        if service_id == 'pconline':
+            match = re.search(r'\"ip\":\"([^\"]+)\"', content)
+            if match:
+                ip = match.group(1)
+            # 提取地理位置
+            pro_match = re.search(r'\"pro\":\"([^\"]+)\"', content)
+            city_match = re.search(r'\"city\":\"([^\"]+)\"', content)
+            if pro_match and city_match:
+                geo = {
+                    'province': pro_match.group(1),
+                    'city': city_match.group(1)
+                }
+        elif service_id == 'ipip':
+            match = re.search(r'当前 IP：([\d\.]+).*来自于：([^<]+)', content, re.DOTALL)
+            if match:
+                ip = match.group(1)
+                location = match.group(2).strip()
+                geo = {'location': location}
+        elif service_id in ['baiduce', 'baidu']:
+            try:
+                data = json.loads(content)
+                if 'ip' in data:
+                    ip = data['ip']
+                else:
+                    ip = data.get('data', {}).get('ip')
+                
+                # 提取地理位置
+                if 'data' in data and isinstance(data['data'], dict):
+                    geo_data = data['data']
+                    geo = {
+                        'country': geo_data.get('country'),
+                        'province': geo_data.get('prov'),
+                        'city': geo_data.get('city')
+                    }
+            except:
+                pass
+        elif service_id == 'useragentinfo':
+            try:
+                data = json.loads(content)
+                ip = data.get('ip')
+                # 提取地理位置
+                geo = {
+                    'country': data.get('country'),
+                    'province': data.get('province'),
+                    'city': data.get('city'),
+                    'isp': data.get('isp')
+                }
+            except:
+                pass
+        elif service_id == 'httpbin':
+            try:
+                data = json.loads(content)
+                ip = data.get('origin')
+            except:
+                pass
+        
+        return ip, geo
+    
+    @staticmethod
+    def get_reliable_public_ip(quorum: int = None) -> Tuple[str, Dict[str, Any]]:
         """获取最可靠的公网IP地址，通过多个服务交叉验证
         
+        所有服务并发查询，只要有 quorum 个服务返回相同IP即立即返回，
+        不再等待其余较慢的服务；未达到法定数时使用出现次数最多的IP。
+        
+        Args:
+            quorum: 判定可信所需的一致服务数，默认为 IP_QUORUM
+        
         Returns:
             Tuple[str, Dict[str, Any]]: (最可靠的IP地址, 附加信息)
             附加信息包含：信任度、所有收集到的IP、地理位置信息等
         """
+        quorum = quorum or NetworkUtils.IP_QUORUM
+        services = NetworkUtils.IP_SERVICES
         ip_results = {}
         ip_details = {}
+        ip_counts = {}
         geo_info = {}
+        quorum_reached = False
         
+        executor = ThreadPoolExecutor(max_workers=len(services), thread_name_prefix="ip-detect")
         try:
-            # 定义服务列表，按可靠性排序
-            services = [
-                # 国内服务
-                ('https://whois.pconline.com.cn/ipJson.jsp', 'pconline'),   # 太平洋电脑网，含地理位置
-                ('https://myip.ipip.net', 'ipip'),                           # IPIP.NET，含地理位置
-                ('https://qifu-api.baidubce.com/ip/local/geo/v1/district', 'baiduce'),  # 百度地理位置
-                ('https://ip.useragentinfo.com/json', 'useragentinfo'),      # User Agent Info，含地理位置
-                ('https://qifu.baidu.com/ip/local/geo/v1/district', 'baidu'),# 百度地理位置
-                # 国际服务作为备选
-                ('https://httpbin.org/ip', 'httpbin'),                       # httpbin
-            ]
+            futures = {
+                executor.submit(NetworkUtils._query_ip_service, service_url, service_id): (service_url, service_id)
+                for service_url, service_id in services
+            }
             
-            # 尝试所有服务
-            for service_url, service_id in services:
-                try:
-                    headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko)'}
-                    response = requests.get(service_url, headers=headers, timeout=3)
+            try:
+                # 按完成顺序处理结果，达到法定数后立即停止等待
+                for future in as_completed(futures, timeout=NetworkUtils.IP_REQUEST_TIMEOUT + 1):
+                    service_url, service_id = futures[future]
+                    try:
+                        ip, geo = future.result()
+                    except Exception as e:
+                        logger.warning(f"从 {service_id} 获取IP失败: {str(e)}")
+                        continue
                     
-                    if response.status_code != 200:
+                    if not ip:
                         continue
-                        
-                    content = response.text
-                    ip = None
                     
-                    # 根据不同服务解析IP和地理位置
-                    if service_id == 'pconline':
-                        match = re.search(r'\"ip\":\"([^\"]+)\"', content)
-                        if match:
-                            ip = match.group(1)
-                        # 提取地理位置
-                        pro_match = re.search(r'\"pro\":\"([^\"]+)\"', content)
-                        city_match = re.search(r'\"city\":\"([^\"]+)\"', content)
-                        if pro_match and city_match:
-                            geo_info[service_id] = {
-                                'province': pro_match.group(1),
-                                'city': city_match.group(1)
-                            }
-                    elif service_id == 'ipip':
-                        match = re.search(r'当前 IP：([\d\.]+).*来自于：([^<]+)', content, re.DOTALL)
-                        if match:
-                            ip = match.group(1)
-                            location = match.group(2).strip()
-                            geo_info[service_id] = {'location': location}
-                    elif service_id in ['baiduce', 'baidu']:
-                        try:
-                            data = json.loads(content)
-                            if 'ip' in data:
-                                ip = data['ip']
-                            else:
-                                ip = data.get('data', {}).get('ip')
-                            
-                            # 提取地理位置
-                            if 'data' in data and isinstance(data['data'], dict):
-                                geo_data = data['data']
-                                geo_info[service_id] = {
-                                    'country': geo_data.get('country'),
-                                    'province': geo_data.get('prov'),
-                                    'city': geo_data.get('city')
-                                }
-                        except:
-                            pass
-                    elif service_id == 'useragentinfo':
-                        try:
-                            data = json.loads(content)
-                            ip = data.get('ip')
-                            # 提取地理位置
-                            geo_info[service_id] = {
-                                'country': data.get('country'),
-                                'province': data.get('province'),
-                                'city': data.get('city'),
-                                'isp': data.get('isp')
-                            }
-                        except:
-                            pass
-                    elif service_id == 'httpbin':
-                        try:
-                            data = json.loads(content)
-                            ip = data.get('origin')
-                        except:
-                            pass
+                    logger.debug(f"从 {service_id} 获取到IP: {ip}")
+                    ip_results[service_id] = ip
+                    ip_counts[ip] = ip_counts.get(ip, 0) + 1
+                    if geo:
+                        geo_info[service_id] = geo
                     
-                    if ip:
-                        logger.debug(f"从 {service_id} 获取到IP: {ip}")
-                        ip_results[service_id] = ip
-                        
-                        # 保存详细信息
-                        ip_details[service_id] = {
-                            'ip': ip,
-                            'service': service_url,
-                            'geo': geo_info.get(service_id, {})
-                        }
-                except Exception as e:
-                    logger.warning(f"从 {service_id} 获取IP失败: {str(e)}")
-                    continue
+                    # 保存详细信息
+                    ip_details[service_id] = {
+                        'ip': ip,
+                        'service': service_url,
+                        'geo': geo
+                    }
+                    
+                    if ip_counts[ip] >= quorum:
+                        quorum_reached = True
+                        break
+            except FuturesTimeoutError:
+                logger.warning("部分IP服务响应超时，使用已获取的结果")
+            
+            # 取消尚未开始的查询，不等待仍在进行中的请求
+            for future in futures:
+                future.cancel()
             
             # 分析结果，找出最可靠的IP
             if not ip_results:
                 logger.error("所有服务都未能成功获取IP")
                 return '', {'status': 'error', 'message': '无法获取公网IP'}
             
-            # 统计各IP出现次数
-            ip_counts = {}
-            for ip in ip_results.values():
-                ip_counts[ip] = ip_counts.get(ip, 0) + 1
-            
             # 获取出现次数最多的IP
             most_common_ip, count = max(ip_counts.items(), key=lambda x: x[1])
-            confidence = min(count / len(services) * 100, 100)  # 计算可信度
+            confidence = min(count / len(ip_results) * 100, 100)  # 计算可信度
             
             # 收集最终结果
             result_info = {
@@ -205,6 +409,7 @@ class NetworkUtils:
                 'confidence': confidence,
                 'source_count': count,
                 'total_sources': len(ip_results),
+                'quorum_reached': quorum_reached,
                 'all_ips': ip_counts,
                 'details': ip_details,
                 'is_consistent': len(ip_counts) == 1,  # 是否所有服务返回一致结果
@@ -218,12 +423,14 @@ class NetworkUtils:
                     if service_id in ip_results and ip_results[service_id] == most_common_ip:
                         result_info['geo'].update(geo_info[service_id])
             
-            logger.info(f"最可靠的公网IP: {most_common_ip} (可信度: {confidence:.1f}%)")
+            logger.info(f"最可靠的公网IP: {most_common_ip} (可信度: {confidence:.1f}%, {count}/{len(ip_results)} 个服务一致)")
             return most_common_ip, result_info
             
         except Exception as e:
             logger.error(f"获取可靠公网IP失败: {str(e)}")
             return '', {'status': 'error', 'message': str(e)}
+        finally:
+            executor.shutdown(wait=False)
     
     @staticmethod
     def extract_ip_from_error(error_message: str) -> Optional[str]:
@@ -3,6 +3,7 @@ import functools
 from datetime import datetime
 from typing import Dict, Any, Callable
 from .logger import get_logger
+from .db_monitor import SQLProfiler
 
 logger = get_logger(__name__)
 
@@ -38,7 +39,9 @@ class PerformanceManager:
             def wrapper(*args, **kwargs):
                 start_time = time.time()
                 try:
-                    result = func(*args, **kwargs)
+                    # 操作期间执行的SQL按操作汇总（仅在启用SQL分析时生效）
+                    with SQLProfiler().action(func.__qualname__):
+                        result = func(*args, **kwargs)
                     cls._record_performance(operation_name, time.time() - start_time)
                     return result
                 except Exception as e:
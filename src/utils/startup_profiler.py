@@ -0,0 +1,211 @@
+import os
+import sys
+import time
+import builtins
+import threading
+from typing import Dict, Any, List, Optional
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StartupProfiler:
+    """启动耗时分析器（进程级单例）
+
+    设置环境变量 PROFILE_STARTUP=1 后启用：替换 builtins.__import__ 记录每个模块
+    首次导入的耗时（总耗时和去掉子模块后的自身耗时），并记录启动各阶段的时间点，
+    首个窗口显示后输出报告并恢复原导入函数。未启用时所有方法都是空操作。
+    """
+
+    ENV_VAR = "PROFILE_STARTUP"
+    TOP_MODULES = 25   # 报告中列出的模块数
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(StartupProfiler, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        # 防止重复初始化
+        if hasattr(self, '_initialized') and self._initialized:
+            return
+
+        self.enabled = os.environ.get(self.ENV_VAR, "0") == "1"
+        self._started_at: Optional[float] = None
+        self._process_offset = 0.0
+        self._original_import = None
+        self._hook = None
+        self._local = threading.local()
+        self._records_lock = threading.Lock()
+        self._modules: Dict[str, Dict[str, float]] = {}
+        self._marks: List[Dict[str, Any]] = []
+        self._import_time = 0.0
+        self._reported = False
+
+        self._initialized = True
+
+    # ---------- 开始/结束 ----------
+
+    def start(self, force: bool = False):
+        """开始记录
+
+        Args:
+            force: 忽略环境变量强制启用
+        """
+        if force:
+            self.enabled = True
+        if not self.enabled or self._started_at is not None:
+            return
+
+        self._started_at = time.perf_counter()
+        self._process_offset = self._process_uptime()
+        self._original_import = builtins.__import__
+        self._hook = self._timed_import
+        builtins.__import__ = self._hook
+        self.mark("开始记录")
+
+    def stop(self):
+        """恢复原导入函数"""
+        if self._hook is not None and builtins.__import__ is self._hook:
+            builtins.__import__ = self._original_import
+        self._hook = None
+
+    @staticmethod
+    def _process_uptime() -> float:
+        """进程已运行的时间(秒)，用于把解释器自身的启动耗时计入首窗时间"""
+        try:
+            import psutil
+            return max(0.0, time.time() - psutil.Process().create_time())
+        except Exception:
+            return 0.0
+
+    def elapsed(self) -> float:
+        """自进程启动以来的时间(秒)"""
+        if self._started_at is None:
+            return 0.0
+        return self._process_offset + time.perf_counter() - self._started_at
+
+    # ---------- 导入计时 ----------
+
+    def _resolve(self, name: str, globals_, level: int) -> str:
+        if level == 0:
+            return name
+        globals_ = globals_ or {}
+        package = globals_.get("__package__")
+        if package is None:
+            package = globals_.get("__name__", "")
+            if "__path__" not in globals_:
+                package = package.rpartition(".")[0]
+        for _ in range(level - 1):
+            package = package.rpartition(".")[0]
+        return f"{package}.{name}" if name else package
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if self._hook is None:
+            return original(name, globals, locals, fromlist, level)
+        try:
+            fullname = self._resolve(name, globals, level)
+        except Exception:
+            return original(name, globals, locals, fromlist, level)
+
+        module = sys.modules.get(fullname)
+        if module is not None:
+            # from 包 import 子模块：包已导入但子模块尚未导入时，按子模块计时
+            pending = [
+                item for item in (fromlist or ())
+                if item != "*" and not hasattr(module, item)
+            ]
+            if not pending:
+                return original(name, globals, locals, fromlist, level)
+            fullname = f"{fullname}.{pending[0]}"
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - start
+            children = stack.pop()
+            with self._records_lock:
+                if stack:
+                    stack[-1] += total
+                else:
+                    # 只累计最外层导入，避免嵌套导入重复计算
+                    self._import_time += total
+                if fullname not in self._modules:
+                    self._modules[fullname] = {"total": total, "self": max(0.0, total - children)}
+
+    # ---------- 阶段 ----------
+
+    def mark(self, name: str):
+        """记录启动阶段的时间点"""
+        if not self.enabled or self._started_at is None:
+            return
+        self._marks.append({"name": name, "time": self.elapsed()})
+
+    def on_first_window(self):
+        """首个窗口 show() 之后调用：事件循环处理完首批绘制事件时记录首窗时间并输出报告"""
+        if not self.enabled or self._started_at is None or self._reported:
+            return
+        self.mark("调用窗口show")
+        try:
+            from PySide6.QtCore import QTimer
+
+            def finish():
+                self.mark("首个窗口显示")
+                self.finish()
+
+            QTimer.singleShot(0, finish)
+        except Exception:
+            self.finish()
+
+    def finish(self):
+        """结束记录并输出报告"""
+        if self._reported:
+            return
+        self._reported = True
+        self.stop()
+        self.log_report()
+
+    # ---------- 报告 ----------
+
+    def get_report(self, top: Optional[int] = None) -> Dict[str, Any]:
+        """获取启动报告
+
+        Returns:
+            Dict[str, Any]: {"marks": [{"name", "time"}], "import_time", "module_count",
+            "modules": [{"module", "total", "self"}]}（按自身耗时倒序）
+        """
+        with self._records_lock:
+            modules = [
+                {"module": name, "total": round(item["total"], 4), "self": round(item["self"], 4)}
+                for name, item in self._modules.items()
+            ]
+        modules.sort(key=lambda item: item["self"], reverse=True)
+        return {
+            "marks": [{"name": m["name"], "time": round(m["time"], 4)} for m in self._marks],
+            "import_time": round(self._import_time, 4),
+            "module_count": len(modules),
+            "modules": modules[:top] if top else modules
+        }
+
+    def log_report(self, top: Optional[int] = None):
+        """将启动报告写入日志"""
+        report = self.get_report(top or self.TOP_MODULES)
+        logger.info("启动耗时报告（自进程启动起）:")
+        previous = 0.0
+        for mark in report["marks"]:
+            logger.info(f"  {mark['time']:8.3f}s  (+{mark['time'] - previous:.3f}s)  {mark['name']}")
+            previous = mark["time"]
+        logger.info(f"导入模块 {report['module_count']} 个，共 {report['import_time']:.3f}s，按自身耗时排序:")
+        for item in report["modules"]:
+            logger.info(f"  自身 {item['self'] * 1000:8.1f}ms  总计 {item['total'] * 1000:8.1f}ms  {item['module']}")
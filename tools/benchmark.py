@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+性能基准测试工具：在固定的合成数据集上测量核心热点路径
+
+覆盖场景：观众写入(viewer_upsert)、重新拉取未变化的观众(viewer_refetch)、签到导入(sign_import)、奖励计算(reward_calc)、
+综合导出(composite_export)、列表分页查询(list_queries)、统计聚合(stats)，以及读取全部观众时
+LiveViewer 实体(viewer_load_orm，对照)与紧凑记录(viewer_load_records)的内存对比。
+每个场景报告耗时、峰值内存和SQL语句数，可以保存为基线并按阈值检查性能回退。
+
+用法:
+    python tools/benchmark.py --sizes 1k 10k
+    python tools/benchmark.py --sizes 10k --save-baseline
+    python tools/benchmark.py --sizes 10k --cases reward_calc composite_export --threshold 0.3
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional
+
+# 添加项目根目录到系统路径，确保可以导入项目模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from src.utils.logger import setup_logger, get_logger
+from src.core.database import DatabaseManager
+from src.core.live_viewer_manager import LiveViewerManager
+from src.core.sign_import_manager import SignImportManager
+from src.core.reward_engine import RewardEngine
+from src.core.composite_exporter import CompositeExporter
+from src.core.pagination import KeysetPaginator
+from src.core.viewer_records import iter_viewer_records
+from src.models.living import Living
+from src.models.live_viewer import LiveViewer
+from src.models.live_reward_record import RewardRuleType
+from src.utils.db_monitor import SQLProfiler
+from tools.generate_dataset import DatasetGenerator, DEFAULT_SEED
+
+logger = get_logger("benchmark")
+
+SIZES = {"1k": 1000, "10k": 10000, "100k": 100000}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = 0.25   # 耗时超过基线25%视为回退
+MIN_REGRESSION_TIME = 0.05 # 基线耗时低于该值(秒)时不判定回退，避免计时抖动
+LIVE_COUNT = 4
+SIGN_SHEETS = 3
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="性能基准测试工具")
+    parser.add_argument('--sizes', nargs='+', default=["1k", "10k"], choices=list(SIZES), help='数据集规模（观众总数）')
+    parser.add_argument('--cases', nargs='+', default=None, help='只运行指定场景')
+    parser.add_argument('--repeat', type=int, default=3, help='每个场景的计时次数，取中位数')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='数据集随机种子')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件路径')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='回退阈值（相对基线的比例）')
+    parser.add_argument('--output', default=None, help='将本次结果写入JSON文件')
+    parser.add_argument('--keep-data', action='store_true', help='保留生成的数据集目录')
+    return parser.parse_args()
+
+
+# ---------- 数据集 ----------
+
+def build_dataset(data_dir: str, viewer_count: int, seed: int) -> Dict[str, Any]:
+    """在 data_dir 下用 DatasetGenerator 生成固定的合成数据集（数据库模板和签到Excel）
+
+    Returns:
+        Dict[str, Any]: 数据集信息 {"db_path", "live_ids", "livingids", "sign_workbook", "upsert_users"}
+    """
+    rng = random.Random(seed)
+    db_path = os.path.join(data_dir, "template.db")
+    db = open_database(db_path, data_dir)
+    per_live = max(1, viewer_count // LIVE_COUNT)
+    summary = DatasetGenerator(
+        db, seed=seed, lives=LIVE_COUNT, viewers_per_live=per_live, sign_rounds=SIGN_SHEETS
+    ).generate(os.path.join(data_dir, "sign_excel"))
+
+    with db.get_session() as session:
+        internal_users = [
+            row.userid for row in session.execute(
+                select(LiveViewer.userid)
+                .where(LiveViewer.living_id == summary["live_ids"][0], LiveViewer.user_type == 1)
+                .order_by(LiveViewer.id)
+            )
+        ]
+
+    # 观众写入使用的接口数据：一半已存在（更新），一半新用户（插入）
+    existing = internal_users[:per_live // 2]
+    userids = existing + [f"user_new_{i}" for i in range(per_live - len(existing))]
+    upsert_users = [
+        {"userid": userid, "name": f"观众{i}", "watch_time": rng.randint(0, 7200), "is_comment": 0, "is_mic": 0}
+        for i, userid in enumerate(userids)
+    ]
+
+    return {
+        "db_path": db_path,
+        "live_ids": summary["live_ids"],
+        "livingids": summary["livingids"],
+        "sign_workbook": summary["workbooks"][0],
+        "upsert_users": upsert_users
+    }
+
+
+def open_database(db_path: str, data_dir: str) -> DatabaseManager:
+    """（重新）初始化数据库管理器指向 db_path"""
+    db = DatabaseManager()
+    if getattr(db, "engine", None) is not None:
+        db.engine.dispose()
+    db.initialize({"path": db_path, "backup_path": os.path.join(data_dir, "backup")})
+    db.init_db()
+    return db
+
+
+# ---------- 场景 ----------
+
+def case_viewer_upsert(db: DatabaseManager, dataset: Dict[str, Any]) -> Callable[[], Any]:
+    manager = LiveViewerManager(db)
+    manager._cache["wecom_contact_tried"] = True  # 不访问企业微信
+    livingid = dataset["livingids"][0]
+    stat_info = {"users": [dict(user) for user in dataset["upsert_users"]]}
+
+    def run():
+        existing = manager._preload_existing_viewers(livingid)
+        result = manager._new_fetch_result()
+        manager._store_page(livingid, dataset["live_ids"][0], stat_info, existing, result, None)
+        return result
+    return run
+
+
+def case_viewer_refetch(db: DatabaseManager, dataset: Dict[str, Any]) -> Callable[[], Any]:
+    manager = LiveViewerManager(db)
+    manager._cache["wecom_contact_tried"] = True  # 不访问企业微信
+    livingid = dataset["livingids"][0]
+    live_id = dataset["live_ids"][0]
+    stat_info = {"users": [dict(user) for user in dataset["upsert_users"]]}
+    # 先写入一次（不计时），计时的是内容没有变化时的重新拉取
+    manager._store_page(livingid, live_id, stat_info, manager._preload_existing_viewers(livingid),
+                        manager._new_fetch_result(), None)
+
+    def run():
+        existing = manager._preload_existing_viewers(livingid)
+        result = manager._new_fetch_result()
+        manager._store_page(livingid, live_id, stat_info, existing, result, None)
+        return result
+    return run
+
+
+def case_viewer_load_orm(db: DatabaseManager, dataset: Dict[str, Any]) -> Callable[[], Any]:
+    def run():
+        with db.get_session() as session:
+            viewers = session.query(LiveViewer).filter(LiveViewer.living_id.in_(dataset["live_ids"])).all()
+            return sum(viewer.watch_time or 0 for viewer in viewers)
+    return run
+
+
+def case_viewer_load_records(db: DatabaseManager, dataset: Dict[str, Any]) -> Callable[[], Any]:
+    def run():
+        with db.get_session() as session:
+            viewers = list(iter_viewer_records(session, LiveViewer.living_id.in_(dataset["live_ids"])))
+            return sum(viewer.watch_time or 0 for viewer in viewers)
+    return run
+
+
+def case_sign_import(db: DatabaseManager, dataset: Dict[str, Any]) -> Callable[[], Any]:
+    manager = SignImportManager(db)
+    return lambda: manager.import_sign_data(dataset["sign_workbook"], dataset["live_ids"][0])
+
+
+def case_reward_calc(db: DatabaseManager, dataset: Dict[str, Any]) -> Callable[[], Any]:
+    engine = RewardEngine(db)
+    rules = [
+        {"id": live_id, "rule_sign_count": 1, "rule_watch_time": 1800, "reward_amount": 2.0}
+        for live_id in dataset["live_ids"]
+    ]
+    return lambda: engine.calculate(rules, RewardRuleType.SIGN_WATCH, 1, "benchmark")
+
+
+def case_composite_export(db: DatabaseManager, dataset: Dict[str, Any]) -> Callable[[], Any]:
+    exporter = CompositeExporter(db)
+    file_path = os.path.join(os.path.dirname(dataset["db_path"]), "composite.xlsx")
+    titles = {live_id: f"基准直播{i + 1}" for i, live_id in enumerate(dataset["live_ids"])}
+    return lambda: exporter.export(file_path, dataset["live_ids"], titles, mark_exported=False)
+
+
+def case_list_queries(db: DatabaseManager, dataset: Dict[str, Any]) -> Callable[[], Any]:
+    def run():
+        with db.get_session() as session:
+            lives = KeysetPaginator([(Living.living_start, True), (Living.id, True)], page_size=10)
+            lives.fetch(session.query(Living), 1)
+            viewers = KeysetPaginator([(LiveViewer.watch_time, True), (LiveViewer.id, True)], page_size=20)
+            query = session.query(LiveViewer.id, LiveViewer.userid, LiveViewer.name, LiveViewer.watch_time)\
+                .filter(LiveViewer.living_id == dataset["live_ids"][0])
+            pages = 0
+            for page in range(1, 51):
+                viewers.fetch(query, page)
+                viewers.count(query)
+                pages += 1
+                if not viewers.has_next:
+                    break
+            return pages
+    return run
+
+
+def case_stats(db: DatabaseManager, dataset: Dict[str, Any]) -> Callable[[], Any]:
+    manager = LiveViewerManager(db)
+    return lambda: [manager.get_viewer_statistics(live_id) for live_id in dataset["live_ids"]]
+
+
+CASES = {
+    "viewer_upsert": case_viewer_upsert,
+    "viewer_refetch": case_viewer_refetch,
+    "sign_import": case_sign_import,
+    "reward_calc": case_reward_calc,
+    "composite_export": case_composite_export,
+    "list_queries": case_list_queries,
+    "stats": case_stats,
+    "viewer_load_orm": case_viewer_load_orm,
+    "viewer_load_records": case_viewer_load_records,
+}
+
+
+# ---------- 执行 ----------
+
+def run_case(name: str, dataset: Dict[str, Any], work_dir: str, repeat: int) -> Dict[str, Any]:
+    """运行单个场景：每次都在数据库模板的副本上执行，计时与内存分开测量"""
+    profiler = SQLProfiler()
+    times = []
+    sql_count = 0
+    peak_memory = 0
+
+    for attempt in range(repeat + 1):
+        db_path = os.path.join(work_dir, f"{name}.db")
+        shutil.copyfile(dataset["db_path"], db_path)
+        db = open_database(db_path, work_dir)
+        profiler.attach(db.engine)
+        run = CASES[name](db, {**dataset, "db_path": db_path})
+
+        measure_memory = attempt == repeat  # 最后一次只测内存，tracemalloc 会拖慢计时
+        if measure_memory:
+            tracemalloc.start()
+        profiler.reset_stats()
+        action = f"benchmark.{name}"
+        start = time.perf_counter()
+        with profiler.action(action):
+            run()
+        elapsed = time.perf_counter() - start
+
+        if measure_memory:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            times.append(elapsed)
+            sql_count = sum(item["count"] for item in profiler.get_stats(action).get(action, []))
+        profiler.detach(db.engine)
+
+    return {
+        "wall_time": round(statistics.median(times), 4),
+        "min_time": round(min(times), 4),
+        "peak_memory_mb": round(peak_memory / 1024 / 1024, 2),
+        "sql_count": sql_count
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """对比基线，返回回退项说明"""
+    regressions = []
+    for size, cases in results.items():
+        for name, result in cases.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            if base["wall_time"] >= MIN_REGRESSION_TIME and result["wall_time"] > base["wall_time"] * (1 + threshold):
+                regressions.append(
+                    f"[{size}] {name}: 耗时 {result['wall_time']:.3f}s, 基线 {base['wall_time']:.3f}s "
+                    f"(+{(result['wall_time'] / base['wall_time'] - 1) * 100:.0f}%)"
+                )
+            if result["sql_count"] > base["sql_count"] * (1 + threshold):
+                regressions.append(f"[{size}] {name}: SQL {result['sql_count']} 条, 基线 {base['sql_count']} 条")
+            if base["peak_memory_mb"] >= 1 and result["peak_memory_mb"] > base["peak_memory_mb"] * (1 + threshold):
+                regressions.append(
+                    f"[{size}] {name}: 峰值内存 {result['peak_memory_mb']}MB, 基线 {base['peak_memory_mb']}MB"
+                )
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]]):
+    """输出结果表"""
+    print(f"\n{'规模':<6}{'场景':<18}{'耗时(s)':>10}{'基线(s)':>10}{'峰值内存(MB)':>14}{'SQL数':>8}")
+    for size, cases in results.items():
+        for name, result in cases.items():
+            base = (baseline or {}).get("results", {}).get(size, {}).get(name)
+            base_time = f"{base['wall_time']:.3f}" if base else "-"
+            print(
+                f"{size:<6}{name:<18}{result['wall_time']:>10.3f}{base_time:>10}"
+                f"{result['peak_memory_mb']:>14.2f}{result['sql_count']:>8}"
+            )
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    cases = args.cases or list(CASES)
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        print(f"未知场景: {', '.join(unknown)}，可选: {', '.join(CASES)}")
+        return 2
+
+    data_root = tempfile.mkdtemp(prefix="wecom_benchmark_")
+    setup_logger(log_dir=os.path.join(data_root, "logs"), log_level="WARNING")
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for size in args.sizes:
+            size_dir = os.path.join(data_root, size)
+            os.makedirs(size_dir, exist_ok=True)
+            print(f"生成数据集 {size} (种子 {args.seed})...")
+            dataset = build_dataset(size_dir, SIZES[size], args.seed)
+
+            results[size] = {}
+            for name in cases:
+                print(f"  运行 {name}...")
+                results[size][name] = run_case(name, dataset, size_dir, max(1, args.repeat))
+    finally:
+        if args.keep_data:
+            print(f"数据集目录: {data_root}")
+        else:
+            DatabaseManager().engine.dispose()
+            shutil.rmtree(data_root, ignore_errors=True)
+
+    print_results(results, baseline)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        if baseline:
+            # 保留未重新测量的规模/场景
+            merged = baseline.get("results", {})
+            for size, size_results in results.items():
+                merged.setdefault(size, {}).update(size_results)
+            report["results"] = merged
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存: {args.baseline}")
+        return 0
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回退（阈值 {args.threshold * 100:.0f}%）:")
+            for item in regressions:
+                print(f"  - {item}")
+            return 1
+        print(f"\n未发现性能回退（阈值 {args.threshold * 100:.0f}%）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+合成数据生成工具：向新的SQLite数据库写入直播、观众、签到记录，并生成对应的签到Excel
+
+- 观众按比例混合内部成员与外部联系人，部分用户观看多场直播
+- 内部成员分布在多个部门，邀请关系形成多级邀请链（主播 -> 观众 -> 观众）
+- 每场直播生成多sheet的签到Excel（每个sheet一轮签到），成员名称带有"@微信"后缀、
+  多余空格、全角空格、表情符号、重复行和未知成员等脏数据
+- 相同的种子和参数生成完全相同的数据，便于基准测试对比
+
+用法:
+    python tools/generate_dataset.py --db data/synthetic.db --lives 4 --viewers 2500
+    python tools/generate_dataset.py --db data/synthetic.db --excel-dir data/sign --seed 7 --force
+"""
+
+import os
+import sys
+import random
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+# 添加项目根目录到系统路径，确保可以导入项目模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+from sqlalchemy import insert, select
+from src.core.database import DatabaseManager
+from src.models.living import Living, LivingStatus, LivingType
+from src.models.live_viewer import LiveViewer, UserSource
+from src.models.live_sign_record import LiveSignRecord
+from src.utils.logger import get_logger
+
+logger = get_logger("generate_dataset")
+
+DEFAULT_SEED = 20240326
+BASE_TIME = datetime(2024, 3, 1, 19, 0)
+INSERT_BATCH = 5000
+
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈"
+GIVEN_CHARS = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉萍红娥玲芬燕彬斌宇浩凯鹏飞鑫波辉亮建国文博雪琳晨阳"
+LATIN_NAMES = ["Tom", "Lucy", "Jack", "Amy", "Kevin", "Grace", "Leo", "Emma", "Ryan", "Iris"]
+DEPARTMENT_UNITS = ["销售", "市场", "研发", "客服", "运营", "财务", "人事", "渠道"]
+EMOJIS = ["🌸", "😊", "🍀", "⭐", "🎉"]
+
+
+def sign_round_time(live_index: int, round_index: int) -> datetime:
+    """第 live_index 场直播第 round_index 轮签到的发起时间"""
+    return BASE_TIME + timedelta(days=live_index, minutes=20 + 30 * round_index)
+
+
+class DatasetGenerator:
+    """合成数据生成器"""
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        seed: int = DEFAULT_SEED,
+        lives: int = 4,
+        viewers_per_live: int = 1000,
+        external_ratio: float = 0.3,
+        departments: int = 20,
+        invite_rate: float = 0.4,
+        anchor_invite_rate: float = 0.1,
+        sign_rounds: int = 3,
+        sign_rate: float = 0.6,
+        dirty_rate: float = 0.15,
+        unknown_rate: float = 0.02
+    ):
+        """初始化生成器
+
+        Args:
+            db_manager: 已初始化的数据库管理器
+            seed: 随机种子
+            lives: 直播场数
+            viewers_per_live: 每场直播的观众数
+            external_ratio: 外部联系人占比
+            departments: 部门数
+            invite_rate: 被邀请观众占比
+            anchor_invite_rate: 被邀请观众中由主播邀请的占比
+            sign_rounds: 每场直播的签到轮数（Excel的sheet数）
+            sign_rate: 每轮签到的观众占比
+            dirty_rate: Excel中成员名称被"弄脏"的占比
+            unknown_rate: Excel中未知成员（库中不存在）的占比
+        """
+        self.db_manager = db_manager
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.lives = lives
+        self.viewers_per_live = viewers_per_live
+        self.external_ratio = external_ratio
+        self.invite_rate = invite_rate
+        self.anchor_invite_rate = anchor_invite_rate
+        self.sign_rounds = sign_rounds
+        self.sign_rate = sign_rate
+        self.dirty_rate = dirty_rate
+        self.unknown_rate = unknown_rate
+        self.departments = [
+            (str(1000 + i), f"{DEPARTMENT_UNITS[i % len(DEPARTMENT_UNITS)]}{i // len(DEPARTMENT_UNITS) + 1}部")
+            for i in range(max(1, departments))
+        ]
+
+    # ---------- 用户池 ----------
+
+    def _person_name(self, index: int, external: bool) -> str:
+        """生成确定且唯一的姓名"""
+        if external and index % 4 == 0:
+            return f"{LATIN_NAMES[index % len(LATIN_NAMES)]}{index}"
+        rng = random.Random(self.seed * 7919 + index)
+        given = "".join(rng.choice(GIVEN_CHARS) for _ in range(rng.choice((1, 2))))
+        return f"{SURNAMES[index % len(SURNAMES)]}{given}{index}"
+
+    def _build_user_pool(self) -> List[Dict[str, Any]]:
+        """用户池：数量多于每场观众数，使部分用户观看多场直播"""
+        pool = []
+        for index in range(int(self.viewers_per_live * 1.3) + 1):
+            external = self.rng.random() < self.external_ratio
+            department_id, department = self.departments[index % len(self.departments)]
+            pool.append({
+                "userid": f"wm{index:08d}ext" if external else f"user{index:06d}",
+                "name": self._person_name(index, external),
+                "external": external,
+                "department_id": None if external else department_id,
+                "department": None if external else department
+            })
+        return pool
+
+    # ---------- 数据库 ----------
+
+    def _create_lives(self, session) -> List[Living]:
+        lives = []
+        for i in range(self.lives):
+            live = Living(
+                livingid=f"synthetic_{self.seed}_{i:03d}",
+                theme=f"合成直播{i + 1}",
+                living_start=BASE_TIME + timedelta(days=i),
+                living_duration=7200,
+                anchor_userid=f"anchor{i % 3:02d}",
+                description="合成数据",
+                status=LivingStatus.ENDED,
+                type=LivingType.GENERAL,
+                corpname="合成企业",
+                agentid="1000001",
+                viewer_num=self.viewers_per_live,
+                is_viewer_fetched=1,
+                is_sign_imported=1
+            )
+            live.created_at = live.updated_at = BASE_TIME
+            session.add(live)
+            lives.append(live)
+        session.flush()
+        return lives
+
+    def _build_viewers(self, live: Living, live_index: int, pool: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """生成一场直播的观众，邀请人只从已生成的内部观众中选择，形成邀请链"""
+        members = self.rng.sample(pool, min(self.viewers_per_live, len(pool)))
+        viewers = []
+        internal_invitors: List[Dict[str, Any]] = []
+        for member in members:
+            invitor_userid = invitor_name = None
+            by_anchor = False
+            if self.rng.random() < self.invite_rate:
+                if not internal_invitors or self.rng.random() < self.anchor_invite_rate:
+                    invitor_userid, invitor_name, by_anchor = live.anchor_userid, f"主播{live.anchor_userid}", True
+                else:
+                    invitor = self.rng.choice(internal_invitors)
+                    invitor_userid, invitor_name = invitor["userid"], invitor["name"]
+
+            viewer = {
+                "living_id": live.id,
+                "userid": member["userid"],
+                "name": member["name"],
+                "user_source": UserSource.EXTERNAL if member["external"] else UserSource.INTERNAL,
+                "user_type": 2 if member["external"] else 1,
+                "department": member["department"],
+                "department_id": member["department_id"],
+                "watch_time": self.rng.randint(0, 7200),
+                "is_comment": self.rng.random() < 0.2,
+                "is_mic": self.rng.random() < 0.02,
+                "invitor_userid": invitor_userid,
+                "invitor_name": invitor_name,
+                "is_invited_by_anchor": by_anchor,
+                "is_signed": False,
+                "sign_count": 0,
+                "sign_time": None,
+                "created_at": BASE_TIME + timedelta(days=live_index),
+                "updated_at": BASE_TIME + timedelta(days=live_index)
+            }
+            viewers.append(viewer)
+            if not member["external"]:
+                internal_invitors.append(viewer)
+        return viewers
+
+    def _assign_signs(self, live: Living, live_index: int, viewers: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """为每轮签到抽取签到观众，回填观众的签到汇总字段"""
+        rounds = []
+        for round_index in range(self.sign_rounds):
+            sign_time = sign_round_time(live_index, round_index)
+            signed = [viewer for viewer in viewers if self.rng.random() < self.sign_rate]
+            for viewer in signed:
+                viewer["is_signed"] = True
+                viewer["sign_count"] += 1
+                viewer["sign_time"] = sign_time
+            rounds.append(signed)
+        return rounds
+
+    def _insert(self, session, model, rows: List[Dict[str, Any]]):
+        for start in range(0, len(rows), INSERT_BATCH):
+            session.execute(insert(model), rows[start:start + INSERT_BATCH])
+
+    # ---------- Excel ----------
+
+    def _dirty(self, name: str) -> str:
+        """按签到导出文件中常见的形式弄脏名称"""
+        variant = self.rng.randrange(5)
+        if variant == 0:
+            return f"{name}@微信"
+        if variant == 1:
+            return f"  {name} "
+        if variant == 2:
+            return f"{name}　"
+        if variant == 3:
+            return f"{name}{self.rng.choice(EMOJIS)}"
+        return name.upper() if name.isascii() else f"{name}@微信{self.rng.choice(EMOJIS)}"
+
+    def _write_workbook(self, path: str, live: Living, live_index: int, rounds: List[List[Dict[str, Any]]]):
+        """生成与企业微信签到导出格式一致的多sheet Excel"""
+        wb = Workbook(write_only=True)
+        wb.properties.created = wb.properties.modified = BASE_TIME
+        for round_index, signed in enumerate(rounds):
+            ws = wb.create_sheet(f"第{round_index + 1}次签到")
+            rows = []
+            for viewer in signed:
+                name = viewer["name"]
+                if viewer["user_type"] == 2 and not name.isascii():
+                    name = f"{name}@微信"
+                if self.rng.random() < self.dirty_rate:
+                    name = self._dirty(viewer["name"])
+                rows.append([name, viewer["department"] or ""])
+                if self.rng.random() < self.dirty_rate / 10:
+                    rows.append([name, viewer["department"] or ""])  # 重复行
+            unknown = int(len(signed) * self.unknown_rate)
+            for i in range(unknown):
+                rows.append([f"未知成员{live_index}_{round_index}_{i}", ""])
+            self.rng.shuffle(rows)
+
+            sign_time = sign_round_time(live_index, round_index)
+            ws.append([f"{live.theme} 签到统计"])
+            ws.append(["签到发起时间", "已签到人数"])
+            ws.append([sign_time.strftime("%Y.%m.%d %H:%M"), len(rows)])
+            ws.append(["签到明细"])
+            ws.append(["已签到成员", "所在部门"])
+            for row in rows:
+                ws.append(row)
+        wb.save(path)
+
+    # ---------- 入口 ----------
+
+    def generate(self, excel_dir: Optional[str] = None) -> Dict[str, Any]:
+        """生成数据
+
+        Args:
+            excel_dir: 签到Excel输出目录，None表示不生成Excel
+
+        Returns:
+            Dict[str, Any]: {"live_ids", "livingids", "viewers", "sign_records", "workbooks"}
+        """
+        summary = {"live_ids": [], "livingids": [], "viewers": 0, "sign_records": 0, "workbooks": []}
+        pool = self._build_user_pool()
+        if excel_dir:
+            os.makedirs(excel_dir, exist_ok=True)
+
+        with self.db_manager.get_session() as session:
+            lives = self._create_lives(session)
+            for live_index, live in enumerate(lives):
+                viewers = self._build_viewers(live, live_index, pool)
+                rounds = self._assign_signs(live, live_index, viewers)
+                self._insert(session, LiveViewer, viewers)
+
+                viewer_ids = dict(session.execute(
+                    select(LiveViewer.userid, LiveViewer.id).where(LiveViewer.living_id == live.id)
+                ).fetchall())
+                sign_records = []
+                for round_index, signed in enumerate(rounds):
+                    for viewer in signed:
+                        sign_records.append({
+                            "viewer_id": viewer_ids[viewer["userid"]],
+                            "living_id": live.livingid,
+                            "sign_time": sign_round_time(live_index, round_index),
+                            "sign_type": "导入",
+                            "sign_sequence": round_index + 1,
+                            "sheet_name": f"第{round_index + 1}次签到",
+                            "original_member_name": viewer["name"],
+                            "is_valid": True,
+                            "created_at": BASE_TIME + timedelta(days=live_index),
+                            "updated_at": BASE_TIME + timedelta(days=live_index)
+                        })
+                self._insert(session, LiveSignRecord, sign_records)
+
+                if excel_dir:
+                    path = os.path.join(excel_dir, f"{live.livingid}_签到.xlsx")
+                    self._write_workbook(path, live, live_index, rounds)
+                    summary["workbooks"].append(path)
+
+                summary["live_ids"].append(live.id)
+                summary["livingids"].append(live.livingid)
+                summary["viewers"] += len(viewers)
+                summary["sign_records"] += len(sign_records)
+                logger.info(f"直播[{live.livingid}]: 观众 {len(viewers)} 人, 签到记录 {len(sign_records)} 条")
+
+        return summary
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="合成数据生成工具")
+    parser.add_argument('--db', required=True, help='生成的SQLite数据库路径')
+    parser.add_argument('--excel-dir', default=None, help='签到Excel输出目录，默认与数据库同目录下的 sign_excel')
+    parser.add_argument('--no-excel', action='store_true', help='不生成签到Excel')
+    parser.add_argument('--force', action='store_true', help='数据库已存在时覆盖')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='随机种子')
+    parser.add_argument('--lives', type=int, default=4, help='直播场数')
+    parser.add_argument('--viewers', type=int, default=1000, help='每场直播的观众数')
+    parser.add_argument('--external-ratio', type=float, default=0.3, help='外部联系人占比')
+    parser.add_argument('--departments', type=int, default=20, help='部门数')
+    parser.add_argument('--invite-rate', type=float, default=0.4, help='被邀请观众占比')
+    parser.add_argument('--sign-rounds', type=int, default=3, help='每场直播的签到轮数')
+    parser.add_argument('--sign-rate', type=float, default=0.6, help='每轮签到的观众占比')
+    parser.add_argument('--dirty-rate', type=float, default=0.15, help='Excel中脏名称的占比')
+    return parser.parse_args()
+
+
+def open_database(db_path: str) -> DatabaseManager:
+    """初始化数据库管理器并建表"""
+    db_dir = os.path.dirname(os.path.abspath(db_path))
+    db = DatabaseManager()
+    if getattr(db, "engine", None) is not None:
+        db.engine.dispose()
+    if not db.initialize({"path": os.path.abspath(db_path), "backup_path": os.path.join(db_dir, "backup")}):
+        raise RuntimeError(f"初始化数据库失败: {db_path}")
+    db.init_db()
+    return db
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    if os.path.exists(args.db):
+        if not args.force:
+            logger.error(f"数据库已存在: {args.db}，使用 --force 覆盖")
+            return 1
+        os.remove(args.db)
+
+    try:
+        db = open_database(args.db)
+        excel_dir = None
+        if not args.no_excel:
+            excel_dir = args.excel_dir or os.path.join(os.path.dirname(os.path.abspath(args.db)), "sign_excel")
+
+        generator = DatasetGenerator(
+            db,
+            seed=args.seed,
+            lives=args.lives,
+            viewers_per_live=args.viewers,
+            external_ratio=args.external_ratio,
+            departments=args.departments,
+            invite_rate=args.invite_rate,
+            sign_rounds=args.sign_rounds,
+            sign_rate=args.sign_rate,
+            dirty_rate=args.dirty_rate
+        )
+        summary = generator.generate(excel_dir)
+        logger.info(
+            f"生成完成: 直播 {len(summary['live_ids'])} 场, 观众 {summary['viewers']} 人, "
+            f"签到记录 {summary['sign_records']} 条, Excel {len(summary['workbooks'])} 个"
+        )
+        return 0
+    except Exception as e:
+        logger.error(f"生成数据时发生错误: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())